@@ -41,6 +41,12 @@ if [ "${TESTING:-false}" != "true" ]; then
   echo ">>> Run clustering tool in background"
   python3 manage.py qcluster &
   sleep 0.1
+  echo ">>> Run the LLM run cluster in background"
+  Q_CLUSTER_NAME=llm python3 manage.py qcluster &
+  sleep 0.1
+  echo ">>> Run the export render cluster in background"
+  Q_CLUSTER_NAME=exports python3 manage.py qcluster &
+  sleep 0.1
 else
   echo ">>> Skipping qcluster in TESTING mode"
 fi
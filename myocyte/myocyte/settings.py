@@ -193,20 +193,66 @@ else:
         }
     }
 
+# "db" is the shared cache (a table created by ``createcachetable``). When
+# CACHE_L1_ENABLED is on, "default" layers a bounded in-process LRU over it
+# (see toxtempass.cache_backends.TieredCache); otherwise "default" is the DB
+# cache itself. Tests use the plain DB cache so rollbacks also reset the cache.
+CACHE_L1_ENABLED = (
+    os.getenv("CACHE_L1_ENABLED", "true").lower() in ("true", "1", "yes")
+    and not TESTING
+)
+_DB_CACHE = {
+    "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+    "LOCATION": "django_cache_table",
+    # The queued AssayView writes live only here. Django's default of 300
+    # entries would cull them (in key order) long before they are flushed.
+    "OPTIONS": {
+        "MAX_ENTRIES": int(os.getenv("DB_CACHE_MAX_ENTRIES", "100000")),
+        "CULL_FREQUENCY": 10,
+    },
+}
 CACHES = {
     "default": {
-        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
-        "LOCATION": "django_cache_table",
+        "BACKEND": "toxtempass.cache_backends.TieredCache",
+        "OPTIONS": {
+            "L2_CACHE": "db",
+            "L1_MAX_ENTRIES": int(os.getenv("CACHE_L1_MAX_ENTRIES", "1000")),
+            "L1_TIMEOUT": float(os.getenv("CACHE_L1_TIMEOUT", "30")),
+            "SYNC_INTERVAL": float(os.getenv("CACHE_L1_SYNC_INTERVAL", "1.0")),
+            # Read-mostly derived data only; write-heavy buffers and queues
+            # (assay_view:*) and the circuit breakers, which are updated under
+            # a lock, go straight to the DB cache.
+            "L1_KEY_PREFIXES": ("llm_config:", "llm_registry:", "workspaces:"),
+        },
     }
+    if CACHE_L1_ENABLED
+    else _DB_CACHE,
+    "db": _DB_CACHE,
 }
 
 # Django Q settings
+# Three clusters, so one kind of long task never delays another:
+#
+# * default (below): emails (toxtempass.tasks.send_email_task and
+#   send_beta_signup_notification) and every schedule without a cluster:
+#   flush_assay_views (migration 0037), probe_deployment_health (0044), the LLM
+#   run dispatcher scheduling.dispatch_pending (0045) and sweep_export_jobs
+#   (0047). All of them are short; the slow ones are bounded well below the
+#   timeout (SMTP by EMAIL_TIMEOUT, the probe by
+#   config.llm_health_probe_budget_seconds, the view flush by
+#   config.view_tracking_flush_max_seconds).
+# * "llm": process_llm_async, admitted by toxtempass.scheduling.
+# * "exports": export jobs, including bulk ZIP exports.
+#
+# A task whose result has not come back after "retry" seconds is handed out
+# again, so each cluster's retry stays above its timeout.
+INTERACTIVE_WORKERS = int(os.getenv("INTERACTIVE_WORKERS", "2"))
 Q_CLUSTER = {
     "name": "DjangORM",
     "label": "Toxtempass Task Queue",
-    "workers": 1,
-    "timeout": 6000,  # 10 minutes allowed for each task
-    "retry": 6200,
+    "workers": INTERACTIVE_WORKERS,
+    "timeout": 600,  # 10 minutes allowed for each task
+    "retry": 660,  # one minute past the timeout
     "queue_limit": 50,
     # 'save_limit': 50,  # delete all task when more than n stored.
     "ack_failures": True,
@@ -215,6 +261,28 @@ Q_CLUSTER = {
     "max_attempts": 2,
     "sync": False,
 }
+# ``process_llm_async`` runs on the ``llm`` cluster. toxtempass.scheduling admits
+# at most LLM_RUN_WORKERS runs to it at a time, in per-user round-robin order.
+# Start it with ``Q_CLUSTER_NAME=llm python manage.py qcluster``.
+LLM_RUN_WORKERS = int(os.getenv("LLM_RUN_WORKERS", "1"))
+# Pandoc/LuaLaTeX export jobs run on a separate cluster so renders are bounded
+# independently of the LLM workers. Start it with
+# ``Q_CLUSTER_NAME=exports python manage.py qcluster``.
+EXPORT_RENDER_WORKERS = int(os.getenv("EXPORT_RENDER_WORKERS", "2"))
+Q_CLUSTER["ALT_CLUSTERS"] = {
+    "llm": {
+        "workers": LLM_RUN_WORKERS,
+        "timeout": 6000,  # 100 minutes allowed for one assay
+        "retry": 6200,
+        "max_attempts": 1,
+    },
+    "exports": {
+        "workers": EXPORT_RENDER_WORKERS,
+        "timeout": 900,
+        "retry": 960,
+        "max_attempts": 1,
+    },
+}
 if DEBUG or TESTING:
     Q_CLUSTER["sync"] = True  # Use Django ORM for development
 
@@ -313,6 +381,12 @@ LOGGING = {
             "level": "INFO",
             "propagate": False,
         },
+        # Finished spans when TRACE_EXPORTER=console (see toxtempass.tracing).
+        "tracing": {
+            "handlers": _logger_handlers,
+            "level": "INFO",
+            "propagate": False,
+        },
     },
 }
 
@@ -333,6 +407,8 @@ EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
 EMAIL_HOST = "smtp.gmail.com"
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True
+# Emails are sent by the default task cluster; never let SMTP hang a worker.
+EMAIL_TIMEOUT = 30
 EMAIL_HOST_USER = os.getenv("GMAIL_ADDRESS", "")  # your@gmail.com
 EMAIL_HOST_PASSWORD = os.getenv("GMAIL_APP_PASSWORD", "")  # 16-char app password
 DEFAULT_FROM_EMAIL = f"ToxTempAssistant <{os.environ['GMAIL_ADDRESS']}>"
@@ -171,6 +171,26 @@ urlpatterns += [
         views.export_assay,
         name="export_assay",
     ),
+    path(
+        "assay/<int:assay_id>/answer/export/<str:export_type>/job/",
+        views.start_export_job,
+        name="start_export_job",
+    ),
+    path(
+        "assay/export/bulk/",
+        views.bulk_export_assays,
+        name="bulk_export_assays",
+    ),
+    path(
+        "export/job/<uuid:job_id>/",
+        views.export_job_status,
+        name="export_job_status",
+    ),
+    path(
+        "export/job/<uuid:job_id>/download/",
+        views.export_job_download,
+        name="export_job_download",
+    ),
 ]
 
 # Filter Investigation and Study for the first menu on new.html
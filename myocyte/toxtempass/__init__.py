@@ -209,6 +209,13 @@ class Config:
     })
     # Subset of EXPORT_MAPPING types that require Pandoc (JSON is serialized inline).
     PANDOC_EXPORT_TYPES: Final[frozenset[str]] = frozenset(EXPORT_MAPPING) - {"json"}
+    # Pandoc types that can also be rendered in-process (toxtempass.native_export),
+    # skipping the Pandoc process start. Documents with TeX math still go
+    # through Pandoc. Off under tests so existing export tests exercise Pandoc.
+    NATIVE_EXPORT_TYPES: Final[frozenset[str]] = frozenset({"md", "html", "docx"})
+    native_export_enabled = (
+        os.getenv("NATIVE_EXPORTS", "1") != "0" and not getattr(settings, "TESTING", False)
+    )
     status_error_max_len = 8192
     license_url = "https://www.gnu.org/licenses/agpl-3.0.html"
     version = os.getenv("GIT_TAG", "") + "-beta"
@@ -231,6 +238,127 @@ class Config:
     # A value of 60 000 ms means at most ~1 min of time can be lost per
     # collaborator if the browser is closed unexpectedly.
     time_sync_interval_ms = 60_000
+    # Assay "last viewed" tracking is queued in the cache and bulk-written to
+    # ``AssayView`` by a django-q schedule (every minute, see migration 0037).
+    # One flush stops starting new batches after view_tracking_flush_max_seconds
+    # and leaves the rest to the next run, well inside the default task timeout.
+    view_tracking_cache_timeout_seconds = 24 * 60 * 60
+    view_tracking_flush_batch_size = 500
+    view_tracking_flush_max_seconds = 120
+    # Per-user workspace snapshots (offcanvas + overview). Invalidated by the
+    # workspace mutation views; the timeout only bounds cache growth.
+    workspace_cache_timeout_seconds = 60 * 60
+    # Rendered exports are cached in storage under a digest of the exported
+    # content (see export.export_content_digest). Bump the version whenever the
+    # markdown/YAML/Pandoc pipeline changes so stale artifacts are not served.
+    # Disabled under tests so existing export tests still exercise Pandoc.
+    export_cache_enabled = not getattr(settings, "TESTING", False)
+    export_cache_version = 1
+    export_cache_prefix = "export_cache"
+    # Export jobs render on their own django-q cluster (``ALT_CLUSTERS`` in
+    # settings.py, worker count from EXPORT_RENDER_WORKERS) so Pandoc/LuaLaTeX
+    # builds never wait behind, or block, LLM processing.
+    export_job_cluster = "exports"
+    export_job_group = "exports"
+    export_job_prefix = "export_jobs"
+    # The exports cluster does not retry (max_attempts 1), so a job whose
+    # worker died stays queued or running. The sweep schedule (migration 0047)
+    # fails jobs queued longer than export_job_queue_stale_seconds or running
+    # past the cluster timeout plus a margin, and deletes finished jobs (and
+    # their per-job artifacts) after export_job_retention_days. The browser
+    # stops polling a job after export_job_poll_timeout_seconds.
+    export_job_queue_stale_seconds = 60 * 60
+    export_job_stale_seconds = (
+        getattr(settings, "Q_CLUSTER", {})
+        .get("ALT_CLUSTERS", {})
+        .get("exports", {})
+        .get("timeout", 900)
+        + 5 * 60
+    )
+    export_job_retention_days = 7
+    export_job_poll_timeout_seconds = 30 * 60
+    # A bulk (multi-assay) ZIP export is one export job on the exports cluster.
+    # Each run stores files until bulk_export_job_budget_seconds have passed
+    # and then queues the job again, well inside the cluster timeout.
+    bulk_export_job_budget_seconds = export_job_stale_seconds // 3
+    bulk_export_max_assays = 200
+    # Streamed ZIP downloads read stored files in chunks of this size and keep
+    # at most this many chunks buffered ahead of the response.
+    zip_stream_chunk_size = 1024 * 1024
+    zip_prefetch_max_chunks = 8
+    # Consented uploads are streamed to storage in chunks of this size (the
+    # hash is computed on the same pass), several files at a time.
+    upload_chunk_size = 8 * 1024 * 1024
+    upload_storage_workers = int(os.getenv("UPLOAD_STORAGE_WORKERS", "4"))
+    # Consented uploads are content-addressed: one object per SHA-256 under
+    # this prefix, shared by every FileAsset with that hash.
+    file_blob_prefix = "consent_user_documents/sha256"
+    # Answer version history is served newest first, this many rows per page;
+    # each row's word diff is computed once and stored on the history row.
+    version_history_page_size = 20
+    # LLM health checks probe this many deployments at once, each with several
+    # streamed samples (p50/p95 latency, time to first token). A deployment
+    # that has not answered within the timeout is reported as failed.
+    health_check_workers = int(os.getenv("HEALTH_CHECK_WORKERS", "8"))
+    health_check_samples = 3
+    health_check_timeout_seconds = 60
+    # ``LLMHealthCheck`` keeps this many results per deployment.
+    health_check_history_size = 100
+    # Pipeline tracing (toxtempass.tracing): "" is off, "console" logs each
+    # finished span, "file" appends spans as JSON lines to ``trace_file`` and
+    # "otel" hands them to OpenTelemetry when it is installed.
+    trace_exporter = os.getenv("TRACE_EXPORTER", "").strip().lower()
+    trace_file = os.getenv("TRACE_FILE", "traces.jsonl")
+    # Chat clients share one keep-alive httpx pool per endpoint host
+    # (toxtempass.http_pool); these bound each worker process's pool.
+    llm_http_max_connections = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "32"))
+    llm_http_max_keepalive_connections = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "16"))
+    llm_http_keepalive_expiry_seconds = 60
+    # Circuit breakers per deployment (toxtempass.deployment_health): this many
+    # consecutive failed probes or runs open one, and after the cooldown the
+    # next probe or run decides.  The probe is a django-q schedule (every 5
+    # minutes, added by migration 0044; the interval can be changed in the admin).
+    # The probe runs on the default task cluster; it probes enough deployments
+    # at once to finish within llm_health_probe_budget_seconds, which also keeps
+    # it shorter than the interval between probes.
+    llm_breaker_failure_threshold = 2
+    llm_breaker_cooldown_seconds = 300
+    llm_health_probe_timeout_seconds = 20
+    llm_health_probe_budget_seconds = 240
+    # LLM runs go through toxtempass.scheduling: at most ``llm_run_max_in_flight``
+    # are handed to the ``llm`` cluster at once (default: its worker count), the
+    # rest wait as pending ``LLMRun`` rows and are admitted in per-user
+    # round-robin order.  A user holds at most ``llm_run_max_in_flight_per_user``
+    # slots while anyone else is waiting.  Runs that have not finished after
+    # ``llm_run_stale_seconds`` are failed by the dispatch schedule (migration 0045).
+    llm_run_cluster = "llm"
+    llm_run_group = "llm_runs"
+    llm_run_max_in_flight = int(
+        os.getenv(
+            "LLM_RUN_MAX_IN_FLIGHT",
+            getattr(settings, "Q_CLUSTER", {})
+            .get("ALT_CLUSTERS", {})
+            .get("llm", {})
+            .get("workers", 1),
+        )
+    )
+    llm_run_max_in_flight_per_user = 1
+    llm_run_stale_seconds = 6300
+    # Task timeout on the ``llm`` cluster; answering stops starting new
+    # questions at 90 % of it (see views.process_llm_async).
+    llm_run_timeout_seconds = (
+        getattr(settings, "Q_CLUSTER", {})
+        .get("ALT_CLUSTERS", {})
+        .get("llm", {})
+        .get("timeout", 6000)
+    )
+    # Queue ETAs (toxtempass.run_eta) predict a run's seconds per question from
+    # the ``llm_eta_neighbours`` finished runs on the same deployment with the
+    # closest context size, out of the latest ``llm_eta_history_size``.
+    llm_eta_history_size = 200
+    llm_eta_neighbours = 10
+    llm_eta_min_history = 3
+    llm_eta_default_seconds_per_question = 5.0
     # Tokens reserved for system messages, per-question instructions, and the
     # model's generated answer.  This headroom is subtracted from the model's
     # advertised context-window (``context-window`` tag) to derive the token
@@ -247,13 +375,16 @@ class Config:
     # length, leaving a 5 % buffer to compensate for imprecision in the
     # character-to-token ratio.
     truncation_safety_margin = 0.95
-    max_workers_django_q = settings.Q_CLUSTER[
-        "workers"
-    ]  # 1 worker for django_q, we use threading for parallelism
+    # Workers of the default (interactive) task cluster; LLM runs use the llm
+    # cluster and answer questions in threads (max_workers_threading).
+    max_workers_django_q = settings.Q_CLUSTER["workers"]
     # How often to reload the overview page to check for busy/scheduled assays
     # (in milliseconds)
     reload_busy_interval_seconds = 10000
     reload_busy_max_retries = 30  # e.g., 30 × 10s = 5 minutes
+    # Polling backs off to the queue ETA's ``poll_after_seconds`` (see
+    # toxtempass.scheduling.queue_estimate), but never waits longer than this.
+    reload_busy_max_interval_seconds = 120
     # ROR organization lookup settings
     ror_organization_api_url = "https://api.ror.org/v2/organizations"
     ror_lookup_timeout_seconds = 3
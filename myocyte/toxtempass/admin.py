@@ -1,10 +1,10 @@
 import logging
-from io import BytesIO
 
 from django import forms
 from django.contrib import admin, messages
 from django.db.models import Q
-from django.http import FileResponse, HttpResponseRedirect
+from django.http import HttpResponseRedirect, StreamingHttpResponse
+from django.template.response import TemplateResponse
 from django.urls import path, reverse
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
@@ -16,16 +16,23 @@ from toxtempass.azure_registry import (
     badge_short,
     endpoint_choices,
     get_registry,
+    registry_version,
+    reload_registry,
 )
+from toxtempass.deployment_health import breaker_states
 from toxtempass.filehandling import download_assay_files_as_zip
 from toxtempass.models import (
     Answer,
     Assay,
     AssayCost,
     DemoAssay,
+    ExportJob,
     Feedback,
     Investigation,
+    LLMCallRecord,
     LLMConfig,
+    LLMHealthCheck,
+    LLMRun,
     Person,
     Question,
     QuestionSet,
@@ -88,14 +95,14 @@ class AssayAdmin(admin.ModelAdmin):
 
         assay = queryset.first()
         try:
-            zip_bytes, filename = download_assay_files_as_zip(assay, request.user, request)
+            zip_stream, filename = download_assay_files_as_zip(assay, request.user, request)
 
-            if not zip_bytes:
+            if zip_stream is None:
                 self.message_user(request, "No files found for this assay.", level="warning")
                 return
 
-            # Wrap zip_bytes in BytesIO for FileResponse
-            response = FileResponse(BytesIO(zip_bytes), content_type="application/zip")
+            # The archive is produced while it is being sent.
+            response = StreamingHttpResponse(zip_stream, content_type="application/zip")
             response["Content-Disposition"] = f'attachment; filename="{filename}"'
 
             logger.info(
@@ -210,6 +217,10 @@ def _render_deployments_table(
         reverse("admin:toxtempass_llmconfig_run_health_check", args=[cfg_pk])
         if cfg_pk else None
     )
+    reload_url = (
+        reverse("admin:toxtempass_llmconfig_reload_registry", args=[cfg_pk])
+        if cfg_pk else None
+    )
 
     last_ts_raw = next(
         (r.get("checked_at", "") for r in results.values() if r.get("checked_at")),
@@ -236,10 +247,20 @@ def _render_deployments_table(
         '<a class="button" href="{}" '
         'style="background:#417690;color:#fff;padding:8px 16px;'
         "text-decoration:none;border-radius:3px;font-weight:500\">"
-        "⟳ Run health check now</a>{}</div>",
-        run_url, ts_text,
+        "⟳ Run health check now</a>"
+        '<a class="button" href="{}" style="margin-left:10px;padding:8px 16px"'
+        ' title="Re-read AZURE_E* variables, the registry file and the overrides'
+        ' below in every worker">⟳ Reload registry (v{})</a>{}</div>',
+        run_url, reload_url, registry_version(), ts_text,
     ) if run_url else ""
 
+    try:
+        breakers = breaker_states(
+            f"{ep.index}:{m.tag}" for ep in registry for m in ep.models
+        )
+    except Exception:
+        breakers = {}
+
     retired_but_allowed: list[str] = []
     rows = []
     for ep in registry:
@@ -251,7 +272,9 @@ def _render_deployments_table(
                 status_html = mark_safe('<span style="color:#888">— not tested —</span>')
             elif r.get("ok"):
                 status_html = format_html(
-                    '<span style="color:#198754">✓ {} ms</span>',
+                    '<span style="color:#198754" title="p95 {} ms · TTFT {} ms · '
+                    '{} sample(s)">✓ {} ms</span>',
+                    r.get("p95_ms", "?"), r.get("ttft_ms", "?"), r.get("samples", 1),
                     r.get("latency_ms", "?"),
                 )
             else:
@@ -259,6 +282,14 @@ def _render_deployments_table(
                 status_html = format_html(
                     '<span style="color:#dc3545" title="{}">✗ failed</span>', err,
                 )
+            breaker = breakers.get(key) or {}
+            if breaker.get("state") in ("open", "half_open"):
+                status_html = format_html(
+                    '{}<br><span style="color:#dc3545;font-size:90%" title="{}">'
+                    "⛔ circuit {} ({} failures)</span>",
+                    status_html, breaker.get("last_error", ""),
+                    breaker["state"].replace("_", "-"), breaker.get("failures", 0),
+                )
 
             privacy_html = format_html(
                 '<span style="color:{}">{} {}</span>',
@@ -495,7 +526,8 @@ class LLMConfigForm(forms.ModelForm):
 
     class Meta:
         model = LLMConfig
-        fields = ("default_model", "allowed_models")
+        fields = ("default_model", "allowed_models", "registry_env")
+        widgets = {"registry_env": forms.Textarea(attrs={"rows": 6, "cols": 100})}
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -524,6 +556,7 @@ class LLMConfigAdmin(admin.ModelAdmin):
         "discovered_endpoints_count",
         "pricing_summary",
         "health_summary",
+        "http_pool_summary",
         "updated_at",
     )
     fieldsets = (
@@ -538,6 +571,10 @@ class LLMConfigAdmin(admin.ModelAdmin):
                 "</div>"
             ),
         }),
+        ("Registry overrides", {
+            "classes": ("collapse",),
+            "fields": ("registry_env",),
+        }),
     )
 
     # ── URL + button for the health check ─────────────────────────────────────
@@ -550,18 +587,50 @@ class LLMConfigAdmin(admin.ModelAdmin):
                 self.admin_site.admin_view(self.run_health_check_view),
                 name="toxtempass_llmconfig_run_health_check",
             ),
+            path(
+                "<int:object_id>/reload-registry/",
+                self.admin_site.admin_view(self.reload_registry_view),
+                name="toxtempass_llmconfig_reload_registry",
+            ),
         ]
         return custom + urls
 
+    def reload_registry_view(self, request, object_id):
+        """Rebuild the model registry here and signal every other worker."""
+        cfg = LLMConfig.load()
+        self._reload_registry(request)
+        return HttpResponseRedirect(
+            reverse("admin:toxtempass_llmconfig_change", args=[cfg.pk])
+        )
+
+    def _reload_registry(self, request):
+        try:
+            change = reload_registry()
+        except Exception as exc:
+            messages.error(request, f"Registry reload failed: {exc}")
+            return
+        summary = ", ".join(
+            f"{label}: {', '.join(sorted(keys))}"
+            for label, keys in (
+                ("added", change.added),
+                ("removed", change.removed),
+                ("changed", change.changed),
+            )
+            if keys
+        )
+        messages.success(
+            request,
+            f"Model registry reloaded (v{change.version}). {summary or 'No changes.'}",
+        )
+
     def run_health_check_view(self, request, object_id):
         """Trigger a live smoke test and persist results to LLMConfig."""
-        from toxtempass.llm import run_health_check
+        from toxtempass.health_check import run_health_check, save_health_check
 
         cfg = LLMConfig.load()
         try:
             results = run_health_check()
-            cfg.last_health_check = results
-            cfg.save()
+            save_health_check(results)
             ok = sum(1 for r in results.values() if r.get("ok"))
             total = len(results)
             level = messages.SUCCESS if ok == total else messages.WARNING
@@ -642,6 +711,25 @@ class LLMConfigAdmin(admin.ModelAdmin):
         )
     health_summary.short_description = "Last health check"
 
+    def http_pool_summary(self, obj):
+        """Connection reuse of the shared LLM HTTP pools (this web process)."""
+        from toxtempass.http_pool import pool_stats
+
+        stats = pool_stats()
+        requests = sum(s["requests"] for s in stats.values())
+        if not requests:
+            return "—"
+        opened = sum(s["connections_opened"] for s in stats.values())
+        detail = "; ".join(
+            f"{host}: {s['requests']} requests, {s['connections_opened']} connections"
+            for host, s in stats.items()
+        )
+        return format_html(
+            '<span title="{}">{}% reused ({} requests, {} connections)</span>',
+            detail, round(100 * (requests - opened) / requests), requests, opened,
+        )
+    http_pool_summary.short_description = "HTTP reuse"
+
     def deployments_panel(self, obj):
         """Read-only view of the panel (used before the instance exists).
 
@@ -679,6 +767,105 @@ class LLMConfigAdmin(admin.ModelAdmin):
         obj.allowed_models = [v for v in post.getlist("allowed_models") if v]
         obj.updated_by = request.user
         super().save_model(request, obj, form, change)
+        if "registry_env" in form.changed_data:
+            self._reload_registry(request)
+
+
+@admin.register(LLMHealthCheck)
+class LLMHealthCheckAdmin(admin.ModelAdmin):
+    """Read-only rolling history of deployment health checks."""
+
+    list_display = (
+        "deployment",
+        "model_id",
+        "ok",
+        "p50_ms",
+        "p95_ms",
+        "ttft_ms",
+        "samples",
+        "checked_at",
+    )
+    list_filter = ("ok", "deployment")
+    search_fields = ("deployment", "model_id", "error")
+    ordering = ("-checked_at",)
+    readonly_fields = [field.name for field in LLMHealthCheck._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(LLMCallRecord)
+class LLMCallRecordAdmin(admin.ModelAdmin):
+    """Read-only per-call LLM telemetry with a latency/error-rate dashboard."""
+
+    list_display = (
+        "model_key",
+        "outcome",
+        "latency_ms",
+        "attempts",
+        "queue_wait_ms",
+        "rate_limit_sleep_ms",
+        "input_tokens",
+        "cache_read_tokens",
+        "assay",
+        "started_at",
+    )
+    list_filter = ("outcome", "model_key")
+    search_fields = ("model_key", "model_id", "assay__title", "error")
+    ordering = ("-started_at",)
+    list_select_related = ("assay",)
+    readonly_fields = [field.name for field in LLMCallRecord._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        urls = super().get_urls()
+        custom = [
+            path(
+                "dashboard/",
+                self.admin_site.admin_view(self.dashboard_view),
+                name="toxtempass_llmcallrecord_dashboard",
+            ),
+        ]
+        return custom + urls
+
+    def dashboard_view(self, request):
+        """p50/p95 latency and error rate per deployment, overall and per day."""
+        from toxtempass.llm_telemetry import call_stats
+
+        try:
+            days = max(1, min(int(request.GET.get("days", 14)), 90))
+        except ValueError:
+            days = 14
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "LLM call dashboard",
+            "days": days,
+            "stats": call_stats(days),
+        }
+        return TemplateResponse(
+            request, "toxtempass/admin/llm_call_dashboard.html", context
+        )
+
+    def changelist_view(self, request, extra_context=None):
+        self.message_user(
+            request,
+            format_html(
+                'Latency percentiles and error rates per deployment: '
+                '<a href="{}">open the LLM call dashboard</a>.',
+                reverse("admin:toxtempass_llmcallrecord_dashboard"),
+            ),
+            level=messages.INFO,
+        )
+        return super().changelist_view(request, extra_context)
 
 
 @admin.register(AssayCost)
@@ -737,3 +924,72 @@ class AssayCostAdmin(admin.ModelAdmin):
             return mark_safe('<span style="color:#888">—</span>')
         return format_html('<b>{sym}{total}</b>', sym=obj.cost_unit_symbol, total=f"{total:.6f}")
     total_cost_display.short_description = "Total cost"
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    """Read-only view of export jobs; doubles as the per-type render timing log."""
+
+    list_display = (
+        "assay",
+        "export_type",
+        "status",
+        "cache_hit",
+        "render_seconds",
+        "requested_by",
+        "created_at",
+        "finished_at",
+    )
+    list_filter = ("export_type", "status", "cache_hit")
+    search_fields = ("assay__title", "requested_by__email")
+    ordering = ("-created_at",)
+    readonly_fields = [field.name for field in ExportJob._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def changelist_view(self, request, extra_context=None):
+        timings = ExportJob.render_timings()
+        if timings:
+            self.message_user(
+                request,
+                "Render time per type — "
+                + "; ".join(
+                    f"{export_type}: avg {row['avg_seconds']}s, "
+                    f"max {row['max_seconds']}s over {row['count']}"
+                    for export_type, row in timings.items()
+                ),
+                level=messages.INFO,
+            )
+        return super().changelist_view(request, extra_context)
+
+
+@admin.register(LLMRun)
+class LLMRunAdmin(admin.ModelAdmin):
+    """Read-only view of the LLM run queue (see toxtempass.scheduling)."""
+
+    list_display = (
+        "assay",
+        "status",
+        "requested_by",
+        "model_key",
+        "question_count",
+        "created_at",
+        "started_at",
+        "run_seconds",
+    )
+    list_filter = ("status", "model_key")
+    search_fields = ("assay__title", "requested_by__email")
+    ordering = ("-created_at",)
+    readonly_fields = [f.name for f in LLMRun._meta.fields if f.name != "payload"]
+    exclude = ("payload",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
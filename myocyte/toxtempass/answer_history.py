@@ -0,0 +1,188 @@
+"""Precomputed word diffs for the answer version history.
+
+Every historical ``Answer`` row carries a change summary (see
+:class:`~toxtempass.models.AnswerVersionDiff`): the fields it changed against
+the previous row and, when ``answer_text`` changed, a compact word diff.  The
+summary is filled in as the row is created (``pre_create_historical_record``
+in ``signals.py``); rows written before that existed are backfilled once per
+answer by :func:`ensure_version_diffs`.  :func:`version_history_page` then
+serves the history newest first with keyset pagination, so opening the modal
+costs the same however long the history is.
+
+The word diff is a list of opcodes against the row's own ``answer_text``::
+
+    [["=", 3], ["-", ["old", "words"]], ["+", 2]]
+
+``"="``/``"+"`` consume that many words of the new text (kept/inserted), and
+``"-"`` carries the removed words, which only exist in the previous version.
+"""
+
+from __future__ import annotations
+
+import re
+from difflib import SequenceMatcher
+
+from django.contrib.humanize.templatetags.humanize import naturaltime
+from django.utils.html import escape, linebreaks
+from django.utils.safestring import SafeString, mark_safe
+
+from toxtempass import config
+from toxtempass.models import Answer
+
+HistoricalAnswer = Answer.history.model
+
+_WORDS = re.compile(r"\S+|\n")
+
+
+def split_words(text: str) -> list[str]:
+    """Split *text* into words, keeping line breaks as their own tokens."""
+    return _WORDS.findall(text or "")
+
+
+def word_diff_ops(old_text: str, new_text: str) -> list[list]:
+    """Return the compact word diff turning *old_text* into *new_text*."""
+    old, new = split_words(old_text), split_words(new_text)
+    ops: list[list] = []
+    matcher = SequenceMatcher(None, old, new, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag in ("delete", "replace"):
+            ops.append(["-", old[i1:i2]])
+        if tag in ("insert", "replace"):
+            ops.append(["+", j2 - j1])
+        elif tag == "equal":
+            ops.append(["=", j2 - j1])
+    return ops
+
+
+def render_word_diff(ops: list[list], new_text: str) -> SafeString:
+    """Render *ops* against *new_text* as HTML (removed words struck through)."""
+    words = iter(split_words(new_text))
+    parts: list[str] = []
+    for tag, arg in ops:
+        if tag == "-":
+            parts.extend(
+                '<span style="color: red; text-decoration: line-through;">'
+                f"{escape(word)}</span>"
+                for word in arg
+            )
+        elif tag == "+":
+            parts.extend(
+                f'<span style="color: green;">{escape(next(words))}</span>'
+                for _ in range(arg)
+            )
+        else:
+            parts.extend(escape(next(words)) for _ in range(arg))
+    return mark_safe(" ".join(parts))  # noqa: S308 - every word is escaped
+
+
+def compute_version_diff(
+    record: HistoricalAnswer, previous: HistoricalAnswer | None
+) -> None:
+    """Fill in the change summary of *record* against *previous* (unsaved)."""
+    changed = record.diff_against(previous).changed_fields if previous else []
+    record.changed_fields = changed
+    record.diff_visible = bool(set(changed) - {"accepted"})
+    record.answer_text_ops = (
+        word_diff_ops(previous.answer_text, record.answer_text)
+        if "answer_text" in changed
+        else None
+    )
+    record.diff_computed = True
+
+
+def record_version_diff(history_instance: HistoricalAnswer) -> None:
+    """Summarize a history row that is about to be saved against its predecessor."""
+    previous = (
+        HistoricalAnswer.objects.filter(id=history_instance.id)
+        .order_by("-history_date", "-history_id")
+        .first()
+    )
+    compute_version_diff(history_instance, previous)
+
+
+def ensure_version_diffs(answer_id: int) -> int:
+    """Backfill change summaries for *answer_id*'s legacy history rows.
+
+    Returns:
+        Number of rows updated (0 once every row has been summarized).
+
+    """
+    if not HistoricalAnswer.objects.filter(id=answer_id, diff_computed=False).exists():
+        return 0
+    rows = list(
+        HistoricalAnswer.objects.filter(id=answer_id).order_by(
+            "history_date", "history_id"
+        )
+    )
+    stale = []
+    for previous, record in zip([None, *rows], rows):
+        if not record.diff_computed:
+            compute_version_diff(record, previous)
+            stale.append(record)
+    HistoricalAnswer.objects.bulk_update(
+        stale, ["diff_computed", "diff_visible", "changed_fields", "answer_text_ops"]
+    )
+    return len(stale)
+
+
+def version_entry(record: HistoricalAnswer) -> dict:
+    """Template context for one row of the version history table."""
+    changed = record.changed_fields or []
+    return {
+        "version": record,
+        "history_date": naturaltime(record.history_date),
+        "answer_text_changes_html": (
+            render_word_diff(record.answer_text_ops, record.answer_text)
+            if "answer_text" in changed and record.answer_text_ops is not None
+            else None
+        ),
+        "answer_documents": (
+            ", ".join(record.answer_documents or [])
+            if "answer_documents" in changed
+            else None
+        ),
+    }
+
+
+def original_version_entry(answer: Answer) -> dict:
+    """Entry for an answer whose history has no visible change yet."""
+    latest = (
+        HistoricalAnswer.objects.filter(id=answer.pk)
+        .select_related("history_user")
+        .order_by("-history_date", "-history_id")
+        .first()
+    )
+    return {
+        "version": latest,
+        "history_date": naturaltime(latest.history_date) if latest else "Original",
+        "answer_text_changes_html": linebreaks(answer.answer_text or "", autoescape=True),
+        "answer_documents": ", ".join(answer.answer_documents or []),
+    }
+
+
+def version_history_page(
+    answer: Answer, before: int | None = None, page_size: int | None = None
+) -> tuple[list[dict], int | None]:
+    """Return one page of *answer*'s visible versions, newest first.
+
+    Args:
+        answer: The answer whose history is shown.
+        before: Keyset cursor; only versions with a smaller ``history_id`` are
+            returned.
+        page_size: Rows per page (default ``config.version_history_page_size``).
+
+    Returns:
+        The page's table entries and the cursor for the next page (``None``
+        on the last page).
+
+    """
+    page_size = page_size or config.version_history_page_size
+    ensure_version_diffs(answer.pk)
+    rows = HistoricalAnswer.objects.filter(id=answer.pk, diff_visible=True)
+    if before is not None:
+        rows = rows.filter(history_id__lt=before)
+    rows = list(
+        rows.select_related("history_user").order_by("-history_id")[: page_size + 1]
+    )
+    next_before = rows[page_size - 1].history_id if len(rows) > page_size else None
+    return [version_entry(record) for record in rows[:page_size]], next_before
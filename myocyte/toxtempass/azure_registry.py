@@ -25,9 +25,28 @@ Example .env block::
     AZURE_E1_DEPLOY_GPT4O=gpt-4o-deployment
     AZURE_E1_MODEL_GPT4O=gpt-4o
 
+Other sources
+=============
+The same ``KEY=VALUE`` lines may also come from a file named by
+``AZURE_REGISTRY_FILE`` and from ``LLMConfig.registry_env`` (edited in the
+admin).  Later sources win: env < file < DB.  An empty value removes a
+variable, e.g. ``AZURE_E1_DEPLOY_GPT4O=`` retires that deployment.  API keys
+(``*_KEY``) are ignored in the DB source; keep them in the env or the file.
+
+Reloading
+=========
+``get_registry()`` serves an immutable :class:`RegistrySnapshot`.
+``reload_registry()`` rebuilds it from the sources, swaps it in atomically and
+bumps a version counter in the shared cache; other processes notice the new
+version on their next lookup and rebuild too.  Listeners registered with
+``on_registry_change()`` (the chat-client cache in ``toxtempass.llm``) are told
+which deployments were added, removed or changed, so only those are evicted.
+Runs that already hold a client keep using it.
+
 The module exposes:
-    ``build_registry()``  – returns a list of ``EndpointEntry`` dicts
-    ``get_registry()``    – cached version of the above
+    ``build_registry()``   – returns a list of ``EndpointEntry`` dicts
+    ``get_registry()``     – the endpoints of the current snapshot
+    ``reload_registry()``  – rebuild, swap and publish a new version
 """
 
 from __future__ import annotations
@@ -35,9 +54,15 @@ from __future__ import annotations
 import logging
 import os
 import re
+import threading
+import time
+from collections.abc import Callable, Mapping
 from dataclasses import dataclass, field
 from datetime import date
-from functools import lru_cache
+from pathlib import Path
+
+from django.apps import apps
+from django.db import DatabaseError
 
 logger = logging.getLogger("llm")
 
@@ -47,6 +72,10 @@ _ENDPOINT_RE = re.compile(r"^AZURE_E(\d+)_ENDPOINT$")
 _DEPLOY_RE = re.compile(r"^AZURE_E(\d+)_DEPLOY_(.+)$")
 _MODEL_RE = re.compile(r"^AZURE_E(\d+)_MODEL_(.+)$")
 _TAGS_RE = re.compile(r"^AZURE_E(\d+)_TAGS_(.+)$")
+# Optional file with extra ``KEY=VALUE`` lines in the same convention.
+_REGISTRY_FILE_ENV = "AZURE_REGISTRY_FILE"
+# Shared-cache counter that tells every process to rebuild its registry.
+_REGISTRY_VERSION_KEY = "llm_registry:version"
 
 
 def _parse_tags(raw: str) -> dict[str, str]:
@@ -370,15 +399,72 @@ def _format_model_label(m: "ModelEntry") -> str:
     return " · ".join(p for p in parts if p)
 
 
-def build_registry() -> list[EndpointEntry]:
-    """Scan ``os.environ`` and return a sorted list of discovered endpoints."""
+def parse_env_lines(text: str) -> dict[str, str]:
+    """Parse ``KEY=VALUE`` lines; blank lines and ``#`` comments are skipped."""
+    out: dict[str, str] = {}
+    for line in (text or "").splitlines():
+        line = line.strip()
+        if not line or line.startswith("#") or "=" not in line:
+            continue
+        key, _, value = line.removeprefix("export ").partition("=")
+        value = value.strip()
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in "'\"":
+            value = value[1:-1]
+        out[key.strip()] = value
+    return out
+
+
+def is_secret_registry_key(key: str) -> bool:
+    """Return whether *key* holds a secret (``AZURE_E{n}_KEY``).
+
+    Secrets only come from the environment or the registry file, never from
+    ``LLMConfig.registry_env``, which is stored in plain text in the database.
+    """
+    return key.endswith("_KEY")
+
+
+def _db_registry_lines() -> dict[str, str]:
+    if not apps.ready:
+        return {}
+    try:
+        from toxtempass.models import LLMConfig
+
+        lines = parse_env_lines(LLMConfig.load().registry_env)
+    except (DatabaseError, LookupError):  # DB unavailable or not migrated yet
+        logger.warning("Registry overrides from LLMConfig unavailable", exc_info=True)
+        return {}
+    secrets = sorted(key for key in lines if is_secret_registry_key(key))
+    if secrets:
+        logger.warning(
+            "Ignoring API keys in LLMConfig.registry_env: %s", ", ".join(secrets)
+        )
+    return {key: value for key, value in lines.items() if key not in secrets}
+
+
+def registry_environ() -> dict[str, str]:
+    """Merge env vars, the optional registry file and the DB overrides."""
+    environ = dict(os.environ)
+    path = os.environ.get(_REGISTRY_FILE_ENV, "").strip()
+    if path:
+        try:
+            environ.update(parse_env_lines(Path(path).read_text()))
+        except OSError as exc:
+            logger.warning("Cannot read %s=%s: %s", _REGISTRY_FILE_ENV, path, exc)
+    environ.update(_db_registry_lines())
+    return {key: value for key, value in environ.items() if value != ""}
+
+
+def build_registry(environ: Mapping[str, str] | None = None) -> list[EndpointEntry]:
+    """Scan *environ* (default: all sources) and return the sorted endpoints."""
+    if environ is None:
+        environ = registry_environ()
     # 1. Find all endpoint indices
     endpoints: dict[int, EndpointEntry] = {}
-    for key, value in os.environ.items():
+    for key, value in environ.items():
         m = _ENDPOINT_RE.match(key)
         if m:
             idx = int(m.group(1))
-            api_key = os.environ.get(f"AZURE_E{idx}_KEY", "")
+            api_key = environ.get(f"AZURE_E{idx}_KEY", "")
             if not api_key:
                 logger.warning("AZURE_E%d_KEY is missing – skipping endpoint", idx)
                 continue
@@ -386,7 +472,7 @@ def build_registry() -> list[EndpointEntry]:
                 index=idx,
                 endpoint=value,
                 api_key=api_key,
-                api_version=os.environ.get(f"AZURE_E{idx}_API_VERSION", ""),
+                api_version=environ.get(f"AZURE_E{idx}_API_VERSION", ""),
             )
 
     # 2. Attach deploy/model pairs (and optional tags)
@@ -394,7 +480,7 @@ def build_registry() -> list[EndpointEntry]:
     model_map: dict[tuple[int, str], str] = {}
     tags_map: dict[tuple[int, str], dict[str, str]] = {}
 
-    for key, value in os.environ.items():
+    for key, value in environ.items():
         dm = _DEPLOY_RE.match(key)
         if dm:
             deploy_map[(int(dm.group(1)), dm.group(2).upper())] = value
@@ -449,29 +535,196 @@ def build_registry() -> list[EndpointEntry]:
     return result
 
 
-@lru_cache(maxsize=1)
+def _deployment_signature(ep: EndpointEntry, m: ModelEntry) -> tuple:
+    return (
+        ep.endpoint,
+        ep.api_key,
+        ep.api_version,
+        m.deployment_name,
+        m.model_id,
+        tuple(sorted(m.tags.items())),
+    )
+
+
+@dataclass(frozen=True)
+class RegistrySnapshot:
+    """One immutable version of the registry with its lookup indexes."""
+
+    version: int
+    endpoints: list[EndpointEntry]
+    by_index: dict[int, EndpointEntry]
+    by_key: dict[str, tuple[EndpointEntry, ModelEntry]]  # "idx:tag"
+    by_model_id: dict[str, list[tuple[EndpointEntry, ModelEntry]]]
+
+    @classmethod
+    def build(cls, endpoints: list[EndpointEntry], version: int) -> RegistrySnapshot:
+        by_key: dict[str, tuple[EndpointEntry, ModelEntry]] = {}
+        by_model_id: dict[str, list[tuple[EndpointEntry, ModelEntry]]] = {}
+        for ep in endpoints:
+            for m in ep.models:
+                by_key[f"{ep.index}:{m.tag}"] = (ep, m)
+                by_model_id.setdefault(m.model_id, []).append((ep, m))
+        return cls(
+            version=version,
+            endpoints=endpoints,
+            by_index={ep.index: ep for ep in endpoints},
+            by_key=by_key,
+            by_model_id=by_model_id,
+        )
+
+    def signatures(self) -> dict[str, tuple]:
+        """Everything a built chat client depends on, per ``"idx:tag"``."""
+        return {key: _deployment_signature(ep, m) for key, (ep, m) in self.by_key.items()}
+
+
+@dataclass(frozen=True)
+class RegistryChange:
+    """Deployments (``"idx:tag"``) that differ between two registry versions."""
+
+    version: int
+    added: frozenset[str] = frozenset()
+    removed: frozenset[str] = frozenset()
+    changed: frozenset[str] = frozenset()
+
+    @property
+    def affected(self) -> frozenset[str]:
+        """Deployments whose cached clients are stale."""
+        return self.removed | self.changed
+
+    @classmethod
+    def between(
+        cls, old: RegistrySnapshot | None, new: RegistrySnapshot
+    ) -> RegistryChange:
+        before = old.signatures() if old else {}
+        after = new.signatures()
+        return cls(
+            version=new.version,
+            added=frozenset(after.keys() - before.keys()),
+            removed=frozenset(before.keys() - after.keys()),
+            changed=frozenset(
+                k for k in after.keys() & before.keys() if after[k] != before[k]
+            ),
+        )
+
+
+_snapshot: RegistrySnapshot | None = None
+# Shared-cache version the current snapshot was built for (None = not synced).
+_synced_version: int | None = None
+_reload_lock = threading.RLock()
+_listeners: list[Callable[[RegistryChange], None]] = []
+
+
+def _shared_version(*, bump: bool = False) -> int | None:
+    """Read (or increment) the cross-process registry version.
+
+    Mirrors ``LLMConfig.current_version``. Returns ``None`` until Django's apps
+    are ready or when the cache is unreachable; the snapshot is then only
+    rebuilt by explicit local reloads.
+    """
+    if not apps.ready:
+        return None
+    try:
+        from django.core.cache import cache
+
+        if bump:
+            try:
+                return cache.incr(_REGISTRY_VERSION_KEY)
+            except ValueError:
+                pass
+        version = cache.get(_REGISTRY_VERSION_KEY)
+        if version is None:
+            cache.add(_REGISTRY_VERSION_KEY, time.time_ns(), None)
+            version = cache.get(_REGISTRY_VERSION_KEY)
+        return version
+    except Exception:
+        logger.debug("Registry version unavailable", exc_info=True)
+        return None
+
+
+def _swap(endpoints: list[EndpointEntry], synced_version: int | None) -> RegistryChange:
+    """Install a new snapshot; callers hold ``_reload_lock``."""
+    global _snapshot, _synced_version
+    old = _snapshot
+    new = RegistrySnapshot.build(endpoints, (old.version + 1) if old else 1)
+    change = RegistryChange.between(old, new)
+    # A single reference assignment: readers see the old or the new snapshot.
+    _snapshot = new
+    _synced_version = synced_version
+    if old is not None:
+        logger.info(
+            "Azure registry v%d: %d added, %d removed, %d changed",
+            new.version, len(change.added), len(change.removed), len(change.changed),
+        )
+        for listener in list(_listeners):
+            try:
+                listener(change)
+            except Exception:
+                logger.exception("Registry change listener %r failed", listener)
+    return change
+
+
+def current_registry() -> RegistrySnapshot:
+    """Return the current snapshot, rebuilding it if another process reloaded."""
+    shared = _shared_version()
+    snapshot = _snapshot
+    if snapshot is None or (shared is not None and shared != _synced_version):
+        with _reload_lock:
+            if _snapshot is None or (shared is not None and shared != _synced_version):
+                _swap(build_registry(), shared)
+            snapshot = _snapshot
+    return snapshot
+
+
+def reload_registry(
+    endpoints: list[EndpointEntry] | None = None, *, publish: bool = True
+) -> RegistryChange:
+    """Rebuild the registry from its sources and swap it in.
+
+    With *publish* the shared version is bumped so every other web and queue
+    worker rebuilds on its next lookup, and the ``LLMConfig`` derived caches
+    (choice lists, ...) are invalidated.  *endpoints* installs a given list
+    instead of reading the sources; it is meant for tests and is never
+    published.
+    """
+    with _reload_lock:
+        if endpoints is not None:
+            return _swap(endpoints, _synced_version)
+        synced = _shared_version(bump=publish)
+        change = _swap(build_registry(), synced)
+    if publish:
+        try:
+            from toxtempass.models import LLMConfig
+
+            LLMConfig.bump_version()
+        except Exception:
+            logger.debug("Could not invalidate LLMConfig caches", exc_info=True)
+    return change
+
+
+def registry_version() -> int:
+    """Process-local version of the registry (increments on every swap)."""
+    return current_registry().version
+
+
+def on_registry_change(listener: Callable[[RegistryChange], None]) -> None:
+    """Call *listener* with a :class:`RegistryChange` after every swap."""
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
 def get_registry() -> list[EndpointEntry]:
-    """Return the cached result of ``build_registry()``."""
-    return build_registry()
+    """Return the endpoints of the current registry snapshot."""
+    return current_registry().endpoints
 
 
 def get_endpoint(index: int) -> EndpointEntry | None:
     """Look up an endpoint by its index number."""
-    for ep in get_registry():
-        if ep.index == index:
-            return ep
-    return None
+    return current_registry().by_index.get(index)
 
 
 def get_model(endpoint_index: int, tag: str) -> tuple[EndpointEntry, ModelEntry] | None:
     """Look up a specific model on a specific endpoint."""
-    ep = get_endpoint(endpoint_index)
-    if ep is None:
-        return None
-    for m in ep.models:
-        if m.tag == tag:
-            return ep, m
-    return None
+    return current_registry().by_key.get(f"{endpoint_index}:{tag}")
 
 
 def env_default_key() -> str | None:
@@ -505,11 +758,7 @@ def find_by_model_id(
     ``prefer_residency`` (default ``"eu"``), then falls back to the first match.
     Returns ``None`` if no deployment hosts the requested model id.
     """
-    matches: list[tuple[EndpointEntry, ModelEntry]] = []
-    for ep in get_registry():
-        for m in ep.models:
-            if m.model_id == model_id:
-                matches.append((ep, m))
+    matches = current_registry().by_model_id.get(model_id, [])
     if not matches:
         return None
     # Prefer the requested residency when available
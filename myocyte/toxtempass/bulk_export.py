@@ -0,0 +1,235 @@
+"""Export many assays in several formats as one ZIP archive, built as an export job.
+
+:func:`enqueue_bulk_export_job` records an :class:`~toxtempass.models.ExportJob`
+without an assay (``export_type`` ``"zip"``) whose ``params`` hold the selected
+assay ids and formats, and queues :func:`run_bulk_export_job` on the
+``exports`` cluster. Bulk renders therefore share ``EXPORT_RENDER_WORKERS``
+with single exports, no web worker waits for them, and the client polls and
+downloads the archive exactly like a single export.
+
+Pandoc files go through the export cache (an unchanged assay is not rendered
+again) and JSON is built inline; every file is recorded in ``params`` as soon
+as it is stored, and after ``config.bulk_export_job_budget_seconds`` the job
+queues itself again to continue, so no task runs into the cluster timeout.
+Once every file is there the archive is written to storage and the job's own
+parts are deleted. Files that could not be exported are listed in a final
+``export_errors.txt`` member instead of failing the archive.
+"""
+
+import json
+import logging
+import subprocess
+import tempfile
+import time
+import uuid
+from collections.abc import Iterable, Iterator
+
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from django.utils.text import slugify
+
+from toxtempass import config
+from toxtempass.export import (
+    PANDOC_EXPORT_TYPES,
+    export_file_name,
+    generate_json_from_assay,
+    render_export_artifact,
+)
+from toxtempass.export_jobs import BULK_EXPORT_TYPE, queue_export_job
+from toxtempass.filehandling import iter_storage_objects
+from toxtempass.models import Assay, ExportJob, Person
+from toxtempass.utilities import log_processing_event
+from toxtempass.zip_stream import ZipEntry, stream_zip
+
+logger = logging.getLogger(__name__)
+
+ERRORS_FILE_NAME = "export_errors.txt"
+
+_RUN_FUNC = "toxtempass.bulk_export.run_bulk_export_job"
+_FAILED_MESSAGE = (
+    "Bulk export failed (ref {corr_id}). Please contact support if the issue "
+    "persists."
+)
+
+
+def bulk_export_member_name(assay: Assay, export_type: str) -> str:
+    """Return the archive path of *assay*'s *export_type* file.
+
+    Each assay gets its own folder, suffixed with its id so that assays with
+    the same title do not collide.
+    """
+    folder = f"{slugify(assay.title) or 'assay'}-{assay.id}"
+    return f"{folder}/{export_file_name(assay, export_type)}"
+
+
+def _record_failure(assay: Assay, export_type: str, exc: Exception) -> str:
+    corr_id = uuid.uuid4().hex[:8]
+    if isinstance(exc, subprocess.CalledProcessError):
+        logger.exception(
+            "Pandoc conversion failed [corr=%s] for assay %s", corr_id, assay.id,
+            exc_info=exc,
+        )
+    else:
+        logger.exception(
+            "Unexpected export error [corr=%s] for assay %s", corr_id, assay.id,
+            exc_info=exc,
+        )
+    log_processing_event(assay, f"[bulk {corr_id}] {type(exc).__name__}: {exc}")
+    assay.save()
+    return f"{bulk_export_member_name(assay, export_type)}: export failed (ref {corr_id})"
+
+
+def _parts_prefix(job: ExportJob) -> str:
+    return f"{config.export_job_prefix}/{job.id}/"
+
+
+def enqueue_bulk_export_job(
+    assays: Iterable[Assay],
+    export_types: Iterable[str],
+    user: Person,
+    file_name: str,
+) -> ExportJob:
+    """Create a bulk export job for *assays* in *export_types* and queue it.
+
+    If the job cannot be queued it is returned as ``failed``.
+    """
+    job = ExportJob.objects.create(
+        requested_by=user,
+        export_type=BULK_EXPORT_TYPE,
+        file_name=file_name,
+        params={
+            "assay_ids": [assay.id for assay in assays],
+            "export_types": list(dict.fromkeys(export_types)),
+            "done": [],
+            "parts": {},
+            "errors": [],
+        },
+    )
+    return queue_export_job(job, _RUN_FUNC)
+
+
+def _store_part(job: ExportJob, assay: Assay, export_type: str) -> str:
+    """Store *assay*'s *export_type* file for *job* and return its storage key.
+
+    Pandoc files already in the export cache are used in place.
+    """
+    if export_type in PANDOC_EXPORT_TYPES:
+        artifact = render_export_artifact(None, assay, export_type, use_cache=True)
+        if artifact.cache_key and default_storage.exists(artifact.cache_key):
+            return artifact.cache_key
+        content = artifact.content
+    else:
+        content = json.dumps(generate_json_from_assay(assay), indent=4).encode("utf-8")
+    return default_storage.save(
+        _parts_prefix(job) + bulk_export_member_name(assay, export_type),
+        ContentFile(content),
+    )
+
+
+def run_bulk_export_job(job_id: str) -> str | None:
+    """Render the files of bulk export *job_id*; runs on the exports cluster.
+
+    Files recorded by an earlier run are skipped. When the time budget runs
+    out the job is queued again; otherwise the archive is written.
+
+    Returns:
+        The storage key of the archive, or ``None`` when the job continues
+        later, failed or no longer exists.
+
+    """
+    try:
+        job = ExportJob.objects.get(pk=job_id, export_type=BULK_EXPORT_TYPE)
+    except ExportJob.DoesNotExist:
+        logger.info("Bulk export job %s was deleted before it ran.", job_id)
+        return None
+    if job.is_finished:
+        # Failed by the sweep while it waited in the queue.
+        return None
+
+    job.status = ExportJob.Status.RUNNING
+    job.started_at = timezone.now()
+    job.save(update_fields=["status", "started_at"])
+
+    params = job.params
+    done = set(params["done"])
+    deadline = time.monotonic() + config.bulk_export_job_budget_seconds
+    stored = 0
+    # Assays deleted since the export was requested are left out.
+    assays = Assay.objects.in_bulk(params["assay_ids"])
+    for assay_id in params["assay_ids"]:
+        assay = assays.get(assay_id)
+        if assay is None:
+            continue
+        for export_type in params["export_types"]:
+            item = f"{assay_id}/{export_type}"
+            if item in done:
+                continue
+            if stored and time.monotonic() >= deadline:
+                job.status = ExportJob.Status.QUEUED
+                job.save(update_fields=["status"])
+                logger.info(
+                    "Bulk export job %s continues after %d file(s)", job.id, len(done)
+                )
+                queue_export_job(job, _RUN_FUNC)
+                return None
+            member = bulk_export_member_name(assay, export_type)
+            try:
+                params["parts"][member] = _store_part(job, assay, export_type)
+            except Exception as exc:
+                params["errors"].append(_record_failure(assay, export_type, exc))
+            params["done"].append(item)
+            done.add(item)
+            stored += 1
+            job.save(update_fields=["params"])
+
+    try:
+        artifact_key = _write_archive(job)
+    except Exception:
+        corr_id = job.id.hex[:8]
+        logger.exception("Could not write bulk export archive [corr=%s]", corr_id)
+        job.status = ExportJob.Status.FAILED
+        job.error = _FAILED_MESSAGE.format(corr_id=corr_id)
+        job.finished_at = timezone.now()
+        job.save(update_fields=["status", "error", "finished_at"])
+        return None
+
+    _delete_parts(job)
+    params["parts"] = {}
+    job.status = ExportJob.Status.DONE
+    job.artifact_key = artifact_key
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "artifact_key", "params", "finished_at"])
+    return artifact_key
+
+
+def _write_archive(job: ExportJob) -> str:
+    """Zip the stored parts of *job* (and the error list) into its artifact."""
+    parts = job.params["parts"]
+    errors = job.params["errors"]
+
+    def _entries() -> Iterator[ZipEntry]:
+        yield from zip(parts, iter_storage_objects(list(parts.values())))
+        if errors:
+            yield ERRORS_FILE_NAME, ("\n".join(errors) + "\n").encode("utf-8")
+
+    with tempfile.TemporaryFile() as archive:
+        for chunk in stream_zip(_entries()):
+            archive.write(chunk)
+        archive.seek(0)
+        return default_storage.save(
+            f"{config.export_job_prefix}/{job.id}.zip",
+            File(archive, name=job.file_name),
+        )
+
+
+def _delete_parts(job: ExportJob) -> None:
+    prefix = _parts_prefix(job)
+    for key in job.params["parts"].values():
+        if not key.startswith(prefix):
+            continue  # shared export cache artifact
+        try:
+            default_storage.delete(key)
+        except Exception:
+            logger.warning("Could not delete bulk export part %s", key, exc_info=True)
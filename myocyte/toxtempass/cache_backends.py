@@ -0,0 +1,346 @@
+"""Two-tier cache backend: a bounded in-process L1 in front of a shared L2.
+
+Every hit on ``DatabaseCache`` is a SQL round-trip. ``TieredCache`` keeps a
+small LRU with per-entry TTL in each process and delegates to another
+configured cache alias (the existing ``DatabaseCache``) as the shared L2, so
+no Redis/memcached dependency is needed.
+
+Coherence across processes is kept by generation counters stored in L2, one
+per entry of ``L1_KEY_PREFIXES`` (or a single one when every key is cached).
+Writes through this backend bump the counter of the key's prefix; each process
+re-reads the counters at most every ``SYNC_INTERVAL`` seconds and drops only
+the L1 entries under a prefix whose counter has moved. Stale reads from another
+process's write are therefore bounded by ``SYNC_INTERVAL``, and a write under
+one prefix leaves the others cached.
+
+Configure in ``settings.CACHES``::
+
+    "default": {
+        "BACKEND": "toxtempass.cache_backends.TieredCache",
+        "OPTIONS": {
+            "L2_CACHE": "db",            # alias of the shared cache
+            "L1_MAX_ENTRIES": 1000,
+            "L1_TIMEOUT": 30,            # seconds; caps the L1 lifetime
+            "SYNC_INTERVAL": 1.0,        # seconds between generation checks
+            "L1_KEY_PREFIXES": None,     # only cache these keys in L1 (None = all)
+        },
+    }
+
+Keys not matching ``L1_KEY_PREFIXES`` go straight to L2 and do not bump any
+generation, which keeps write-heavy keys (heartbeat buffers, queues) from
+flushing the L1 of every process. ``get_many``, ``set_many`` and
+``delete_many`` reach L2 as one batch call each rather than one per key.
+"""
+
+import logging
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+logger = logging.getLogger(__name__)
+
+_GENERATION_KEY = "tiered_cache:generation:{}"
+
+
+class TieredCache(BaseCache):
+    """In-process LRU+TTL (L1) layered over another cache alias (L2)."""
+
+    def __init__(self, location: str, params: dict[str, object]) -> None:
+        """Read the L1 options; *location* is unused, L2 has its own."""
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self._l2_alias: str = options.get("L2_CACHE", "db")
+        self._l1_max_entries: int = int(options.get("L1_MAX_ENTRIES", 1000))
+        self._l1_timeout: float = float(options.get("L1_TIMEOUT", 30))
+        self._sync_interval: float = float(options.get("SYNC_INTERVAL", 1.0))
+        prefixes = options.get("L1_KEY_PREFIXES")
+        self._l1_prefixes: tuple[str, ...] | None = (
+            tuple(prefixes) if prefixes is not None else None
+        )
+
+        # key -> (pickled value, expires_at monotonic, prefix)
+        self._l1: OrderedDict[str, tuple[bytes, float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        # prefix -> last generation seen; missing until first synced or written.
+        self._generations: dict[str, int | None] = {}
+        self._next_sync = 0.0
+        self._stats = {
+            "l1_hits": 0,
+            "l2_hits": 0,
+            "misses": 0,
+            "l1_evictions": 0,
+            "invalidations": 0,
+        }
+
+    # ── Helpers ───────────────────────────────────────────────────────────────
+
+    @property
+    def l2(self) -> BaseCache:
+        """The shared cache this backend writes through to."""
+        return caches[self._l2_alias]
+
+    def _prefix(self, key: str) -> str | None:
+        """Return the ``L1_KEY_PREFIXES`` entry of *key*; ``None`` if not cached."""
+        if self._l1_prefixes is None:
+            return ""
+        return next((p for p in self._l1_prefixes if key.startswith(p)), None)
+
+    def _l1_key(self, key: str, version: int | None) -> str:
+        return f"{version if version is not None else self.version}:{key}"
+
+    def _drop_prefix(self, prefix: str) -> None:
+        """Drop the L1 entries under *prefix*; call with the lock held."""
+        stale = [k for k, entry in self._l1.items() if entry[2] == prefix]
+        if stale:
+            self._stats["invalidations"] += 1
+        for l1_key in stale:
+            del self._l1[l1_key]
+
+    def _sync_generations(self) -> None:
+        """Drop L1 entries under prefixes another process has written to."""
+        now = time.monotonic()
+        if now < self._next_sync:
+            return
+        prefixes = self._l1_prefixes if self._l1_prefixes is not None else ("",)
+        current = self.l2.get_many([_GENERATION_KEY.format(p) for p in prefixes])
+        with self._lock:
+            self._next_sync = now + self._sync_interval
+            for prefix in prefixes:
+                generation = current.get(_GENERATION_KEY.format(prefix))
+                if (
+                    prefix in self._generations
+                    and generation != self._generations[prefix]
+                ):
+                    self._drop_prefix(prefix)
+                self._generations[prefix] = generation
+
+    def _bump_generation(self, prefix: str) -> None:
+        """Tell other processes that a key under *prefix* changed."""
+        key = _GENERATION_KEY.format(prefix)
+        try:
+            generation = self.l2.incr(key)
+        except ValueError:
+            self.l2.add(key, 1, None)
+            generation = self.l2.get(key)
+        with self._lock:
+            # Our own L1 was updated in place, so keep it — unless another
+            # process bumped the counter too, in which case we missed theirs.
+            # Before the first sync or write, L1 holds only our own writes
+            # under this prefix, so there is nothing we can have missed.
+            if (
+                prefix in self._generations
+                and generation != (self._generations[prefix] or 0) + 1
+            ):
+                self._drop_prefix(prefix)
+            self._generations[prefix] = generation
+
+    def _l1_get(self, l1_key: str) -> tuple[bool, object]:
+        with self._lock:
+            entry = self._l1.get(l1_key)
+            if entry is None:
+                return False, None
+            blob, expires_at, _ = entry
+            if expires_at <= time.monotonic():
+                del self._l1[l1_key]
+                return False, None
+            self._l1.move_to_end(l1_key)
+            self._stats["l1_hits"] += 1
+        return True, pickle.loads(blob)  # noqa: S301 - values we pickled ourselves
+
+    def _l1_set(self, l1_key: str, prefix: str, value: object, timeout: object) -> None:
+        ttl = self._l1_timeout
+        l2_timeout = self.get_backend_timeout(timeout)
+        if l2_timeout is not None:
+            ttl = min(ttl, l2_timeout - time.time())
+        if ttl <= 0:
+            self._l1_delete(l1_key)
+            return
+        blob = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._l1[l1_key] = (blob, time.monotonic() + ttl, prefix)
+            self._l1.move_to_end(l1_key)
+            while len(self._l1) > self._l1_max_entries:
+                self._l1.popitem(last=False)
+                self._stats["l1_evictions"] += 1
+
+    def _l1_delete(self, l1_key: str) -> None:
+        with self._lock:
+            self._l1.pop(l1_key, None)
+
+    # ── BaseCache API ─────────────────────────────────────────────────────────
+
+    def get(self, key: str, default: object = None, version: int | None = None) -> object:
+        """Return *key* from L1, else from L2 (caching it in L1), else *default*."""
+        prefix = self._prefix(key)
+        l1_key = self._l1_key(key, version)
+        if prefix is not None:
+            self._sync_generations()
+            found, value = self._l1_get(l1_key)
+            if found:
+                return value
+
+        sentinel = object()
+        value = self.l2.get(key, sentinel, version=version)
+        with self._lock:
+            self._stats["misses" if value is sentinel else "l2_hits"] += 1
+        if value is sentinel:
+            return default
+        if prefix is not None:
+            self._l1_set(l1_key, prefix, value, DEFAULT_TIMEOUT)
+        return value
+
+    def set(
+        self,
+        key: str,
+        value: object,
+        timeout: object = DEFAULT_TIMEOUT,
+        version: int | None = None,
+    ) -> None:
+        """Write *key* to L2 and this process's L1."""
+        self.l2.set(key, value, timeout, version=version)
+        prefix = self._prefix(key)
+        if prefix is not None:
+            self._l1_set(self._l1_key(key, version), prefix, value, timeout)
+            self._bump_generation(prefix)
+
+    def add(
+        self,
+        key: str,
+        value: object,
+        timeout: object = DEFAULT_TIMEOUT,
+        version: int | None = None,
+    ) -> bool:
+        """Write *key* unless L2 already has it; return whether it was written."""
+        added = self.l2.add(key, value, timeout, version=version)
+        prefix = self._prefix(key)
+        if added and prefix is not None:
+            self._l1_set(self._l1_key(key, version), prefix, value, timeout)
+            self._bump_generation(prefix)
+        return added
+
+    def touch(
+        self, key: str, timeout: object = DEFAULT_TIMEOUT, version: int | None = None
+    ) -> bool:
+        """Set a new expiry on *key*; L1 re-reads it from L2 next time."""
+        touched = self.l2.touch(key, timeout, version=version)
+        if self._prefix(key) is not None:
+            self._l1_delete(self._l1_key(key, version))
+        return touched
+
+    def delete(self, key: str, version: int | None = None) -> bool:
+        """Delete *key* from L2 and L1; return whether L2 had it."""
+        deleted = self.l2.delete(key, version=version)
+        prefix = self._prefix(key)
+        if prefix is not None:
+            self._l1_delete(self._l1_key(key, version))
+            self._bump_generation(prefix)
+        return deleted
+
+    def incr(self, key: str, delta: int = 1, version: int | None = None) -> int:
+        """Add *delta* to *key* in L2 and return the new value."""
+        value = self.l2.incr(key, delta, version=version)
+        prefix = self._prefix(key)
+        if prefix is not None:
+            self._l1_set(self._l1_key(key, version), prefix, value, DEFAULT_TIMEOUT)
+            self._bump_generation(prefix)
+        return value
+
+    def get_many(self, keys: Iterable[str], version: int | None = None) -> dict:
+        """Return the cached *keys*: L1 hits first, the rest in one L2 call."""
+        keys = list(keys)
+        found: dict[str, object] = {}
+        missing: list[str] = []
+        if any(self._prefix(key) is not None for key in keys):
+            self._sync_generations()
+        for key in keys:
+            if self._prefix(key) is not None:
+                hit, value = self._l1_get(self._l1_key(key, version))
+                if hit:
+                    found[key] = value
+                    continue
+            missing.append(key)
+        if not missing:
+            return found
+
+        from_l2 = self.l2.get_many(missing, version=version)
+        with self._lock:
+            self._stats["l2_hits"] += len(from_l2)
+            self._stats["misses"] += len(missing) - len(from_l2)
+        for key, value in from_l2.items():
+            prefix = self._prefix(key)
+            if prefix is not None:
+                self._l1_set(self._l1_key(key, version), prefix, value, DEFAULT_TIMEOUT)
+        found.update(from_l2)
+        return found
+
+    def set_many(
+        self,
+        data: dict[str, object],
+        timeout: object = DEFAULT_TIMEOUT,
+        version: int | None = None,
+    ) -> list[str]:
+        """Write *data* to L2 in one call and to L1; return the keys that failed."""
+        failed = self.l2.set_many(data, timeout, version=version)
+        prefixes = set()
+        for key, value in data.items():
+            prefix = self._prefix(key)
+            if prefix is not None and key not in failed:
+                self._l1_set(self._l1_key(key, version), prefix, value, timeout)
+                prefixes.add(prefix)
+        for prefix in prefixes:
+            self._bump_generation(prefix)
+        return failed
+
+    def delete_many(self, keys: Iterable[str], version: int | None = None) -> None:
+        """Delete *keys* from L2 in one call and from L1."""
+        keys = list(keys)
+        self.l2.delete_many(keys, version=version)
+        prefixes = set()
+        for key in keys:
+            prefix = self._prefix(key)
+            if prefix is not None:
+                self._l1_delete(self._l1_key(key, version))
+                prefixes.add(prefix)
+        for prefix in prefixes:
+            self._bump_generation(prefix)
+
+    def has_key(self, key: str, version: int | None = None) -> bool:
+        """Return whether *key* is cached."""
+        sentinel = object()
+        return self.get(key, sentinel, version=version) is not sentinel
+
+    def clear(self) -> None:
+        """Clear L2 and this process's L1; other processes drop theirs on sync."""
+        self.l2.clear()
+        with self._lock:
+            self._l1.clear()
+        for prefix in self._l1_prefixes if self._l1_prefixes is not None else ("",):
+            self._bump_generation(prefix)
+
+    def close(self, **kwargs: object) -> None:
+        """Close the L2 connection."""
+        self.l2.close(**kwargs)
+
+    # ── Introspection ─────────────────────────────────────────────────────────
+
+    def stats(self) -> dict[str, object]:
+        """Return hit/miss counters for this process plus the L1 size."""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["l1_entries"] = len(self._l1)
+        lookups = snapshot["l1_hits"] + snapshot["l2_hits"] + snapshot["misses"]
+        snapshot["l1_hit_ratio"] = (
+            round(snapshot["l1_hits"] / lookups, 3) if lookups else None
+        )
+        return snapshot
+
+    def reset_stats(self) -> None:
+        """Zero the hit/miss counters."""
+        with self._lock:
+            for name in self._stats:
+                self._stats[name] = 0
@@ -0,0 +1,123 @@
+"""Concurrency-safe building blocks on top of the Django cache.
+
+Cached state shared by every web worker cannot be updated with a plain
+``get``/``set``, which loses updates that race with each other. Both helpers
+here only rely on ``cache.add`` being atomic, which holds for every backend in
+use, ``DatabaseCache`` included:
+
+* :class:`CacheQueue`, a multi-producer queue of items in numbered slot keys,
+  drained in batches by a single scheduled consumer (``view_tracking``), and
+* :func:`cache_lock`, a short-lived mutex around a read-modify-write.
+"""
+
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from django.core.cache import cache
+
+_DRAINED = "__drained__"
+_MISSING = object()
+
+
+class CacheQueue:
+    """Append-only queue whose items live in slot keys ``<name>:<n>``.
+
+    :meth:`put` claims the first free slot with ``cache.add``, so concurrent
+    producers never overwrite each other and the filled slots stay contiguous.
+    The consumer reads a batch with :meth:`peek` and, once the batch has been
+    stored, releases it with :meth:`ack`. Slots are not reused after an ack:
+    they hold a short-lived marker instead, so a producer that read an old head
+    skips them rather than writing where the consumer no longer looks.
+    """
+
+    def __init__(self, name: str, timeout: float, drained_timeout: float = 300) -> None:
+        """Create a queue under the cache prefix *name*.
+
+        *timeout* bounds how long unconsumed items are kept; *drained_timeout*
+        how long acknowledged slots stay blocked for slow producers.
+        """
+        self.name = name
+        self.timeout = timeout
+        self.drained_timeout = drained_timeout
+
+    def _slot(self, n: int) -> str:
+        return f"{self.name}:{n}"
+
+    @property
+    def _head_key(self) -> str:
+        return f"{self.name}:head"
+
+    @property
+    def _tail_key(self) -> str:
+        return f"{self.name}:tail"
+
+    def put(self, item: object) -> None:
+        """Append *item*."""
+        n = max(cache.get(self._tail_key) or 0, cache.get(self._head_key) or 0)
+        while not cache.add(self._slot(n), item, self.timeout):
+            n += 1
+        # Only a hint where the next free slot is; a stale value costs a retry.
+        cache.set(self._tail_key, n + 1, self.timeout)
+
+    def peek(self, limit: int = 500) -> tuple[list, int]:
+        """Return up to *limit* items from the head and the position after them.
+
+        Every slot below the tail hint has been filled once, so a missing one
+        there has expired or been culled: it is skipped, and the position moves
+        past it, instead of ending the batch and holding up the items after it.
+        """
+        head = cache.get(self._head_key) or 0
+        tail = cache.get(self._tail_key) or 0
+        items: list = []
+        position = start = head
+        while True:
+            keys = [self._slot(n) for n in range(start, start + limit)]
+            found = cache.get_many(keys)
+            for n, key in enumerate(keys, start):
+                value = found.get(key, _MISSING)
+                if value is _MISSING and n >= tail:
+                    return items, position
+                if value is not _MISSING and value != _DRAINED:
+                    items.append(value)
+                position = n + 1
+                if len(items) == limit:
+                    return items, position
+            start += limit
+
+    def ack(self, position: int) -> None:
+        """Drop every item before *position* (as returned by :meth:`peek`)."""
+        head = cache.get(self._head_key) or 0
+        if position <= head:
+            return
+        cache.set_many(
+            {self._slot(n): _DRAINED for n in range(head, position)},
+            self.drained_timeout,
+        )
+        cache.set(self._head_key, position, None)
+
+
+class CacheLockTimeout(Exception):
+    """Raised when :func:`cache_lock` cannot take its lock in time."""
+
+
+@contextmanager
+def cache_lock(key: str, timeout: float = 10, wait: float = 2) -> Iterator[None]:
+    """Hold the cache mutex *key* for the duration of the block.
+
+    The lock expires after *timeout* seconds in case its holder dies. If it
+    cannot be taken within *wait* seconds, :class:`CacheLockTimeout` is raised
+    and the block does not run.
+    """
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + wait
+    while not cache.add(key, token, timeout):
+        if time.monotonic() >= deadline:
+            raise CacheLockTimeout(f"Cache lock {key} is busy")
+        time.sleep(0.01)
+    try:
+        yield
+    finally:
+        if cache.get(key) == token:
+            cache.delete(key)
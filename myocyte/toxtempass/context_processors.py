@@ -1,7 +1,7 @@
 import logging
 from typing import Dict
 
-from .workspace import get_workspace_list
+from .workspace import get_workspace_snapshot
 from django.utils.functional import SimpleLazyObject
 from toxtempass import config
 
@@ -26,82 +26,40 @@ def current_url_name(request) -> dict:
 def workspaces(request) -> Dict[str, object]:
     """Add workspace lists to every template so the offcanvas can render on any page.
 
-    This calls the existing get_workspace_list view helper which returns a dict with
-    owned_workspaces, member_workspaces and accessible_investigations. Using a
-    context processor avoids having to call this from every view that renders the
-    offcanvas.
+    The three keys share one snapshot from ``get_workspace_snapshot``, which is
+    memoised on the request (and cached across requests), so a template that
+    touches all of them — or a view that already called ``get_workspace_list``
+    — triggers the workspace queries at most once. Evaluation stays lazy so DB
+    access only happens when the template actually uses them.
     """
-    # Provide the three expected context keys but keep evaluation lazy so
-    # DB access only happens when the template actually uses them.
-    def _owned_workspaces():
-        try:
-            user = getattr(request, "user", None)
-            if not user or not getattr(user, "is_authenticated", False):
-                return []
-            return get_workspace_list(request).get("owned_workspaces", [])
-        except Exception:
-            return []
-
-    def _member_workspaces():
-        try:
-            user = getattr(request, "user", None)
-            if not user or not getattr(user, "is_authenticated", False):
-                return []
-            return get_workspace_list(request).get("member_workspaces", [])
-        except Exception:
-            return []
 
-    def _accessible_investigations():
+    def _lookup(key: str):
         try:
             user = getattr(request, "user", None)
             if not user or not getattr(user, "is_authenticated", False):
                 return []
-            return get_workspace_list(request).get("accessible_investigations", [])
+            return get_workspace_snapshot(request).get(key, [])
         except Exception:
             return []
 
     return {
-        "owned_workspaces": SimpleLazyObject(_owned_workspaces),
-        "member_workspaces": SimpleLazyObject(_member_workspaces),
-        "accessible_investigations": SimpleLazyObject(_accessible_investigations),
+        "owned_workspaces": SimpleLazyObject(lambda: _lookup("owned_workspaces")),
+        "member_workspaces": SimpleLazyObject(lambda: _lookup("member_workspaces")),
+        "accessible_investigations": SimpleLazyObject(
+            lambda: _lookup("accessible_investigations")
+        ),
     }
 
 
-def llm_info(request) -> dict:
-    """Expose LLM selector + signature context for the offcanvas.
+def _build_llm_choices(cfg, is_superuser: bool) -> list[tuple[str, str]]:
+    """Build the user-facing ``(key, label)`` model choices for the offcanvas.
 
-    * ``llm_signature`` — dict with icon/model_id/provider/version/privacy for the
-      currently-resolved deployment, or ``None`` if nothing is configured.
-    * ``llm_choices``   — ``(value, label)`` list the user may pick from.
-    * ``llm_current``   — the user's persisted preference (empty if none).
+    Just model_id as the label (no privacy/version cruft). Superusers also see
+    admin-only models (not in allowed list), marked "(admin-only)".
     """
-    user = getattr(request, "user", None)
-    if not user or not getattr(user, "is_authenticated", False):
-        return {"llm_signature": None, "llm_choices": [], "llm_current": ""}
-
-    try:
-        from toxtempass.azure_registry import (
-            badge_color,
-            badge_icon,
-            badge_short,
-            find_by_model_id,
-            get_model,
-            get_registry,
-        )
-        from toxtempass.models import LLMConfig
-    except Exception as exc:
-        logger.debug("llm_info context unavailable: %s", exc)
-        return {"llm_signature": None, "llm_choices": [], "llm_current": ""}
-
-    try:
-        cfg = LLMConfig.load()
-    except Exception:
-        cfg = None
+    from toxtempass.azure_registry import get_registry
 
     allowed = set(cfg.allowed_models) if cfg and cfg.allowed_models else None
-    is_superuser = bool(getattr(user, "is_superuser", False))
-    # Build user-facing choices: just model_id as the label (no privacy/version cruft).
-    # Superusers also see admin-only models (not in allowed list), marked "(admin-only)".
     choices = []
     for ep in get_registry():
         for m in ep.models:
@@ -113,14 +71,22 @@ def llm_info(request) -> dict:
                 continue
             label = m.model_id if in_allowed else f"{m.model_id} (admin-only)"
             choices.append((key, label))
+    return choices
 
-    current = ""
-    prefs = getattr(user, "preferences", None) or {}
-    if isinstance(prefs, dict):
-        current = prefs.get("llm_model", "") or ""
 
-    # Resolve the effective deployment (user pref > admin default).
-    effective_key = current or (cfg.default_model if cfg else "")
+def _build_llm_signature(effective_key: str) -> dict | None:
+    """Resolve *effective_key* (``"idx:tag"``) to the offcanvas signature dict.
+
+    The ``source`` entry is request-specific and added by the caller.
+    """
+    from toxtempass.azure_registry import (
+        badge_color,
+        badge_icon,
+        badge_short,
+        find_by_model_id,
+        get_model,
+    )
+
     resolved = None
     if effective_key and ":" in effective_key:
         try:
@@ -135,40 +101,92 @@ def llm_info(request) -> dict:
         except Exception:
             resolved = None
 
-    signature = None
-    if resolved is not None:
-        ep, m = resolved
-        direct = (m.tags.get("direct-from-azure") or "").lower() == "true"
-        # Who built the model vs. who hosts/serves it.
-        model_by = (m.tags.get("provider") or "").title()
-        if direct:
-            hosted_on = "Azure (direct)"
-        else:
-            # Azure hosts the infra, but the model is served through a
-            # third-party MaaS passthrough (e.g. Anthropic on Foundry).
-            hosted_on = f"Azure (MaaS via {model_by or 'third-party'})"
-        signature = {
-            "icon": badge_icon(m.badge),
-            "color": badge_color(m.badge),
-            "privacy_short": badge_short(m.badge),
-            "model_id": m.model_id,
-            "deployment_name": m.deployment_name,
-            "model_by": model_by,
-            "hosted_on": hosted_on,
-            "version": m.tags.get("version", ""),
-            "api": m.api,
-            "endpoint_index": ep.index,
-            "tag": m.tag,
-            "retirement_date": (
-                m.retirement_date.isoformat() if m.retirement_date else ""
-            ),
-            "retirement_status": m.retirement_status,
-            "context_window": m.context_window,
-            "source": "user" if current else "admin_default",
-        }
+    if resolved is None:
+        return None
+    ep, m = resolved
+    direct = (m.tags.get("direct-from-azure") or "").lower() == "true"
+    # Who built the model vs. who hosts/serves it.
+    model_by = (m.tags.get("provider") or "").title()
+    if direct:
+        hosted_on = "Azure (direct)"
+    else:
+        # Azure hosts the infra, but the model is served through a
+        # third-party MaaS passthrough (e.g. Anthropic on Foundry).
+        hosted_on = f"Azure (MaaS via {model_by or 'third-party'})"
+    return {
+        "icon": badge_icon(m.badge),
+        "color": badge_color(m.badge),
+        "privacy_short": badge_short(m.badge),
+        "model_id": m.model_id,
+        "deployment_name": m.deployment_name,
+        "model_by": model_by,
+        "hosted_on": hosted_on,
+        "version": m.tags.get("version", ""),
+        "api": m.api,
+        "endpoint_index": ep.index,
+        "tag": m.tag,
+        "retirement_date": (
+            m.retirement_date.isoformat() if m.retirement_date else ""
+        ),
+        "retirement_status": m.retirement_status,
+        "context_window": m.context_window,
+    }
+
+
+def llm_info(request) -> dict:
+    """Expose LLM selector + signature context for the offcanvas.
+
+    * ``llm_signature`` — dict with icon/model_id/provider/version/privacy for the
+      currently-resolved deployment, or ``None`` if nothing is configured.
+    * ``llm_choices``   — ``(value, label)`` list the user may pick from.
+    * ``llm_current``   — the user's persisted preference (empty if none).
+
+    Choices and signatures are memoised per ``LLMConfig`` version (see
+    ``LLMConfig.cached``), so they are rebuilt only after an admin change.
+    """
+    user = getattr(request, "user", None)
+    if not user or not getattr(user, "is_authenticated", False):
+        return {"llm_signature": None, "llm_choices": [], "llm_current": ""}
+
+    try:
+        from toxtempass.models import LLMConfig
+    except Exception as exc:
+        logger.debug("llm_info context unavailable: %s", exc)
+        return {"llm_signature": None, "llm_choices": [], "llm_current": ""}
+
+    is_superuser = bool(getattr(user, "is_superuser", False))
+    current = ""
+    prefs = getattr(user, "preferences", None) or {}
+    if isinstance(prefs, dict):
+        current = prefs.get("llm_model", "") or ""
+
+    try:
+        choices = LLMConfig.cached(
+            ("llm_choices", is_superuser),
+            lambda cfg: _build_llm_choices(cfg, is_superuser),
+        )
+        # Resolve the effective deployment (user pref > admin default).
+        effective_key = current or LLMConfig.cached(
+            "default_model", lambda cfg: cfg.default_model
+        )
+        signature = LLMConfig.cached(
+            ("llm_signature", effective_key),
+            lambda cfg: _build_llm_signature(effective_key),
+        )
+    except Exception:
+        # DB not ready, migrations pending, etc.
+        try:
+            cfg = LLMConfig.load()
+        except Exception:
+            cfg = None
+        choices = _build_llm_choices(cfg, is_superuser)
+        signature = _build_llm_signature(current or (cfg.default_model if cfg else ""))
+
+    if signature is not None:
+        signature = {**signature, "source": "user" if current else "admin_default"}
 
     return {
         "llm_signature": signature,
-        "llm_choices": choices,
+        "llm_choices": list(choices),
         "llm_current": current,
     }
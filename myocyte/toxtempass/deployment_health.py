@@ -0,0 +1,249 @@
+"""Per-deployment circuit breakers and health-aware model routing.
+
+Every deployment key (``"idx:tag"``) has a breaker in the shared cache, fed by
+two sources:
+
+* :func:`probe_deployment_health`, a django-q schedule that sends one short
+  probe to every deployment (and stores it like an admin health check), and
+* :func:`record_run_health`, called at the end of ``process_llm_async`` with
+  the run's ``LLMCallRecord`` rows.
+
+``config.llm_breaker_failure_threshold`` consecutive failures open a breaker.
+Once ``config.llm_breaker_cooldown_seconds`` have passed it is *half open*:
+traffic may try the deployment again and the next result closes or re-opens
+it.  :func:`route_deployment` is consulted when a run is queued and again when
+it starts; it swaps a deployment with an open breaker for an equivalent healthy
+one (same model elsewhere, else same provider) with the same privacy badge
+that the user is allowed to use.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import time
+from collections import defaultdict
+from collections.abc import Iterable
+
+from django.core.cache import cache
+
+from toxtempass import config
+from toxtempass.azure_registry import EndpointEntry, ModelEntry, current_registry
+from toxtempass.cache_primitives import CacheLockTimeout, cache_lock
+
+logger = logging.getLogger("llm")
+
+_BREAKER_KEY = "llm_breaker:{key}"
+_BREAKER_LOCK_KEY = "llm_breaker_lock:{key}"
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Call outcomes that say something about the deployment rather than the input.
+_FAILURE_OUTCOMES = {"transient", "timeout", "error"}
+
+
+def _breaker_key(key: str) -> str:
+    return _BREAKER_KEY.format(key=key)
+
+
+def _current_state(breaker: dict | None, now: float) -> str:
+    if not breaker or breaker.get("state") != OPEN:
+        return CLOSED
+    if now - breaker.get("opened_at", 0) >= config.llm_breaker_cooldown_seconds:
+        return HALF_OPEN
+    return OPEN
+
+
+def breaker_state(key: str) -> str:
+    """Return ``"closed"``, ``"open"`` or ``"half_open"`` for a deployment."""
+    return _current_state(cache.get(_breaker_key(key)), time.time())
+
+
+def breaker_states(keys: Iterable[str] | None = None) -> dict[str, dict]:
+    """Breaker details (state, failures, last error) for *keys* (default: all)."""
+    if keys is None:
+        keys = current_registry().by_key
+    keys = list(keys)
+    stored = cache.get_many([_breaker_key(k) for k in keys])
+    now = time.time()
+    out = {}
+    for key in keys:
+        breaker = stored.get(_breaker_key(key)) or {}
+        out[key] = {
+            "state": _current_state(breaker, now),
+            "failures": breaker.get("failures", 0),
+            "last_error": breaker.get("last_error", ""),
+            "opened_at": breaker.get("opened_at"),
+        }
+    return out
+
+
+def is_available(key: str) -> bool:
+    """``False`` only while the deployment's breaker is open."""
+    return breaker_state(key) != OPEN
+
+
+def record_result(key: str, ok: bool, error: str = "") -> str:
+    """Feed one health observation into *key*'s breaker; return the new state.
+
+    The update holds a per-deployment cache lock so concurrent runs and probes
+    cannot overwrite each other's counts. If the lock stays busy the
+    observation is dropped; the next run or probe reports the deployment again.
+    """
+    try:
+        with cache_lock(_BREAKER_LOCK_KEY.format(key=key)):
+            return _update_breaker(key, ok, error)
+    except CacheLockTimeout:
+        logger.warning("Circuit breaker for %s is busy; result not recorded", key)
+        return breaker_state(key)
+
+
+def _update_breaker(key: str, ok: bool, error: str) -> str:
+    breaker = cache.get(_breaker_key(key)) or {"state": CLOSED, "failures": 0}
+    now = time.time()
+    if ok:
+        if not breaker.get("failures") and breaker.get("state") == CLOSED:
+            return CLOSED  # nothing to write
+        if breaker.get("state") == OPEN:
+            logger.info("Circuit breaker for %s closed", key)
+        breaker = {"state": CLOSED, "failures": 0}
+    else:
+        failures = breaker.get("failures", 0) + 1
+        half_open = _current_state(breaker, now) == HALF_OPEN
+        breaker = {**breaker, "failures": failures, "last_error": error[:200]}
+        if half_open or failures >= config.llm_breaker_failure_threshold:
+            if breaker.get("state") != OPEN or half_open:
+                logger.warning("Circuit breaker for %s opened: %s", key, error[:200])
+            breaker.update(state=OPEN, opened_at=now)
+    cache.set(_breaker_key(key), breaker, None)
+    return _current_state(breaker, now)
+
+
+def record_run_health(records: Iterable) -> None:
+    """Feed a finished run's ``LLMCallRecord`` rows into the breakers.
+
+    A deployment counts as healthy when any call succeeded and as failing when
+    every call ended in a transient error, a timeout or another error.  Bad
+    requests (oversized input, content filters) say nothing about health.
+    """
+    outcomes: dict[str, set[str]] = defaultdict(set)
+    errors: dict[str, str] = {}
+    for record in records:
+        if record.model_key and getattr(record, "_started_at", None) is not None:
+            outcomes[record.model_key].add(record.outcome)
+            if record.error:
+                errors[record.model_key] = record.error
+    for key, seen in outcomes.items():
+        try:
+            if "ok" in seen:
+                record_result(key, True)
+            elif seen and seen <= _FAILURE_OUTCOMES:
+                record_result(key, False, errors.get(key, "run failed"))
+        except Exception:
+            logger.debug("Could not update circuit breaker for %s", key, exc_info=True)
+
+
+def probe_deployment_health() -> int:
+    """Probe every deployment once and update the breakers (django-q schedule).
+
+    Returns the number of deployments whose breaker is open afterwards.
+    """
+    from toxtempass.health_check import (
+        run_health_check,
+        save_health_check,
+        select_deployments,
+    )
+
+    # Deployments are probed in rounds of ``workers``; use enough workers that
+    # every round fits into the budget (this runs on the default cluster).
+    timeout = config.llm_health_probe_timeout_seconds
+    rounds = max(1, int(config.llm_health_probe_budget_seconds // timeout))
+    workers = max(
+        config.health_check_workers, math.ceil(len(select_deployments()) / rounds)
+    )
+    results = run_health_check(samples=1, timeout=timeout, workers=workers)
+    if not results:
+        return 0
+    states = {
+        key: record_result(key, bool(r.get("ok")), r.get("error") or "")
+        for key, r in results.items()
+    }
+    save_health_check(results)
+    unhealthy = sorted(k for k, state in states.items() if state == OPEN)
+    if unhealthy:
+        logger.warning("Deployments with open circuit breakers: %s", ", ".join(unhealthy))
+    return len(unhealthy)
+
+
+def _allowed_keys(user) -> set[str] | None:
+    """Deployment keys *user* may use (``None`` = all)."""
+    from toxtempass.models import LLMConfig
+
+    if user is not None and getattr(user, "is_superuser", False):
+        return None
+    allowed = LLMConfig.load().allowed_models or []
+    return set(allowed) if allowed else None
+
+
+def _candidates(
+    ep: EndpointEntry, m: ModelEntry, user
+) -> list[tuple[EndpointEntry, ModelEntry]]:
+    """Equivalent deployments to *m*, best first, ignoring breaker state."""
+    allowed = _allowed_keys(user)
+    provider = m.tags.get("provider", "").lower()
+    ranked = []
+    for other_ep in current_registry().endpoints:
+        for other in other_ep.models:
+            key = f"{other_ep.index}:{other.tag}"
+            if other_ep is ep and other.tag == m.tag:
+                continue
+            if allowed is not None and key not in allowed:
+                continue
+            if other.retirement_status == "retired" or other.badge != m.badge:
+                continue
+            if other.model_id == m.model_id:
+                rank = 0
+            elif provider and other.tags.get("provider", "").lower() == provider:
+                rank = 1
+            else:
+                continue
+            ranked.append((rank, other_ep.index, other.tag, other_ep, other))
+    ranked.sort(key=lambda item: item[:3])
+    return [(other_ep, other) for *_, other_ep, other in ranked]
+
+
+def healthy_substitute(key: str, user=None) -> str | None:
+    """Return the best equivalent deployment whose breaker is not open."""
+    result = current_registry().by_key.get(key)
+    if result is None:
+        return None
+    candidates = [f"{e.index}:{m.tag}" for e, m in _candidates(*result, user)]
+    if not candidates:
+        return None
+    states = breaker_states(candidates)
+    return next((k for k in candidates if states[k]["state"] != OPEN), None)
+
+
+def route_deployment(key: str | None, user=None) -> tuple[str | None, str | None]:
+    """Return ``(key_to_use, substituted_from)`` for a run about to use *key*.
+
+    *substituted_from* is the original key when a healthy substitute was
+    chosen, else ``None``.  Without a healthy alternative the original key is
+    kept: the run may still succeed and its retries handle short outages.
+    """
+    if not key or ":" not in key:
+        return key, None
+    try:
+        if is_available(key):
+            return key, None
+        substitute = healthy_substitute(key, user)
+    except Exception:
+        logger.debug("Health-aware routing unavailable for %s", key, exc_info=True)
+        return key, None
+    if substitute is None:
+        logger.warning("Breaker for %s is open and no healthy substitute exists", key)
+        return key, None
+    logger.info("Routing %s to healthy substitute %s", key, substitute)
+    return substitute, key
@@ -1,21 +1,29 @@
+import hashlib
 import io
 import json
 import logging
 import re
 import subprocess
 import tempfile
+import time
 import uuid
+from collections.abc import Iterator
+from dataclasses import dataclass
+from functools import cached_property
 from pathlib import Path
 
 import yaml
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 from django.core.serializers import serialize
-from django.db.models import Count, Min
+from django.db.models import Count, Min, Model, Prefetch
 from django.http import FileResponse, HttpRequest, JsonResponse
 from django.utils import timezone  # Import timezone utilities
 from django.utils.text import slugify
 
 from toxtempass import Config
-from toxtempass.models import Assay, Person, Section
+from toxtempass.models import Answer, Assay, Person, Question, Section, Subsection
+from toxtempass.tracing import span
 from toxtempass.utilities import log_processing_event
 
 logger = logging.getLogger(__name__)
@@ -25,6 +33,7 @@ logger = logging.getLogger(__name__)
 EXPORT_MIME_SUFFIX = Config.EXPORT_MIME_SUFFIX
 EXPORT_MAPPING = Config.EXPORT_MAPPING
 PANDOC_EXPORT_TYPES = Config.PANDOC_EXPORT_TYPES
+NATIVE_EXPORT_TYPES = Config.NATIVE_EXPORT_TYPES
 
 # simple regexes to catch display‐math delimiters
 
@@ -193,255 +202,388 @@ def get_assay_export_author_metadata(assay: Assay) -> ExportAuthorMetadata:
     }
 
 
-def generate_json_from_assay(assay: Assay) -> dict | None:
-    """Generate Json from assay."""
-    try:
-        # Set the timezone to Amsterdam
-        amsterdam_tz = timezone.get_fixed_timezone(
-            1
-        )  # UTC+1 for Amsterdam (standard time)
-        current_time = timezone.now().astimezone(
-            amsterdam_tz
-        )  # Current time in Amsterdam timezone
-
-        # Source the model identity from AssayCost (the source of truth recorded
-        # by process_llm_async), not Config.model — Config.model is the import-time
-        # registry default and does not reflect what actually ran on this assay.
-        # An assay regenerated with multiple models has multiple AssayCost rows.
-        # The info URL mirrors the link used by the off-canvas LLM signature
-        # badge (templates/.../user_offcanvas.html), so the export and the UI
-        # point at the same Azure catalog page.
-        from urllib.parse import quote
-
-        models_used: list[dict] = []
-        for c in assay.costs.order_by("updated_at"):
-            info_url = (
-                f"https://ai.azure.com/catalog/models/{quote(c.model_id, safe='')}"
-                if c.model_id
-                else ""
-            )
-            models_used.append(
-                {
-                    "model_key": c.model_key,
-                    "model_id": c.model_id,
-                    "info_url": info_url,
-                }
-            )
+def _serialize_many(objects: list) -> dict[int, dict]:
+    """Serialize *objects* in one pass and return the JSON dicts keyed by pk.
 
-        if models_used:
-            model_summary = ", ".join(
-                f"{m['model_id']} ({m['model_key']})"
-                if m["model_id"]
-                else m["model_key"]
-                for m in models_used
-            )
-            # De-duplicate URLs while preserving order; drop empties.
-            seen_urls: set[str] = set()
-            ordered_urls = [
-                u for m in models_used
-                if (u := m["info_url"]) and not (u in seen_urls or seen_urls.add(u))
-            ]
-            model_info_url_value = ", ".join(ordered_urls) if ordered_urls else ""
-        else:
-            model_summary = "Not recorded"
-            model_info_url_value = ""
+    Produces exactly what ``json.loads(serialize("json", [obj]))[0]`` gives per
+    object, without one serializer round-trip per row.
+    """
+    if not objects:
+        return {}
+    return {item["pk"]: item for item in json.loads(serialize("json", objects))}
+
+
+def build_export_tree(assay: Assay) -> dict[str, list]:
+    """Return the answer/question/section part of the assay export.
+
+    Fetches the assay's answers and its question set's sections, subsections and
+    questions in a fixed number of queries and joins them in memory, instead of
+    walking the ORM per question. Returns a dict with ``answers``,
+    ``questions_with_answers`` and ``sections`` shaped as in
+    :func:`generate_json_from_assay`.
+    """
+    # ``subsections_for_context`` is the only auto-created M2M on these models;
+    # the serializer reads it from the prefetch cache instead of querying.
+    question_qs = Question.objects.prefetch_related(
+        Prefetch("subsections_for_context", queryset=Subsection.objects.only("pk"))
+    ).order_by("pk")
+    answers = list(
+        Answer.objects.filter(assay=assay)
+        .prefetch_related(Prefetch("question", queryset=question_qs))
+        .order_by("pk")
+    )
+
+    if assay.question_set_id is not None:
+        section_qs = Section.objects.filter(question_set_id=assay.question_set_id)
+    else:
+        # No question set recorded: export the sections the assay has answers in.
+        section_qs = Section.objects.filter(
+            subsections__questions__answers__assay=assay
+        ).distinct()
+    sections = list(
+        section_qs.prefetch_related(
+            Prefetch("subsections", queryset=Subsection.objects.order_by("pk")),
+            Prefetch("subsections__questions", queryset=question_qs),
+        ).order_by("pk")
+    )
+    subsections = [sub for section in sections for sub in section.subsections.all()]
+    questions = [q for sub in subsections for q in sub.questions.all()]
+
+    # Latest answer per question wins, matching the previous per-question loop.
+    answer_text_by_question = {a.question_id: a.answer_text for a in answers}
+
+    answer_json = _serialize_many(answers)
+    question_json = _serialize_many(
+        list({q.pk: q for q in questions + [a.question for a in answers]}.values())
+    )
+    section_json = _serialize_many(sections)
+    subsection_json = _serialize_many(subsections)
+
+    return {
+        "answers": [answer_json[a.pk] for a in answers],
+        "questions_with_answers": [
+            {
+                "question": question_json[a.question_id],
+                "answer": a.answer_text,
+                "source": a.answer_documents,
+            }
+            for a in answers
+        ],
+        "sections": [
+            {
+                "section": section_json[section.pk],
+                "subsections": [
+                    {
+                        "subsection": subsection_json[sub.pk],
+                        "questions_with_answers": [
+                            {
+                                "question": question_json[q.pk],
+                                "answer": answer_text_by_question.get(q.pk, ""),
+                            }
+                            for q in sub.questions.all()
+                        ],
+                    }
+                    for sub in section.subsections.all()
+                ],
+            }
+            for section in sections
+        ],
+    }
+
+
+def build_export_metadata(assay: Assay) -> dict:
+    """Return the ``metadata`` part of an assay export (authors, models, config)."""
+    # Set the timezone to Amsterdam
+    amsterdam_tz = timezone.get_fixed_timezone(
+        1
+    )  # UTC+1 for Amsterdam (standard time)
+    current_time = timezone.now().astimezone(
+        amsterdam_tz
+    )  # Current time in Amsterdam timezone
+
+    # Source the model identity from AssayCost (the source of truth recorded
+    # by process_llm_async), not Config.model — Config.model is the import-time
+    # registry default and does not reflect what actually ran on this assay.
+    # An assay regenerated with multiple models has multiple AssayCost rows.
+    # The info URL mirrors the link used by the off-canvas LLM signature
+    # badge (templates/.../user_offcanvas.html), so the export and the UI
+    # point at the same Azure catalog page.
+    from urllib.parse import quote
+
+    models_used: list[dict] = []
+    for c in assay.costs.order_by("updated_at"):
+        info_url = (
+            f"https://ai.azure.com/catalog/models/{quote(c.model_id, safe='')}"
+            if c.model_id
+            else ""
+        )
+        models_used.append(
+            {
+                "model_key": c.model_key,
+                "model_id": c.model_id,
+                "info_url": info_url,
+            }
+        )
+
+    if models_used:
+        model_summary = ", ".join(
+            f"{m['model_id']} ({m['model_key']})"
+            if m["model_id"]
+            else m["model_key"]
+            for m in models_used
+        )
+        # De-duplicate URLs while preserving order; drop empties.
+        seen_urls: set[str] = set()
+        ordered_urls = [
+            u for m in models_used
+            if (u := m["info_url"]) and not (u in seen_urls or seen_urls.add(u))
+        ]
+        model_info_url_value = ", ".join(ordered_urls) if ordered_urls else ""
+    else:
+        model_summary = "Not recorded"
+        model_info_url_value = ""
+
+    author_metadata = get_assay_export_author_metadata(assay)
+    return {
+        # Current date and time in ISO format
+        "creation_date": current_time.isoformat(),
+        # Filename for the export
+        "filename": f"toxtemp_{slugify(assay.title)}",
+        # Replace with your actual website name
+        "reference_toxtemp": getattr(Config, "reference_toxtemp", None),
+        "website": "toxtempassistant.vhp4safety.nl",
+        # Structured per-run LLM identities (machine-readable companion to
+        # the human-readable `config.model` string).
+        "models_used": models_used,
+        # Trimmed config for reproducibility
+        # (PII and developer-only fields omitted)
+        "config": {
+            "model": model_summary,
+            "model_info_url": model_info_url_value
+            or getattr(Config, "model_info_url", None),
+            # Same DOI link the off-canvas uses for the ToxTempAssistant
+            # paper badge. Config has no plain "reference_toxtempassistant"
+            # attribute — the previous getattr silently resolved to None.
+            "reference_toxtempassistant": getattr(
+                Config, "reference_toxtempassistant_paper", None
+            ),
+            "reference_toxtemp": getattr(Config, "reference_toxtemp", None),
+            "website": "toxtempassistant.vhp4safety.nl",
+            "version": getattr(Config, "version", None),
+            "github_repo_url": getattr(Config, "github_repo_url", None),
+            "git_hash": getattr(Config, "git_hash", None),
+            "license_url": getattr(Config, "license_url", None),
+        },
+        **author_metadata,
+    }
 
+
+def generate_json_from_assay(assay: Assay) -> dict | None:
+    """Generate Json from assay.
+
+    Only the JSON export uses this; the document exports are written from
+    :class:`ExportSource` without serializing every model.
+    """
+    try:
         # Prepare the data structure
-        author_metadata = get_assay_export_author_metadata(assay)
         export_data = {
-            "metadata": {
-                # Current date and time in ISO format
-                "creation_date": current_time.isoformat(),
-                # Filename for the export
-                "filename": f"toxtemp_{slugify(assay.title)}",
-                # Replace with your actual website name
-                "reference_toxtemp": getattr(Config, "reference_toxtemp", None),
-                "website": "toxtempassistant.vhp4safety.nl",
-                # Structured per-run LLM identities (machine-readable companion to
-                # the human-readable `config.model` string).
-                "models_used": models_used,
-                # Trimmed config for reproducibility
-                # (PII and developer-only fields omitted)
-                "config": {
-                    "model": model_summary,
-                    "model_info_url": model_info_url_value
-                    or getattr(Config, "model_info_url", None),
-                    # Same DOI link the off-canvas uses for the ToxTempAssistant
-                    # paper badge. Config has no plain "reference_toxtempassistant"
-                    # attribute — the previous getattr silently resolved to None.
-                    "reference_toxtempassistant": getattr(
-                        Config, "reference_toxtempassistant_paper", None
-                    ),
-                    "reference_toxtemp": getattr(Config, "reference_toxtemp", None),
-                    "website": "toxtempassistant.vhp4safety.nl",
-                    "version": getattr(Config, "version", None),
-                    "github_repo_url": getattr(Config, "github_repo_url", None),
-                    "git_hash": getattr(Config, "git_hash", None),
-                    "license_url": getattr(Config, "license_url", None),
-                },
-                **author_metadata,
-            },
+            "metadata": build_export_metadata(assay),
             "investigation": json.loads(serialize("json", [assay.study.investigation]))[
                 0
             ],
             "study": json.loads(serialize("json", [assay.study]))[0],
             "assay": json.loads(serialize("json", [assay]))[0],
-            "answers": json.loads(serialize("json", assay.answers.all())),
         }
-
-        # Add questions and their corresponding answers
-        questions_with_answers = []
-        for answer in assay.answers.all():
-            question_data = json.loads(serialize("json", [answer.question]))[0]
-            questions_with_answers.append(
-                {
-                    "question": question_data,
-                    "answer": answer.answer_text,
-                    "source": answer.answer_documents,
-                }
-            )
-        export_data["questions_with_answers"] = questions_with_answers
-
-        # Add sections and subsections with questions and answers
-        sections = []
-        for section in Section.objects.all():
-            section_data = {
-                "section": json.loads(serialize("json", [section]))[0],
-                "subsections": [],
-            }
-            for subsection in section.subsections.all():
-                subsection_data = {
-                    "subsection": json.loads(serialize("json", [subsection]))[0],
-                    "questions_with_answers": [],
-                }
-                # Add questions and answers for this subsection
-                for question in subsection.questions.all():
-                    # Find the corresponding answer, if any
-                    answer_text = ""
-                    for answer in assay.answers.filter(question=question):
-                        answer_text = answer.answer_text
-                    subsection_data["questions_with_answers"].append(
-                        {
-                            "question": json.loads(serialize("json", [question]))[0],
-                            "answer": answer_text,
-                        }
-                    )
-
-                section_data["subsections"].append(subsection_data)
-            sections.append(section_data)
-
-        export_data["sections"] = sections
+        # Answers, questions and the section tree in a fixed number of queries.
+        export_data.update(build_export_tree(assay))
         return export_data
 
     except Assay.DoesNotExist:
         return None
 
 
-def generate_markdown_from_assay(assay: Assay) -> str:
-    """Generate markdown from assay."""
-    export_data = generate_json_from_assay(assay)
+def _concrete_field_values(obj: Model) -> dict:
+    """Return ``{attname: value}`` for *obj*'s concrete fields, without queries."""
+    return {f.attname: getattr(obj, f.attname) for f in obj._meta.concrete_fields}
+
+
+class ExportSource:
+    """The database content of one assay export, loaded on first use.
+
+    The metadata and the section/question tree are fetched in a fixed number
+    of queries and kept as model instances; :func:`iter_markdown_from_assay`
+    and the native renderers read them directly. Call :meth:`prefetch` before
+    handing the source to another thread so rendering does no database access.
+    """
+
+    def __init__(self, assay: Assay) -> None:
+        self.assay = assay
+
+    @cached_property
+    def metadata(self) -> dict:
+        """Export metadata as in :func:`build_export_metadata`."""
+        return build_export_metadata(self.assay)
+
+    @cached_property
+    def sections(self) -> list[Section]:
+        """Sections with prefetched subsections and questions, in export order."""
+        assay = self.assay
+        question_qs = Question.objects.only(
+            "pk", "subsection_id", "question_text"
+        ).order_by("pk")
+        if assay.question_set_id is not None:
+            section_qs = Section.objects.filter(question_set_id=assay.question_set_id)
+        else:
+            # No question set recorded: export the sections the assay has answers in.
+            section_qs = Section.objects.filter(
+                subsections__questions__answers__assay=assay
+            ).distinct()
+        return list(
+            section_qs.only("pk", "title")
+            .prefetch_related(
+                Prefetch(
+                    "subsections",
+                    queryset=Subsection.objects.only("pk", "section_id", "title").order_by(
+                        "pk"
+                    ),
+                ),
+                Prefetch("subsections__questions", queryset=question_qs),
+            )
+            .order_by("pk")
+        )
+
+    @cached_property
+    def answer_text_by_question(self) -> dict[int, str]:
+        """Answer text per question id; the latest answer per question wins."""
+        return dict(
+            Answer.objects.filter(assay=self.assay)
+            .order_by("pk")
+            .values_list("question_id", "answer_text")
+        )
+
+    def prefetch(self) -> "ExportSource":
+        """Load everything rendering needs; returns ``self``."""
+        _ = self.assay.study.investigation
+        _ = self.metadata, self.sections, self.answer_text_by_question
+        return self
+
+    def fingerprint(self) -> dict:
+        """Return the exported content as plain data for :func:`export_content_digest`."""
+        study = self.assay.study
+        return {
+            "metadata": self.metadata,
+            "investigation": _concrete_field_values(study.investigation),
+            "study": _concrete_field_values(study),
+            "assay": _concrete_field_values(self.assay),
+            "sections": [
+                [
+                    section.pk,
+                    section.title,
+                    [
+                        [
+                            sub.pk,
+                            sub.title,
+                            [
+                                [q.pk, q.question_text, self.answer_text_by_question.get(q.pk)]
+                                for q in sub.questions.all()
+                            ],
+                        ]
+                        for sub in section.subsections.all()
+                    ],
+                ]
+                for section in self.sections
+            ],
+        }
+
+
+def export_author_lines(authors: list[ExportAuthor]) -> list[str]:
+    """Return one display line per author; only the last lists an email."""
+    lines = []
+    last_author_index = len(authors) - 1
+    for index, author in enumerate(authors):
+        author_line = author["name"]
+        if author.get("organization"):
+            author_line += f" ({author['organization']})"
+        if author.get("orcid_id"):
+            author_line += f" — ORCID iD: {author['orcid_id']}"
+        if index == last_author_index and author.get("email"):
+            author_line += f" — Email: {author['email']}"
+        lines.append(author_line)
+    return lines
+
+
+def iter_markdown_from_assay(
+    assay: Assay, source: ExportSource | None = None
+) -> Iterator[str]:
+    """Yield the markdown export of *assay* in chunks.
+
+    The header comes first, then one chunk per subsection, read straight from
+    the model instances of *source* (built from *assay* when not given), so
+    the export path can write the document to disk as it is generated.
+    """
+    if source is None:
+        source = ExportSource(assay)
+    metadata = source.metadata
     # Start with metadata
     markdown = []
     markdown.append("## Metadata\n")
-    markdown.append(f"- **Creation Date:** {export_data['metadata']['creation_date']}\n")
-    markdown.append(f"- **Filename:** {export_data['metadata']['filename']}\n")
-    markdown.append(f"- **Website:** {export_data['metadata']['website']}\n")
-    if export_data["metadata"].get("authors"):
+    markdown.append(f"- **Creation Date:** {metadata['creation_date']}\n")
+    markdown.append(f"- **Filename:** {metadata['filename']}\n")
+    markdown.append(f"- **Website:** {metadata['website']}\n")
+    if metadata.get("authors"):
         markdown.append("- **Authors:**\n")
-        last_author_index = len(export_data["metadata"]["authors"]) - 1
-        for index, author in enumerate(export_data["metadata"]["authors"]):
-            author_line = author["name"]
-            if author.get("organization"):
-                author_line += f" ({author['organization']})"
-            if author.get("orcid_id"):
-                author_line += f" — ORCID iD: {author['orcid_id']}"
-            if index == last_author_index and author.get("email"):
-                author_line += f" — Email: {author['email']}"
+        for author_line in export_author_lines(metadata["authors"]):
             markdown.append(f"  - {author_line}\n")
-    if export_data["metadata"].get("main_author"):
-        markdown.append(f"- **Main Author:** {export_data['metadata']['main_author']}\n")
-    if export_data["metadata"].get("co_authors"):
-        markdown.append(
-            "- **Co-authors:** "
-            + ", ".join(export_data["metadata"]["co_authors"])
-            + "\n"
-        )
+    if metadata.get("main_author"):
+        markdown.append(f"- **Main Author:** {metadata['main_author']}\n")
+    if metadata.get("co_authors"):
+        markdown.append("- **Co-authors:** " + ", ".join(metadata["co_authors"]) + "\n")
     markdown.append("\n## ToxTempAssistant configuration\n")
-    for key, value in export_data["metadata"]["config"].items():
+    for key, value in metadata["config"].items():
         markdown.append(f"- {key}: {value}\n")
     markdown.append("\n")
 
-    # Include investigation details
-    investigation_title = export_data["investigation"]["fields"]["title"]
-    investigation_description = export_data["investigation"]["fields"]["description"]
-    markdown.append("# Investigation\n")
-    markdown.append(f"- **Title:** {investigation_title}\n")
-    markdown.append(f"- **Description:** {investigation_description}\n")
-    markdown.append("\n")
-
-    # Include study details
-    study_title = export_data["study"]["fields"]["title"]
-    study_description = export_data["study"]["fields"]["description"]
-    markdown.append("# Study\n")
-    markdown.append(f"- **Title:** {study_title}\n")
-    markdown.append(f"- **Description:** {study_description}\n")
-    markdown.append("\n")
-
-    # Include assay details
-    assay_title = export_data["assay"]["fields"]["title"]
+    # Include investigation, study and assay details
+    study = assay.study
+    for heading, obj in (("Investigation", study.investigation), ("Study", study)):
+        markdown.append(f"# {heading}\n")
+        markdown.append(f"- **Title:** {obj.title}\n")
+        markdown.append(f"- **Description:** {obj.description}\n")
+        markdown.append("\n")
     markdown.append("# Assay\n")
-    markdown.append(f"- **Title:** {assay_title}\n")
+    markdown.append(f"- **Title:** {assay.title}\n")
     markdown.append("\n")
-
-    # Directly use the sections from export_data
-    sections = export_data.get("sections", [])
-
-    # Add sections and subsections to Markdown
-    for section in sections:
-        # Add section title
-        section_title = section["section"]["fields"][
-            "title"
-        ]  # Adjust based on your model's field names
-        markdown.append(f"# {section_title}\n")  # Section title
-
-        for subsection in section["subsections"]:
-            # Add subsection title
-            subsection_title = subsection["subsection"]["fields"][
-                "title"
-            ]  # Adjust based on your model's field names
-            markdown.append(f"## {subsection_title}\n")  # Subsection title
-
-            for qa in subsection["questions_with_answers"]:
-                question_text = qa["question"]["fields"][
-                    "question_text"
-                ]  # Adjust based on your model's field names
+    yield "".join(markdown)
+
+    answer_text_by_question = source.answer_text_by_question
+    for section in source.sections:
+        yield f"# {section.title}\n"  # Section title
+        for subsection in section.subsections.all():
+            markdown = [f"## {subsection.title}\n"]  # Subsection title
+            for question in subsection.questions.all():
                 answer_text = (
-                    qa["answer"] if qa["answer"] else "Answer not found in documents."
+                    answer_text_by_question.get(question.pk)
+                    or "Answer not found in documents."
                 )
-
                 # Add question and answer in a list format
-                markdown.append(f"{question_text}\n\n")
+                markdown.append(f"{question.question_text}\n\n")
                 markdown.append(quote_answer(answer_text))
+            yield "".join(markdown)
+        yield "\n"  # Add an empty line for spacing between sections
 
-        markdown.append("\n")  # Add an empty line for spacing between sections
 
-    return "".join(markdown)
+def generate_markdown_from_assay(assay: Assay, source: ExportSource | None = None) -> str:
+    """Generate markdown from assay (see :func:`iter_markdown_from_assay`)."""
+    return "".join(iter_markdown_from_assay(assay, source))
 
 
-def get_create_meta_data_yaml(
-    request: HttpRequest, assay: Assay, file_path: Path, export_type: str = "pdf"
-) -> Path:
-    """Create meta data yaml file for pandoc.
-
-    Args:
-        request: The current HTTP request (used for author metadata).
-        assay: The assay being exported.
-        file_path: Destination file path; the YAML file is written alongside it.
-        export_type: The export format (e.g. ``"pdf"``, ``"tex"``).  When
-            ``"tex"``, fontspec and unicode-math are wrapped in an ``iftex``
-            conditional so the generated ``.tex`` file also compiles with
-            pdfLaTeX.
+def export_document_metadata(
+    assay: Assay, export_type: str = "pdf", metadata: dict | None = None
+) -> dict:
+    """Return the document metadata (title, authors, date, TeX header) of an export.
 
+    Pandoc receives this as its YAML metadata file; the in-process renderers in
+    :mod:`toxtempass.native_export` use the same values for the title block.
     """
     # get date:
     # Define the Amsterdam timezone (UTC+1)
@@ -485,8 +627,11 @@ def get_create_meta_data_yaml(
             r"\usepackage[a4paper, margin=3cm]{geometry}",
         ]
 
-    author_metadata = get_assay_export_author_metadata(assay)
-    metadata_dict = {
+    if metadata is not None:
+        author_metadata = metadata
+    else:
+        author_metadata = get_assay_export_author_metadata(assay)
+    return {
         "author": author_metadata["author"],
         "authors": author_metadata["authors"],
         "date": str(current_date),  # Current date;
@@ -500,47 +645,223 @@ def get_create_meta_data_yaml(
         "toc": "true",
         "toc-title": "Table of Contents",
     }
+
+
+def get_create_meta_data_yaml(
+    request: HttpRequest | None,
+    assay: Assay,
+    file_path: Path,
+    export_type: str = "pdf",
+    source: ExportSource | None = None,
+) -> Path:
+    """Create meta data yaml file for pandoc.
+
+    Args:
+        request: The current HTTP request (used for author metadata).
+        assay: The assay being exported.
+        file_path: Destination file path; the YAML file is written alongside it.
+        export_type: The export format (e.g. ``"pdf"``, ``"tex"``).  When
+            ``"tex"``, fontspec and unicode-math are wrapped in an ``iftex``
+            conditional so the generated ``.tex`` file also compiles with
+            pdfLaTeX.
+        source: The export's :class:`ExportSource`; when given, the author
+            metadata is taken from it instead of queried again.
+
+    """
+    metadata_dict = export_document_metadata(
+        assay, export_type, source.metadata if source is not None else None
+    )
     yaml_file_path = file_path.with_name("yaml" + file_path.name).with_suffix(".yaml")
     with open(yaml_file_path, "w") as file:
         yaml.dump(metadata_dict, file, default_flow_style=False)
     return yaml_file_path
 
 
-def export_assay_to_file(
-    request: HttpRequest, assay: Assay, export_type: str
-) -> FileResponse:
-    """Export assay to file."""
-    # EXPORT_MAPPING (defined in toxtempass/__init__.py) is the single security
-    # gate: only types with both trusted Pandoc options and known MIME/suffix
-    # metadata are permitted.
-    if export_type not in EXPORT_MAPPING or export_type not in EXPORT_MIME_SUFFIX:
-        return JsonResponse({"error": "Invalid export type"}, status=400)
-    mapped_suffix = EXPORT_MIME_SUFFIX[export_type]["suffix"]
-    file_name = f"toxtemp_{slugify(assay.title)}{mapped_suffix}"
+def export_content_digest(export_data: dict, export_type: str) -> str:
+    """Return a stable SHA-256 digest of *export_data* rendered as *export_type*.
+
+    *export_data* is the exported content as plain data, normally
+    :meth:`ExportSource.fingerprint`.
+
+    ``metadata.creation_date`` is left out so an unchanged assay always maps to
+    the same digest; the build version and git hash in ``metadata.config`` plus
+    ``Config.export_cache_version`` tie the digest to the export code.
+    """
+    metadata = {
+        key: value
+        for key, value in (export_data.get("metadata") or {}).items()
+        if key != "creation_date"
+    }
+    payload = {
+        "cache_version": Config.export_cache_version,
+        "export_type": export_type,
+        "pandoc_options": list(EXPORT_MAPPING[export_type]),
+        "renderer": "native" if uses_native_renderer(export_type) else "pandoc",
+        "data": {**export_data, "metadata": metadata},
+    }
+    canonical = json.dumps(payload, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def uses_native_renderer(export_type: str) -> bool:
+    """Return whether *export_type* is rendered in-process instead of by Pandoc."""
+    return Config.native_export_enabled and export_type in NATIVE_EXPORT_TYPES
+
+
+def _export_cache_dir(assay_id: int, export_type: str | None = None) -> str:
+    base = f"{Config.export_cache_prefix}/{assay_id}"
+    return f"{base}/{export_type}" if export_type else base
+
+
+def export_cache_key(assay: Assay, export_type: str, digest: str) -> str:
+    """Return the storage key of the cached *export_type* artifact for *digest*."""
+    suffix = EXPORT_MIME_SUFFIX[export_type]["suffix"]
+    return f"{_export_cache_dir(assay.id, export_type)}/{digest}{suffix}"
+
+
+def read_cached_export(key: str) -> bytes | None:
+    """Return the cached artifact stored under *key*, or ``None`` on a miss.
+
+    Storage errors are logged and treated as a miss so exports never fail
+    because of the cache.
+    """
+    try:
+        if not default_storage.exists(key):
+            return None
+        with default_storage.open(key, "rb") as cached_file:
+            return cached_file.read()
+    except Exception:
+        logger.warning("Export cache read failed for %s", key, exc_info=True)
+        return None
+
+
+def store_cached_export(key: str, content: bytes) -> None:
+    """Store *content* under *key* and drop older artifacts of the same type.
+
+    Only the artifact for the current digest is kept per assay and export
+    type, so the cache does not grow with every edit.
+    """
+    directory = key.rsplit("/", 1)[0]
+    try:
+        if not default_storage.exists(key):
+            default_storage.save(key, ContentFile(content))
+        _, file_names = default_storage.listdir(directory)
+        for name in file_names:
+            stale_key = f"{directory}/{name}"
+            if stale_key != key:
+                default_storage.delete(stale_key)
+    except Exception:
+        logger.warning("Export cache write failed for %s", key, exc_info=True)
+
+
+def delete_cached_exports(assay_id: int) -> None:
+    """Remove every cached export artifact of *assay_id* from storage."""
+    directory = _export_cache_dir(assay_id)
+    try:
+        export_types, _ = default_storage.listdir(directory)
+        for export_type in export_types:
+            type_dir = f"{directory}/{export_type}"
+            _, file_names = default_storage.listdir(type_dir)
+            for name in file_names:
+                default_storage.delete(f"{type_dir}/{name}")
+    except FileNotFoundError:
+        return
+    except Exception:
+        logger.warning("Failed to delete cached exports for assay %s", assay_id, exc_info=True)
+
+
+@dataclass
+class ExportArtifact:
+    """A rendered export and whether it came from the storage cache."""
+
+    content: bytes
+    cache_key: str | None
+    cache_hit: bool
+    render_seconds: float | None = None
+
+
+def export_file_name(assay: Assay, export_type: str) -> str:
+    """Return the download file name for *assay* exported as *export_type*."""
+    return f"toxtemp_{slugify(assay.title)}{EXPORT_MIME_SUFFIX[export_type]['suffix']}"
+
+
+def _render_native(assay: Assay, export_type: str, source: ExportSource) -> bytes | None:
+    """Render with :mod:`toxtempass.native_export`; ``None`` means use Pandoc."""
+    from toxtempass.native_export import NativeExportUnsupported, render_native_export
+
+    try:
+        return render_native_export(assay, export_type, source)
+    except NativeExportUnsupported as exc:
+        logger.debug("Falling back to Pandoc for assay %s (%s): %s", assay.id, export_type, exc)
+        return None
+
+
+def export_source_cache_key(source: ExportSource, export_type: str) -> str:
+    """Return the export cache key of *source*'s current content as *export_type*."""
+    return export_cache_key(
+        source.assay,
+        export_type,
+        export_content_digest(source.fingerprint(), export_type),
+    )
 
+
+def render_export(
+    request: HttpRequest | None,
+    assay: Assay,
+    export_type: str,
+    source: ExportSource | None = None,
+) -> bytes:
+    """Render *assay* as *export_type* and return the file content.
+
+    Document types are written from *source* (built from *assay* when not
+    given); with a prefetched *source* this does no database access, so it can
+    run in a worker thread. The markdown for Pandoc is written to disk chunk by
+    chunk as it is generated. JSON is built with :func:`generate_json_from_assay`.
+
+    Markdown, HTML and DOCX are rendered in-process when
+    ``Config.native_export_enabled`` is set, unless the document needs Pandoc
+    (see :mod:`toxtempass.native_export`).
+
+    Raises:
+        subprocess.CalledProcessError: Pandoc exited with a non-zero status.
+
+    """
+    if export_type != "json" and source is None:
+        with span("export.prefetch"):
+            source = ExportSource(assay)
+
+    if uses_native_renderer(export_type):
+        with span("export.native") as native_span:
+            content = _render_native(assay, export_type, source)
+            native_span.set_attribute("fallback", content is None)
+        if content is not None:
+            return content
+
+    file_name = export_file_name(assay, export_type)
     # All export artefacts are written to a short-lived temp directory; nothing
     # is stored permanently on the container filesystem.
     with tempfile.TemporaryDirectory() as tmp_dir:
         file_path = Path(tmp_dir) / file_name
 
-        export_data = None
         if export_type == "json":
-            export_data = generate_json_from_assay(assay)
-            with file_path.open("w", encoding="utf-8") as json_file:
-                json.dump(export_data, json_file, indent=4)
+            with span("export.json"), file_path.open("w", encoding="utf-8") as json_file:
+                json.dump(generate_json_from_assay(assay), json_file, indent=4)
 
         elif export_type in PANDOC_EXPORT_TYPES:
             # Generate the markdown file
-            export_data = generate_markdown_from_assay(assay)
             md_file_path = file_path.with_name(f"{file_path.stem}_md").with_suffix(
                 ".md"
             )
-            with md_file_path.open("w", encoding="utf-8") as md_file:
-                md_file.write(export_data)
-
-            yaml_metadata_file_path = get_create_meta_data_yaml(
-                request, assay, file_path, export_type
-            )
+            with (
+                span("export.markdown"),
+                md_file_path.open("w", encoding="utf-8") as md_file,
+            ):
+                md_file.writelines(iter_markdown_from_assay(assay, source))
+
+            with span("export.metadata"):
+                yaml_metadata_file_path = get_create_meta_data_yaml(
+                    request, assay, file_path, export_type, source=source
+                )
 
             # Convert the markdown file to the requested format using Pandoc
             pandoc_command = [
@@ -553,43 +874,103 @@ def export_assay_to_file(
             # Add ONLY safe mapped Pandoc options
             pandoc_command.extend(EXPORT_MAPPING[export_type])
             pandoc_command.extend(["-o", str(file_path)])
-
-            try:
+            with span("export.pandoc"):
                 subprocess.run(pandoc_command, check=True)  # noqa: S603
-            except subprocess.CalledProcessError as e:
-                corr_id = uuid.uuid4().hex[:8]
-                logger.exception(
-                    "Pandoc conversion failed [corr=%s] for assay %s", corr_id, assay.id
-                )
-                log_processing_event(assay, f"[{corr_id}] {type(e).__name__}: {e}")
-                assay.save()
-                return JsonResponse(
-                    {
-                        "error": f"Export failed (ref {corr_id}). "
-                        "Please contact support if the issue persists."
-                    },
-                    status=500,
-                )
-            except Exception as e:
-                corr_id = uuid.uuid4().hex[:8]
-                logger.exception(
-                    "Unexpected export error [corr=%s] for assay %s", corr_id, assay.id
-                )
-                log_processing_event(assay, f"[{corr_id}] {type(e).__name__}: {e}")
-                assay.save()
-                return JsonResponse(
-                    {
-                        "error": f"Export failed (ref {corr_id}). "
-                        "Please contact support if the issue persists."
-                    },
-                    status=500,
-                )
 
         # Read the output file into memory so it can be served after the temp
         # directory is cleaned up.
-        file_content = file_path.read_bytes()
+        return file_path.read_bytes()
+
 
-    # Prepare the response for the generated file
+def render_export_artifact(
+    request: HttpRequest | None,
+    assay: Assay,
+    export_type: str,
+    *,
+    use_cache: bool | None = None,
+) -> ExportArtifact:
+    """Return the rendered *export_type* file for *assay*.
+
+    Pandoc renders are served from storage when the exported content is
+    unchanged. The artifact keeps the date of its first render, so repeated
+    downloads of the same content are byte-identical.
+
+    Args:
+        request: The current request, if any (exports queued as jobs have none).
+        assay: The assay to export.
+        export_type: A key of ``EXPORT_MAPPING``.
+        use_cache: Override ``Config.export_cache_enabled``.
+
+    Raises:
+        subprocess.CalledProcessError: Pandoc exited with a non-zero status.
+
+    """
+    if use_cache is None:
+        use_cache = Config.export_cache_enabled
+    with span(
+        "export.artifact", assay_id=assay.id, export_type=export_type
+    ) as artifact_span:
+        source = None
+        cache_key = None
+        if use_cache and export_type in PANDOC_EXPORT_TYPES:
+            with span("export.cache_lookup") as lookup_span:
+                source = ExportSource(assay)
+                try:
+                    cache_key = export_source_cache_key(source, export_type)
+                except Exception:
+                    logger.warning(
+                        "Export cache digest failed for assay %s", assay.id, exc_info=True
+                    )
+                    source = None
+                cached_content = read_cached_export(cache_key) if cache_key else None
+                lookup_span.set_attribute("hit", cached_content is not None)
+            if cached_content is not None:
+                logger.debug("Export cache hit for %s", cache_key)
+                artifact_span.set_attribute("cache_hit", True)
+                return ExportArtifact(cached_content, cache_key, cache_hit=True)
+
+        started = time.perf_counter()
+        content = render_export(request, assay, export_type, source)
+        render_seconds = time.perf_counter() - started
+        logger.info(
+            "Rendered %s export for assay %s in %.2fs",
+            export_type,
+            assay.id,
+            render_seconds,
+        )
+        if cache_key:
+            with span("export.cache_store", bytes=len(content)):
+                store_cached_export(cache_key, content)
+        artifact_span.set_attribute("cache_hit", False)
+        return ExportArtifact(
+            content, cache_key, cache_hit=False, render_seconds=render_seconds
+        )
+
+
+def export_error_response(
+    assay: Assay, exc: Exception, log_message: str
+) -> JsonResponse:
+    """Log *exc* under a correlation id and return a generic 500 response.
+
+    The correlation id is written to ``assay.processing_log`` (internal only)
+    so support can find the traceback in the error log.
+    """
+    corr_id = uuid.uuid4().hex[:8]
+    logger.exception(log_message, corr_id, assay.id)
+    log_processing_event(assay, f"[{corr_id}] {type(exc).__name__}: {exc}")
+    assay.save()
+    return JsonResponse(
+        {
+            "error": f"Export failed (ref {corr_id}). "
+            "Please contact support if the issue persists."
+        },
+        status=500,
+    )
+
+
+def _export_file_response(
+    assay: Assay, file_content: bytes, file_name: str, export_type: str
+) -> FileResponse | JsonResponse:
     try:
         return FileResponse(
             io.BytesIO(file_content),
@@ -598,17 +979,36 @@ def export_assay_to_file(
             content_type=EXPORT_MIME_SUFFIX[export_type]["mime_type"],
         )
     except Exception as e:
-        corr_id = uuid.uuid4().hex[:8]
-        logger.exception(
-            "FileResponse construction failed [corr=%s] for assay %s",
-            corr_id, assay.id,
-        )
-        log_processing_event(assay, f"[{corr_id}] {type(e).__name__}: {e}")
-        assay.save()
-        return JsonResponse(
-            {
-                "error": f"Export failed (ref {corr_id}). "
-                "Please contact support if the issue persists."
-            },
-            status=500,
+        return export_error_response(
+            assay, e, "FileResponse construction failed [corr=%s] for assay %s"
         )
+
+
+def export_assay_to_file(
+    request: HttpRequest, assay: Assay, export_type: str
+) -> FileResponse:
+    """Export assay to file."""
+    # EXPORT_MAPPING (defined in toxtempass/__init__.py) is the single security
+    # gate: only types with both trusted Pandoc options and known MIME/suffix
+    # metadata are permitted.
+    if export_type not in EXPORT_MAPPING or export_type not in EXPORT_MIME_SUFFIX:
+        return JsonResponse({"error": "Invalid export type"}, status=400)
+
+    with span("export", assay_id=assay.id, export_type=export_type) as export_span:
+        try:
+            artifact = render_export_artifact(request, assay, export_type)
+        except subprocess.CalledProcessError as e:
+            export_span.set_attribute("error", f"{type(e).__name__}: {e}"[:400])
+            return export_error_response(
+                assay, e, "Pandoc conversion failed [corr=%s] for assay %s"
+            )
+        except Exception as e:
+            export_span.set_attribute("error", f"{type(e).__name__}: {e}"[:400])
+            return export_error_response(
+                assay, e, "Unexpected export error [corr=%s] for assay %s"
+            )
+
+        with span("export.response", bytes=len(artifact.content)):
+            return _export_file_response(
+                assay, artifact.content, export_file_name(assay, export_type), export_type
+            )
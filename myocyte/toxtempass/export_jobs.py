@@ -0,0 +1,273 @@
+"""Asynchronous export jobs rendered on the dedicated ``exports`` cluster.
+
+:func:`enqueue_export_job` records an :class:`~toxtempass.models.ExportJob` and
+queues :func:`run_export_job` with django-q on ``config.export_job_cluster``,
+whose worker count (``EXPORT_RENDER_WORKERS``) bounds concurrent Pandoc builds
+independently of the LLM workers. The rendered file is stored in
+``default_storage`` — under the export cache key when there is one, so a later
+job for unchanged content is ready immediately — and the client polls
+:func:`export_job_payload` until it can download it. A request for an assay and
+format that already has a job in flight gets that job back instead of a second
+render.
+
+Bulk ZIP exports of several assays are export jobs too, rendered by
+:func:`toxtempass.bulk_export.run_bulk_export_job`.
+
+The exports cluster does not retry tasks, so :func:`sweep_export_jobs` runs on
+a schedule (migration 0047) to fail jobs whose worker died and to delete old
+jobs together with their per-job artifacts.
+"""
+
+import logging
+import subprocess
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from django.urls import reverse
+from django.utils import timezone
+from django_q.tasks import async_task
+
+from toxtempass import config
+from toxtempass.export import (
+    EXPORT_MIME_SUFFIX,
+    PANDOC_EXPORT_TYPES,
+    ExportSource,
+    export_file_name,
+    export_source_cache_key,
+    render_export_artifact,
+)
+from toxtempass.models import Assay, ExportJob, Person
+from toxtempass.utilities import log_processing_event
+
+logger = logging.getLogger(__name__)
+
+_FAILED_MESSAGE = (
+    "Export failed (ref {corr_id}). Please contact support if the issue persists."
+)
+_STALE_MESSAGE = "The export did not finish in time. Please export again."
+
+# export_type of bulk ZIP jobs (toxtempass.bulk_export), which have no assay.
+BULK_EXPORT_TYPE = "zip"
+
+_IN_FLIGHT = (ExportJob.Status.QUEUED, ExportJob.Status.RUNNING)
+_FINISHED = (ExportJob.Status.DONE, ExportJob.Status.FAILED)
+
+
+def _job_artifact_key(job: ExportJob) -> str:
+    suffix = EXPORT_MIME_SUFFIX[job.export_type]["suffix"]
+    return f"{config.export_job_prefix}/{job.id}{suffix}"
+
+
+def export_job_mime_type(job: ExportJob) -> str:
+    """Return the content type of *job*'s artifact."""
+    if job.export_type == BULK_EXPORT_TYPE:
+        return "application/zip"
+    return EXPORT_MIME_SUFFIX[job.export_type]["mime_type"]
+
+
+def _cached_artifact_key(assay: Assay, export_type: str) -> str | None:
+    """Return the export cache key for *assay* if its artifact is already stored."""
+    if not config.export_cache_enabled or export_type not in PANDOC_EXPORT_TYPES:
+        return None
+    try:
+        key = export_source_cache_key(ExportSource(assay), export_type)
+        return key if default_storage.exists(key) else None
+    except Exception:
+        logger.warning("Export cache lookup failed for assay %s", assay.id, exc_info=True)
+        return None
+
+
+def enqueue_export_job(assay: Assay, export_type: str, user: Person) -> ExportJob:
+    """Create an export job for *assay* and queue its render.
+
+    When the artifact for the current content is already cached the job is
+    returned as ``done`` without touching the queue, and when a job for the
+    same assay and format is still queued or running that job is returned. If
+    the render cannot be queued the job is returned as ``failed``.
+    """
+    in_flight = (
+        ExportJob.objects.filter(
+            assay=assay,
+            export_type=export_type,
+            status__in=_IN_FLIGHT,
+            created_at__gte=timezone.now()
+            - timedelta(seconds=config.export_job_queue_stale_seconds),
+        )
+        .order_by("-created_at")
+        .first()
+    )
+    if in_flight is not None:
+        logger.info(
+            "Reusing %s export job %s for assay %s", export_type, in_flight.id, assay.id
+        )
+        return in_flight
+
+    job = ExportJob(
+        assay=assay,
+        requested_by=user,
+        export_type=export_type,
+        file_name=export_file_name(assay, export_type),
+    )
+    cached_key = _cached_artifact_key(assay, export_type)
+    if cached_key:
+        now = timezone.now()
+        job.status = ExportJob.Status.DONE
+        job.artifact_key = cached_key
+        job.cache_hit = True
+        job.started_at = job.finished_at = now
+        job.save()
+        return job
+
+    job.save()
+    return queue_export_job(job, "toxtempass.export_jobs.run_export_job")
+
+
+def queue_export_job(job: ExportJob, func: str) -> ExportJob:
+    """Queue *func* for the saved *job* on the exports cluster.
+
+    If the task cannot be queued the job is marked ``failed``. Returns the job
+    as stored after queueing (in sync mode the task has already run).
+    """
+    try:
+        task_id = async_task(
+            func,
+            str(job.id),
+            group=config.export_job_group,
+            cluster=config.export_job_cluster,
+        )
+    except Exception:
+        corr_id = job.id.hex[:8]
+        logger.exception("Could not queue export job %s [corr=%s]", job.id, corr_id)
+        ExportJob.objects.filter(pk=job.pk, status=ExportJob.Status.QUEUED).update(
+            status=ExportJob.Status.FAILED,
+            error=_FAILED_MESSAGE.format(corr_id=corr_id),
+            finished_at=timezone.now(),
+        )
+        job.refresh_from_db()
+        return job
+    # In sync mode the task has already run and saved the job; only store the
+    # task id on top of whatever state it left.
+    ExportJob.objects.filter(pk=job.pk).update(task_id=str(task_id or ""))
+    job.refresh_from_db()
+    logger.info("Queued %s export job %s", job.export_type, job.id)
+    return job
+
+
+def run_export_job(job_id: str) -> str | None:
+    """Render the export for *job_id* and store it; runs on the exports cluster.
+
+    Returns:
+        The storage key of the artifact, or ``None`` when the job failed or
+        no longer exists.
+
+    """
+    try:
+        job = ExportJob.objects.select_related("assay").get(pk=job_id)
+    except ExportJob.DoesNotExist:
+        logger.info("Export job %s was deleted before it ran.", job_id)
+        return None
+
+    job.status = ExportJob.Status.RUNNING
+    job.started_at = timezone.now()
+    job.save(update_fields=["status", "started_at"])
+
+    assay = job.assay
+    try:
+        artifact = render_export_artifact(None, assay, job.export_type, use_cache=True)
+        artifact_key = artifact.cache_key
+        if not artifact_key or not default_storage.exists(artifact_key):
+            # Not cacheable (JSON) or the cache write failed: keep a job copy.
+            artifact_key = default_storage.save(
+                _job_artifact_key(job), ContentFile(artifact.content)
+            )
+    except Exception as e:
+        corr_id = job.id.hex[:8]
+        if isinstance(e, subprocess.CalledProcessError):
+            logger.exception(
+                "Pandoc conversion failed [corr=%s] for assay %s", corr_id, assay.id
+            )
+        else:
+            logger.exception(
+                "Unexpected export error [corr=%s] for assay %s", corr_id, assay.id
+            )
+        log_processing_event(assay, f"[{corr_id}] {type(e).__name__}: {e}")
+        assay.save()
+        job.status = ExportJob.Status.FAILED
+        job.error = _FAILED_MESSAGE.format(corr_id=corr_id)
+        job.finished_at = timezone.now()
+        job.save(update_fields=["status", "error", "finished_at"])
+        return None
+
+    job.status = ExportJob.Status.DONE
+    job.artifact_key = artifact_key
+    job.cache_hit = artifact.cache_hit
+    job.render_seconds = artifact.render_seconds
+    job.finished_at = timezone.now()
+    job.save(
+        update_fields=[
+            "status",
+            "artifact_key",
+            "cache_hit",
+            "render_seconds",
+            "finished_at",
+        ]
+    )
+    return artifact_key
+
+
+def sweep_export_jobs() -> dict[str, int]:
+    """Fail export jobs whose worker died and delete old ones; runs on a schedule.
+
+    Queued jobs fail after ``config.export_job_queue_stale_seconds`` (counted
+    from their last run for bulk jobs that queued themselves again), running
+    ones after ``config.export_job_stale_seconds``. Finished jobs older than
+    ``config.export_job_retention_days`` are deleted with their per-job
+    artifact; artifacts in the export cache are shared and left alone.
+    """
+    now = timezone.now()
+    queue_cutoff = now - timedelta(seconds=config.export_job_queue_stale_seconds)
+    failed = ExportJob.objects.filter(
+        (
+            Q(status=ExportJob.Status.QUEUED, created_at__lt=queue_cutoff)
+            & (Q(started_at__isnull=True) | Q(started_at__lt=queue_cutoff))
+        )
+        | Q(
+            status=ExportJob.Status.RUNNING,
+            started_at__lt=now - timedelta(seconds=config.export_job_stale_seconds),
+        )
+    ).update(status=ExportJob.Status.FAILED, error=_STALE_MESSAGE, finished_at=now)
+    if failed:
+        logger.warning("Failed %d stale export job(s)", failed)
+
+    expired = ExportJob.objects.filter(
+        status__in=_FINISHED,
+        created_at__lt=now - timedelta(days=config.export_job_retention_days),
+    )
+    keys = expired.filter(
+        artifact_key__startswith=f"{config.export_job_prefix}/"
+    ).values_list("artifact_key", flat=True)
+    for key in keys.iterator():
+        try:
+            default_storage.delete(key)
+        except Exception:
+            logger.warning("Could not delete export artifact %s", key, exc_info=True)
+    deleted, _ = expired.delete()
+    return {"failed": failed, "deleted": deleted}
+
+
+def export_job_payload(job: ExportJob) -> dict:
+    """Return the JSON status of *job* for the polling client."""
+    payload = {
+        "job_id": str(job.id),
+        "status": job.status,
+        "export_type": job.export_type,
+        "cache_hit": job.cache_hit,
+        "render_seconds": job.render_seconds,
+    }
+    if job.status == ExportJob.Status.DONE:
+        payload["download_url"] = reverse("export_job_download", args=[job.id])
+    elif job.status == ExportJob.Status.FAILED:
+        payload["error"] = job.error
+    return payload
@@ -4,14 +4,17 @@ import hashlib
 import json
 import logging
 import mimetypes
+import queue
 import shutil
 import tempfile
+import threading
 import warnings
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor, wait
 from io import BytesIO
 from pathlib import Path
 from typing import TYPE_CHECKING
 from zipfile import ZipFile
-from zipfile import ZipFile as ZipFileLib
 
 import tiktoken
 from django.core.files.storage import default_storage
@@ -30,10 +33,13 @@ from langchain_core.messages import HumanMessage, SystemMessage
 from PIL import Image
 from pypdf import PdfReader
 from pypdf._page import PageObject
+from simple_history.utils import bulk_create_with_history
 
 from toxtempass import config
 from toxtempass.llm import get_llm
-from toxtempass.models import AnswerFile, Assay, FileAsset, FileDownloadLog, Person
+from toxtempass.models import Assay, FileAsset, FileDownloadLog, Person
+from toxtempass.tracing import span
+from toxtempass.zip_stream import stream_zip
 
 try:
     import openpyxl
@@ -150,31 +156,39 @@ def _format_image_description(
 
 def summarize_image_entries(doc_dict: dict[str, dict[str, str]]) -> None:
     """Convert encoded image entries in-place to textual summaries."""
-    for key in list(doc_dict.keys()):
-        meta = doc_dict[key]
-        if "encodedbytes" not in meta:
-            continue
-
+    image_keys = [key for key, meta in doc_dict.items() if "encodedbytes" in meta]
+    with span("ingest.describe_images", images=len(image_keys)):
+        for key in image_keys:
+            _summarize_image_entry(doc_dict, key)
+
+
+def _summarize_image_entry(doc_dict: dict[str, dict[str, str]], key: str) -> None:
+    meta = doc_dict[key]
+    with span(
+        "ingest.describe_image",
+        document=Path(meta.get("source_document", key)).name,
+        page=meta.get("page_number"),
+    ):
         description = _describe_image(
             meta.get("encodedbytes", ""),
             Path(key).name,
             meta.get("mime_type"),
             meta.get("page_context"),
         )
-        if not description:
-            logger.info("Removing image %s due to empty or ignored description.", key)
-            doc_dict.pop(key)
-            continue
-
-        doc_dict[key] = {
-            "text": _format_image_description(
-                description,
-                meta.get("source_document", key),
-                meta.get("page_number"),
-            ),
-            "source_document": meta.get("source_document", key),
-            "origin": "image_description",
-        }
+    if not description:
+        logger.info("Removing image %s due to empty or ignored description.", key)
+        doc_dict.pop(key)
+        return
+
+    doc_dict[key] = {
+        "text": _format_image_description(
+            description,
+            meta.get("source_document", key),
+            meta.get("page_number"),
+        ),
+        "source_document": meta.get("source_document", key),
+        "origin": "image_description",
+    }
 
 
 def _convert_image_to_webp(
@@ -807,7 +821,10 @@ def get_text_or_imagebytes_from_django_uploaded_file(
             original_names[temp_path_str] = file.name
 
     # md5_dict = calculate_md5_multiplefiles(temp_files)
-    text_dict = get_text_or_bytes_perfile_dict(temp_files, extract_images=extract_images)
+    with span("ingest.extract", files=len(temp_files), extract_images=extract_images):
+        text_dict = get_text_or_bytes_perfile_dict(
+            temp_files, extract_images=extract_images
+        )
 
     # Determine which input files produced no output entry at all.
     # Every successfully processed file leaves at least one entry whose
@@ -876,9 +893,94 @@ def collect_source_documents(doc_dict: dict[str, dict[str, str]]) -> list[str]:
     return ordered
 
 
-def _calculate_sha256(file_bytes: bytes) -> str:
-    """Calculate SHA256 hash for file bytes."""
-    return hashlib.sha256(file_bytes).hexdigest()
+class HashingUploadStream:
+    """Read-only, non-seekable stream over an upload's chunks.
+
+    The SHA-256 and size are updated as chunks are pulled, so hashing happens
+    in the same single pass that feeds the storage backend. Being
+    non-seekable makes the S3 backend upload it as a multipart stream one
+    part at a time instead of rewinding or reading it whole.
+    """
+
+    def __init__(self, chunks: Iterable[bytes]) -> None:
+        self._chunks = iter(chunks)
+        self._pending = b""
+        self._sha256 = hashlib.sha256()
+        self.size = 0
+        self.closed = False
+
+    def _next_chunk(self) -> bytes:
+        for chunk in self._chunks:
+            if chunk:
+                self._sha256.update(chunk)
+                self.size += len(chunk)
+                return chunk
+        return b""
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return False
+
+    def read(self, size: int = -1) -> bytes:
+        """Return up to *size* bytes (fewer only at end of stream)."""
+        parts = [self._pending] if self._pending else []
+        available = len(self._pending)
+        self._pending = b""
+        while size < 0 or available < size:
+            chunk = self._next_chunk()
+            if not chunk:
+                break
+            parts.append(chunk)
+            available += len(chunk)
+        data = b"".join(parts)
+        if size >= 0 and len(data) > size:
+            data, self._pending = data[:size], data[size:]
+        return data
+
+    def hexdigest(self) -> str:
+        """Return the SHA-256 of the whole upload, consuming any unread rest."""
+        self._pending = b""
+        while self._next_chunk():
+            pass
+        return self._sha256.hexdigest()
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def content_object_key(sha256_hash: str) -> str:
+    """Return the content-addressed storage key for a file with this SHA-256.
+
+    Consented uploads are stored once per content hash; every ``FileAsset``
+    with the same ``sha256`` points at the same object.
+    """
+    return f"{config.file_blob_prefix}/{sha256_hash[:2]}/{sha256_hash}"
+
+
+def _hash_upload(file: UploadedFile) -> tuple[int, str]:
+    """Return the size and SHA-256 of *file*, reading it chunk by chunk."""
+    stream = HashingUploadStream(file.chunks(chunk_size=config.upload_chunk_size))
+    digest = stream.hexdigest()  # consumes the stream, so ``size`` is final
+    return stream.size, digest
+
+
+def _upload_to_storage(file: UploadedFile, object_key: str, sha256_hash: str) -> None:
+    """Stream *file* to *object_key*, checking it still hashes to *sha256_hash*."""
+    stream = HashingUploadStream(file.chunks(chunk_size=config.upload_chunk_size))
+    saved_key = default_storage.save(object_key, stream)
+    if saved_key != object_key:
+        # The backend did not overwrite: *object_key* already exists. Its content
+        # is addressed by the same hash, so keep it and drop the renamed copy.
+        default_storage.delete(saved_key)
+    if stream.hexdigest() != sha256_hash:
+        raise ValueError(f"File {file.name} changed while it was being stored.")
+    logger.info(
+        "Successfully uploaded file %s to storage: %s",
+        file.name,
+        object_key,
+    )
 
 
 def store_files_to_storage(
@@ -889,6 +991,14 @@ def store_files_to_storage(
 ) -> list["FileAsset"]:
     """Store uploaded files to S3/MinIO if user consented.
 
+    Storage is content-addressed (see :func:`content_object_key`): each file is
+    hashed first, and only content that no available ``FileAsset`` already
+    references is uploaded. Uploads are streamed chunk by chunk (see
+    :class:`HashingUploadStream`) on up to ``config.upload_storage_workers``
+    threads; the ``FileAsset`` rows — one per uploaded file, even when the
+    content is shared — are created afterwards in one insert, in the order of
+    *files*.
+
     Args:
         files: List of uploaded files from the form
         user: Person object (uploader)
@@ -899,10 +1009,12 @@ def store_files_to_storage(
         List of created FileAsset objects (empty if no consent)
 
     Raises:
-        Exception: If file storage fails (propagates after logging)
+        Exception: If file storage fails (propagates after logging); objects
+            uploaded in the same call and not referenced elsewhere are removed
+            again.
+
     """
     from toxtempass.models import FileAsset
-    import uuid
 
     if not consent:
         logger.debug("User did not consent to file storage; skipping storage.")
@@ -912,64 +1024,95 @@ def store_files_to_storage(
         logger.debug("No files provided for storage.")
         return []
 
-    created_assets: list[FileAsset] = []
-
-    for file in files:
-        try:
-            # Read file content
-            file_content = b""
-            for chunk in file.chunks():
-                file_content += chunk
-
-            # Calculate metadata
-            file_size = len(file_content)
-            sha256_hash = _calculate_sha256(file_content)
-            content_type = (
-                getattr(file, "content_type", "")
-                or mimetypes.guess_type(file.name)[0]
-                or ""
-            )
+    workers = max(1, min(config.upload_storage_workers, len(files)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        digests = list(pool.map(_hash_upload, files))
+        object_keys = [content_object_key(sha256_hash) for _, sha256_hash in digests]
 
-            # Generate S3 object key using user/assay structure
-            # Format: consent_user_documents/{user.email}/{assay.id}/{uuid}/{filename}
-            object_key = (
-                f"consent_user_documents/{user.email}/assay/{assay.id}/"
-                f"{uuid.uuid4()}/"
-                f"{Path(file.name).name}"
-            )
+        stored_keys = set(
+            FileAsset.objects.filter(
+                object_key__in=object_keys, status=FileAsset.Status.AVAILABLE
+            ).values_list("object_key", flat=True)
+        )
+        # One upload per new content hash, however often it appears in *files*.
+        uploads = {}
+        for file, object_key, (_, sha256_hash) in zip(files, object_keys, digests):
+            if object_key not in stored_keys and object_key not in uploads:
+                uploads[object_key] = (file, sha256_hash)
+        logger.debug(
+            "Uploading %d of %d files; the rest are already stored.",
+            len(uploads),
+            len(files),
+        )
+        futures = {
+            object_key: pool.submit(_upload_to_storage, file, object_key, sha256_hash)
+            for object_key, (file, sha256_hash) in uploads.items()
+        }
+        wait(futures.values())
 
-            # Upload to storage using BytesIO from file_content
-            # (file pointer is exhausted after chunks() call above)
-            file_obj = BytesIO(file_content)
-            default_storage.save(object_key, file_obj)
-            logger.info(
-                "Successfully uploaded file %s to storage: %s",
+    failures = [
+        (uploads[object_key][0], future.exception())
+        for object_key, future in futures.items()
+        if future.exception() is not None
+    ]
+    if failures:
+        for file, exc in failures:
+            logger.error(
+                "Failed to store file %s for user %s on assay %s: %s",
                 file.name,
-                object_key,
+                user.email,
+                assay.id,
+                exc,
+                exc_info=exc,
             )
-
-            # Create FileAsset record
-            asset = FileAsset.objects.create(
+        # Don't leave objects behind that no FileAsset row points to.
+        uploaded = [key for key, future in futures.items() if future.exception() is None]
+        referenced = set(
+            FileAsset.objects.filter(object_key__in=uploaded).values_list(
+                "object_key", flat=True
+            )
+        )
+        for object_key in uploaded:
+            if object_key in referenced:
+                continue
+            try:
+                default_storage.delete(object_key)
+            except Exception:
+                logger.exception("Failed to remove uploaded object %s", object_key)
+        raise failures[0][1]
+
+    created_assets = FileAsset.objects.bulk_create(
+        [
+            FileAsset(
                 object_key=object_key,
                 original_filename=file.name,
-                content_type=content_type,
-                size_bytes=file_size,
+                content_type=(
+                    getattr(file, "content_type", "")
+                    or mimetypes.guess_type(file.name)[0]
+                    or ""
+                ),
+                size_bytes=size_bytes,
                 sha256=sha256_hash,
                 status=FileAsset.Status.AVAILABLE,
                 uploaded_by=user,
             )
-            created_assets.append(asset)
-            logger.debug("Created FileAsset record: id=%s, key=%s", asset.id, object_key)
-
-        except Exception as exc:
-            logger.exception(
-                "Failed to store file %s for user %s on assay %s: %s",
-                file.name,
-                user.email,
-                assay.id,
-                exc,
+            for file, object_key, (size_bytes, sha256_hash) in zip(
+                files, object_keys, digests
             )
-            raise
+        ]
+    )
+    for asset in created_assets:
+        logger.debug("Created FileAsset record: id=%s, key=%s", asset.id, asset.object_key)
+
+    # The last row referencing a deduplicated object may have been deleted
+    # (and the object with it) between the reference check and the insert.
+    # The new rows now hold a reference, so restore any object that is gone.
+    for file, object_key, (_, sha256_hash) in zip(files, object_keys, digests):
+        if object_key in uploads or default_storage.exists(object_key):
+            continue
+        logger.warning("Shared object %s vanished; uploading it again.", object_key)
+        _upload_to_storage(file, object_key, sha256_hash)
+        uploads[object_key] = (file, sha256_hash)
 
     logger.info(
         "Stored %d files for user %s on assay %s",
@@ -979,12 +1122,92 @@ def store_files_to_storage(
     )
     return created_assets
 
+
+_PREFETCH_END = object()
+
+
+def iter_storage_objects(
+    object_keys: list[str],
+    chunk_size: int | None = None,
+    max_buffered_chunks: int | None = None,
+) -> Iterator[Iterator[bytes]]:
+    """Yield one chunk iterator per storage object, reading ahead in a thread.
+
+    A background thread reads the objects from ``default_storage`` in order,
+    ``chunk_size`` bytes at a time, into a bounded queue, so the next object is
+    already being fetched while the current one is consumed. At most
+    ``max_buffered_chunks`` chunks are held in memory. Each yielded iterator
+    must be exhausted before the next one is requested; a storage error is
+    re-raised from the iterator of the object that failed.
+    """
+    chunk_size = chunk_size or config.zip_stream_chunk_size
+    buffer: queue.Queue = queue.Queue(
+        maxsize=max_buffered_chunks or config.zip_prefetch_max_chunks
+    )
+    stop = threading.Event()
+
+    def _put(item: object) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _reader() -> None:
+        try:
+            for key in object_keys:
+                with default_storage.open(key, "rb") as stored:
+                    for chunk in stored.chunks(chunk_size):
+                        if not _put(chunk):
+                            return
+                if not _put(_PREFETCH_END):
+                    return
+        except Exception as exc:
+            _put(exc)
+
+    def _object_chunks() -> Iterator[bytes]:
+        while True:
+            item = buffer.get()
+            if item is _PREFETCH_END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    reader = threading.Thread(target=_reader, name="storage-prefetch", daemon=True)
+    reader.start()
+    try:
+        for _ in object_keys:
+            yield _object_chunks()
+    finally:
+        # Unblocks the reader if the consumer stopped early (client went away).
+        stop.set()
+
+
+def _client_ip(request: HttpRequest | None) -> str | None:
+    if request is None:
+        return None
+    x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
+    if x_forwarded_for:
+        return x_forwarded_for.split(",")[0]
+    return request.META.get("REMOTE_ADDR")
+
+
 def download_assay_files_as_zip(
     assay: Assay,
     user: Person,
     request: HttpRequest | None = None,
-) -> tuple[bytes, str]:
-    """Download all files associated with an assay as a ZIP archive.
+) -> tuple[Iterator[bytes] | None, str]:
+    """Stream all files associated with an assay as a ZIP archive.
+
+    Objects are pulled from storage chunk by chunk (see
+    :func:`iter_storage_objects`) and the archive is produced incrementally by
+    :func:`~toxtempass.zip_stream.stream_zip`, so memory use is bounded by the
+    prefetch buffer rather than the total size of the files. The downloads are
+    recorded in ``FileDownloadLog`` with a single bulk insert before streaming
+    starts.
 
     Args:
         assay: Assay object whose files to download
@@ -992,73 +1215,45 @@ def download_assay_files_as_zip(
         request: Optional HttpRequest to extract IP address for audit log
 
     Returns:
-        Tuple of (zip_bytes, filename)
+        Tuple of (archive chunk iterator, filename); the iterator is ``None``
+        when the assay has no stored files.
 
-    Raises:
-        Exception: If file retrieval or ZIP creation fails
     """
     # Get all files associated with all answers in this assay
-    answer_files = AnswerFile.objects.filter(
-        answer__assay=assay
-    ).select_related("file").distinct("file")
+    file_assets = list(
+        FileAsset.objects.filter(answers__assay=assay)
+        .distinct()
+        .order_by("created_at", "id")
+    )
 
-    if not answer_files.exists():
+    if not file_assets:
         logger.warning("No files found for assay %s", assay.id)
-        return b"", "empty.zip"
-
-    file_assets = [af.file for af in answer_files]
-    zip_buffer = BytesIO()
+        return None, "empty.zip"
 
+    # Log the download for audit trail
     try:
-        with ZipFileLib(zip_buffer, "w") as zip_file:
-            for file_asset in file_assets:
-                try:
-                    # Download file from S3/MinIO
-                    file_content = default_storage.open(file_asset.object_key).read()
-
-                    # Add to ZIP with original filename
-                    zip_file.writestr(file_asset.original_filename, file_content)
-                    logger.debug("Added %s to ZIP", file_asset.original_filename)
-
-                except Exception as exc:
-                    logger.exception(
-                        "Failed to retrieve file %s from storage: %s",
-                        file_asset.id,
-                        exc,
-                    )
-                    raise
-
-        zip_bytes = zip_buffer.getvalue()
-
-        # Log the download for audit trail
-        try:
-            ip_address = None
-            if request:
-                x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
-                if x_forwarded_for:
-                    ip_address = x_forwarded_for.split(",")[0]
-                else:
-                    ip_address = request.META.get("REMOTE_ADDR")
-
-            for file_asset in file_assets:
-                FileDownloadLog.objects.create(
-                    file=file_asset,
-                    user=user,
-                    ip_address=ip_address,
-                )
-            logger.info(
-                "Logged %d file downloads for assay %s by user %s",
-                len(file_assets),
-                assay.id,
-                user.email,
-            )
-        except Exception as exc:
-            logger.exception("Failed to create download log entries: %s", exc)
-            # Don't fail the download if logging fails
-            pass
-
-        return zip_bytes, f"assay_{assay.id}_files.zip"
-
+        ip_address = _client_ip(request)
+        bulk_create_with_history(
+            [
+                FileDownloadLog(file=file_asset, user=user, ip_address=ip_address)
+                for file_asset in file_assets
+            ],
+            FileDownloadLog,
+            default_user=user,
+        )
+        logger.info(
+            "Logged %d file downloads for assay %s by user %s",
+            len(file_assets),
+            assay.id,
+            user.email,
+        )
     except Exception as exc:
-        logger.exception("Failed to create ZIP archive for assay %s: %s", assay.id, exc)
-        raise
+        logger.exception("Failed to create download log entries: %s", exc)
+        # Don't fail the download if logging fails
+
+    objects = iter_storage_objects([file_asset.object_key for file_asset in file_assets])
+    entries = (
+        (file_asset.original_filename, chunks)
+        for file_asset, chunks in zip(file_assets, objects)
+    )
+    return stream_zip(entries), f"assay_{assay.id}_files.zip"
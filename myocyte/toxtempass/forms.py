@@ -1,5 +1,6 @@
 import logging
 import mimetypes
+import time
 from collections import defaultdict
 from datetime import datetime
 from decimal import Decimal
@@ -13,7 +14,6 @@ from django.db import transaction
 from django.db.models import Sum
 from django.forms import widgets
 from django.utils.safestring import SafeText, mark_safe
-from django_q.tasks import async_task
 from guardian.shortcuts import get_objects_for_user
 
 from toxtempass import config
@@ -34,6 +34,8 @@ from toxtempass.models import (
     Workspace,
     WorkspaceRole,
 )
+from toxtempass.scheduling import submit_llm_run
+from toxtempass.tracing import span
 from toxtempass.utilities import add_user_alert, provenance_label_for_item
 from toxtempass.widgets import (
     BootstrapSelectWithButtonsWidget,
@@ -509,6 +511,7 @@ class AssayAnswerForm(forms.Form):
         user = kwargs.pop("user", None)
         if user is not None and not self.assay.is_accessible_by(user):
             raise PermissionDenied("You do not have access to this assay.")
+        self.user = user
         super().__init__(*args, **kwargs)
 
         accepted_files = ",".join(config.IMAGE_ACCEPT_FILES + config.TEXT_ACCEPT_FILES)
@@ -653,10 +656,16 @@ class AssayAnswerForm(forms.Form):
         extract_images = self.cleaned_data.get("extract_images", False)
         self.async_enqueued = False
 
+        extraction_seconds = None
         if uploaded_files:
-            doc_dict, unreadable = get_text_or_imagebytes_from_django_uploaded_file(
-                uploaded_files, extract_images=False
-            )
+            ingest_started = time.perf_counter()
+            with span(
+                "assay.ingest", assay_id=self.assay.id, files=len(uploaded_files)
+            ):
+                doc_dict, unreadable = get_text_or_imagebytes_from_django_uploaded_file(
+                    uploaded_files, extract_images=False
+                )
+            extraction_seconds = time.perf_counter() - ingest_started
             logger.debug(f"Received {len(uploaded_files)} uploaded files for processing.")
             if unreadable:
                 for name in unreadable:
@@ -740,21 +749,20 @@ class AssayAnswerForm(forms.Form):
         if uploaded_files and earmarked_answers:
             answer_ids = [answer.id for answer in earmarked_answers]
             try:
-                from toxtempass.views import process_llm_async
-
                 for answer in earmarked_answers:
                     if answer.accepted:
                         answer.accepted = False
                         answer.save(update_fields=["accepted"])
                 self.assay.status = LLMStatus.SCHEDULED
-                async_task(
-                    process_llm_async,
-                    self.assay.id,
+                self.assay.save(update_fields=["status", "user_alerts"])
+                submit_llm_run(
+                    self.assay,
                     doc_dict,
                     extract_images,
                     answer_ids,
+                    requested_by=self.user,
+                    extraction_seconds=extraction_seconds,
                 )
-                self.assay.save(update_fields=["status", "user_alerts"])
                 self.async_enqueued = True
                 logger.info(
                     "Queued asynchronous update for answers %s on assay %s.",
@@ -0,0 +1,237 @@
+"""Concurrent smoke tests of the discovered Azure deployments.
+
+:func:`run_health_check` selects the deployments to test (the tag filter is
+applied before any call is made), probes them on a thread pool and gives each
+one ``config.health_check_timeout_seconds`` to answer.  Every deployment is
+sampled ``config.health_check_samples`` times with a streamed request, which
+yields p50/p95 latency and the median time to first token.  Results keep the
+shape of the former serial check (``ok``, ``latency_ms``, ``error``, ...), so
+``LLMConfig.last_health_check`` and the admin table read them unchanged;
+:func:`save_health_check` additionally appends them to the rolling
+``LLMHealthCheck`` history.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import statistics
+import time
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.db import transaction
+from django.utils import timezone
+
+from toxtempass import config
+from toxtempass.azure_registry import EndpointEntry, ModelEntry, get_registry
+
+logger = logging.getLogger("llm")
+
+DEFAULT_PROMPT = "What is the capital of France? One word."
+
+
+def _elapsed_ms(started: float, until: float | None = None) -> int:
+    return int(((until or time.perf_counter()) - started) * 1000)
+
+
+def percentile(values: list[int], pct: float) -> int | None:
+    """Nearest-rank percentile of *values* (``None`` when empty)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def _chunk_text(chunk: object) -> str:
+    text = getattr(chunk, "content", chunk)
+    if isinstance(text, list):
+        text = "".join(c.get("text", "") if isinstance(c, dict) else str(c) for c in text)
+    return text if isinstance(text, str) else str(text)
+
+
+def select_deployments(
+    only: Iterable[str] | None = None,
+) -> list[tuple[EndpointEntry, ModelEntry]]:
+    """Return the registry's deployments, restricted to the tags in *only*."""
+    tags = {t.strip().upper() for t in only or () if t.strip()}
+    return [
+        (ep, m)
+        for ep in get_registry()
+        for m in ep.models
+        if not tags or m.tag.upper() in tags
+    ]
+
+
+def _empty_result(m: ModelEntry, checked_at: str) -> dict:
+    return {
+        "ok": False,
+        "latency_ms": None,
+        "p50_ms": None,
+        "p95_ms": None,
+        "ttft_ms": None,
+        "samples": 0,
+        "error": None,
+        "response": None,
+        "model_id": m.model_id,
+        "deployment": m.deployment_name,
+        "api": m.api,
+        "checked_at": checked_at,
+    }
+
+
+def probe_deployment(
+    ep: EndpointEntry,
+    m: ModelEntry,
+    prompt: str,
+    samples: int,
+    timeout: float,
+    checked_at: str,
+) -> dict:
+    """Stream *prompt* to one deployment *samples* times and summarize latency.
+
+    Sampling stops early once *timeout* is spent; the deployment counts as
+    healthy when every attempted probe answered.
+    """
+    from toxtempass.llm import get_llm_for_endpoint
+
+    entry = _empty_result(m, checked_at)
+    deadline = time.monotonic() + timeout
+    latencies: list[int] = []
+    ttfts: list[int] = []
+    started = time.perf_counter()
+    try:
+        llm = get_llm_for_endpoint(ep.index, m.tag, temperature=0)
+        for _ in range(max(1, samples)):
+            if latencies and time.monotonic() >= deadline:
+                break
+            started = time.perf_counter()
+            first_token = None
+            parts = []
+            for chunk in llm.stream(prompt):
+                text = _chunk_text(chunk)
+                if text and first_token is None:
+                    first_token = time.perf_counter()
+                parts.append(text)
+            finished = time.perf_counter()
+            latencies.append(_elapsed_ms(started, finished))
+            ttfts.append(_elapsed_ms(started, first_token or finished))
+            entry["response"] = "".join(parts).strip()[:120]
+        entry["ok"] = True
+    except Exception as exc:
+        entry["error"] = f"{type(exc).__name__}: {exc}"[:400]
+        latencies.append(_elapsed_ms(started))
+
+    entry["samples"] = len(ttfts)
+    entry["p50_ms"] = percentile(latencies, 50)
+    entry["p95_ms"] = percentile(latencies, 95)
+    entry["ttft_ms"] = int(statistics.median(ttfts)) if ttfts else None
+    entry["latency_ms"] = entry["p50_ms"]
+    return entry
+
+
+def run_health_check(
+    prompt: str = DEFAULT_PROMPT,
+    *,
+    only: Iterable[str] | None = None,
+    samples: int | None = None,
+    timeout: float | None = None,
+    workers: int | None = None,
+) -> dict:
+    """Probe the selected deployments concurrently.
+
+    Args:
+        prompt: Prompt sent with every probe.
+        only: Restrict the check to these model tags (case-insensitive).
+        samples: Probes per deployment (default ``config.health_check_samples``).
+        timeout: Seconds each deployment gets (default
+            ``config.health_check_timeout_seconds``).
+        workers: Deployments probed at once (default
+            ``config.health_check_workers``).
+
+    Returns:
+        A dict keyed by ``"endpoint_index:tag"`` in registry order::
+
+            {"1:KIMI": {"ok": True, "latency_ms": 1240, "p50_ms": 1240,
+                        "p95_ms": 1710, "ttft_ms": 380, "samples": 3,
+                        "error": None, "response": "Paris", ...}}
+
+    """
+    samples = samples or config.health_check_samples
+    timeout = timeout or config.health_check_timeout_seconds
+    targets = select_deployments(only)
+    if not targets:
+        return {}
+    pool_size = max(1, min(workers or config.health_check_workers, len(targets)))
+    checked_at = timezone.now().isoformat()
+
+    pool = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="health")
+    futures = {
+        f"{ep.index}:{m.tag}": pool.submit(
+            probe_deployment, ep, m, prompt, samples, timeout, checked_at
+        )
+        for ep, m in targets
+    }
+    # Deployments queue behind the pool, so the last batch starts after the
+    # earlier ones have used up their time.
+    wait(futures.values(), timeout=timeout * math.ceil(len(targets) / pool_size))
+    # Do not wait for probes that are still hanging on a dead endpoint.
+    pool.shutdown(wait=False, cancel_futures=True)
+
+    results: dict[str, dict] = {}
+    for (ep, m), (key, future) in zip(targets, futures.items()):
+        if future.done() and not future.cancelled():
+            results[key] = future.result()
+        else:
+            logger.warning("Health check for %s timed out after %ss", key, timeout)
+            results[key] = _empty_result(m, checked_at)
+            results[key]["error"] = f"TimeoutError: no answer within {timeout:g}s"
+    return results
+
+
+def save_health_check(results: dict) -> None:
+    """Store *results* as the latest snapshot and append them to the history.
+
+    Keys missing from *results* (a filtered run) keep their previous snapshot
+    as long as the deployment is still in the registry.
+    """
+    from toxtempass.models import LLMConfig, LLMHealthCheck
+
+    known = {f"{ep.index}:{m.tag}" for ep, m in select_deployments()}
+    LLMConfig.load()  # make sure the singleton row exists
+    # Health data is not part of the cached config, so write it without
+    # save(): that would bump the config version and drop every snapshot.
+    with transaction.atomic():
+        stored = (
+            LLMConfig.objects.select_for_update()
+            .values_list("last_health_check", flat=True)
+            .get(pk=1)
+        )
+        previous = {k: v for k, v in (stored or {}).items() if k in known}
+        LLMConfig.objects.filter(pk=1).update(
+            last_health_check={**previous, **results}
+        )
+
+    now = timezone.now()
+    LLMHealthCheck.objects.bulk_create(
+        LLMHealthCheck(
+            deployment=key,
+            model_id=r.get("model_id") or "",
+            checked_at=now,
+            ok=bool(r.get("ok")),
+            samples=r.get("samples") or 0,
+            p50_ms=r.get("p50_ms"),
+            p95_ms=r.get("p95_ms"),
+            ttft_ms=r.get("ttft_ms"),
+            error=r.get("error") or "",
+        )
+        for key, r in results.items()
+    )
+    for key in results:
+        stale = list(
+            LLMHealthCheck.objects.filter(deployment=key)
+            .order_by("-checked_at", "-pk")
+            .values_list("pk", flat=True)[config.health_check_history_size :]
+        )
+        if stale:
+            LLMHealthCheck.objects.filter(pk__in=stale).delete()
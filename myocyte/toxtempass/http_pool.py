@@ -0,0 +1,232 @@
+"""Shared keep-alive HTTP clients for the chat model SDKs.
+
+Every chat client built by ``toxtempass.llm`` gets its httpx clients from
+:func:`get_http_clients`, which keeps one sync and one async client per
+endpoint host (``scheme://host[:port]``).  All deployments on an Azure
+endpoint therefore share warm TLS connections instead of each SDK instance
+opening its own pool.  Pool limits come from ``config.llm_http_*``.
+
+Async connections belong to the event loop that opened them, and the
+evaluation scripts call ``asyncio.run`` once per batch.  The async client
+therefore keeps a separate connection pool per running loop
+(:class:`_PerLoopTransport`), so a chat client cached across batches never
+reuses a socket from a loop that has since been closed; :func:`reset_pools`
+closes each of those pools on its own loop.
+
+Each pool counts its requests, new TCP connections and TLS handshakes via the
+httpcore ``trace`` extension; :func:`pool_stats` reports them per host for
+this process (requests minus connections is the number of reused ones).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+import weakref
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+import httpx
+
+from toxtempass import config
+
+logger = logging.getLogger("llm")
+
+# The SDKs pass their own per-request timeouts; this only applies otherwise.
+_DEFAULT_TIMEOUT = httpx.Timeout(120.0, connect=10.0)
+
+
+@dataclass
+class _Counters:
+    requests: int = 0
+    connections: int = 0
+    tls_handshakes: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def count(self, name: str) -> None:
+        with self.lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def trace_event(self, event_name: str) -> None:
+        if event_name in (
+            "connection.connect_tcp.complete",
+            "connection.connect_unix_socket.complete",
+        ):
+            self.count("connections")
+        elif event_name == "connection.start_tls.complete":
+            self.count("tls_handshakes")
+
+
+class _PerLoopTransport(httpx.AsyncBaseTransport):
+    """Async transport with its own connection pool for each event loop."""
+
+    def __init__(self, limits: httpx.Limits) -> None:
+        self._limits = limits
+        self._transports: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, httpx.AsyncHTTPTransport
+        ] = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def _transport(self) -> httpx.AsyncHTTPTransport:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            transport = self._transports.get(loop)
+            if transport is None:
+                transport = self._transports[loop] = httpx.AsyncHTTPTransport(
+                    limits=self._limits
+                )
+        return transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """Send *request* over the running loop's pool."""
+        return await self._transport().handle_async_request(request)
+
+    async def aclose(self) -> None:
+        """Close the running loop's pool; other loops' pools go with their loop."""
+        with self._lock:
+            transport = self._transports.pop(asyncio.get_running_loop(), None)
+        if transport is not None:
+            await transport.aclose()
+
+    def close_all(self) -> None:
+        """Close every loop's pool from synchronous code.
+
+        A pool is closed on its own loop: scheduled there if the loop is
+        running, run to completion if it is idle. Pools of closed loops are
+        only dropped, as their connections can no longer be used.
+        """
+        with self._lock:
+            transports = list(self._transports.items())
+            self._transports.clear()
+        for loop, transport in transports:
+            if loop.is_closed():
+                continue
+            try:
+                if loop.is_running():
+                    asyncio.run_coroutine_threadsafe(transport.aclose(), loop)
+                else:
+                    loop.run_until_complete(transport.aclose())
+            except Exception:
+                logger.debug("Closing an async HTTP pool failed", exc_info=True)
+
+
+@dataclass
+class HostPool:
+    """The shared sync/async clients of one endpoint host."""
+
+    host: str
+    sync_client: httpx.Client
+    async_client: httpx.AsyncClient
+    async_transport: _PerLoopTransport
+    sync_counters: _Counters
+    async_counters: _Counters
+
+    def stats(self) -> dict:
+        """Return request, connection and reuse counts for this host."""
+        requests = self.sync_counters.requests + self.async_counters.requests
+        connections = self.sync_counters.connections + self.async_counters.connections
+        return {
+            "requests": requests,
+            "connections_opened": connections,
+            "tls_handshakes": (
+                self.sync_counters.tls_handshakes + self.async_counters.tls_handshakes
+            ),
+            "reused": max(0, requests - connections),
+            "reuse_ratio": round(1 - connections / requests, 3) if requests else None,
+        }
+
+
+_pools: dict[str, HostPool] = {}
+_pools_lock = threading.Lock()
+
+
+def endpoint_host(url: str) -> str:
+    """Return the ``scheme://netloc`` part of *url*, the pool key."""
+    parts = urlsplit(url or "")
+    return f"{parts.scheme or 'https'}://{parts.netloc or parts.path}".lower()
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=config.llm_http_max_connections,
+        max_keepalive_connections=config.llm_http_max_keepalive_connections,
+        keepalive_expiry=config.llm_http_keepalive_expiry_seconds,
+    )
+
+
+def _build_pool(host: str) -> HostPool:
+    sync_counters = _Counters()
+    async_counters = _Counters()
+
+    def on_request(request: httpx.Request) -> None:
+        sync_counters.count("requests")
+        request.extensions["trace"] = lambda name, info: sync_counters.trace_event(name)
+
+    async def on_async_request(request: httpx.Request) -> None:
+        async_counters.count("requests")
+
+        async def trace(name: str, info: dict) -> None:
+            async_counters.trace_event(name)
+
+        request.extensions["trace"] = trace
+
+    async_transport = _PerLoopTransport(_limits())
+    return HostPool(
+        host=host,
+        sync_client=httpx.Client(
+            limits=_limits(),
+            timeout=_DEFAULT_TIMEOUT,
+            event_hooks={"request": [on_request]},
+        ),
+        async_client=httpx.AsyncClient(
+            transport=async_transport,
+            timeout=_DEFAULT_TIMEOUT,
+            event_hooks={"request": [on_async_request]},
+        ),
+        async_transport=async_transport,
+        sync_counters=sync_counters,
+        async_counters=async_counters,
+    )
+
+
+def get_http_clients(url: str) -> tuple[httpx.Client, httpx.AsyncClient]:
+    """Return the shared ``(sync, async)`` httpx clients for *url*'s host."""
+    host = endpoint_host(url)
+    pool = _pools.get(host)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(host)
+            if pool is None:
+                pool = _pools[host] = _build_pool(host)
+                logger.debug("Created shared HTTP pool for %s", host)
+    return pool.sync_client, pool.async_client
+
+
+def pool_stats() -> dict[str, dict]:
+    """Per-host request and connection counters of this process."""
+    return {host: pool.stats() for host, pool in sorted(_pools.items())}
+
+
+def reset_pools() -> None:
+    """Close and forget all pools (used after fork and in tests)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        try:
+            pool.sync_client.close()
+            pool.async_transport.close_all()
+        except Exception:
+            logger.debug("Closing HTTP pool for %s failed", pool.host, exc_info=True)
+
+
+def _forget_pools_after_fork() -> None:
+    # A forked worker must not reuse the parent's sockets; drop the pools
+    # without closing them (the parent still owns the connections).
+    _pools.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_pools_after_fork)
@@ -1,6 +1,8 @@
 import logging
 import os
-from functools import lru_cache
+import threading
+from collections import OrderedDict
+from functools import wraps
 from typing import Literal
 
 from django.core.exceptions import ImproperlyConfigured
@@ -8,6 +10,9 @@ from langchain_core.messages import BaseMessage
 from langchain_openai import ChatOpenAI
 from pydantic import Field, model_validator
 
+from toxtempass.azure_registry import RegistryChange, on_registry_change, registry_version
+from toxtempass.http_pool import get_http_clients
+
 # Get logger
 logger = logging.getLogger("llm")
 
@@ -61,17 +66,18 @@ def _resolve_azure_config() -> tuple[str | None, str | None, str | None]:
 def get_llm():
     """Return the currently-configured default LLM client.
 
-    Not cached at this layer — each call re-reads ``LLMConfig`` so admin changes
-    propagate to all workers on their next request. The underlying per-deployment
-    client *is* cached inside :func:`get_llm_for_endpoint`, so repeated calls
-    with the same default are effectively free.
+    Each call checks the ``LLMConfig`` version (see ``LLMConfig.cached``) so admin
+    changes propagate to all workers on their next request, without re-querying
+    the row otherwise. The underlying per-deployment client is cached inside
+    :func:`get_llm_for_endpoint`, so repeated calls with the same default are
+    effectively free.
     """
     # Fast path: admin picked an Azure deployment → honour its api tag.
     try:
         from toxtempass.models import LLMConfig
-        cfg = LLMConfig.load()
-        if cfg.default_model and ":" in cfg.default_model:
-            idx, tag = cfg.default_model.split(":", 1)
+        default_model = LLMConfig.cached("default_model", lambda cfg: cfg.default_model)
+        if default_model and ":" in default_model:
+            idx, tag = default_model.split(":", 1)
             return get_llm_for_endpoint(int(idx), tag, temperature=0)
     except Exception:
         pass  # DB not ready, no row yet, etc. — fall through to env-default.
@@ -125,6 +131,9 @@ def get_llm():
         )
 
     logger.info("LLM configured")
+    http_client, http_async_client = get_http_clients(
+        base_url or "https://api.openai.com"
+    )
     return ChatOpenAI(
         api_key=api_key,
         base_url=base_url,  # fine if None
@@ -132,6 +141,8 @@ def get_llm():
         temperature=temperature,
         default_headers=extra_headers,
         timeout=120,
+        http_client=http_client,
+        http_async_client=http_async_client,
     )
 
 
@@ -186,6 +197,19 @@ def current_llm_key(user) -> str | None:
     return env_default_key()
 
 
+def queue_llm_key(user) -> tuple[str | None, str | None]:
+    """Return ``(key, substituted_from)`` to snapshot when queueing a run.
+
+    Like :func:`current_llm_key`, but a deployment whose circuit breaker is
+    open is swapped for an equivalent healthy one (see
+    :func:`toxtempass.deployment_health.route_deployment`); *substituted_from*
+    is then the user's original deployment so the run can say so.
+    """
+    from toxtempass.deployment_health import route_deployment
+
+    return route_deployment(current_llm_key(user), user)
+
+
 def resolve_user_llm(user, temperature: float | int = 0):
     """Return ``(llm, source, replaced)`` for a given user.
 
@@ -198,6 +222,9 @@ def resolve_user_llm(user, temperature: float | int = 0):
     ``replaced`` is ``True`` when the user had a preference that was invalid/retired/
     disallowed — the caller should surface a non-blocking toast in that case.
 
+    A deployment whose circuit breaker is open is swapped for an equivalent
+    healthy one when there is one (``source`` is unchanged).
+
     When ``source == "user"``, the user's stored preference is also cleaned up
     (stripped of invalid entries) so the same toast doesn't trigger again next time.
     """
@@ -237,62 +264,39 @@ def resolve_user_llm(user, temperature: float | int = 0):
                     lambda p: p.pop("llm_model", missing) is not missing,
                 )
 
+    from toxtempass.deployment_health import route_deployment
+
     if user_pref is not None:
-        idx, tag = user_pref
-        return get_llm_for_endpoint(idx, tag, temperature=temperature), "user", replaced
+        key, _ = route_deployment(f"{user_pref[0]}:{user_pref[1]}", user)
+        idx, tag = key.split(":", 1)
+        llm = get_llm_for_endpoint(int(idx), tag, temperature=temperature)
+        return llm, "user", replaced
 
     # Fall back to admin default via get_llm()
     if get_registry():
+        default = LLMConfig.load().default_model
+        key, substituted_from = route_deployment(default, user)
+        if substituted_from:
+            idx, tag = key.split(":", 1)
+            llm = get_llm_for_endpoint(int(idx), tag, temperature=temperature)
+            return llm, "admin_default", replaced
         return get_llm(), "admin_default", replaced
 
     return get_llm(), "legacy", replaced
 
 
-def run_health_check(prompt: str = "What is the capital of France? One word.") -> dict:
+def run_health_check(
+    prompt: str = "What is the capital of France? One word.", **kwargs
+) -> dict:
     """Ping every discovered Azure deployment with a trivial prompt.
 
-    Returns a dict keyed by ``"endpoint_index:tag"`` with per-deployment results::
-
-        {"1:KIMI": {"ok": True, "latency_ms": 1240, "error": None,
-                    "response": "Paris", "checked_at": "2026-04-12T13:47:00+00:00"}}
+    Deployments are probed concurrently; see
+    :func:`toxtempass.health_check.run_health_check` for the options (tag
+    filter, samples, timeout) and the per-deployment result shape.
     """
-    import time
-    from datetime import datetime, timezone
-
-    from toxtempass.azure_registry import get_registry
+    from toxtempass.health_check import run_health_check as _run
 
-    results: dict[str, dict] = {}
-    for ep in get_registry():
-        for m in ep.models:
-            key = f"{ep.index}:{m.tag}"
-            t0 = time.perf_counter()
-            entry: dict = {
-                "ok": False,
-                "latency_ms": None,
-                "error": None,
-                "response": None,
-                "model_id": m.model_id,
-                "deployment": m.deployment_name,
-                "api": m.api,
-                "checked_at": datetime.now(timezone.utc).isoformat(),
-            }
-            try:
-                llm = get_llm_for_endpoint(ep.index, m.tag, temperature=0)
-                resp = llm.invoke(prompt)
-                text = getattr(resp, "content", str(resp))
-                if isinstance(text, list):
-                    text = " ".join(
-                        c.get("text", "") if isinstance(c, dict) else str(c)
-                        for c in text
-                    )
-                entry["ok"] = True
-                entry["response"] = text.strip()[:120]
-                entry["latency_ms"] = int((time.perf_counter() - t0) * 1000)
-            except Exception as exc:
-                entry["error"] = f"{type(exc).__name__}: {exc}"[:400]
-                entry["latency_ms"] = int((time.perf_counter() - t0) * 1000)
-            results[key] = entry
-    return results
+    return _run(prompt, **kwargs)
 
 
 def _is_reasoning_model(model_id: str) -> bool:
@@ -304,8 +308,68 @@ def _is_reasoning_model(model_id: str) -> bool:
     return m.startswith(("o1", "o3", "o4", "o5")) or m.startswith("gpt-5")
 
 
-@lru_cache(maxsize=32)
+def _deployment_cache(maxsize: int):
+    """LRU cache for :func:`get_llm_for_endpoint` that can evict deployments.
+
+    Works like ``lru_cache`` (including ``cache_clear``) and adds
+    ``evict(keys)``, which drops the clients of the given ``"idx:tag"``
+    deployments.  A client built while the registry was swapped underneath is
+    returned but not cached, so a stale client never outlives a reload.
+    """
+
+    def decorator(fn):
+        entries: OrderedDict[tuple, object] = OrderedDict()
+        lock = threading.Lock()
+
+        @wraps(fn)
+        def wrapper(endpoint_index: int, model_tag: str, temperature: float | int = 0):
+            key = (int(endpoint_index), model_tag, temperature)
+            with lock:
+                if key in entries:
+                    entries.move_to_end(key)
+                    return entries[key]
+            version = registry_version()
+            client = fn(endpoint_index, model_tag, temperature)
+            with lock:
+                if registry_version() == version:
+                    entries[key] = client
+                    while len(entries) > maxsize:
+                        entries.popitem(last=False)
+            return client
+
+        def evict(deployment_keys) -> int:
+            with lock:
+                stale = [k for k in entries if f"{k[0]}:{k[1]}" in deployment_keys]
+                for k in stale:
+                    del entries[k]
+            return len(stale)
+
+        def cache_clear() -> None:
+            with lock:
+                entries.clear()
+
+        wrapper.evict = evict
+        wrapper.cache_clear = cache_clear
+        return wrapper
+
+    return decorator
+
+
+@_deployment_cache(maxsize=32)
 def get_llm_for_endpoint(endpoint_index: int, model_tag: str, temperature: float | int = 0):
+    """Return the shared chat client for a specific Azure deployment.
+
+    Cached per deployment and temperature; see :func:`build_llm_for_endpoint`.
+    """
+    return build_llm_for_endpoint(endpoint_index, model_tag, temperature)
+
+
+def build_llm_for_endpoint(
+    endpoint_index: int,
+    model_tag: str,
+    temperature: float | int = 0,
+    **client_kwargs,
+):
     """Build a chat client for a specific Azure deployment.
 
     Dispatches by the ``api`` tag on the model:
@@ -313,6 +377,10 @@ def get_llm_for_endpoint(endpoint_index: int, model_tag: str, temperature: float
       - ``azure-openai`` → ``AzureChatOpenAI``  (classic ``*.cognitiveservices.azure.com``)
       - ``foundry``      → ``AzureAIChatCompletionsModel``  (Foundry Models Inference API)
       - ``anthropic``    → ``ChatAnthropic``  (Foundry ``/anthropic/`` passthrough)
+
+    *client_kwargs* (e.g. ``max_retries``, ``stream_usage``) are passed on to
+    the chat model. Unlike :func:`get_llm_for_endpoint` the client is not
+    cached, so tweaking one does not change the one answer generation uses.
     """
     from toxtempass.azure_registry import get_model
 
@@ -341,6 +409,8 @@ def get_llm_for_endpoint(endpoint_index: int, model_tag: str, temperature: float
             temperature = 1
         temp_kwargs = {"temperature": temperature}
 
+    chat_kwargs = {**temp_kwargs, **client_kwargs}
+
     logger.info(
         "LLM configured: model=%s, deployment=%s, endpoint=%s, api=%s, tags=%s",
         m.model_id, m.deployment_name, ep.endpoint, m.api, m.tags,
@@ -356,13 +426,15 @@ def get_llm_for_endpoint(endpoint_index: int, model_tag: str, temperature: float
             ) from exc
         # Anthropic SDK base_url must be the root that precedes /v1/messages.
         base = ep.endpoint.rstrip("/").removesuffix("/v1/messages").removesuffix("/v1")
-        return ChatAnthropic(
+        llm = ChatAnthropic(
             api_key=ep.api_key,
             base_url=base,
             model=m.deployment_name,
             timeout=120,
-            **temp_kwargs,
+            **chat_kwargs,
         )
+        _use_shared_anthropic_clients(llm, base)
+        return llm
 
     if m.api == "azure-openai":
         from langchain_openai import AzureChatOpenAI
@@ -378,6 +450,7 @@ def get_llm_for_endpoint(endpoint_index: int, model_tag: str, temperature: float
         # authoritative), but SGLang-backed Azure deployments (e.g. some
         # serverless models) validate body.model and reject `null`. Harmless for
         # genuine Azure deployments, required for the OpenAI-compatible backends.
+        http_client, http_async_client = get_http_clients(azure_endpoint)
         return AzureChatOpenAI(
             api_key=ep.api_key,
             azure_endpoint=azure_endpoint,
@@ -385,7 +458,9 @@ def get_llm_for_endpoint(endpoint_index: int, model_tag: str, temperature: float
             azure_deployment=m.deployment_name,
             model=m.model_id,
             timeout=120,
-            **temp_kwargs,
+            http_client=http_client,
+            http_async_client=http_async_client,
+            **chat_kwargs,
         )
 
     if m.api == "foundry":
@@ -403,19 +478,57 @@ def get_llm_for_endpoint(endpoint_index: int, model_tag: str, temperature: float
             credential=ep.api_key,
             model=m.deployment_name,
             api_version=ep.api_version or None,
-            **temp_kwargs,
+            **chat_kwargs,
         )
 
     # Default: plain OpenAI-compat passthrough (api:openai).
+    http_client, http_async_client = get_http_clients(ep.endpoint)
     return ChatOpenAI(
         api_key=ep.api_key,
         base_url=ep.endpoint,
         model=m.deployment_name,
         timeout=120,
-        **temp_kwargs,
+        http_client=http_client,
+        http_async_client=http_async_client,
+        **chat_kwargs,
     )
 
 
+def _evict_changed_deployments(change: RegistryChange) -> None:
+    # Runs that already hold a client keep it; only new lookups rebuild.
+    evicted = get_llm_for_endpoint.evict(change.affected)
+    if evicted:
+        logger.info(
+            "Registry v%d: evicted %d cached chat client(s) for %s",
+            change.version, evicted, ", ".join(sorted(change.affected)),
+        )
+
+
+on_registry_change(_evict_changed_deployments)
+
+
+def _use_shared_anthropic_clients(llm, base_url: str) -> None:
+    """Point a ``ChatAnthropic``'s SDK clients at the shared host pool.
+
+    ``ChatAnthropic`` takes no ``http_client`` argument; it builds its
+    ``anthropic.Anthropic``/``AsyncAnthropic`` clients lazily from
+    ``_client_params``.  Building them here with the pooled httpx clients
+    pre-fills those cached properties.  If the integration changes shape we
+    keep the SDK's own pool.
+    """
+    try:
+        import anthropic
+
+        http_client, http_async_client = get_http_clients(base_url)
+        params = dict(llm._client_params)
+        llm.__dict__["_client"] = anthropic.Anthropic(**params, http_client=http_client)
+        llm.__dict__["_async_client"] = anthropic.AsyncAnthropic(
+            **params, http_client=http_async_client
+        )
+    except Exception:
+        logger.debug("ChatAnthropic keeps its own HTTP pool", exc_info=True)
+
+
 
 
 
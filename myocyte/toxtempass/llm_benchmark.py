@@ -0,0 +1,370 @@
+"""Throughput benchmark for LLM deployments under assay-sized prompts.
+
+:func:`ramp` replays the message shape ``views.generate_answer`` sends (base
+prompt, assay name/description, one large document context, the question) at
+increasing concurrency and records, per level, time to first token, output
+tokens/s per stream and in aggregate, and how many requests were rejected with
+HTTP 429.  The ramp stops at the first level that is rate limited (the 429
+onset); :func:`recommend_concurrency` picks the smallest clean level that
+reaches 90 % of the best aggregate throughput.
+
+:class:`FakeOpenAIServer` is a local OpenAI-compatible endpoint with a fixed
+time to first token, token rate and concurrency limit, so the benchmark (and
+its tests) run offline.
+"""
+
+from __future__ import annotations
+
+import json
+import statistics
+import threading
+import time
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+from toxtempass import config
+from toxtempass.health_check import percentile
+
+DEFAULT_QUESTION = (
+    "Describe the test system used in this assay, including cell type, source, "
+    "culture conditions and passage number."
+)
+_FILLER = (
+    "HepG2 cells were seeded at 10,000 cells per well in 96-well plates and "
+    "exposed to the test compounds for 24 h before the ATP content was measured "
+    "by luminescence. "
+)
+
+
+def benchmark_messages(
+    context_chars: int = 48_000, question: str = DEFAULT_QUESTION
+) -> list[BaseMessage]:
+    """Build a ``generate_answer``-shaped prompt with *context_chars* of context."""
+    context = (_FILLER * (context_chars // len(_FILLER) + 1))[:context_chars]
+    return [
+        SystemMessage(content=config.base_prompt),
+        SystemMessage(content="ASSAY NAME: Benchmark assay"),
+        SystemMessage(
+            content="ASSAY DESCRIPTION: Cytotoxicity screen in HepG2 cells."
+        ),
+        SystemMessage(content="Context for this question:\n" + context),
+        HumanMessage(content=question),
+    ]
+
+
+def _is_rate_limit(exc: Exception) -> bool:
+    return getattr(exc, "status_code", None) == 429 or "RateLimit" in type(exc).__name__
+
+
+@dataclass
+class RequestResult:
+    """Timing of one streamed request."""
+
+    ok: bool
+    rate_limited: bool = False
+    error: str = ""
+    ttft_ms: int | None = None
+    total_ms: int = 0
+    output_tokens: int = 0
+    tokens_estimated: bool = False
+
+
+@dataclass
+class LevelResult:
+    """Aggregated results of one concurrency level."""
+
+    concurrency: int
+    requests: int
+    ok: int
+    rate_limited: int
+    errors: int
+    wall_seconds: float
+    ttft_p50_ms: int | None
+    ttft_p95_ms: int | None
+    stream_tokens_per_second: float | None
+    aggregate_tokens_per_second: float
+    error_samples: list[str] = field(default_factory=list)
+
+
+def run_request(llm: object, messages: list[BaseMessage]) -> RequestResult:
+    """Stream one completion and time it.
+
+    Output tokens come from the provider's usage metadata when it is streamed;
+    otherwise every non-empty chunk counts as one token (``tokens_estimated``).
+    """
+    started = time.perf_counter()
+    first_token = None
+    chunks = 0
+    usage_tokens = None
+    try:
+        for chunk in llm.stream(messages):
+            usage = getattr(chunk, "usage_metadata", None) or {}
+            if usage.get("output_tokens"):
+                usage_tokens = usage["output_tokens"]
+            if getattr(chunk, "content", None):
+                chunks += 1
+                if first_token is None:
+                    first_token = time.perf_counter()
+    except Exception as exc:
+        return RequestResult(
+            ok=False,
+            rate_limited=_is_rate_limit(exc),
+            error=f"{type(exc).__name__}: {exc}"[:200],
+            total_ms=int((time.perf_counter() - started) * 1000),
+        )
+    return RequestResult(
+        ok=True,
+        ttft_ms=int(((first_token or time.perf_counter()) - started) * 1000),
+        total_ms=int((time.perf_counter() - started) * 1000),
+        output_tokens=usage_tokens if usage_tokens is not None else chunks,
+        tokens_estimated=usage_tokens is None,
+    )
+
+
+def run_level(
+    llm: object, messages: list[BaseMessage], concurrency: int, requests: int
+) -> LevelResult:
+    """Send *requests* streamed completions, *concurrency* at a time."""
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda _: run_request(llm, messages), range(requests)))
+    wall = time.perf_counter() - started
+
+    ok = [r for r in results if r.ok]
+    ttfts = [r.ttft_ms for r in ok if r.ttft_ms is not None]
+    stream_rates = [
+        r.output_tokens / ((r.total_ms - r.ttft_ms) / 1000)
+        for r in ok
+        if r.ttft_ms is not None and r.total_ms > r.ttft_ms
+    ]
+    return LevelResult(
+        concurrency=concurrency,
+        requests=requests,
+        ok=len(ok),
+        rate_limited=sum(r.rate_limited for r in results),
+        errors=sum(not r.ok and not r.rate_limited for r in results),
+        wall_seconds=round(wall, 3),
+        ttft_p50_ms=percentile(ttfts, 50),
+        ttft_p95_ms=percentile(ttfts, 95),
+        stream_tokens_per_second=(
+            round(statistics.median(stream_rates), 1) if stream_rates else None
+        ),
+        aggregate_tokens_per_second=round(sum(r.output_tokens for r in ok) / wall, 1),
+        error_samples=sorted({r.error for r in results if r.error})[:3],
+    )
+
+
+def ramp(
+    llm: object,
+    messages: list[BaseMessage],
+    levels: Sequence[int] = (1, 2, 4, 8, 16, 32),
+    rounds: int = 2,
+) -> list[LevelResult]:
+    """Run increasing concurrency levels until one is rate limited."""
+    results = []
+    for concurrency in levels:
+        level = run_level(llm, messages, concurrency, concurrency * rounds)
+        results.append(level)
+        if level.rate_limited:
+            break
+    return results
+
+
+def rate_limit_onset(levels: Sequence[LevelResult]) -> int | None:
+    """Lowest concurrency at which requests were rejected with 429."""
+    return next((lvl.concurrency for lvl in levels if lvl.rate_limited), None)
+
+
+def recommend_concurrency(levels: Sequence[LevelResult]) -> int:
+    """Smallest clean level within 90 % of the best clean aggregate throughput."""
+    clean = [lvl for lvl in levels if not lvl.rate_limited and not lvl.errors]
+    if not clean:
+        return 1
+    best = max(lvl.aggregate_tokens_per_second for lvl in clean)
+    return min(
+        lvl.concurrency for lvl in clean if lvl.aggregate_tokens_per_second >= 0.9 * best
+    )
+
+
+def deployment_report(key: str, model_id: str, levels: list[LevelResult]) -> dict:
+    """JSON-serializable summary of one deployment's ramp."""
+    return {
+        "deployment": key,
+        "model_id": model_id,
+        "rate_limit_onset": rate_limit_onset(levels),
+        "recommended_concurrency": recommend_concurrency(levels),
+        "levels": [asdict(lvl) for lvl in levels],
+    }
+
+
+class FakeOpenAIServer:
+    """Local OpenAI-compatible ``/chat/completions`` endpoint for offline runs.
+
+    Answers with *output_tokens* tokens after *ttft_ms*, at *tokens_per_second*,
+    and rejects requests beyond *max_concurrency* in flight with HTTP 429.
+
+        with FakeOpenAIServer(max_concurrency=4) as server:
+            llm = ChatOpenAI(base_url=server.base_url, api_key="fake", model="fake")
+    """
+
+    def __init__(
+        self,
+        *,
+        ttft_ms: int = 200,
+        tokens_per_second: float = 80.0,
+        output_tokens: int = 120,
+        max_concurrency: int = 8,
+    ) -> None:
+        self.ttft_ms = ttft_ms
+        self.tokens_per_second = tokens_per_second
+        self.output_tokens = output_tokens
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def __enter__(self) -> FakeOpenAIServer:
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _acquire(self) -> bool:
+        with self._lock:
+            if self.in_flight >= self.max_concurrency:
+                self.rejected += 1
+                return False
+            self.in_flight += 1
+            return True
+
+    def _release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format: str, *args: object) -> None:
+                return
+
+            def _json(self, status: int, payload: dict, headers: dict | None = None):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _sse(self, payload: dict | str) -> None:
+                data = payload if isinstance(payload, str) else json.dumps(payload)
+                self.wfile.write(f"data: {data}\n\n".encode())
+                self.wfile.flush()
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                request = json.loads(self.rfile.read(length) or b"{}")
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._json(404, {"error": {"message": "not found"}})
+                    return
+                if not server._acquire():
+                    self._json(
+                        429,
+                        {
+                            "error": {
+                                "message": "Rate limit reached. Please try again in 1s.",
+                                "type": "rate_limit_error",
+                                "code": "429",
+                            }
+                        },
+                        {"Retry-After": "1"},
+                    )
+                    return
+                try:
+                    self._complete(request)
+                finally:
+                    server._release()
+
+            def _complete(self, request: dict) -> None:
+                model = request.get("model", "fake")
+                prompt_tokens = len(json.dumps(request.get("messages", []))) // 4
+                usage = {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": server.output_tokens,
+                    "total_tokens": prompt_tokens + server.output_tokens,
+                }
+                time.sleep(server.ttft_ms / 1000)
+                if not request.get("stream"):
+                    time.sleep(server.output_tokens / server.tokens_per_second)
+                    self._json(
+                        200,
+                        {
+                            "id": "chatcmpl-fake",
+                            "object": "chat.completion",
+                            "created": int(time.time()),
+                            "model": model,
+                            "choices": [
+                                {
+                                    "index": 0,
+                                    "message": {
+                                        "role": "assistant",
+                                        "content": "token " * server.output_tokens,
+                                    },
+                                    "finish_reason": "stop",
+                                }
+                            ],
+                            "usage": usage,
+                        },
+                    )
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                chunk = {
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                }
+                for index in range(server.output_tokens):
+                    if index:
+                        time.sleep(1 / server.tokens_per_second)
+                    delta = {"content": "token "}
+                    if not index:
+                        delta["role"] = "assistant"
+                    self._sse(
+                        {
+                            **chunk,
+                            "choices": [
+                                {"index": 0, "delta": delta, "finish_reason": None}
+                            ],
+                        }
+                    )
+                self._sse(
+                    {
+                        **chunk,
+                        "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                    }
+                )
+                if (request.get("stream_options") or {}).get("include_usage"):
+                    self._sse({**chunk, "choices": [], "usage": usage})
+                self._sse("[DONE]")
+
+        return Handler
@@ -0,0 +1,165 @@
+"""Per-call LLM telemetry: ``LLMCallRecord`` rows and the dashboard statistics.
+
+``process_llm_async`` creates one unsaved record per question with
+:func:`new_call_record` when it submits the question to the thread pool;
+``generate_answer`` fills it in (:func:`start_call`, :func:`finish_call` and
+the retry counters), and :func:`save_call_records` writes the whole run in a
+single ``bulk_create`` when the run ends.  :func:`call_stats` aggregates the
+records per deployment and day for the admin dashboard.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections import defaultdict
+from collections.abc import Iterable
+from datetime import timedelta
+
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from toxtempass.health_check import percentile
+from toxtempass.models import Assay, LLMCallRecord
+
+logger = logging.getLogger("llm")
+
+
+def new_call_record(
+    *,
+    assay_id: int,
+    question_id: int | None,
+    model_key: str,
+    model_id: str,
+    answering_round: int,
+) -> LLMCallRecord:
+    """Return an unsaved record; the queue wait is measured from now."""
+    record = LLMCallRecord(
+        assay_id=assay_id,
+        question_id=question_id,
+        model_key=model_key or "",
+        model_id=model_id[:128] if isinstance(model_id, str) else "",
+        answering_round=answering_round,
+    )
+    record._queued_at = time.perf_counter()
+    return record
+
+
+def start_call(record: LLMCallRecord) -> None:
+    """Mark the start of the first attempt."""
+    now = time.perf_counter()
+    record.started_at = timezone.now()
+    record.queue_wait_ms = int((now - getattr(record, "_queued_at", now)) * 1000)
+    record._started_at = now
+
+
+def finish_call(
+    record: LLMCallRecord,
+    outcome: str,
+    *,
+    usage: dict | None = None,
+    error: BaseException | None = None,
+) -> None:
+    """Record the outcome, latency and token usage of a finished call."""
+    record.outcome = outcome
+    started = getattr(record, "_started_at", None)
+    if started is not None:
+        record.latency_ms = int((time.perf_counter() - started) * 1000)
+    if usage:
+        details = usage.get("input_token_details") or {}
+        record.input_tokens = usage.get("input_tokens", 0) or 0
+        record.output_tokens = usage.get("output_tokens", 0) or 0
+        record.cache_read_tokens = details.get("cache_read", 0) or 0
+        record.cache_creation_tokens = details.get("cache_creation", 0) or 0
+    if error is not None:
+        record.error = f"{type(error).__name__}: {error}"[:400]
+
+
+def save_call_records(records: Iterable[LLMCallRecord]) -> int:
+    """Bulk-insert the records of one run; never raises.
+
+    Records whose call never started (cancelled futures) are dropped, and
+    records of an assay deleted mid-run are kept without the assay.
+    """
+    records = [r for r in records if getattr(r, "_started_at", None) is not None]
+    if not records:
+        return 0
+    try:
+        existing = set(
+            Assay.objects.filter(pk__in={r.assay_id for r in records}).values_list(
+                "pk", flat=True
+            )
+        )
+        for record in records:
+            if record.assay_id not in existing:
+                record.assay_id = None
+        LLMCallRecord.objects.bulk_create(records, batch_size=500)
+    except Exception:
+        logger.exception("Failed to persist %d LLM call record(s)", len(records))
+        return 0
+    return len(records)
+
+
+def _summarize(rows: list[tuple]) -> dict:
+    ok_latencies = [
+        latency for outcome, latency, *_ in rows if outcome == LLMCallRecord.Outcome.OK
+    ]
+    calls = len(rows)
+    errors = calls - len(ok_latencies)
+    input_tokens = sum(r[5] for r in rows)
+    return {
+        "calls": calls,
+        "errors": errors,
+        "error_rate": round(errors / calls, 3) if calls else 0.0,
+        "p50_ms": percentile(ok_latencies, 50),
+        "p95_ms": percentile(ok_latencies, 95),
+        "avg_attempts": round(sum(r[2] for r in rows) / calls, 2) if calls else 0.0,
+        "rate_limit_sleep_s": round(sum(r[3] for r in rows) / 1000, 1),
+        "cache_read_ratio": (
+            round(sum(r[4] for r in rows) / input_tokens, 3) if input_tokens else 0.0
+        ),
+    }
+
+
+def call_stats(days: int = 14) -> list[dict]:
+    """Latency percentiles and error rates per deployment, overall and per day.
+
+    Returns:
+        One dict per deployment (busiest first) with the window summary and a
+        ``days`` list of per-day summaries, newest first.
+
+    """
+    since = timezone.now() - timedelta(days=days)
+    rows = (
+        LLMCallRecord.objects.filter(started_at__gte=since)
+        .annotate(day=TruncDate("started_at"))
+        .values_list(
+            "model_key",
+            "day",
+            "outcome",
+            "latency_ms",
+            "attempts",
+            "rate_limit_sleep_ms",
+            "cache_read_tokens",
+            "input_tokens",
+        )
+    )
+    by_deployment: dict[str, list[tuple]] = defaultdict(list)
+    by_day: dict[str, dict] = defaultdict(lambda: defaultdict(list))
+    for model_key, day, *values in rows:
+        key = model_key or "(legacy)"
+        by_deployment[key].append(values)
+        by_day[key][day].append(values)
+
+    stats = [
+        {
+            "model_key": key,
+            **_summarize(values),
+            "days": [
+                {"day": day, **_summarize(day_rows)}
+                for day, day_rows in sorted(by_day[key].items(), reverse=True)
+            ],
+        }
+        for key, values in by_deployment.items()
+    ]
+    return sorted(stats, key=lambda s: s["calls"], reverse=True)
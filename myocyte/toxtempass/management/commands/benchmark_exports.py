@@ -0,0 +1,87 @@
+"""Time the in-process export renderers against Pandoc for one assay.
+
+Renders the assay's Markdown, HTML and DOCX exports with both renderers (the
+artifact cache is bypassed) and prints the median and best wall time per
+format. The export source is loaded once up front, so only rendering is timed.
+Documents with TeX math fall back to Pandoc in both columns.
+
+    sudo docker exec djangoapp python manage.py benchmark_exports --assay-id 42
+    sudo docker exec djangoapp python manage.py benchmark_exports --repeat 10
+"""
+
+from __future__ import annotations
+
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from toxtempass import Config
+from toxtempass.export import ExportSource, render_export
+from toxtempass.models import Assay
+
+
+class Command(BaseCommand):
+    """Benchmark native vs. Pandoc rendering of the simple export formats."""
+
+    help = "Compare in-process and Pandoc render latency for md/html/docx exports."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Register CLI options."""
+        parser.add_argument(
+            "--assay-id",
+            type=int,
+            default=None,
+            help="Assay to export (default: the newest assay with answers).",
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument(
+            "--types",
+            default=",".join(sorted(Config.NATIVE_EXPORT_TYPES)),
+            help="Comma-separated export types.",
+        )
+
+    def handle(self, *args: object, **options: object) -> None:
+        """Render every type with both renderers and print the timings."""
+        assays = Assay.objects.filter(answers__isnull=False).distinct()
+        if options["assay_id"] is not None:
+            assays = assays.filter(pk=options["assay_id"])
+        assay = assays.order_by("-pk").first()
+        if assay is None:
+            raise CommandError("No assay with answers found.")
+
+        export_types = [t for t in str(options["types"]).split(",") if t]
+        unknown = set(export_types) - Config.NATIVE_EXPORT_TYPES
+        if unknown:
+            raise CommandError(f"No native renderer for: {', '.join(sorted(unknown))}")
+
+        repeat = max(1, int(options["repeat"]))
+        source = ExportSource(assay).prefetch()
+        self.stdout.write(
+            f"Assay {assay.pk} ({assay.answers.count()} answers), {repeat} runs each"
+        )
+        self.stdout.write(f"{'type':<6}{'renderer':<10}{'median ms':>11}{'best ms':>10}")
+        for export_type in export_types:
+            medians = {}
+            for renderer, enabled in (("pandoc", False), ("native", True)):
+                previous = Config.native_export_enabled
+                Config.native_export_enabled = enabled
+                try:
+                    timings = []
+                    for _ in range(repeat):
+                        started = time.perf_counter()
+                        render_export(None, assay, export_type, source)
+                        timings.append((time.perf_counter() - started) * 1000)
+                finally:
+                    Config.native_export_enabled = previous
+                medians[renderer] = statistics.median(timings)
+                self.stdout.write(
+                    f"{export_type:<6}{renderer:<10}"
+                    f"{medians[renderer]:>11.1f}{min(timings):>10.1f}"
+                )
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{export_type}: native is "
+                    f"{medians['pandoc'] / max(medians['native'], 1e-6):.1f}x faster"
+                )
+            )
@@ -0,0 +1,181 @@
+"""Measure LLM deployment throughput under assay-sized prompts.
+
+Replays the ``generate_answer`` message shape against each discovered
+deployment at increasing concurrency and reports time to first token, output
+tokens/s, the concurrency at which 429s start and a recommended per-deployment
+concurrency (compare with ``config.max_workers_threading``).
+
+Usage::
+
+    poetry run python manage.py benchmark_llm_throughput --only KIMI
+    poetry run python manage.py benchmark_llm_throughput --levels 1,2,4,8 \\
+        --output llm_throughput.json
+    # offline (CI): every deployment is served by a local fake endpoint
+    poetry run python manage.py benchmark_llm_throughput --fake-server \\
+        --fake-max-concurrency 4
+
+Real deployments are called through a client built like the one answer
+generation uses (``build_llm_for_endpoint``), but with the SDK's automatic
+retries off, so each 429 is counted when it happens rather than after the
+retries give up, and with usage streamed, so token counts are reported by the
+deployment rather than estimated from chunks.
+"""
+
+from __future__ import annotations
+
+import json
+from contextlib import ExitStack
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from toxtempass import config
+from toxtempass.azure_registry import ModelEntry
+from toxtempass.health_check import select_deployments
+from toxtempass.llm_benchmark import (
+    FakeOpenAIServer,
+    benchmark_messages,
+    deployment_report,
+    ramp,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Ramp concurrency against each deployment and report TTFT, tokens/s "
+        "and 429 onset."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--only",
+            default="",
+            help="Comma-separated tags to benchmark (e.g. 'KIMI,CLAUDE').",
+        )
+        parser.add_argument(
+            "--levels",
+            default="1,2,4,8,16,32",
+            help="Comma-separated concurrency levels, ramped in order.",
+        )
+        parser.add_argument(
+            "--rounds",
+            type=int,
+            default=2,
+            help="Requests per level = concurrency × rounds.",
+        )
+        parser.add_argument(
+            "--context-chars",
+            type=int,
+            default=48_000,
+            help="Size of the document context in the prompt (~4 chars per token).",
+        )
+        parser.add_argument("--output", default="", help="Write the JSON report here.")
+        parser.add_argument(
+            "--fake-server",
+            action="store_true",
+            help="Serve every deployment from a local fake OpenAI-compatible endpoint.",
+        )
+        parser.add_argument("--fake-max-concurrency", type=int, default=8)
+        parser.add_argument("--fake-tokens-per-second", type=float, default=80.0)
+        parser.add_argument("--fake-ttft-ms", type=int, default=200)
+        parser.add_argument("--fake-output-tokens", type=int, default=120)
+
+    def handle(self, *args, **opts):
+        try:
+            levels = [int(v) for v in opts["levels"].split(",") if v.strip()]
+        except ValueError as exc:
+            raise CommandError(f"Invalid --levels: {opts['levels']}") from exc
+        if not levels or min(levels) < 1:
+            raise CommandError("--levels needs positive integers.")
+
+        targets = [
+            (f"{ep.index}:{m.tag}", m)
+            for ep, m in select_deployments(opts["only"].split(","))
+        ]
+        if not targets and opts["fake_server"]:
+            fake = ModelEntry(tag="FAKE", deployment_name="fake", model_id="fake")
+            targets = [("0:FAKE", fake)]
+        if not targets:
+            raise CommandError(
+                "No deployments selected (no AZURE_E*_ENDPOINT vars or --only)."
+            )
+
+        messages = benchmark_messages(opts["context_chars"])
+        reports = []
+        for key, model in targets:
+            self.stdout.write(self.style.HTTP_INFO(f"→ {key} ({model.model_id})"))
+            with ExitStack() as stack:
+                llm = self._client(key, model, opts, stack)
+                results = ramp(
+                    llm, messages, levels=levels, rounds=max(1, opts["rounds"])
+                )
+            report = deployment_report(key, model.model_id, results)
+            reports.append(report)
+            self._print_levels(report)
+
+        payload = {
+            "generated_at": timezone.now().isoformat(),
+            "fake_server": opts["fake_server"],
+            "context_chars": opts["context_chars"],
+            "rounds": opts["rounds"],
+            "max_workers_threading": config.max_workers_threading,
+            "deployments": reports,
+        }
+        if opts["output"]:
+            with open(opts["output"], "w") as fh:
+                json.dump(payload, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Report written to {opts['output']}"))
+
+    def _client(self, key: str, model: ModelEntry, opts: dict, stack: ExitStack):
+        if not opts["fake_server"]:
+            from toxtempass.llm import build_llm_for_endpoint
+
+            return build_llm_for_endpoint(
+                int(key.split(":")[0]),
+                model.tag,
+                temperature=0,
+                max_retries=0,
+                stream_usage=True,
+            )
+
+        from langchain_openai import ChatOpenAI
+
+        server = stack.enter_context(
+            FakeOpenAIServer(
+                ttft_ms=opts["fake_ttft_ms"],
+                tokens_per_second=opts["fake_tokens_per_second"],
+                output_tokens=opts["fake_output_tokens"],
+                max_concurrency=opts["fake_max_concurrency"],
+            )
+        )
+        return ChatOpenAI(
+            base_url=server.base_url,
+            api_key="fake",
+            model=model.deployment_name,
+            max_retries=0,
+            stream_usage=True,
+            timeout=120,
+        )
+
+    def _print_levels(self, report: dict) -> None:
+        self.stdout.write(
+            f"  {'conc':>4} {'ok':>4} {'429':>4} {'err':>4} "
+            f"{'TTFT p50':>9} {'TTFT p95':>9} {'tok/s/stream':>13} {'tok/s total':>12}"
+        )
+        for lvl in report["levels"]:
+            self.stdout.write(
+                f"  {lvl['concurrency']:>4} {lvl['ok']:>4} {lvl['rate_limited']:>4} "
+                f"{lvl['errors']:>4} {lvl['ttft_p50_ms'] or '-':>9} "
+                f"{lvl['ttft_p95_ms'] or '-':>9} "
+                f"{lvl['stream_tokens_per_second'] or '-':>13} "
+                f"{lvl['aggregate_tokens_per_second']:>12}"
+            )
+            for sample in lvl["error_samples"]:
+                self.stdout.write(self.style.WARNING(f"       {sample}"))
+        onset = report["rate_limit_onset"]
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"  recommended concurrency: {report['recommended_concurrency']}"
+                f" (429 onset: {onset if onset is not None else 'not reached'})"
+            )
+        )
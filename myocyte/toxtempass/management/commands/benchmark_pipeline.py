@@ -0,0 +1,151 @@
+"""Run the offline pipeline benchmarks and store or compare JSON baselines.
+
+The cases (see ``toxtempass.perf_benchmark``) run in a throwaway test
+database with a fake chat model, so no network and no production data are
+involved.  Each case reports its median/best wall time and its query count.
+
+Usage::
+
+    poetry run python manage.py benchmark_pipeline --save-baseline
+    poetry run python manage.py benchmark_pipeline --compare
+    poetry run python manage.py benchmark_pipeline --only extract_pdf,generate_json \\
+        --baseline /tmp/bench.json --tolerance 0.5
+
+``--compare`` exits with an error when a case got slower than the baseline by
+more than ``--tolerance`` (and ``--noise-floor-ms``) or issues more queries.
+Compare baselines recorded on the same machine and database backend.
+Cases that cannot run here (e.g. ``extract_docx`` without the spaCy model) are
+listed as skipped.
+"""
+
+from __future__ import annotations
+
+import json
+import tempfile
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from toxtempass.perf_benchmark import (
+    CASES,
+    BenchmarkOptions,
+    compare_to_baseline,
+    results_payload,
+    run_cases,
+)
+
+
+class Command(BaseCommand):
+    """Time the core pipeline offline and guard against regressions."""
+
+    help = "Run the offline pipeline benchmarks; save or compare a JSON baseline."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Register CLI options."""
+        parser.add_argument(
+            "--only",
+            default="",
+            help=f"Comma-separated cases (default: all of {', '.join(CASES)}).",
+        )
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument("--questions", type=int, default=77)
+        parser.add_argument(
+            "--llm-latency-ms",
+            type=int,
+            default=50,
+            help="Latency of every fake chat-model call.",
+        )
+        parser.add_argument(
+            "--baseline",
+            default="benchmarks/pipeline_baseline.json",
+            help="Baseline file to write (--save-baseline) or read (--compare).",
+        )
+        parser.add_argument("--save-baseline", action="store_true")
+        parser.add_argument("--compare", action="store_true")
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.25,
+            help="Allowed relative slowdown of a case's median before it regresses.",
+        )
+        parser.add_argument(
+            "--noise-floor-ms",
+            type=float,
+            default=5.0,
+            help="Slowdowns smaller than this never count as regressions.",
+        )
+        parser.add_argument(
+            "--keepdb",
+            action="store_true",
+            help="Reuse the test database between runs.",
+        )
+
+    def handle(self, *args: object, **options: object) -> None:
+        """Run the cases in a test database and report, save or compare."""
+        only = [c.strip() for c in str(options["only"]).split(",") if c.strip()]
+        unknown = set(only) - set(CASES)
+        if unknown:
+            raise CommandError(f"Unknown case(s): {', '.join(sorted(unknown))}")
+        baseline_path = Path(str(options["baseline"]))
+        baseline = None
+        if options["compare"]:
+            if not baseline_path.exists():
+                raise CommandError(f"No baseline at {baseline_path}.")
+            baseline = json.loads(baseline_path.read_text())
+
+        with tempfile.TemporaryDirectory(prefix="toxtempass-bench-") as workdir:
+            bench_options = BenchmarkOptions(
+                workdir=Path(workdir),
+                repeat=max(1, int(options["repeat"])),
+                questions=max(1, int(options["questions"])),
+                llm_latency_ms=max(0, int(options["llm_latency_ms"])),
+            )
+            setup_test_environment()
+            old_name = connection.creation.create_test_db(
+                verbosity=0, autoclobber=True, serialize=False, keepdb=options["keepdb"]
+            )
+            try:
+                results = run_cases(bench_options, only or None)
+                payload = results_payload(results, bench_options)
+            finally:
+                connection.creation.destroy_test_db(
+                    old_name, verbosity=0, keepdb=options["keepdb"]
+                )
+                teardown_test_environment()
+
+        self._print(payload, baseline)
+
+        if options["save_baseline"]:
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(json.dumps(payload, indent=2) + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {baseline_path}"))
+
+        if baseline is not None:
+            regressions = compare_to_baseline(
+                payload,
+                baseline,
+                tolerance=float(options["tolerance"]),
+                noise_floor_ms=float(options["noise_floor_ms"]),
+            )
+            if regressions:
+                for line in regressions:
+                    self.stdout.write(self.style.ERROR(f"REGRESSION {line}"))
+                raise CommandError(f"{len(regressions)} regression(s) against baseline.")
+            self.stdout.write(self.style.SUCCESS("No regressions against baseline."))
+
+    def _print(self, payload: dict, baseline: dict | None) -> None:
+        base_cases = (baseline or {}).get("cases", {})
+        self.stdout.write(
+            f"{'case':<32}{'median ms':>11}{'best ms':>10}{'queries':>9}{'baseline':>11}"
+        )
+        for name, case in payload["cases"].items():
+            base = base_cases.get(name)
+            self.stdout.write(
+                f"{name:<32}{case['median_ms']:>11.1f}{case['best_ms']:>10.1f}"
+                f"{case['queries']:>9}"
+                f"{(format(base['median_ms'], '.1f') if base else '-'):>11}"
+            )
+        for name, reason in payload["skipped"].items():
+            self.stdout.write(self.style.WARNING(f"{name:<32}skipped: {reason}"))
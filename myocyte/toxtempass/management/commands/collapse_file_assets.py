@@ -0,0 +1,128 @@
+"""Move stored FileAssets onto content-addressed keys, collapsing duplicates.
+
+Uploads used to be stored under a fresh ``consent_user_documents/.../{uuid}/``
+key each time, so the same document uploaded to several assays was stored
+several times. This copies each distinct content once to its
+content-addressed key (see :func:`toxtempass.filehandling.content_object_key`),
+repoints every ``FileAsset`` with that SHA-256 at it, and deletes the old
+objects no row references any more. Rows without a recorded hash are left
+alone. Safe to re-run.
+
+    sudo docker exec djangoapp python manage.py collapse_file_assets --dry-run
+    sudo docker exec djangoapp python manage.py collapse_file_assets
+"""
+
+from __future__ import annotations
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandParser
+from django.db.models import Count
+
+from toxtempass import config
+from toxtempass.filehandling import HashingUploadStream, content_object_key
+from toxtempass.models import FileAsset
+
+
+class Command(BaseCommand):
+    """Collapse duplicate stored files onto one object per SHA-256."""
+
+    help = "Move FileAssets to content-addressed storage keys and drop duplicates."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Register CLI options."""
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Only report what would change."
+        )
+        parser.add_argument(
+            "--keep-old",
+            action="store_true",
+            help="Don't delete the old objects after repointing the rows.",
+        )
+
+    def handle(self, *args: object, **options: object) -> None:
+        """Process every hash whose rows are not all on the content key yet."""
+        dry_run = bool(options["dry_run"])
+        assets = FileAsset.objects.filter(status=FileAsset.Status.AVAILABLE).exclude(
+            sha256=""
+        )
+        hashes = (
+            assets.exclude(object_key__startswith=f"{config.file_blob_prefix}/")
+            .values_list("sha256", flat=True)
+            .distinct()
+        )
+
+        moved = copied = removed = failed = 0
+        saved_bytes = 0
+        for sha256_hash in list(hashes):
+            group = list(
+                assets.filter(sha256=sha256_hash).values_list("object_key", "size_bytes")
+            )
+            target = content_object_key(sha256_hash)
+            old_keys = sorted({key for key, _ in group if key != target})
+            if dry_run:
+                self.stdout.write(
+                    f"{sha256_hash[:12]}: {len(group)} row(s), "
+                    f"{len(old_keys)} object(s) -> {target}"
+                )
+                moved += len(group)
+                continue
+
+            try:
+                if not default_storage.exists(target):
+                    self._copy(old_keys, target, sha256_hash)
+                    copied += 1
+            except Exception as exc:
+                failed += 1
+                self.stderr.write(f"{sha256_hash[:12]}: skipped ({exc})")
+                continue
+
+            moved += (
+                assets.filter(sha256=sha256_hash)
+                .exclude(object_key=target)
+                .update(object_key=target)
+            )
+            if options["keep_old"]:
+                continue
+            still_used = set(
+                FileAsset.objects.filter(object_key__in=old_keys)
+                .values_list("object_key", flat=True)
+            )
+            sizes = dict(group)
+            for key in old_keys:
+                if key in still_used:
+                    continue
+                try:
+                    if default_storage.exists(key):
+                        default_storage.delete(key)
+                        removed += 1
+                        saved_bytes += sizes.get(key) or 0
+                except Exception as exc:
+                    self.stderr.write(f"Could not delete {key}: {exc}")
+
+        duplicates = (
+            assets.values("sha256").annotate(n=Count("id")).filter(n__gt=1).count()
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{'Would repoint' if dry_run else 'Repointed'} {moved} row(s); "
+                f"copied {copied} object(s), deleted {removed} "
+                f"({saved_bytes / 1024 / 1024:.1f} MiB), {failed} failed. "
+                f"{duplicates} hash(es) are shared by several rows."
+            )
+        )
+
+    def _copy(self, old_keys: list[str], target: str, sha256_hash: str) -> None:
+        """Copy the first readable old object to *target*, verifying its hash."""
+        for key in old_keys:
+            if not default_storage.exists(key):
+                continue
+            with default_storage.open(key, "rb") as source:
+                stream = HashingUploadStream(
+                    source.chunks(chunk_size=config.upload_chunk_size)
+                )
+                default_storage.save(target, stream)
+                if stream.hexdigest() == sha256_hash:
+                    return
+            default_storage.delete(target)
+            self.stderr.write(f"{key}: content does not match its recorded SHA-256")
+        raise FileNotFoundError("no stored object matches the recorded hash")
@@ -0,0 +1,63 @@
+"""Rebuild the Azure model registry in every running worker.
+
+Re-reads the ``AZURE_E*`` sources (environment of *this* process, the
+``AZURE_REGISTRY_FILE`` file and ``LLMConfig.registry_env``) and bumps the
+shared registry version, so web and queue workers rebuild theirs on their next
+lookup. Cached chat clients are evicted only for deployments that changed.
+
+Usage::
+
+    poetry run python manage.py reload_llm_registry
+    poetry run python manage.py reload_llm_registry --dry-run
+"""
+
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from toxtempass.azure_registry import (
+    RegistryChange,
+    RegistrySnapshot,
+    build_registry,
+    current_registry,
+    reload_registry,
+)
+
+
+class Command(BaseCommand):
+    help = "Reload the Azure model registry without restarting the workers."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only show what would change.",
+        )
+
+    def handle(self, *args, **opts):
+        current = current_registry()
+        if opts["dry_run"]:
+            change = RegistryChange.between(
+                current, RegistrySnapshot.build(build_registry(), current.version + 1)
+            )
+        else:
+            change = reload_registry()
+
+        for label, keys, style in (
+            ("added", change.added, self.style.SUCCESS),
+            ("removed", change.removed, self.style.WARNING),
+            ("changed", change.changed, self.style.HTTP_INFO),
+        ):
+            for key in sorted(keys):
+                self.stdout.write(style(f"  {label:<8}{key}"))
+        if not (change.added or change.removed or change.changed):
+            self.stdout.write("  no deployment changes")
+
+        if opts["dry_run"]:
+            self.stdout.write("Dry run: nothing reloaded.")
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    "Registry reloaded; other workers follow on their next lookup."
+                )
+            )
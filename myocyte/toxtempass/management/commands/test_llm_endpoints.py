@@ -5,14 +5,19 @@ Usage::
     poetry run python manage.py test_llm_endpoints
     poetry run python manage.py test_llm_endpoints --only KIMI
     poetry run python manage.py test_llm_endpoints --prompt "ping"
+    poetry run python manage.py test_llm_endpoints --samples 5 --timeout 20
+
+Deployments are probed concurrently; ``--only`` is applied before any call.
 """
 
 from __future__ import annotations
 
 from django.core.management.base import BaseCommand
 
+from toxtempass import config
 from toxtempass.azure_registry import get_registry
-from toxtempass.llm import run_health_check
+from toxtempass.health_check import run_health_check, save_health_check
+from toxtempass.http_pool import pool_stats
 
 
 class Command(BaseCommand):
@@ -29,10 +34,31 @@ class Command(BaseCommand):
             default="",
             help="Comma-separated tags to restrict testing (e.g. 'KIMI,CLAUDE').",
         )
+        parser.add_argument(
+            "--samples",
+            type=int,
+            default=config.health_check_samples,
+            help="Probes per deployment (for p50/p95 latency).",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=config.health_check_timeout_seconds,
+            help="Seconds each deployment gets before it counts as failed.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=config.health_check_workers,
+            help="Deployments probed at once.",
+        )
         parser.add_argument(
             "--save",
             action="store_true",
-            help="Persist results to LLMConfig.last_health_check (same as admin action).",
+            help=(
+                "Persist results to LLMConfig.last_health_check and the "
+                "LLMHealthCheck history (same as admin action)."
+            ),
         )
 
     def handle(self, *args, **opts):
@@ -40,21 +66,24 @@ class Command(BaseCommand):
             self.stdout.write(self.style.ERROR("No AZURE_E*_ENDPOINT vars found."))
             return
 
-        only = {t.strip().upper() for t in opts["only"].split(",") if t.strip()}
-        results = run_health_check(prompt=opts["prompt"])
-
-        filtered = {
-            k: v for k, v in results.items() if not only or k.split(":")[1] in only
-        }
+        results = run_health_check(
+            prompt=opts["prompt"],
+            only=opts["only"].split(","),
+            samples=opts["samples"],
+            timeout=opts["timeout"],
+            workers=opts["workers"],
+        )
 
         ok = 0
-        for key, r in filtered.items():
+        for key, r in results.items():
             label = f"{key} ({r['model_id']}, api={r['api']})"
             self.stdout.write(self.style.HTTP_INFO(f"→ {label}"))
             if r["ok"]:
                 self.stdout.write(
                     self.style.SUCCESS(
-                        f"  ✓ {r['latency_ms']}ms · {r['response']}"
+                        f"  ✓ p50 {r['p50_ms']}ms · p95 {r['p95_ms']}ms · "
+                        f"TTFT {r['ttft_ms']}ms ({r['samples']} samples) · "
+                        f"{r['response']}"
                     )
                 )
                 ok += 1
@@ -62,13 +91,17 @@ class Command(BaseCommand):
                 self.stdout.write(self.style.ERROR(f"  ✗ {r['error']}"))
 
         if opts["save"]:
-            from toxtempass.models import LLMConfig
-            cfg = LLMConfig.load()
-            cfg.last_health_check = results
-            cfg.save()
+            save_health_check(results)
             self.stdout.write(self.style.HTTP_INFO("Saved results to LLMConfig."))
 
-        total = len(filtered)
+        for host, stats in pool_stats().items():
+            self.stdout.write(
+                f"  {host}: {stats['requests']} requests over "
+                f"{stats['connections_opened']} connection(s), "
+                f"{stats['reused']} reused"
+            )
+
+        total = len(results)
         style = self.style.SUCCESS if ok == total else self.style.WARNING
         self.stdout.write("")
         self.stdout.write(style(f"{ok}/{total} deployments responded."))
@@ -0,0 +1,40 @@
+"""Register the django-q schedule that flushes buffered assay time heartbeats.
+
+``toxtempass.views.assay_time_sync`` no longer writes ``AssayTimeLog`` rows on
+every heartbeat; ``toxtempass.time_tracking.flush_assay_time`` persists the
+cached values periodically instead.
+"""
+
+from django.db import migrations
+
+FLUSH_FUNC = "toxtempass.time_tracking.flush_assay_time"
+
+
+def add_flush_schedule(apps, schema_editor):
+    Schedule = apps.get_model("django_q", "Schedule")
+    Schedule.objects.update_or_create(
+        func=FLUSH_FUNC,
+        defaults={
+            "name": "Flush assay time heartbeats",
+            "schedule_type": "I",  # Schedule.MINUTES
+            "minutes": 1,
+            "repeats": -1,
+        },
+    )
+
+
+def remove_flush_schedule(apps, schema_editor):
+    Schedule = apps.get_model("django_q", "Schedule")
+    Schedule.objects.filter(func=FLUSH_FUNC).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("toxtempass", "0035_question_riskhunt3r_db_label"),
+        ("django_q", "__latest__"),
+    ]
+
+    operations = [
+        migrations.RunPython(add_flush_schedule, remove_flush_schedule),
+    ]
@@ -0,0 +1,40 @@
+"""Register the django-q schedule that bulk-writes queued assay views.
+
+``toxtempass.views.answer_assay_questions`` no longer upserts ``AssayView`` on
+every GET; ``toxtempass.view_tracking.flush_assay_views`` persists the queued
+timestamps periodically instead.
+"""
+
+from django.db import migrations
+
+FLUSH_FUNC = "toxtempass.view_tracking.flush_assay_views"
+
+
+def add_flush_schedule(apps, schema_editor):
+    Schedule = apps.get_model("django_q", "Schedule")
+    Schedule.objects.update_or_create(
+        func=FLUSH_FUNC,
+        defaults={
+            "name": "Flush assay views",
+            "schedule_type": "I",  # Schedule.MINUTES
+            "minutes": 1,
+            "repeats": -1,
+        },
+    )
+
+
+def remove_flush_schedule(apps, schema_editor):
+    Schedule = apps.get_model("django_q", "Schedule")
+    Schedule.objects.filter(func=FLUSH_FUNC).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("toxtempass", "0036_schedule_flush_assay_time"),
+        ("django_q", "__latest__"),
+    ]
+
+    operations = [
+        migrations.RunPython(add_flush_schedule, remove_flush_schedule),
+    ]
@@ -0,0 +1,102 @@
+import uuid
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("toxtempass", "0037_schedule_flush_assay_views"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ExportJob",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("export_type", models.CharField(max_length=16)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("queued", "Queued"),
+                            ("running", "Running"),
+                            ("done", "Done"),
+                            ("failed", "Failed"),
+                        ],
+                        default="queued",
+                        max_length=16,
+                    ),
+                ),
+                ("task_id", models.CharField(blank=True, default="", max_length=64)),
+                (
+                    "artifact_key",
+                    models.CharField(
+                        blank=True,
+                        default="",
+                        help_text="Storage key of the rendered file once the job is done.",
+                        max_length=1024,
+                    ),
+                ),
+                ("file_name", models.CharField(blank=True, default="", max_length=512)),
+                (
+                    "cache_hit",
+                    models.BooleanField(
+                        default=False, help_text="Served from the export artifact cache."
+                    ),
+                ),
+                (
+                    "render_seconds",
+                    models.FloatField(
+                        blank=True,
+                        help_text="Wall time spent rendering (cache misses).",
+                        null=True,
+                    ),
+                ),
+                ("error", models.TextField(blank=True, default="")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("started_at", models.DateTimeField(blank=True, null=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "assay",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="export_jobs",
+                        to="toxtempass.assay",
+                    ),
+                ),
+                (
+                    "requested_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="export_jobs",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Export Job",
+                "verbose_name_plural": "Export Jobs",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["export_type", "status"],
+                        name="exportjob_type_status_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("toxtempass", "0038_exportjob"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="fileasset",
+            name="object_key",
+            field=models.CharField(db_index=True, max_length=1024),
+        ),
+    ]
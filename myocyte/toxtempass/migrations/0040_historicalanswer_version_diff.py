@@ -0,0 +1,37 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("toxtempass", "0039_fileasset_shared_object_key"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="historicalanswer",
+            name="diff_computed",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name="historicalanswer",
+            name="diff_visible",
+            field=models.BooleanField(
+                default=False, help_text="Changes something other than ``accepted``."
+            ),
+        ),
+        migrations.AddField(
+            model_name="historicalanswer",
+            name="changed_fields",
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name="historicalanswer",
+            name="answer_text_ops",
+            field=models.JSONField(
+                blank=True,
+                help_text="Word diff against the previous version (see answer_history).",
+                null=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,53 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("toxtempass", "0040_historicalanswer_version_diff"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LLMHealthCheck",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "deployment",
+                    models.CharField(help_text='Deployment key, e.g. "1:GPT4O".', max_length=64),
+                ),
+                ("model_id", models.CharField(blank=True, default="", max_length=128)),
+                ("checked_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("ok", models.BooleanField(default=False)),
+                (
+                    "samples",
+                    models.PositiveSmallIntegerField(default=0, help_text="Probes that completed."),
+                ),
+                ("p50_ms", models.PositiveIntegerField(blank=True, null=True)),
+                ("p95_ms", models.PositiveIntegerField(blank=True, null=True)),
+                (
+                    "ttft_ms",
+                    models.PositiveIntegerField(
+                        blank=True, help_text="Median time to first streamed token.", null=True
+                    ),
+                ),
+                ("error", models.TextField(blank=True, default="")),
+            ],
+            options={
+                "verbose_name": "LLM Health Check",
+                "verbose_name_plural": "LLM Health Checks",
+                "ordering": ["-checked_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["deployment", "-checked_at"], name="llmhealth_deploy_time_idx"
+                    )
+                ],
+            },
+        ),
+    ]
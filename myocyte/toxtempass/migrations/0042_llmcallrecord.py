@@ -0,0 +1,106 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("toxtempass", "0041_llmhealthcheck"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LLMCallRecord",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "model_key",
+                    models.CharField(
+                        blank=True,
+                        default="",
+                        help_text='Deployment key used, e.g. "1:GPT4O" (empty for legacy clients).',
+                        max_length=64,
+                    ),
+                ),
+                ("model_id", models.CharField(blank=True, default="", max_length=128)),
+                ("answering_round", models.PositiveSmallIntegerField(default=0)),
+                ("started_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "queue_wait_ms",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="Time between submission to the pool and the first attempt.",
+                    ),
+                ),
+                (
+                    "latency_ms",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="Wall time of the call including retries and back-off.",
+                    ),
+                ),
+                ("attempts", models.PositiveSmallIntegerField(default=0)),
+                (
+                    "rate_limit_sleep_ms",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Time spent sleeping after 429 responses."
+                    ),
+                ),
+                ("input_tokens", models.PositiveIntegerField(default=0)),
+                ("output_tokens", models.PositiveIntegerField(default=0)),
+                ("cache_read_tokens", models.PositiveIntegerField(default=0)),
+                ("cache_creation_tokens", models.PositiveIntegerField(default=0)),
+                (
+                    "outcome",
+                    models.CharField(
+                        choices=[
+                            ("ok", "OK"),
+                            ("bad_request", "Bad request"),
+                            ("transient", "Gave up after transient errors"),
+                            ("timeout", "Timed out"),
+                            ("error", "Error"),
+                        ],
+                        default="error",
+                        max_length=16,
+                    ),
+                ),
+                ("error", models.CharField(blank=True, default="", max_length=400)),
+                (
+                    "assay",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="llm_calls",
+                        to="toxtempass.assay",
+                    ),
+                ),
+                (
+                    "question",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="toxtempass.question",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "LLM Call",
+                "verbose_name_plural": "LLM Calls",
+                "ordering": ["-started_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["model_key", "started_at"], name="llmcall_model_time_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("toxtempass", "0042_llmcallrecord"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="llmconfig",
+            name="registry_env",
+            field=models.TextField(
+                blank=True,
+                default="",
+                help_text=(
+                    "Extra AZURE_E* lines (KEY=VALUE, one per line) layered over the "
+                    "environment to add, change or retire (empty value) deployments "
+                    "without a restart. Keep API keys in the environment."
+                ),
+            ),
+        ),
+    ]
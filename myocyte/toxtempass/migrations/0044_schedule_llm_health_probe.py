@@ -0,0 +1,40 @@
+"""Register the django-q schedule that probes every LLM deployment.
+
+``toxtempass.deployment_health.probe_deployment_health`` sends one short probe
+to each deployment and updates its circuit breaker, so queue-time routing can
+avoid deployments that are currently failing.
+"""
+
+from django.db import migrations
+
+PROBE_FUNC = "toxtempass.deployment_health.probe_deployment_health"
+
+
+def add_probe_schedule(apps, schema_editor):
+    Schedule = apps.get_model("django_q", "Schedule")
+    Schedule.objects.update_or_create(
+        func=PROBE_FUNC,
+        defaults={
+            "name": "Probe LLM deployment health",
+            "schedule_type": "I",  # Schedule.MINUTES
+            "minutes": 5,
+            "repeats": -1,
+        },
+    )
+
+
+def remove_probe_schedule(apps, schema_editor):
+    Schedule = apps.get_model("django_q", "Schedule")
+    Schedule.objects.filter(func=PROBE_FUNC).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("toxtempass", "0043_llmconfig_registry_env"),
+        ("django_q", "__latest__"),
+    ]
+
+    operations = [
+        migrations.RunPython(add_probe_schedule, remove_probe_schedule),
+    ]
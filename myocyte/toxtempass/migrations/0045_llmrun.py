@@ -0,0 +1,111 @@
+"""Add ``LLMRun`` and the schedule that dispatches pending LLM runs.
+
+Runs are normally admitted when they are submitted and whenever a run
+finishes; ``toxtempass.scheduling.dispatch_pending`` also runs every minute to
+fail runs whose worker died and admit whatever is waiting behind them.
+"""
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+DISPATCH_FUNC = "toxtempass.scheduling.dispatch_pending"
+
+
+def add_dispatch_schedule(apps, schema_editor):
+    Schedule = apps.get_model("django_q", "Schedule")
+    Schedule.objects.update_or_create(
+        func=DISPATCH_FUNC,
+        defaults={
+            "name": "Dispatch pending LLM runs",
+            "schedule_type": "I",  # Schedule.MINUTES
+            "minutes": 1,
+            "repeats": -1,
+        },
+    )
+
+
+def remove_dispatch_schedule(apps, schema_editor):
+    Schedule = apps.get_model("django_q", "Schedule")
+    Schedule.objects.filter(func=DISPATCH_FUNC).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("toxtempass", "0044_schedule_llm_health_probe"),
+        ("django_q", "__latest__"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LLMRun",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("queued", "Queued"),
+                            ("running", "Running"),
+                            ("done", "Done"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        max_length=16,
+                    ),
+                ),
+                (
+                    "payload",
+                    models.TextField(
+                        blank=True,
+                        default="",
+                        help_text="Signed task arguments; cleared once the run has started.",
+                    ),
+                ),
+                ("task_id", models.CharField(blank=True, default="", max_length=64)),
+                ("error", models.TextField(blank=True, default="")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("dispatched_at", models.DateTimeField(blank=True, null=True)),
+                ("started_at", models.DateTimeField(blank=True, null=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "assay",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="llm_runs",
+                        to="toxtempass.assay",
+                    ),
+                ),
+                (
+                    "requested_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="llm_runs",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "LLM Run",
+                "verbose_name_plural": "LLM Runs",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["status", "created_at"],
+                        name="llmrun_status_created_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(add_dispatch_schedule, remove_dispatch_schedule),
+    ]
@@ -0,0 +1,49 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("toxtempass", "0045_llmrun"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="llmrun",
+            name="model_key",
+            field=models.CharField(
+                blank=True,
+                default="",
+                help_text='Deployment key, e.g. "1:GPT4O"; the one used once the run ends.',
+                max_length=64,
+            ),
+        ),
+        migrations.AddField(
+            model_name="llmrun",
+            name="question_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="llmrun",
+            name="context_chars",
+            field=models.PositiveIntegerField(
+                default=0, help_text="Characters of extracted document text."
+            ),
+        ),
+        migrations.AddField(
+            model_name="llmrun",
+            name="run_seconds",
+            field=models.FloatField(
+                blank=True, help_text="Wall time from start to finish.", null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="llmrun",
+            name="timings",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                help_text="Seconds spent on extraction, in the queue and per answering round.",
+            ),
+        ),
+    ]
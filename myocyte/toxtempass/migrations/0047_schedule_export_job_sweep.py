@@ -0,0 +1,40 @@
+"""Register the django-q schedule that sweeps export jobs.
+
+``toxtempass.export_jobs.sweep_export_jobs`` fails export jobs whose worker
+died (the exports cluster does not retry) and deletes old jobs together with
+their per-job artifacts.
+"""
+
+from django.db import migrations
+
+SWEEP_FUNC = "toxtempass.export_jobs.sweep_export_jobs"
+
+
+def add_sweep_schedule(apps, schema_editor):
+    Schedule = apps.get_model("django_q", "Schedule")
+    Schedule.objects.update_or_create(
+        func=SWEEP_FUNC,
+        defaults={
+            "name": "Sweep stale and old export jobs",
+            "schedule_type": "I",  # Schedule.MINUTES
+            "minutes": 10,
+            "repeats": -1,
+        },
+    )
+
+
+def remove_sweep_schedule(apps, schema_editor):
+    Schedule = apps.get_model("django_q", "Schedule")
+    Schedule.objects.filter(func=SWEEP_FUNC).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("toxtempass", "0046_llmrun_timings"),
+        ("django_q", "__latest__"),
+    ]
+
+    operations = [
+        migrations.RunPython(add_sweep_schedule, remove_sweep_schedule),
+    ]
@@ -0,0 +1,26 @@
+"""Remove the schedule that flushed buffered assay time heartbeats.
+
+``toxtempass.time_tracking.record_active_seconds`` now writes ``AssayTimeLog``
+directly, so ``flush_assay_time`` (scheduled by migration 0036) is gone.
+"""
+
+from django.db import migrations
+
+FLUSH_FUNC = "toxtempass.time_tracking.flush_assay_time"
+
+
+def remove_flush_schedule(apps, schema_editor):
+    Schedule = apps.get_model("django_q", "Schedule")
+    Schedule.objects.filter(func=FLUSH_FUNC).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("toxtempass", "0047_schedule_export_job_sweep"),
+        ("django_q", "__latest__"),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_flush_schedule, migrations.RunPython.noop),
+    ]
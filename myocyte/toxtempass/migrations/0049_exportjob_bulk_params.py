@@ -0,0 +1,24 @@
+# Generated by Django 6.1.2 on 2026-10-19 08:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('toxtempass', '0048_remove_flush_assay_time_schedule'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exportjob',
+            name='params',
+            field=models.JSONField(blank=True, default=dict, help_text='Bulk exports: selected assays and formats, and render progress.'),
+        ),
+        migrations.AlterField(
+            model_name='exportjob',
+            name='assay',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='export_jobs', to='toxtempass.assay'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.1.2 on 2026-10-19 08:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('toxtempass', '0049_exportjob_bulk_params'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='llmconfig',
+            name='registry_env',
+            field=models.TextField(blank=True, default='', help_text='Extra AZURE_E* lines (KEY=VALUE, one per line) layered over the environment to add, change or retire (empty value) deployments without a restart. API keys (*_KEY) are rejected: keep them in the environment or the registry file.'),
+        ),
+    ]
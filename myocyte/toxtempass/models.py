@@ -1,12 +1,18 @@
 from __future__ import annotations
 
+import copy
+import threading
+import time
 import uuid
+from collections.abc import Callable
+from typing import Any
 
 from django.contrib.auth.models import AbstractUser, BaseUserManager
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.core.validators import validate_email
-from django.db import models
-from django.db.models import Count, Q
+from django.db import models, transaction
+from django.db.models import Avg, Count, Max, Q
 from django.utils import timezone
 from guardian.shortcuts import assign_perm
 from simple_history.models import HistoricalRecords
@@ -749,7 +755,8 @@ class FileAsset(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
 
     bucket = models.CharField(max_length=255, blank=True)
-    object_key = models.CharField(max_length=1024, unique=True)
+    # Content-addressed: rows with the same ``sha256`` share one object.
+    object_key = models.CharField(max_length=1024, db_index=True)
 
     original_filename = models.CharField(max_length=512)
     content_type = models.CharField(max_length=255, blank=True)
@@ -774,6 +781,29 @@ class FileAsset(models.Model):
 
 
 # Answer Model (linked to Assay)
+class AnswerVersionDiff(models.Model):
+    """Change summary stored on every historical Answer row.
+
+    Filled in when the history row is created (see
+    ``toxtempass.answer_history``) so the version history view never has to
+    diff records on request.
+    """
+
+    diff_computed = models.BooleanField(default=False)
+    diff_visible = models.BooleanField(
+        default=False, help_text="Changes something other than ``accepted``."
+    )
+    changed_fields = models.JSONField(default=list, blank=True)
+    answer_text_ops = models.JSONField(
+        null=True,
+        blank=True,
+        help_text="Word diff against the previous version (see answer_history).",
+    )
+
+    class Meta:
+        abstract = True
+
+
 class Answer(AccessibleModel):
     assay = models.ForeignKey(Assay, on_delete=models.CASCADE, related_name="answers")
     question = models.ForeignKey(
@@ -799,7 +829,7 @@ class Answer(AccessibleModel):
     accepted = models.BooleanField(
         null=True, blank=True, help_text="Marked as final answer."
     )
-    history = HistoricalRecords()
+    history = HistoricalRecords(bases=[AnswerVersionDiff])
 
     def __str__(self):
         """Return a string representation of the answer."""
@@ -941,11 +971,22 @@ class WorkspaceInvestigation(models.Model):
         unique_together = ("workspace", "investigation")
 
 
+_LLM_CONFIG_VERSION_KEY = "llm_config:version"
+# Process-local snapshot of the singleton plus anything derived from it (model
+# choices, signatures, ...), valid for exactly one ``_LLM_CONFIG_VERSION_KEY``.
+_llm_config_local: dict[str, Any] = {"version": None, "config": None, "derived": {}}
+_llm_config_lock = threading.Lock()
+
+
 class LLMConfig(models.Model):
     """Singleton admin-managed configuration for Azure AI Foundry LLM endpoints.
 
     Only one row should ever exist (enforced by the ``save`` override).
     Stores which deployment is the default and which deployments users may choose.
+
+    ``load()`` and ``cached()`` serve from a process-local snapshot keyed by a
+    version counter in the shared cache. ``save()`` bumps the counter, so every
+    worker picks up admin changes on its next lookup.
     """
 
     default_model = models.CharField(
@@ -973,6 +1014,16 @@ class LLMConfig(models.Model):
             "the 'Run health check now' admin action."
         ),
     )
+    registry_env = models.TextField(
+        default="",
+        blank=True,
+        help_text=(
+            "Extra AZURE_E* lines (KEY=VALUE, one per line) layered over the "
+            "environment to add, change or retire (empty value) deployments "
+            "without a restart. API keys (*_KEY) are rejected: keep them in the "
+            "environment or the registry file."
+        ),
+    )
     updated_at = models.DateTimeField(auto_now=True)
     updated_by = models.ForeignKey(
         Person,
@@ -986,15 +1037,90 @@ class LLMConfig(models.Model):
         verbose_name_plural = "LLM Configuration"
 
     def save(self, *args, **kwargs):
-        """Persist the singleton row (always pk=1)."""
+        """Persist the singleton row (always pk=1) and invalidate cached copies.
+
+        The version is bumped once the change is committed, so no process can
+        re-cache the old row under the new version.
+        """
         self.pk = 1
         super().save(*args, **kwargs)
+        transaction.on_commit(LLMConfig.bump_version)
+
+    def clean(self) -> None:
+        """Reject API keys in ``registry_env``; it is stored in plain text."""
+        super().clean()
+        from toxtempass.azure_registry import is_secret_registry_key, parse_env_lines
+
+        lines = parse_env_lines(self.registry_env)
+        secrets = sorted(key for key in lines if is_secret_registry_key(key))
+        if secrets:
+            raise ValidationError(
+                {
+                    "registry_env": (
+                        f"Remove {', '.join(secrets)}: API keys belong in the "
+                        "environment or the registry file, not the database."
+                    )
+                }
+            )
+
+    @classmethod
+    def current_version(cls) -> int:
+        """Return the shared config version, initialising it if absent."""
+        version = cache.get(_LLM_CONFIG_VERSION_KEY)
+        if version is None:
+            # Seed with a timestamp rather than 0 so a counter that was evicted
+            # from the cache can never collide with a value a worker still holds.
+            cache.add(_LLM_CONFIG_VERSION_KEY, time.time_ns(), None)
+            version = cache.get(_LLM_CONFIG_VERSION_KEY)
+        return version
+
+    @classmethod
+    def bump_version(cls) -> None:
+        """Invalidate every process-local snapshot of the config."""
+        try:
+            cache.incr(_LLM_CONFIG_VERSION_KEY)
+        except ValueError:
+            cache.add(_LLM_CONFIG_VERSION_KEY, time.time_ns(), None)
+        with _llm_config_lock:
+            _llm_config_local.update(version=None, config=None, derived={})
+
+    @classmethod
+    def _snapshot(cls) -> tuple["LLMConfig", dict[Any, Any]]:
+        version = cls.current_version()
+        with _llm_config_lock:
+            if _llm_config_local["version"] == version:
+                return _llm_config_local["config"], _llm_config_local["derived"]
+        obj, created = cls.objects.get_or_create(pk=1)
+        if created:
+            # Creating the row bumped the version; the row is current for the new one.
+            version = cls.current_version()
+        derived: dict[Any, Any] = {}
+        with _llm_config_lock:
+            _llm_config_local.update(version=version, config=obj, derived=derived)
+        return obj, derived
 
     @classmethod
     def load(cls) -> "LLMConfig":
-        """Return the singleton row, creating it with defaults if needed."""
-        obj, _ = cls.objects.get_or_create(pk=1)
-        return obj
+        """Return the singleton row, creating it with defaults if needed.
+
+        Served from the process-local snapshot while the shared version is
+        unchanged. A copy is returned so callers may modify and ``save()`` it.
+        """
+        obj, _ = cls._snapshot()
+        return copy.deepcopy(obj)
+
+    @classmethod
+    def cached(cls, key: Any, builder: Callable[["LLMConfig"], Any]) -> Any:
+        """Return ``builder(config)`` memoised for the current config version.
+
+        Use for structures derived from the config and the model registry
+        (choice lists, signatures, ...) that would otherwise be rebuilt on
+        every page render. The returned value is shared; do not mutate it.
+        """
+        obj, derived = cls._snapshot()
+        if key not in derived:
+            derived[key] = builder(obj)
+        return derived[key]
 
     @property
     def default_endpoint_index(self) -> int | None:
@@ -1017,6 +1143,44 @@ class LLMConfig(models.Model):
         return f"LLM Config (default={self.default_model or 'auto'})"
 
 
+class LLMHealthCheck(models.Model):
+    """One health-check result for one deployment; a rolling history per key.
+
+    Written by :func:`toxtempass.health_check.save_health_check`, which keeps
+    the newest ``config.health_check_history_size`` rows per deployment.
+    ``LLMConfig.last_health_check`` still holds the latest snapshot.
+    """
+
+    deployment = models.CharField(
+        max_length=64, help_text='Deployment key, e.g. "1:GPT4O".'
+    )
+    model_id = models.CharField(max_length=128, blank=True, default="")
+    checked_at = models.DateTimeField(default=timezone.now)
+    ok = models.BooleanField(default=False)
+    samples = models.PositiveSmallIntegerField(
+        default=0, help_text="Probes that completed."
+    )
+    p50_ms = models.PositiveIntegerField(null=True, blank=True)
+    p95_ms = models.PositiveIntegerField(null=True, blank=True)
+    ttft_ms = models.PositiveIntegerField(
+        null=True, blank=True, help_text="Median time to first streamed token."
+    )
+    error = models.TextField(blank=True, default="")
+
+    class Meta:
+        verbose_name = "LLM Health Check"
+        verbose_name_plural = "LLM Health Checks"
+        ordering = ["-checked_at"]
+        indexes = [
+            models.Index(
+                fields=["deployment", "-checked_at"], name="llmhealth_deploy_time_idx"
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.deployment} {'ok' if self.ok else 'failed'} @ {self.checked_at}"
+
+
 
 
 class AssayCost(models.Model):
@@ -1114,3 +1278,247 @@ class AssayCost(models.Model):
         if self.cost_input is None and self.cost_output is None:
             return None
         return (self.cost_input or 0) + (self.cost_output or 0)
+
+
+class ExportJob(models.Model):
+    """One export render queued on the dedicated ``exports`` task cluster.
+
+    The request that creates the job returns immediately; the client polls the
+    job status and downloads the stored artifact once it is ``done``. Finished
+    rows double as the render timing log for each export type. A bulk ZIP of
+    several assays is one job without an ``assay``; its selection and progress
+    are kept in ``params``.
+    """
+
+    class Status(models.TextChoices):
+        QUEUED = "queued", "Queued"
+        RUNNING = "running", "Running"
+        DONE = "done", "Done"
+        FAILED = "failed", "Failed"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    assay = models.ForeignKey(
+        Assay,
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name="export_jobs",
+    )
+    requested_by = models.ForeignKey(
+        Person,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="export_jobs",
+    )
+    export_type = models.CharField(max_length=16)
+    params = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Bulk exports: selected assays and formats, and render progress.",
+    )
+    status = models.CharField(
+        max_length=16, choices=Status.choices, default=Status.QUEUED
+    )
+    task_id = models.CharField(max_length=64, blank=True, default="")
+    artifact_key = models.CharField(
+        max_length=1024,
+        blank=True,
+        default="",
+        help_text="Storage key of the rendered file once the job is done.",
+    )
+    file_name = models.CharField(max_length=512, blank=True, default="")
+    cache_hit = models.BooleanField(
+        default=False, help_text="Served from the export artifact cache."
+    )
+    render_seconds = models.FloatField(
+        null=True, blank=True, help_text="Wall time spent rendering (cache misses)."
+    )
+    error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Export Job"
+        verbose_name_plural = "Export Jobs"
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["export_type", "status"], name="exportjob_type_status_idx")
+        ]
+
+    def __str__(self) -> str:
+        return f"ExportJob {self.export_type} assay={self.assay_id} ({self.status})"
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (self.Status.DONE, self.Status.FAILED)
+
+    @classmethod
+    def render_timings(cls) -> dict[str, dict[str, float | int]]:
+        """Return count, mean and max render seconds per export type."""
+        rows = (
+            cls.objects.filter(
+                status=cls.Status.DONE, cache_hit=False, render_seconds__isnull=False
+            )
+            .values("export_type")
+            .annotate(
+                count=Count("id"),
+                avg_seconds=Avg("render_seconds"),
+                max_seconds=Max("render_seconds"),
+            )
+            .order_by("export_type")
+        )
+        return {
+            row["export_type"]: {
+                "count": row["count"],
+                "avg_seconds": round(row["avg_seconds"], 3),
+                "max_seconds": round(row["max_seconds"], 3),
+            }
+            for row in rows
+        }
+
+
+class LLMRun(models.Model):
+    """One ``process_llm_async`` run waiting for, or holding, an LLM worker slot.
+
+    Runs are admitted to the ``llm`` task cluster by
+    :func:`toxtempass.scheduling.dispatch_pending` in per-user round-robin
+    order; until then they stay ``pending`` with their task arguments in
+    ``payload``. Finished rows double as the run timing log that
+    :mod:`toxtempass.run_eta` predicts queue start and finish times from.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        QUEUED = "queued", "Queued"
+        RUNNING = "running", "Running"
+        DONE = "done", "Done"
+        FAILED = "failed", "Failed"
+
+    ACTIVE = (Status.PENDING, Status.QUEUED, Status.RUNNING)
+    IN_FLIGHT = (Status.QUEUED, Status.RUNNING)
+
+    assay = models.ForeignKey(Assay, on_delete=models.CASCADE, related_name="llm_runs")
+    requested_by = models.ForeignKey(
+        Person,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="llm_runs",
+    )
+    status = models.CharField(
+        max_length=16, choices=Status.choices, default=Status.PENDING
+    )
+    payload = models.TextField(
+        blank=True,
+        default="",
+        help_text="Signed task arguments; cleared once the run has started.",
+    )
+    task_id = models.CharField(max_length=64, blank=True, default="")
+    model_key = models.CharField(
+        max_length=64,
+        blank=True,
+        default="",
+        help_text='Deployment key, e.g. "1:GPT4O"; the one used once the run ends.',
+    )
+    question_count = models.PositiveIntegerField(default=0)
+    context_chars = models.PositiveIntegerField(
+        default=0, help_text="Characters of extracted document text."
+    )
+    run_seconds = models.FloatField(
+        null=True, blank=True, help_text="Wall time from start to finish."
+    )
+    timings = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Seconds spent on extraction, in the queue and per answering round.",
+    )
+    error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    dispatched_at = models.DateTimeField(null=True, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "LLM Run"
+        verbose_name_plural = "LLM Runs"
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["status", "created_at"], name="llmrun_status_created_idx"
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"LLMRun assay={self.assay_id} ({self.status})"
+
+
+class LLMCallRecord(models.Model):
+    """Telemetry for one ``generate_answer`` call (one question of one run).
+
+    Rows are collected in memory during ``process_llm_async`` and written in
+    one ``bulk_create`` when the run ends (see ``toxtempass.llm_telemetry``).
+    """
+
+    class Outcome(models.TextChoices):
+        OK = "ok", "OK"
+        BAD_REQUEST = "bad_request", "Bad request"
+        TRANSIENT = "transient", "Gave up after transient errors"
+        TIMEOUT = "timeout", "Timed out"
+        ERROR = "error", "Error"
+
+    assay = models.ForeignKey(
+        "Assay",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="llm_calls",
+    )
+    question = models.ForeignKey(
+        "Question",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    model_key = models.CharField(
+        max_length=64,
+        blank=True,
+        default="",
+        help_text='Deployment key used, e.g. "1:GPT4O" (empty for legacy clients).',
+    )
+    model_id = models.CharField(max_length=128, blank=True, default="")
+    answering_round = models.PositiveSmallIntegerField(default=0)
+    started_at = models.DateTimeField(default=timezone.now)
+    queue_wait_ms = models.PositiveIntegerField(
+        default=0, help_text="Time between submission to the pool and the first attempt."
+    )
+    latency_ms = models.PositiveIntegerField(
+        default=0, help_text="Wall time of the call including retries and back-off."
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    rate_limit_sleep_ms = models.PositiveIntegerField(
+        default=0, help_text="Time spent sleeping after 429 responses."
+    )
+    input_tokens = models.PositiveIntegerField(default=0)
+    output_tokens = models.PositiveIntegerField(default=0)
+    cache_read_tokens = models.PositiveIntegerField(default=0)
+    cache_creation_tokens = models.PositiveIntegerField(default=0)
+    outcome = models.CharField(
+        max_length=16, choices=Outcome.choices, default=Outcome.ERROR
+    )
+    error = models.CharField(max_length=400, blank=True, default="")
+
+    class Meta:
+        verbose_name = "LLM Call"
+        verbose_name_plural = "LLM Calls"
+        ordering = ["-started_at"]
+        indexes = [
+            models.Index(
+                fields=["model_key", "started_at"], name="llmcall_model_time_idx"
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.model_key or self.model_id} {self.outcome} ({self.latency_ms} ms)"
@@ -0,0 +1,439 @@
+"""In-process Markdown, HTML and DOCX renderers for assay exports.
+
+For these formats Pandoc's process start-up dominates the export time, so
+:func:`render_native_export` builds them directly from the model instances of
+an :class:`~toxtempass.export.ExportSource`: Markdown is the generated
+markdown itself, HTML comes from a Django template and DOCX from python-docx.
+Answers are parsed with markdown-it (CommonMark plus tables).
+
+Documents containing TeX math are left to Pandoc, which converts math to
+MathML/OMML; :class:`NativeExportUnsupported` signals the fallback, as does a
+missing optional dependency. PDF, TeX and DocBook always use Pandoc.
+"""
+
+import io
+import logging
+import re
+from collections.abc import Iterator
+from dataclasses import dataclass
+
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from toxtempass.export import (
+    ExportSource,
+    export_author_lines,
+    export_document_metadata,
+    generate_markdown_from_assay,
+)
+from toxtempass.models import Assay
+
+try:
+    from markdown_it import MarkdownIt
+except ImportError:  # pragma: no cover - optional dependency
+    MarkdownIt = None
+
+try:
+    import docx
+    from docx.enum.style import WD_STYLE_TYPE
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    from docx.opc.constants import RELATIONSHIP_TYPE
+    from docx.oxml import OxmlElement
+    from docx.oxml.ns import qn
+    from docx.shared import Inches
+except ImportError:  # pragma: no cover - optional dependency
+    docx = None
+
+logger = logging.getLogger(__name__)
+
+NO_ANSWER_TEXT = "Answer not found in documents."
+
+# Pandoc's tex_math_dollars / tex_math_*_backslash rules, approximately: $$…$$,
+# \[…\], \(…\) and $…$ where the dollars hug non-space text.
+TEX_MATH = re.compile(
+    r"\$\$|\\\[|\\\(|(?<![\\$])\$(?=\S)[^$\n]*?(?<=\S)\$(?!\d)"
+)
+# Pandoc's default --toc-depth.
+TOC_DEPTH = 3
+
+
+class NativeExportUnsupported(Exception):
+    """The document needs Pandoc (TeX math, or a renderer dependency is missing)."""
+
+
+@dataclass(frozen=True)
+class Heading:
+    level: int
+    text: str
+
+
+@dataclass(frozen=True)
+class Field:
+    """A ``label: value`` list item, optionally with nested items."""
+
+    label: str
+    value: str
+    items: tuple[str, ...] = ()
+    strong: bool = True
+
+
+@dataclass(frozen=True)
+class QuestionAnswer:
+    question: str
+    answer: str
+
+
+ExportBlock = Heading | Field | QuestionAnswer
+
+
+def iter_export_blocks(assay: Assay, source: ExportSource) -> Iterator[ExportBlock]:
+    """Yield the document structure of :func:`iter_markdown_from_assay`."""
+    metadata = source.metadata
+    yield Heading(2, "Metadata")
+    yield Field("Creation Date", metadata["creation_date"])
+    yield Field("Filename", metadata["filename"])
+    yield Field("Website", metadata["website"])
+    if metadata.get("authors"):
+        yield Field("Authors", "", tuple(export_author_lines(metadata["authors"])))
+    if metadata.get("main_author"):
+        yield Field("Main Author", metadata["main_author"])
+    if metadata.get("co_authors"):
+        yield Field("Co-authors", ", ".join(metadata["co_authors"]))
+    yield Heading(2, "ToxTempAssistant configuration")
+    for key, value in metadata["config"].items():
+        yield Field(key, str(value), strong=False)
+
+    study = assay.study
+    for heading, obj in (("Investigation", study.investigation), ("Study", study)):
+        yield Heading(1, heading)
+        yield Field("Title", obj.title)
+        yield Field("Description", obj.description)
+    yield Heading(1, "Assay")
+    yield Field("Title", assay.title)
+
+    answer_text_by_question = source.answer_text_by_question
+    for section in source.sections:
+        yield Heading(1, section.title)
+        for subsection in section.subsections.all():
+            yield Heading(2, subsection.title)
+            for question in subsection.questions.all():
+                yield QuestionAnswer(
+                    question.question_text,
+                    answer_text_by_question.get(question.pk) or NO_ANSWER_TEXT,
+                )
+
+
+def _block_texts(block: ExportBlock) -> tuple[str, ...]:
+    if isinstance(block, Heading):
+        return (block.text,)
+    if isinstance(block, Field):
+        return (block.label, block.value, *block.items)
+    return (block.question, block.answer)
+
+
+def _check_supported(blocks: list[ExportBlock]) -> None:
+    for block in blocks:
+        for text in _block_texts(block):
+            if text and TEX_MATH.search(str(text)):
+                raise NativeExportUnsupported("document contains TeX math")
+
+
+def _markdown_parser() -> "MarkdownIt":
+    if MarkdownIt is None:
+        raise NativeExportUnsupported("markdown-it-py is not installed")
+    # Raw HTML in answers is escaped rather than passed through.
+    return MarkdownIt("commonmark", {"html": False, "typographer": True}).enable(
+        ["table", "strikethrough", "smartquotes"]
+    )
+
+
+def pandoc_identifier(text: str, used: set[str]) -> str:
+    """Return Pandoc's ``auto_identifiers`` id for a heading, unique in *used*."""
+    kept = "".join(
+        ch for ch in text.lower() if ch.isalnum() or ch in "_-." or ch.isspace()
+    )
+    identifier = re.sub(r"\s+", "-", kept.strip())
+    # Everything up to the first letter is dropped.
+    while identifier and not identifier[0].isalpha():
+        identifier = identifier[1:]
+    identifier = identifier or "section"
+    candidate, suffix = identifier, 0
+    while candidate in used:
+        suffix += 1
+        candidate = f"{identifier}-{suffix}"
+    used.add(candidate)
+    return candidate
+
+
+# --- HTML -------------------------------------------------------------------
+
+
+def render_html(blocks: list[ExportBlock], metadata: dict) -> bytes:
+    """Render *blocks* as a standalone HTML5 page with a table of contents."""
+    md = _markdown_parser()
+    used_ids: set[str] = set()
+    items: list[dict] = []
+    toc: list[dict] = []
+    for block in blocks:
+        if isinstance(block, Heading):
+            entry = {
+                "kind": "heading",
+                "level": block.level,
+                "id": pandoc_identifier(block.text, used_ids),
+                "text": block.text,
+                "children": [],
+            }
+            items.append(entry)
+            if block.level == 1 or not toc or toc[-1]["level"] >= block.level:
+                toc.append(entry)
+            elif block.level <= TOC_DEPTH:
+                toc[-1]["children"].append(entry)
+        elif isinstance(block, Field):
+            if not items or items[-1]["kind"] != "fields":
+                items.append({"kind": "fields", "fields": []})
+            items[-1]["fields"].append(
+                {
+                    "label": block.label,
+                    "strong": block.strong,
+                    "value": mark_safe(md.renderInline(block.value)),  # noqa: S308
+                    "items": [mark_safe(md.renderInline(i)) for i in block.items],  # noqa: S308
+                }
+            )
+        else:
+            items.append(
+                {
+                    "kind": "qa",
+                    "question": mark_safe(md.render(block.question)),  # noqa: S308
+                    "answer": mark_safe(md.render(block.answer)),  # noqa: S308
+                }
+            )
+    html = render_to_string(
+        "toxtempass/export/assay_export.html",
+        {
+            "meta": metadata,
+            "toc_title": metadata["toc-title"],
+            "items": items,
+            "toc": toc,
+        },
+    )
+    return html.encode("utf-8")
+
+
+# --- DOCX -------------------------------------------------------------------
+
+
+def _docx_style(document: "docx.document.Document", name: str, fallback: str = "Normal"):
+    try:
+        return document.styles[name]
+    except KeyError:
+        return document.styles[fallback]
+
+
+def _ensure_paragraph_style(
+    document: "docx.document.Document", name: str, *, centered: bool = False
+) -> None:
+    try:
+        document.styles[name]
+    except KeyError:
+        style = document.styles.add_style(name, WD_STYLE_TYPE.PARAGRAPH)
+        style.base_style = document.styles["Normal"]
+        if centered:
+            style.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+
+def _add_toc_field(document: "docx.document.Document", title: str) -> None:
+    """Insert a TOC field that Word fills in when the document is opened."""
+    document.add_paragraph(title, style=_docx_style(document, "TOC Heading", "Heading 1"))
+    run = document.add_paragraph().add_run()
+
+    def _field_char(kind: str) -> None:
+        element = OxmlElement("w:fldChar")
+        element.set(qn("w:fldCharType"), kind)
+        run._r.append(element)
+
+    _field_char("begin")
+    instruction = OxmlElement("w:instrText")
+    instruction.set(qn("xml:space"), "preserve")
+    instruction.text = r'TOC \o "1-3" \h \z \u'
+    run._r.append(instruction)
+    _field_char("separate")
+    placeholder = OxmlElement("w:t")
+    placeholder.text = "Update the field to show the table of contents."
+    run._r.append(placeholder)
+    _field_char("end")
+    update_fields = OxmlElement("w:updateFields")
+    update_fields.set(qn("w:val"), "true")
+    document.settings.element.append(update_fields)
+
+
+class _DocxInlineWriter:
+    """Append markdown-it inline tokens to a python-docx paragraph as runs."""
+
+    def __init__(self, paragraph) -> None:
+        self.paragraph = paragraph
+        self.bold = self.italic = self.strike = False
+        self.link_url: str | None = None
+        self.link_runs: list = []
+
+    def _run(self, text: str, *, code: bool = False):
+        run = self.paragraph.add_run(text)
+        run.bold = self.bold or None
+        run.italic = self.italic or None
+        if self.strike:
+            run.font.strike = True
+        if code:
+            run.font.name = "Courier New"
+        if self.link_url is not None:
+            self.link_runs.append(run)
+        return run
+
+    def _close_link(self) -> None:
+        if self.link_url and self.link_runs:
+            r_id = self.paragraph.part.relate_to(
+                self.link_url, RELATIONSHIP_TYPE.HYPERLINK, is_external=True
+            )
+            link = OxmlElement("w:hyperlink")
+            link.set(qn("r:id"), r_id)
+            self.link_runs[0]._r.addprevious(link)
+            for run in self.link_runs:
+                run.font.underline = True
+                link.append(run._r)
+        self.link_url = None
+        self.link_runs = []
+
+    def write(self, tokens: list) -> None:
+        for token in tokens:
+            kind = token.type
+            if kind == "text":
+                self._run(token.content)
+            elif kind == "code_inline":
+                self._run(token.content, code=True)
+            elif kind == "softbreak":
+                self._run(" ")
+            elif kind == "hardbreak":
+                self._run("").add_break()
+            elif kind in ("strong_open", "strong_close"):
+                self.bold = kind == "strong_open"
+            elif kind in ("em_open", "em_close"):
+                self.italic = kind == "em_open"
+            elif kind in ("s_open", "s_close"):
+                self.strike = kind == "s_open"
+            elif kind == "link_open":
+                self.link_url = str(token.attrs.get("href") or "")
+            elif kind == "link_close":
+                self._close_link()
+            elif kind == "image":
+                self._run(token.content)
+        self._close_link()
+
+
+def _write_markdown_docx(document, md: "MarkdownIt", text: str, base_style: str) -> None:
+    """Append markdown *text* to *document* as paragraphs, lists and tables."""
+    lists: list[str] = []
+    paragraph_style: str | None = None
+    table: list[list[list]] | None = None
+    code_style = _docx_style(document, "No Spacing")
+    for token in md.parse(text):
+        kind = token.type
+        if kind in ("bullet_list_open", "ordered_list_open"):
+            lists.append("List Bullet" if kind == "bullet_list_open" else "List Number")
+        elif kind in ("bullet_list_close", "ordered_list_close"):
+            lists.pop()
+        elif kind == "list_item_open":
+            depth = min(len(lists), 3)
+            paragraph_style = lists[-1] + (f" {depth}" if depth > 1 else "")
+        elif kind == "heading_open":
+            paragraph_style = f"Heading {min(int(token.tag[1]), 9)}"
+        elif kind == "table_open":
+            table = []
+        elif kind == "tr_open" and table is not None:
+            table.append([])
+        elif kind == "inline" and table is not None:
+            table[-1].append(token.children or [])
+        elif kind == "table_close" and table is not None:
+            columns = max((len(row) for row in table), default=0)
+            if columns:
+                grid = document.add_table(rows=len(table), cols=columns)
+                grid.style = _docx_style(document, "Table Grid", "Normal Table")
+                for row, cells in zip(grid.rows, table):
+                    for cell, children in zip(row.cells, cells):
+                        _DocxInlineWriter(cell.paragraphs[0]).write(children)
+            table = None
+        elif kind in ("fence", "code_block"):
+            run = document.add_paragraph(style=code_style).add_run()
+            run.font.name = "Courier New"
+            for index, line in enumerate(token.content.rstrip("\n").split("\n")):
+                if index:
+                    run.add_break()
+                run.add_text(line)
+        elif kind == "inline":
+            style = paragraph_style or base_style
+            paragraph_style = None
+            paragraph = document.add_paragraph(style=_docx_style(document, style))
+            _DocxInlineWriter(paragraph).write(token.children or [])
+
+
+def render_docx(blocks: list[ExportBlock], metadata: dict) -> bytes:
+    """Render *blocks* as a DOCX document with a title block and TOC field."""
+    if docx is None:
+        raise NativeExportUnsupported("python-docx is not installed")
+    md = _markdown_parser()
+    document = docx.Document()
+    document.core_properties.title = metadata["title"]
+    document.core_properties.author = "; ".join(metadata["author"])
+    document.core_properties.keywords = metadata["keywords"]
+    # Paragraph style names as in Pandoc's reference.docx.
+    for name in ("Author", "Date"):
+        _ensure_paragraph_style(document, name, centered=True)
+    _ensure_paragraph_style(document, "Block Text")
+    document.styles["Block Text"].paragraph_format.left_indent = Inches(0.4)
+
+    document.add_paragraph(metadata["title"], style="Title")
+    for name in metadata["author"]:
+        document.add_paragraph(name, style="Author")
+    document.add_paragraph(metadata["date"], style="Date")
+    _add_toc_field(document, metadata["toc-title"])
+
+    for block in blocks:
+        if isinstance(block, Heading):
+            document.add_heading(block.text, level=block.level)
+        elif isinstance(block, Field):
+            paragraph = document.add_paragraph(style=_docx_style(document, "List Bullet"))
+            label = paragraph.add_run(f"{block.label}:")
+            label.bold = block.strong or None
+            if block.value:
+                paragraph.add_run(" ")
+                _DocxInlineWriter(paragraph).write(md.parseInline(block.value)[0].children)
+            for item in block.items:
+                sub = document.add_paragraph(style=_docx_style(document, "List Bullet 2"))
+                _DocxInlineWriter(sub).write(md.parseInline(item)[0].children)
+        else:
+            _write_markdown_docx(document, md, block.question, "Normal")
+            _write_markdown_docx(document, md, block.answer, "Block Text")
+
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+# --- Entry point --------------------------------------------------------------
+
+
+def render_native_export(assay: Assay, export_type: str, source: ExportSource) -> bytes:
+    """Render *assay* as ``md``, ``html`` or ``docx`` without Pandoc.
+
+    Raises:
+        NativeExportUnsupported: The document needs Pandoc; render it there.
+
+    """
+    if export_type == "md":
+        return generate_markdown_from_assay(assay, source).encode("utf-8")
+
+    blocks = list(iter_export_blocks(assay, source))
+    _check_supported(blocks)
+    metadata = export_document_metadata(assay, export_type, source.metadata)
+    if export_type == "html":
+        return render_html(blocks, metadata)
+    if export_type == "docx":
+        return render_docx(blocks, metadata)
+    raise NativeExportUnsupported(f"no native renderer for {export_type}")
@@ -0,0 +1,481 @@
+"""Offline performance benchmarks of the core pipeline.
+
+Every case builds its own synthetic input, runs the code under test a few
+times and records the median and best wall time together with the number of
+database queries issued on the calling thread:
+
+* ``process_llm_async`` on a 77-question assay, answered by
+  :class:`LatencyFakeChatModel` (a fixed per-call latency instead of a network
+  round trip);
+* text extraction from generated PDF, DOCX and XLSX files;
+* ``truncate_context_to_token_limit`` on a multi-megabyte context;
+* ``generate_json_from_assay`` on the answered assay;
+* one page of ``AssayListView`` through the test client.
+
+``manage.py benchmark_pipeline`` runs the cases in a throwaway test database
+and stores the results as a JSON baseline or compares them against one: a
+case regresses when its median grows by more than the tolerance (and by more
+than a small noise floor) or when it issues more queries than the baseline.
+A case whose prerequisites are missing raises :class:`CaseSkipped`; it is
+reported with its reason instead of a result.
+"""
+
+from __future__ import annotations
+
+import platform
+import statistics
+import threading
+import time
+import uuid
+from collections.abc import Callable, Iterable
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from types import SimpleNamespace
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from toxtempass import config
+from toxtempass.models import (
+    Answer,
+    Assay,
+    Investigation,
+    Person,
+    Question,
+    QuestionSet,
+    Section,
+    Study,
+    Subsection,
+)
+
+_WORDS = (
+    "HepG2 cells were seeded at 10,000 cells per well and exposed to the test "
+    "compound for 24 hours before cytotoxicity was measured by ATP content, "
+    "with chlorpromazine as positive control and 0.1% DMSO as vehicle. "
+).split()
+
+
+# Loaded by unstructured's DOCX partitioner (``unstructured.nlp.tokenize``).
+SPACY_MODEL = "en_core_web_sm"
+
+
+def synthetic_text(chars: int, offset: int = 0) -> str:
+    """Return *chars* characters of assay-like prose."""
+    words: list[str] = []
+    length = 0
+    index = offset
+    while length < chars:
+        word = _WORDS[index % len(_WORDS)]
+        words.append(word)
+        length += len(word) + 1
+        index += 1
+    return " ".join(words)[:chars]
+
+
+@dataclass
+class CaseResult:
+    """Timing and query count of one benchmark case."""
+
+    name: str
+    runs: int
+    median_ms: float
+    best_ms: float
+    queries: int
+
+
+@dataclass
+class BenchmarkOptions:
+    """Inputs shared by all cases."""
+
+    workdir: Path
+    repeat: int = 3
+    questions: int = 77
+    llm_latency_ms: int = 50
+    list_assays: int = 20
+    skipped: dict[str, str] = field(default_factory=dict)
+
+
+class CaseSkipped(Exception):
+    """Raised by a case that cannot run in this environment."""
+
+
+def measure(
+    name: str,
+    fn: Callable[[], object],
+    repeat: int,
+    setup: Callable[[], object] | None = None,
+) -> CaseResult:
+    """Run *fn* *repeat* times; *setup* runs untimed before every run."""
+    timings = []
+    queries = 0
+    for _ in range(max(1, repeat)):
+        if setup is not None:
+            setup()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - started) * 1000)
+        queries = max(queries, len(captured.captured_queries))
+    return CaseResult(
+        name=name,
+        runs=len(timings),
+        median_ms=round(statistics.median(timings), 2),
+        best_ms=round(min(timings), 2),
+        queries=queries,
+    )
+
+
+class LatencyFakeChatModel:
+    """Chat model stand-in that answers every ``invoke`` after *latency_ms*."""
+
+    model_name = "fake-latency"
+
+    def __init__(self, latency_ms: int = 50, output_tokens: int = 60) -> None:
+        self.latency_ms = latency_ms
+        self.output_tokens = output_tokens
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def invoke(self, messages: list) -> SimpleNamespace:
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency_ms / 1000)
+        prompt_chars = sum(len(str(getattr(m, "content", m))) for m in messages)
+        return SimpleNamespace(
+            content=synthetic_text(self.output_tokens * 4),
+            usage_metadata={
+                "input_tokens": prompt_chars // 4,
+                "output_tokens": self.output_tokens,
+            },
+        )
+
+
+def build_synthetic_assay(questions: int = 77, list_assays: int = 0) -> Assay:
+    """Create a user, a question set with *questions* questions and one assay.
+
+    The last section is answered in round 2, like the ToxTemp summary
+    questions.  *list_assays* further (unanswered) assays are added to the same
+    study so the overview has several pages.
+    """
+    owner = Person.objects.create_user(
+        email=f"benchmark-{uuid.uuid4().hex[:12]}@example.invalid",
+        password=uuid.uuid4().hex,
+        first_name="Bench",
+        last_name="Mark",
+    )
+    question_set = QuestionSet.objects.create(
+        display_name="Benchmark", created_by=owner, hide_from_display=True
+    )
+    sections = [
+        Section.objects.create(question_set=question_set, title=f"Section {i + 1}")
+        for i in range(max(1, min(7, questions)))
+    ]
+    subsections = [
+        Subsection.objects.create(section=section, title=f"{section.title}.{j + 1}")
+        for section in sections
+        for j in range(2)
+    ]
+    last_section = sections[-1]
+    question_rows = Question.objects.bulk_create(
+        Question(
+            subsection=subsections[i % len(subsections)],
+            question_text=f"Benchmark question {i + 1}: {synthetic_text(120, i)}?",
+            answering_round=(
+                2 if subsections[i % len(subsections)].section == last_section else 1
+            ),
+        )
+        for i in range(questions)
+    )
+
+    investigation = Investigation.objects.create(owner=owner, title="Benchmark")
+    study = Study.objects.create(investigation=investigation, title="Benchmark study")
+    assay = Assay.objects.create(
+        study=study,
+        title="Benchmark assay",
+        description="Synthetic cytotoxicity assay used by the pipeline benchmark.",
+        question_set=question_set,
+        created_by=owner,
+    )
+    Answer.objects.bulk_create(Answer(assay=assay, question=q) for q in question_rows)
+    Assay.objects.bulk_create(
+        Assay(
+            study=study,
+            title=f"Benchmark list assay {i + 1}",
+            description="Synthetic assay for the overview page.",
+            question_set=question_set,
+            created_by=owner,
+        )
+        for i in range(list_assays)
+    )
+    return assay
+
+
+def write_pdf(path: Path, pages: int = 20, chars_per_page: int = 3000) -> Path:
+    """Write a text-only PDF with *pages* pages of prose."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"",  # page tree, filled in once the page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_numbers = []
+    for page in range(pages):
+        text = synthetic_text(chars_per_page, page * 7)
+        lines = [text[i : i + 90] for i in range(0, len(text), 90)]
+        body = "BT /F1 9 Tf 11 TL 40 800 Td " + " ".join(
+            "({}) '".format(
+                line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            )
+            for line in lines
+        ) + " ET"
+        stream = body.encode("latin-1")
+        objects.append(
+            b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        )
+        content_number = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>"
+            % content_number
+        )
+        page_numbers.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % n for n in page_numbers)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, pages)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, obj)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref,
+    )
+    path.write_bytes(bytes(out))
+    return path
+
+
+def write_docx(path: Path, paragraphs: int = 200, chars: int = 600) -> Path:
+    """Write a DOCX with *paragraphs* paragraphs of prose."""
+    import docx
+
+    document = docx.Document()
+    for i in range(paragraphs):
+        if i % 20 == 0:
+            document.add_heading(f"Section {i // 20 + 1}", level=1)
+        document.add_paragraph(synthetic_text(chars, i))
+    document.save(path)
+    return path
+
+
+def write_xlsx(path: Path, rows: int = 2000, columns: int = 8) -> Path:
+    """Write an XLSX with one sheet of *rows* × *columns* measurements."""
+    import openpyxl
+
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "Plate readout"
+    sheet.append([f"col_{c + 1}" for c in range(columns)])
+    for r in range(rows):
+        sheet.append([(r * columns + c) % 997 / 10 for c in range(columns)])
+    workbook.save(path)
+    workbook.close()
+    return path
+
+
+def bench_process_llm_async(options: BenchmarkOptions) -> CaseResult:
+    from toxtempass.views import process_llm_async
+
+    assay = build_synthetic_assay(options.questions)
+    llm = LatencyFakeChatModel(options.llm_latency_ms)
+    doc_dict = {
+        "protocol.pdf": {
+            "text": synthetic_text(60_000),
+            "source_document": "protocol.pdf",
+            "origin": "document",
+        }
+    }
+    return measure(
+        f"process_llm_async_{options.questions}q",
+        lambda: process_llm_async(assay.id, doc_dict=doc_dict, chatopenai=llm),
+        options.repeat,
+    )
+
+
+def _bench_extraction(name: str, path: Path, repeat: int) -> CaseResult:
+    from toxtempass.filehandling import get_text_or_bytes_perfile_dict
+
+    return measure(
+        name,
+        lambda: get_text_or_bytes_perfile_dict(
+            [path], unlink=False, extract_images=False
+        ),
+        repeat,
+    )
+
+
+def bench_extract_pdf(options: BenchmarkOptions) -> CaseResult:
+    path = write_pdf(options.workdir / "benchmark.pdf")
+    return _bench_extraction("extract_pdf_20_pages", path, options.repeat)
+
+
+def docx_extraction_unavailable() -> str | None:
+    """Return why DOCX files cannot be extracted here, or ``None`` if they can.
+
+    unstructured splits DOCX text into sentences with spaCy's
+    ``en_core_web_sm`` model and downloads it on first use, which fails
+    offline.
+    """
+    try:
+        from spacy.util import is_package
+    except ImportError:
+        return "spaCy is not installed"
+    if not is_package(SPACY_MODEL):
+        return (
+            f"spaCy model {SPACY_MODEL} is not installed "
+            f"(python -m spacy download {SPACY_MODEL})"
+        )
+    return None
+
+
+def bench_extract_docx(options: BenchmarkOptions) -> CaseResult:
+    reason = docx_extraction_unavailable()
+    if reason:
+        raise CaseSkipped(reason)
+    path = write_docx(options.workdir / "benchmark.docx")
+    return _bench_extraction("extract_docx_200_paragraphs", path, options.repeat)
+
+
+def bench_extract_xlsx(options: BenchmarkOptions) -> CaseResult:
+    path = write_xlsx(options.workdir / "benchmark.xlsx")
+    return _bench_extraction("extract_xlsx_2000_rows", path, options.repeat)
+
+
+def bench_truncate_context(options: BenchmarkOptions) -> CaseResult:
+    from toxtempass.filehandling import truncate_context_to_token_limit
+
+    text = synthetic_text(4_000_000)
+    return measure(
+        "truncate_context_4mb",
+        lambda: truncate_context_to_token_limit(text, 100_000),
+        options.repeat,
+    )
+
+
+def bench_generate_json(options: BenchmarkOptions) -> CaseResult:
+    from toxtempass.export import generate_json_from_assay
+
+    assay = build_synthetic_assay(options.questions)
+    Answer.objects.filter(assay=assay).update(
+        answer_text=synthetic_text(800), accepted=True
+    )
+    return measure(
+        f"generate_json_{options.questions}q",
+        lambda: generate_json_from_assay(Assay.objects.get(pk=assay.pk)),
+        options.repeat,
+    )
+
+
+def bench_assay_list_view(options: BenchmarkOptions) -> CaseResult:
+    from django.test import Client
+    from django.urls import reverse
+
+    assay = build_synthetic_assay(options.questions, options.list_assays)
+    client = Client()
+    client.force_login(assay.study.investigation.owner)
+    url = reverse("overview")
+
+    def get_page() -> None:
+        response = client.get(url)
+        if response.status_code != 200:
+            raise RuntimeError(f"{url} returned HTTP {response.status_code}")
+
+    return measure("assay_list_view", get_page, options.repeat)
+
+
+CASES: dict[str, Callable[[BenchmarkOptions], CaseResult]] = {
+    "process_llm_async": bench_process_llm_async,
+    "extract_pdf": bench_extract_pdf,
+    "extract_docx": bench_extract_docx,
+    "extract_xlsx": bench_extract_xlsx,
+    "truncate_context": bench_truncate_context,
+    "generate_json": bench_generate_json,
+    "assay_list_view": bench_assay_list_view,
+}
+
+
+def run_cases(
+    options: BenchmarkOptions, only: Iterable[str] | None = None
+) -> list[CaseResult]:
+    """Run the selected cases (all by default) in registry order.
+
+    Skipped cases are left out and their reasons recorded in
+    ``options.skipped``.
+    """
+    selected = set(only or CASES)
+    unknown = selected - set(CASES)
+    if unknown:
+        raise ValueError(f"Unknown benchmark case(s): {', '.join(sorted(unknown))}")
+    results = []
+    for key, case in CASES.items():
+        if key not in selected:
+            continue
+        try:
+            results.append(case(options))
+        except CaseSkipped as exc:
+            options.skipped[key] = str(exc)
+    return results
+
+
+def results_payload(results: list[CaseResult], options: BenchmarkOptions) -> dict:
+    """JSON-serializable report, usable as a baseline."""
+    return {
+        "generated_at": timezone.now().isoformat(),
+        "git_hash": config.git_hash,
+        "python": platform.python_version(),
+        "database": connection.vendor,
+        "options": {
+            "repeat": options.repeat,
+            "questions": options.questions,
+            "llm_latency_ms": options.llm_latency_ms,
+            "list_assays": options.list_assays,
+        },
+        "cases": {result.name: asdict(result) for result in results},
+        "skipped": options.skipped,
+    }
+
+
+def compare_to_baseline(
+    current: dict,
+    baseline: dict,
+    tolerance: float = 0.25,
+    noise_floor_ms: float = 5.0,
+) -> list[str]:
+    """Describe every case of *current* that regressed against *baseline*.
+
+    A case regresses when its median is more than *tolerance* (relative) and
+    *noise_floor_ms* (absolute) slower than the baseline, or when it issues
+    more queries.  Cases missing from either side are ignored.
+    """
+    regressions = []
+    for name, case in current["cases"].items():
+        base = baseline.get("cases", {}).get(name)
+        if base is None:
+            continue
+        slower_by = case["median_ms"] - base["median_ms"]
+        if (
+            case["median_ms"] > base["median_ms"] * (1 + tolerance)
+            and slower_by > noise_floor_ms
+        ):
+            regressions.append(
+                f"{name}: median {case['median_ms']:.1f} ms vs "
+                f"{base['median_ms']:.1f} ms baseline (+{slower_by:.1f} ms)"
+            )
+        if case["queries"] > base["queries"]:
+            regressions.append(
+                f"{name}: {case['queries']} queries vs {base['queries']} baseline"
+            )
+    return regressions
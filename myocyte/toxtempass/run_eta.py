@@ -0,0 +1,60 @@
+"""Duration prediction for LLM runs, behind the queue ETA.
+
+Finished :class:`~toxtempass.models.LLMRun` rows are the history. A run is
+predicted to take its question count times a per-question time: the median
+over the ``config.llm_eta_neighbours`` recent runs on the same deployment
+whose document context size is closest (on a log scale).  With fewer than
+``config.llm_eta_min_history`` runs on the deployment, runs on any deployment
+are used, and without any history ``config.llm_eta_default_seconds_per_question``.
+"""
+
+from __future__ import annotations
+
+import math
+from statistics import median
+
+from toxtempass import config
+from toxtempass.models import LLMRun
+
+
+class DurationPredictor:
+    """Predicts run durations; loads each deployment's history once."""
+
+    def __init__(self) -> None:
+        self._history: dict[str, list[tuple[float, float]]] = {}
+
+    def _load(self, model_key: str) -> list[tuple[float, float]]:
+        """``(log context size, seconds per question)`` of recent finished runs."""
+        if model_key not in self._history:
+            finished = LLMRun.objects.filter(
+                status=LLMRun.Status.DONE,
+                run_seconds__isnull=False,
+                question_count__gt=0,
+            ).order_by("-finished_at")
+            if model_key:
+                finished = finished.filter(model_key=model_key)
+            self._history[model_key] = [
+                (math.log1p(chars), seconds / questions)
+                for chars, seconds, questions in finished.values_list(
+                    "context_chars", "run_seconds", "question_count"
+                )[: config.llm_eta_history_size]
+            ]
+        return self._history[model_key]
+
+    def seconds_per_question(self, model_key: str, context_chars: int) -> float:
+        history = self._load(model_key or "")
+        if len(history) < config.llm_eta_min_history:
+            history = self._load("")
+        if not history:
+            return config.llm_eta_default_seconds_per_question
+        size = math.log1p(context_chars)
+        nearest = sorted(history, key=lambda row: abs(row[0] - size))
+        return median(rate for _, rate in nearest[: config.llm_eta_neighbours])
+
+    def predict(self, model_key: str, question_count: int, context_chars: int) -> float:
+        """Predicted wall time in seconds of a run with these parameters."""
+        rate = self.seconds_per_question(model_key, context_chars)
+        return rate * max(question_count, 1)
+
+    def predict_run(self, run: LLMRun) -> float:
+        return self.predict(run.model_key, run.question_count, run.context_chars)
@@ -0,0 +1,325 @@
+"""Admission control and per-user fair queueing for LLM runs.
+
+``process_llm_async`` runs are not put on the task queue directly.
+:func:`submit_llm_run` stores them as pending :class:`~toxtempass.models.LLMRun`
+rows, and :func:`dispatch_pending` hands them to the ``llm`` django-q cluster.
+At most ``config.llm_run_max_in_flight`` runs are queued or running there at
+once, so the broker never holds a backlog in submission order.
+
+Pending runs are admitted round-robin per user: a user's *n*-th waiting run
+(counting the ones already in flight) goes after every other user's
+(*n*-1)-th, and within a round the user served least recently goes first, so
+ten assays from one user cannot starve a single assay from someone else.  A
+user holds at most ``config.llm_run_max_in_flight_per_user`` slots while
+others are waiting; spare slots still go to them.
+
+Dispatch happens on submission, whenever a run finishes, and on a one-minute
+schedule (migration 0045) that also fails runs whose worker has died.
+"""
+
+from __future__ import annotations
+
+import heapq
+import logging
+import time
+from collections import Counter
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from django_q.signing import SignedPackage
+from django_q.tasks import async_task
+
+from toxtempass import config
+from toxtempass.models import Assay, LLMRun, LLMStatus, Person
+from toxtempass.run_eta import DurationPredictor
+
+logger = logging.getLogger("llm")
+
+
+def submit_llm_run(
+    assay: Assay,
+    doc_dict: dict[str, dict] | None = None,
+    extract_images: bool = False,
+    answer_ids: list[int] | None = None,
+    *,
+    requested_by: Person | None = None,
+    extraction_seconds: float | None = None,
+    **kwargs,
+) -> LLMRun:
+    """Queue ``process_llm_async`` for *assay* with these arguments.
+
+    *requested_by* is the user the run counts against for fair queueing and
+    *extraction_seconds* the time spent reading the uploads, kept for the
+    timing log. The run is dispatched straight away when a slot is free.
+    """
+    run = LLMRun.objects.create(
+        assay=assay,
+        requested_by=requested_by if getattr(requested_by, "pk", None) else None,
+        payload=SignedPackage.dumps(((doc_dict, extract_images, answer_ids), kwargs)),
+        model_key=kwargs.get("llm_model") or "",
+        question_count=len(answer_ids) if answer_ids else assay.answers.count(),
+        context_chars=sum(
+            len(entry.get("text") or "") for entry in (doc_dict or {}).values()
+        ),
+        timings=(
+            {"extraction": round(extraction_seconds, 3)}
+            if extraction_seconds is not None
+            else {}
+        ),
+    )
+    dispatch_pending()
+    run.refresh_from_db()
+    return run
+
+
+def _last_served(user_ids: Iterable[int | None]) -> dict[int, datetime]:
+    """When each of *user_ids* last had a run dispatched."""
+    return dict(
+        LLMRun.objects.filter(
+            requested_by_id__in={pk for pk in user_ids if pk is not None},
+            dispatched_at__isnull=False,
+        )
+        .values("requested_by_id")
+        .annotate(last=Max("dispatched_at"))
+        .values_list("requested_by_id", "last")
+    )
+
+
+def _fair_order(active: Iterable[LLMRun]) -> list[LLMRun]:
+    """Pending runs of *active* in per-user round-robin order.
+
+    Runs of the same round go to the user served least recently first, so a
+    finished run does not let its user jump back ahead of the others.
+    """
+    active = list(active)
+    seen = Counter(r.requested_by_id for r in active if r.status in LLMRun.IN_FLIGHT)
+    last_served = _last_served(r.requested_by_id for r in active)
+    ranked = []
+    for run in sorted(active, key=lambda r: (r.created_at, r.pk)):
+        if run.status != LLMRun.Status.PENDING:
+            continue
+        served = last_served.get(run.requested_by_id)
+        ranked.append(
+            (
+                (seen[run.requested_by_id], served is not None, served),
+                run.created_at,
+                run.pk,
+                run,
+            )
+        )
+        seen[run.requested_by_id] += 1
+    ranked.sort(key=lambda item: item[:3])
+    return [run for *_, run in ranked]
+
+
+def _admit(active: list[LLMRun]) -> list[LLMRun]:
+    """Choose the pending runs that get the free slots."""
+    in_flight = Counter(
+        r.requested_by_id for r in active if r.status in LLMRun.IN_FLIGHT
+    )
+    slots = config.llm_run_max_in_flight - sum(in_flight.values())
+    if slots <= 0:
+        return []
+    chosen, held = [], []
+    for run in _fair_order(active):
+        if len(chosen) == slots:
+            break
+        if in_flight[run.requested_by_id] < config.llm_run_max_in_flight_per_user:
+            in_flight[run.requested_by_id] += 1
+            chosen.append(run)
+        else:
+            held.append(run)
+    # Nobody else is waiting for the remaining slots.
+    return chosen + held[: slots - len(chosen)]
+
+
+def _fail_stale_runs() -> int:
+    """Fail in-flight runs that outlived the ``llm`` cluster timeout."""
+    cutoff = timezone.now() - timedelta(seconds=config.llm_run_stale_seconds)
+    stale = list(
+        LLMRun.objects.filter(
+            status__in=LLMRun.IN_FLIGHT, dispatched_at__lt=cutoff
+        ).values_list("pk", "assay_id")
+    )
+    if not stale:
+        return 0
+    LLMRun.objects.filter(pk__in=[pk for pk, _ in stale]).update(
+        status=LLMRun.Status.FAILED,
+        error="No result from the LLM worker; it was presumably restarted.",
+        finished_at=timezone.now(),
+    )
+    Assay.objects.filter(
+        pk__in=[assay_id for _, assay_id in stale],
+        status__in=[LLMStatus.BUSY, LLMStatus.SCHEDULED],
+    ).exclude(llm_runs__status__in=LLMRun.ACTIVE).update(status=LLMStatus.ERROR)
+    logger.warning("Failed %d stale LLM run(s)", len(stale))
+    return len(stale)
+
+
+def dispatch_pending() -> int:
+    """Admit pending runs to the ``llm`` cluster; return how many were queued."""
+    _fail_stale_runs()
+    with transaction.atomic():
+        # Locking the active rows serialises concurrent dispatchers.
+        active = list(
+            LLMRun.objects.select_for_update()
+            .filter(status__in=LLMRun.ACTIVE)
+            .only("requested_by", "status", "created_at")
+        )
+        chosen = _admit(active)
+        if chosen:
+            LLMRun.objects.filter(
+                pk__in=[r.pk for r in chosen], status=LLMRun.Status.PENDING
+            ).update(status=LLMRun.Status.QUEUED, dispatched_at=timezone.now())
+    for run in chosen:
+        try:
+            task_id = async_task(
+                "toxtempass.scheduling.run_llm_run",
+                run.pk,
+                group=config.llm_run_group,
+                cluster=config.llm_run_cluster,
+            )
+        except Exception:
+            logger.exception("Could not queue LLM run %s; it stays pending", run.pk)
+            LLMRun.objects.filter(pk=run.pk, status=LLMRun.Status.QUEUED).update(
+                status=LLMRun.Status.PENDING, dispatched_at=None
+            )
+            continue
+        # In sync mode the run has already finished; only add the task id.
+        LLMRun.objects.filter(pk=run.pk).update(task_id=str(task_id or ""))
+    return len(chosen)
+
+
+def run_llm_run(run_id: int) -> str | None:
+    """Run one admitted LLM run; executes on the ``llm`` cluster.
+
+    Returns:
+        The final run status, or ``None`` when the run was no longer queued
+        (deleted, or already failed as stale).
+
+    """
+    from toxtempass.views import process_llm_async
+
+    run = LLMRun.objects.filter(pk=run_id).first()
+    # Claim the run; the payload (document text) is not needed once loaded.
+    claimed = run is not None and LLMRun.objects.filter(
+        pk=run_id, status=LLMRun.Status.QUEUED
+    ).update(status=LLMRun.Status.RUNNING, started_at=timezone.now(), payload="")
+    if not claimed:
+        logger.warning("LLM run %s is no longer queued; skipping", run_id)
+        return None
+
+    started = time.perf_counter()
+    timings = {
+        **run.timings,
+        "queue": round((timezone.now() - run.created_at).total_seconds(), 3),
+    }
+    status, error = LLMRun.Status.FAILED, ""
+    try:
+        args, kwargs = SignedPackage.loads(run.payload)
+        process_llm_async(run.assay_id, *args, timings=timings, **kwargs)
+        status = LLMRun.Status.DONE
+    except Exception as exc:
+        error = f"{type(exc).__name__}: {exc}"
+        raise
+    finally:
+        LLMRun.objects.filter(pk=run_id).update(
+            status=status,
+            error=error,
+            finished_at=timezone.now(),
+            run_seconds=round(time.perf_counter() - started, 3),
+            model_key=timings.pop("model_key", None) or run.model_key,
+            timings=timings,
+        )
+        try:
+            dispatch_pending()
+        except Exception:
+            logger.exception("Dispatching pending LLM runs failed")
+    return status
+
+
+def queue_position(assay: Assay | int) -> int | None:
+    """Where *assay*'s latest run stands in the LLM queue.
+
+    Returns ``None`` when no run is waiting or running, ``0`` once it has been
+    handed to a worker, and ``n >= 1`` when it is the *n*-th pending run in
+    line.
+    """
+    assay_id = getattr(assay, "pk", assay)
+    run = (
+        LLMRun.objects.filter(assay_id=assay_id, status__in=LLMRun.ACTIVE)
+        .order_by("-created_at")
+        .only("status")
+        .first()
+    )
+    if run is None:
+        return None
+    if run.status != LLMRun.Status.PENDING:
+        return 0
+    order = _fair_order(
+        LLMRun.objects.filter(status__in=LLMRun.ACTIVE).only(
+            "requested_by", "status", "created_at"
+        )
+    )
+    # 0 if the run was admitted in the meantime.
+    return next((i for i, r in enumerate(order, start=1) if r.pk == run.pk), 0)
+
+
+def queue_estimate(assay: Assay | int) -> dict | None:
+    """Queue position and predicted start and finish of *assay*'s latest run.
+
+    The slots are simulated from now on: running runs free theirs after their
+    predicted duration (:class:`~toxtempass.run_eta.DurationPredictor`) minus
+    the time already spent, and the pending runs ahead take them in fair
+    order.  ``poll_after_seconds`` tells the client when asking again is
+    worthwhile: a quarter of the remaining time, at most
+    ``config.reload_busy_max_interval_seconds``.  ``None`` when *assay* has no
+    run waiting or running.
+    """
+    assay_id = getattr(assay, "pk", assay)
+    active = list(
+        LLMRun.objects.filter(status__in=LLMRun.ACTIVE).defer("payload", "timings")
+    )
+    mine = [r for r in active if r.assay_id == assay_id]
+    if not mine:
+        return None
+    run = max(mine, key=lambda r: (r.created_at, r.pk))
+    predictor = DurationPredictor()
+    now = timezone.now()
+
+    if run.status == LLMRun.Status.PENDING:
+        # Seconds from now until each slot is free.
+        free_in = [
+            max(predictor.predict_run(r) - _elapsed(r, now), 0.0)
+            for r in active
+            if r.status in LLMRun.IN_FLIGHT
+        ]
+        free_in += [0.0] * (max(config.llm_run_max_in_flight, 1) - len(free_in))
+        heapq.heapify(free_in)
+        order = _fair_order(active)
+        position = next(i for i, r in enumerate(order, start=1) if r.pk == run.pk)
+        for ahead in order[: position - 1]:
+            heapq.heappush(free_in, heapq.heappop(free_in) + predictor.predict_run(ahead))
+        start = now + timedelta(seconds=free_in[0])
+        remaining = free_in[0] + predictor.predict_run(run)
+    else:
+        position = 0
+        start = run.started_at or now
+        remaining = max(predictor.predict_run(run) - _elapsed(run, now), 0.0)
+
+    return {
+        "queue_position": position,
+        "estimated_start": start.isoformat(),
+        "estimated_finish": (now + timedelta(seconds=remaining)).isoformat(),
+        "eta_seconds": round(remaining),
+        "poll_after_seconds": round(
+            min(remaining / 4, config.reload_busy_max_interval_seconds)
+        ),
+    }
+
+
+def _elapsed(run: LLMRun, now: datetime) -> float:
+    return (now - run.started_at).total_seconds() if run.started_at else 0.0
@@ -1,25 +1,28 @@
 from __future__ import annotations
 
 import logging
+from functools import partial
 
 from django.core.files.storage import default_storage
+from django.db import transaction
 from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
+from django_q.signals import post_execute, pre_execute
+from simple_history.signals import pre_create_historical_record
 
+from toxtempass import tracing
 from toxtempass.demo import seed_demo_assay_for_user
 
-from .models import FileAsset, Person
+from .models import Answer, Assay, ExportJob, FileAsset, Investigation, Person
 
 logger = logging.getLogger(__name__)
 
 
-@receiver(post_delete, sender=FileAsset)
-def delete_object_from_storage(sender:FileAsset, instance: FileAsset, **kwargs) -> None:
-    """Remove the object from storage (S3/MinIO) after the DB row is deleted."""
-    key = (instance.object_key or "").strip()
-    if not key:
+def _delete_unreferenced_object(key: str) -> None:
+    """Delete *key* from storage unless a FileAsset row still references it."""
+    if FileAsset.objects.filter(object_key=key).exists():
+        logger.debug("Storage object %s is still referenced; keeping it.", key)
         return
-
     try:
         if default_storage.exists(key):
             default_storage.delete(key)
@@ -27,9 +30,81 @@ def delete_object_from_storage(sender:FileAsset, instance: FileAsset, **kwargs)
         # Decide your policy: log and swallow, or re-raise
         logger.exception("Failed to delete storage object: %s", key)
 
+
+@receiver(post_delete, sender=FileAsset)
+def delete_object_from_storage(sender:FileAsset, instance: FileAsset, **kwargs) -> None:
+    """Remove the object from storage (S3/MinIO) once no FileAsset references it.
+
+    Objects are content-addressed and shared by every row with the same hash,
+    so the object is only deleted together with its last row. The reference
+    count is checked once the delete has committed: a rolled-back delete keeps
+    the object, and a row added meanwhile by another request still counts.
+    """
+    key = (instance.object_key or "").strip()
+    if not key:
+        return
+    transaction.on_commit(partial(_delete_unreferenced_object, key))
+
+@receiver(
+    pre_create_historical_record,
+    sender=Answer.history.model,
+    dispatch_uid="answer_history_version_diff",
+)
+def summarize_answer_version(sender, history_instance, **kwargs) -> None:
+    """Store the word diff on each new Answer history row as it is created."""
+    from toxtempass.answer_history import record_version_diff
+
+    record_version_diff(history_instance)
+
+@receiver(post_delete, sender=Assay, dispatch_uid="assay_export_cache_delete")
+def delete_cached_exports_for_assay(sender: Assay, instance: Assay, **kwargs) -> None:
+    """Remove the assay's cached export artifacts from storage."""
+    from toxtempass import Config
+    from toxtempass.export import delete_cached_exports
+
+    if Config.export_cache_enabled:
+        delete_cached_exports(instance.pk)
+
+@receiver(post_delete, sender=ExportJob, dispatch_uid="export_job_artifact_delete")
+def delete_export_job_artifact(sender: ExportJob, instance: ExportJob, **kwargs) -> None:
+    """Remove job-owned files; shared export cache entries are left alone.
+
+    Besides the artifact this covers the stored parts of a bulk export that
+    never finished.
+    """
+    from toxtempass import Config
+
+    parts = (instance.params or {}).get("parts", {})
+    for key in [instance.artifact_key, *parts.values()]:
+        if not key.startswith(f"{Config.export_job_prefix}/"):
+            continue
+        try:
+            default_storage.delete(key)
+        except Exception:
+            logger.exception("Failed to delete export job artifact: %s", key)
+
 @receiver(post_save, sender=Person, dispatch_uid="person_seed_demo_assay")
 def seed_demo(sender:Person, instance: Person, created: bool, **kwargs) -> None:
     """Seed a demo assay for newly created users."""
     if not created:
             return
-    seed_demo_assay_for_user(instance)
\ No newline at end of file
+    seed_demo_assay_for_user(instance)
+
+@receiver(post_save, sender=Investigation, dispatch_uid="investigation_workspace_cache")
+@receiver(post_delete, sender=Investigation, dispatch_uid="investigation_workspace_cache_delete")
+def invalidate_workspace_snapshots(sender: Investigation, instance: Investigation, **kwargs) -> None:
+    """Drop cached workspace snapshots; they list the owner's investigations."""
+    from toxtempass.workspace import invalidate_workspace_cache
+
+    invalidate_workspace_cache()
+
+
+@receiver(pre_execute)
+def bind_task_to_traces(sender, func, task: dict, **kwargs) -> None:
+    """Link the spans of a django-q task to its task ID."""
+    tracing.bind_task(task.get("id"))
+
+
+@receiver(post_execute)
+def unbind_task_from_traces(sender, **kwargs) -> None:
+    tracing.bind_task(None)
@@ -5,7 +5,8 @@ from django.utils.safestring import SafeText, mark_safe
 
 from django.urls import reverse
 
-from toxtempass.models import Answer, Assay, AssayCost, LLMStatus, AssayView, Person
+from toxtempass.models import Answer, Assay, AssayCost, LLMStatus, Person
+from toxtempass.view_tracking import get_viewed_assay_ids
 from django.utils.dateparse import parse_datetime
 from django.contrib.humanize.templatetags.humanize import naturaltime
 
@@ -181,8 +182,10 @@ class AssayTable(tables.Table):
         request = self.context.get("request")
         if not request or not request.user.is_authenticated:
             return ""
-        viewed = AssayView.objects.filter(assay=record, user=request.user).exists()
-        if not viewed:
+        # One cached lookup per table render, not one query per row.
+        if not hasattr(self, "_viewed_assay_ids"):
+            self._viewed_assay_ids = get_viewed_assay_ids(request.user.id)
+        if record.id not in self._viewed_assay_ids:
             return mark_safe(
                 '<i class="bi bi-dot text-primary fs-3"></i><span class="visually-hidden">New</span>'
             )
@@ -0,0 +1,131 @@
+"""Tests for the precomputed, paginated answer version history."""
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from toxtempass.answer_history import (
+    HistoricalAnswer,
+    ensure_version_diffs,
+    render_word_diff,
+    version_history_page,
+    word_diff_ops,
+)
+from toxtempass.models import QuestionSet
+from toxtempass.tests.fixtures.factories import (
+    AnswerFactory,
+    AssayFactory,
+    InvestigationFactory,
+    PersonFactory,
+    StudyFactory,
+)
+
+
+def _answer(**kwargs):
+    # One shared QuestionSet with an explicit label, so the v{n} factory
+    # sequence cannot collide with the migration-seeded "v1".
+    question_set, _ = QuestionSet.objects.get_or_create(label="history")
+    return AnswerFactory.create(
+        question__subsection__section__question_set=question_set, **kwargs
+    )
+
+
+def _edit(answer, *texts):
+    for text in texts:
+        answer.answer_text = text
+        answer.save()
+
+
+def test_word_diff_round_trip():
+    ops = word_diff_ops("the quick brown fox", "the slow brown <fox>")
+    html = render_word_diff(ops, "the slow brown <fox>")
+
+    assert ops == [
+        ["=", 1], ["-", ["quick"]], ["+", 1], ["=", 1], ["-", ["fox"]], ["+", 1]
+    ]
+    assert html == (
+        'the <span style="color: red; text-decoration: line-through;">quick</span> '
+        '<span style="color: green;">slow</span> brown '
+        '<span style="color: red; text-decoration: line-through;">fox</span> '
+        '<span style="color: green;">&lt;fox&gt;</span>'
+    )
+
+
+@pytest.mark.django_db
+class TestVersionHistory:
+    def test_diff_is_stored_when_the_version_is_saved(self):
+        answer = _answer(answer_text="first draft")
+        _edit(answer, "second draft")
+        answer.accepted = True
+        answer.save()
+
+        created, edited, accepted = answer.history.order_by("history_id")
+        assert (created.diff_visible, created.changed_fields) == (False, [])
+        assert edited.changed_fields == ["answer_text"]
+        assert edited.answer_text_ops == [["-", ["first"]], ["+", 1], ["=", 1]]
+        assert (accepted.diff_visible, accepted.changed_fields) == (False, ["accepted"])
+
+    def test_keyset_pages_newest_first(self):
+        answer = _answer(answer_text="v0")
+        _edit(answer, *(f"v{i}" for i in range(1, 8)))
+
+        first, cursor = version_history_page(answer, page_size=3)
+        second, cursor = version_history_page(answer, before=cursor, page_size=3)
+        last, cursor = version_history_page(answer, before=cursor, page_size=3)
+
+        texts = [e["version"].answer_text for e in first + second + last]
+        assert texts == [f"v{i}" for i in range(7, 0, -1)]
+        assert cursor is None
+
+    def test_page_cost_does_not_grow_with_history(self):
+        short = _answer(answer_text="v0")
+        _edit(short, "v1", "v2")
+        long = _answer(answer_text="v0")
+        _edit(long, *(f"v{i}" for i in range(1, 60)))
+
+        with CaptureQueriesContext(connection) as short_ctx:
+            version_history_page(short, page_size=5)
+        with CaptureQueriesContext(connection) as long_ctx:
+            version_history_page(long, page_size=5)
+
+        assert len(long_ctx) == len(short_ctx)
+
+    def test_legacy_rows_are_backfilled_once(self):
+        answer = _answer(answer_text="old text")
+        _edit(answer, "new text")
+        HistoricalAnswer.objects.filter(id=answer.pk).update(
+            diff_computed=False,
+            diff_visible=False,
+            changed_fields=[],
+            answer_text_ops=None,
+        )
+
+        assert ensure_version_diffs(answer.pk) == 2
+        assert ensure_version_diffs(answer.pk) == 0
+        entries, _ = version_history_page(answer)
+        assert [e["version"].answer_text for e in entries] == ["new text"]
+        assert "line-through;\">old</span>" in entries[0]["answer_text_changes_html"]
+
+    def test_view_serves_pages(self, client, monkeypatch):
+        user = PersonFactory.create()
+        study = StudyFactory.create(investigation=InvestigationFactory.create(owner=user))
+        answer = _answer(
+            assay=AssayFactory.create(study=study), answer_text="<b>v0</b>"
+        )
+        _edit(answer, "<b>v1</b>", "<b>v2</b>")
+        url = reverse(
+            "get_version_history",
+            kwargs={"assay_id": answer.assay_id, "question_id": answer.question_id},
+        )
+        client.force_login(user)
+
+        monkeypatch.setattr("toxtempass.config.version_history_page_size", 1)
+        first = client.get(url).content.decode()
+        latest = answer.history.latest("history_id")
+        older = client.get(url, {"before": latest.history_id})
+
+        assert "&lt;b&gt;v2&lt;/b&gt;" in first and "v0" not in first
+        assert "Load older versions" in first
+        assert "&lt;b&gt;v1&lt;/b&gt;" in older.content.decode()
+        assert "<table" not in older.content.decode()
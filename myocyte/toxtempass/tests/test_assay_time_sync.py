@@ -1,10 +1,15 @@
 """Tests for the assay_time_sync endpoint and AssayTimeLog model."""
 
+from unittest.mock import patch
+
 import pytest
+from django.db import connection
 from django.test import Client
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from toxtempass.models import AssayTimeLog
+from toxtempass.time_tracking import get_assay_total_seconds, record_active_seconds
 from toxtempass.tests.fixtures.factories import (
     AssayFactory,
     InvestigationFactory,
@@ -71,6 +76,7 @@ class TestAssayTimeSyncView:
         client.force_login(user)
         resp = client.post(sync_url, {"seconds": "180"})
         assert resp.status_code == 200
+        assert resp.json()["total_seconds"] == 180
         assert AssayTimeLog.objects.filter(user=user, assay=assay).count() == 1
         assert AssayTimeLog.objects.get(user=user, assay=assay).seconds == 180
 
@@ -90,6 +96,35 @@ class TestAssayTimeSyncView:
         assert data["success"] is True
         assert data["total_seconds"] == 300
 
+    def test_smaller_value_does_not_regress(self, client, user, assay, sync_url):
+        AssayTimeLog.objects.create(user=user, assay=assay, seconds=300)
+        client.force_login(user)
+        resp = client.post(sync_url, {"seconds": "50"})
+        assert resp.json()["total_seconds"] == 300
+        assert AssayTimeLog.objects.get(user=user, assay=assay).seconds == 300
+
+    def test_heartbeat_is_one_conditional_update(self, user, assay):
+        record_active_seconds(assay.id, user.id, 10)
+        with CaptureQueriesContext(connection) as ctx:
+            assert record_active_seconds(assay.id, user.id, 20) == 20
+        # The UPDATE and the total; nothing is read first.
+        assert len(ctx.captured_queries) == 2
+        assert ctx.captured_queries[0]["sql"].startswith("UPDATE")
+        assert get_assay_total_seconds(assay.id) == 20
+
+    def test_racing_first_heartbeat_keeps_the_larger_value(self, user, assay):
+        real_get_or_create = AssayTimeLog.objects.get_or_create
+
+        def created_meanwhile(**kwargs):
+            AssayTimeLog.objects.create(user=user, assay=assay, seconds=5)
+            return real_get_or_create(**kwargs)
+
+        with patch.object(
+            AssayTimeLog.objects, "get_or_create", side_effect=created_meanwhile
+        ):
+            assert record_active_seconds(assay.id, user.id, 30) == 30
+        assert AssayTimeLog.objects.get(user=user, assay=assay).seconds == 30
+
     def test_invalid_seconds_non_integer(self, client, user, sync_url):
         client.force_login(user)
         resp = client.post(sync_url, {"seconds": "abc"})
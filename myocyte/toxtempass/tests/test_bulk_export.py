@@ -0,0 +1,257 @@
+"""Tests for the multi-assay ZIP export job."""
+
+import io
+import subprocess
+import threading
+import zipfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from django.core.files.storage import InMemoryStorage
+from django.urls import reverse
+
+from toxtempass import config
+from toxtempass.bulk_export import (
+    ERRORS_FILE_NAME,
+    bulk_export_member_name,
+    run_bulk_export_job,
+)
+from toxtempass.export_jobs import sweep_export_jobs
+from toxtempass.models import ExportJob, Feedback
+from toxtempass.tests.fixtures.factories import (
+    AssayFactory,
+    InvestigationFactory,
+    PersonFactory,
+    StudyFactory,
+)
+from toxtempass.zip_stream import stream_zip
+
+
+class _PandocStub:
+    """Thread-safe stand-in for ``subprocess.run`` that counts renders."""
+
+    def __init__(self, fail_for: str | None = None) -> None:
+        self.calls = 0
+        self.fail_for = fail_for
+        self._lock = threading.Lock()
+
+    def __call__(self, cmd, check=False):
+        with self._lock:
+            self.calls += 1
+        out = Path(cmd[cmd.index("-o") + 1])
+        if self.fail_for and self.fail_for in out.name:
+            raise subprocess.CalledProcessError(43, cmd)
+        out.write_bytes(f"rendered {out.name}".encode())
+
+
+def _read_zip(response) -> zipfile.ZipFile:
+    return zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+
+
+def _export(client, **data) -> tuple[dict, zipfile.ZipFile | None]:
+    """Start a bulk export (tasks run inline in tests) and download the ZIP."""
+    resp = client.post(reverse("bulk_export_assays"), data)
+    assert resp.status_code == 202
+    job = resp.json()
+    if job["status"] != ExportJob.Status.DONE:
+        return job, None
+    download = client.get(job["download_url"])
+    assert download["Content-Type"] == "application/zip"
+    return job, _read_zip(download)
+
+
+@pytest.fixture
+def user(db):
+    return PersonFactory.create()
+
+
+@pytest.fixture
+def investigation(user):
+    return InvestigationFactory.create(owner=user)
+
+
+@pytest.fixture
+def storage():
+    storage = InMemoryStorage()
+    with (
+        patch("toxtempass.export.default_storage", storage),
+        patch("toxtempass.export_jobs.default_storage", storage),
+        patch("toxtempass.bulk_export.default_storage", storage),
+        patch("toxtempass.filehandling.default_storage", storage),
+        patch("toxtempass.views.default_storage", storage),
+    ):
+        yield storage
+
+
+def _assay(investigation, user, title, feedback=True):
+    study = StudyFactory.create(investigation=investigation)
+    assay = AssayFactory.create(study=study, title=title)
+    if feedback:
+        Feedback.objects.create(
+            feedback_text="ok", usefulness_rating=3, assay=assay, user=user
+        )
+    return assay
+
+
+def test_stream_zip_yields_incrementally():
+    def entries():
+        yield "a.txt", b"a" * 10_000
+        yield "b.txt", iter([b"b1", b"b2"])
+
+    chunks = list(stream_zip(entries()))
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+
+    assert len(chunks) > 2
+    assert archive.read("a.txt") == b"a" * 10_000
+    assert archive.read("b.txt") == b"b1b2"
+    assert archive.testzip() is None
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("storage")
+class TestBulkExportView:
+    @property
+    def url(self) -> str:
+        return reverse("bulk_export_assays")
+
+    def test_exports_accessible_assays_with_feedback(self, client, user, investigation):
+        first = _assay(investigation, user, "first")
+        second = _assay(investigation, user, "second")
+        _assay(investigation, user, "no feedback", feedback=False)
+        _assay(InvestigationFactory.create(), PersonFactory.create(), "not mine")
+
+        client.force_login(user)
+        pandoc = _PandocStub()
+        with patch("toxtempass.export.subprocess.run", side_effect=pandoc):
+            job, archive = _export(client, format=["pdf", "json"])
+
+        assert job["export_type"] == "zip"
+        assert sorted(archive.namelist()) == sorted(
+            bulk_export_member_name(assay, export_type)
+            for assay in (first, second)
+            for export_type in ("pdf", "json")
+        )
+        assert pandoc.calls == 2
+        assert archive.read(bulk_export_member_name(first, "pdf")) == (
+            b"rendered toxtemp_first.pdf"
+        )
+
+    def test_scope_filters(self, client, user, investigation):
+        first = _assay(investigation, user, "first")
+        _assay(InvestigationFactory.create(owner=user), user, "elsewhere")
+
+        client.force_login(user)
+        job, archive = _export(client, format="json", investigation=investigation.id)
+
+        assert archive.namelist() == [bulk_export_member_name(first, "json")]
+        download = client.get(job["download_url"])
+        assert f"investigation-{investigation.id}" in download["Content-Disposition"]
+
+    def test_reuses_cached_artifacts(self, client, user, investigation, storage):
+        _assay(investigation, user, "cached")
+        client.force_login(user)
+        pandoc = _PandocStub()
+        with (
+            patch.object(config, "export_cache_enabled", True),
+            patch("toxtempass.export.subprocess.run", side_effect=pandoc),
+        ):
+            _, first = _export(client, format="docx")
+            _, second = _export(client, format="docx")
+
+        assert pandoc.calls == 1
+        name = first.namelist()[0]
+        assert first.read(name) == second.read(name)
+        # Cached files are zipped in place; only the archives are job files.
+        _, job_files = storage.listdir(config.export_job_prefix)
+        assert len(job_files) == 2
+
+    def test_failed_render_is_listed_not_fatal(self, client, user, investigation):
+        good = _assay(investigation, user, "good")
+        bad = _assay(investigation, user, "bad")
+        client.force_login(user)
+        with patch(
+            "toxtempass.export.subprocess.run", side_effect=_PandocStub(fail_for="bad")
+        ):
+            _, archive = _export(client, format="pdf")
+
+        assert bulk_export_member_name(good, "pdf") in archive.namelist()
+        errors = archive.read(ERRORS_FILE_NAME).decode()
+        assert bulk_export_member_name(bad, "pdf") in errors
+        ref = errors.split("(ref ")[1][:8]
+        bad.refresh_from_db()
+        assert f"[bulk {ref}]" in bad.processing_log
+
+    def test_job_runs_on_the_exports_cluster_and_continues(
+        self, client, user, investigation, storage
+    ):
+        first = _assay(investigation, user, "first")
+        second = _assay(investigation, user, "second")
+        client.force_login(user)
+        with (
+            patch.object(config, "bulk_export_job_budget_seconds", 0),
+            patch("toxtempass.export_jobs.async_task", return_value="t-1") as queued,
+        ):
+            job, archive = _export(client, format="json")
+            assert job["status"] == ExportJob.Status.QUEUED
+            assert archive is None
+            # Each run stores one file once the budget is used up, then requeues.
+            run_bulk_export_job(job["job_id"])
+            pending = ExportJob.objects.get()
+            assert pending.status == ExportJob.Status.QUEUED
+            first_parts = list(pending.params["parts"].values())
+            assert len(first_parts) == 1
+            run_bulk_export_job(job["job_id"])
+
+        assert queued.call_count == 2
+        assert queued.call_args.kwargs["cluster"] == config.export_job_cluster
+        stored = ExportJob.objects.get()
+        assert stored.status == ExportJob.Status.DONE
+        assert stored.params["parts"] == {}
+        download_url = reverse("export_job_download", args=[stored.id])
+        archive = _read_zip(client.get(download_url))
+        assert sorted(archive.namelist()) == sorted(
+            bulk_export_member_name(assay, "json") for assay in (first, second)
+        )
+        # The stored parts were deleted once the archive was written.
+        assert not any(storage.exists(key) for key in first_parts)
+
+    def test_queueing_failure_fails_the_job(self, client, user, investigation):
+        _assay(investigation, user, "first")
+        client.force_login(user)
+        with patch(
+            "toxtempass.export_jobs.async_task", side_effect=RuntimeError("broker down")
+        ):
+            job, _ = _export(client, format="json")
+
+        assert job["status"] == ExportJob.Status.FAILED
+        assert "ref" in job["error"]
+
+    def test_only_the_requesting_user_can_download(self, client, user, investigation):
+        _assay(investigation, user, "first")
+        client.force_login(user)
+        job, _ = _export(client, format="json")
+
+        client.force_login(PersonFactory.create())
+        assert client.get(job["download_url"]).status_code == 403
+        assert client.get(job["status_url"]).status_code == 403
+
+    def test_deleting_a_job_deletes_its_parts(self, user, storage):
+        key = storage.save(f"{config.export_job_prefix}/x/part.json", io.BytesIO(b"{}"))
+        ExportJob.objects.create(
+            requested_by=user,
+            export_type="zip",
+            status=ExportJob.Status.FAILED,
+            params={"parts": {"part.json": key}},
+        )
+        ExportJob.objects.update(created_at="2000-01-01T00:00:00Z")
+        with patch("toxtempass.signals.default_storage", storage):
+            assert sweep_export_jobs()["deleted"] == 1
+
+        assert not storage.exists(key)
+
+    def test_invalid_format_and_empty_selection(self, client, user, investigation):
+        client.force_login(user)
+        assert client.post(self.url, {"format": "exe"}).status_code == 400
+        assert client.post(self.url, {"format": "pdf"}).status_code == 404
+        assert client.get(self.url, {"format": "pdf"}).status_code == 405
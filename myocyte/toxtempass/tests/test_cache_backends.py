@@ -0,0 +1,166 @@
+"""Tests for the two-tier (in-process L1 over shared L2) cache backend."""
+
+import pytest
+from django.core.cache import caches
+from django.test import override_settings
+
+from toxtempass.cache_backends import TieredCache
+
+L2_SETTINGS = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "l2": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "tiered-cache-tests",
+    },
+    "db": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "django_cache_table",
+    },
+}
+
+
+def _make(**options):
+    options.setdefault("L2_CACHE", "l2")
+    options.setdefault("SYNC_INTERVAL", 0)
+    return TieredCache("", {"OPTIONS": options})
+
+
+@pytest.fixture(autouse=True)
+def l2_cache():
+    with override_settings(CACHES=L2_SETTINGS):
+        caches["l2"].clear()
+        yield caches["l2"]
+
+
+class TestTieredCache:
+    def test_second_get_is_served_from_l1(self):
+        cache = _make()
+        cache.set("k", {"a": 1})
+        assert cache.get("k") == {"a": 1}
+        stats = cache.stats()
+        assert stats["l1_hits"] == 1
+        assert stats["misses"] == 0
+
+    def test_l2_hit_populates_l1(self, l2_cache):
+        l2_cache.set("k", "v")
+        cache = _make()
+        assert cache.get("k") == "v"
+        assert cache.get("k") == "v"
+        stats = cache.stats()
+        assert stats["l2_hits"] == 1
+        assert stats["l1_hits"] == 1
+
+    def test_miss_returns_default(self):
+        cache = _make()
+        assert cache.get("missing", "fallback") == "fallback"
+        assert cache.stats()["misses"] == 1
+
+    def test_l1_returns_copies(self):
+        cache = _make()
+        cache.set("k", [1])
+        cache.get("k").append(2)
+        assert cache.get("k") == [1]
+
+    def test_write_in_one_process_invalidates_the_other(self):
+        worker_a, worker_b = _make(), _make()
+        worker_a.set("k", "old")
+        assert worker_b.get("k") == "old"
+        worker_a.set("k", "new")
+        assert worker_b.get("k") == "new"
+
+    def test_delete_invalidates_other_process(self):
+        worker_a, worker_b = _make(), _make()
+        worker_a.set("k", "v")
+        assert worker_b.get("k") == "v"
+        worker_a.delete("k")
+        assert worker_b.get("k") is None
+
+    def test_first_write_keeps_other_entries(self):
+        cache = _make()
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.stats()["l1_entries"] == 2
+        assert cache.stats()["invalidations"] == 0
+
+    def test_write_only_invalidates_its_prefix_elsewhere(self):
+        prefixes = ("hot:", "warm:")
+        worker_a = _make(L1_KEY_PREFIXES=prefixes)
+        worker_b = _make(L1_KEY_PREFIXES=prefixes)
+        worker_a.set("hot:k", 1)
+        worker_a.set("warm:k", 1)
+        assert worker_b.get("hot:k") == 1
+        assert worker_b.get("warm:k") == 1
+
+        worker_a.set("hot:k", 2)
+        assert worker_b.get("hot:k") == 2
+        assert worker_b.get("warm:k") == 1
+        stats = worker_b.stats()
+        assert stats["l1_hits"] == 1
+        assert stats["l1_entries"] == 2
+
+    def test_lru_eviction(self):
+        cache = _make(L1_MAX_ENTRIES=2)
+        for key in ("a", "b", "c"):
+            cache.set(key, key)
+        assert cache.stats()["l1_entries"] == 2
+        assert cache.stats()["l1_evictions"] == 1
+        # Evicted from L1 but still served by L2.
+        assert cache.get("a") == "a"
+
+    def test_prefix_filter_bypasses_l1(self, l2_cache):
+        cache = _make(L1_KEY_PREFIXES=("hot:",))
+        cache.set("cold:k", 1)
+        cache.set("hot:k", 2)
+        assert cache.stats()["l1_entries"] == 1
+        assert l2_cache.get("cold:k") == 1
+
+    def test_incr_and_has_key(self):
+        cache = _make()
+        cache.set("n", 1)
+        assert cache.incr("n") == 2
+        assert cache.get("n") == 2
+        assert cache.has_key("n")
+        assert not cache.has_key("nope")
+
+    def test_clear(self, l2_cache):
+        cache = _make()
+        cache.set("k", "v")
+        cache.clear()
+        assert cache.get("k") is None
+        assert l2_cache.get("k") is None
+
+    def test_many_calls_go_to_l2_as_batches(self):
+        cache = _make(L1_KEY_PREFIXES=("hot:",))
+        cache.set_many({"hot:a": 1, "hot:b": 2, "cold:a": 3})
+        assert cache.stats()["l1_entries"] == 2
+        assert cache.get_many(["hot:a", "cold:a", "cold:b"]) == {
+            "hot:a": 1,
+            "cold:a": 3,
+        }
+        cache.delete_many(["hot:a", "cold:a"])
+        assert cache.get_many(["hot:a", "hot:b", "cold:a"]) == {"hot:b": 2}
+
+    def test_many_calls_invalidate_other_processes(self):
+        worker_a, worker_b = _make(), _make()
+        worker_a.set_many({"a": 1, "b": 1})
+        assert worker_b.get_many(["a", "b"]) == {"a": 1, "b": 1}
+        worker_a.set_many({"a": 2})
+        assert worker_b.get_many(["a", "b"]) == {"a": 2, "b": 1}
+        worker_a.delete_many(["a"])
+        assert worker_b.get_many(["a", "b"]) == {"b": 1}
+
+
+@pytest.mark.django_db
+def test_get_many_and_delete_many_are_one_query_each(django_assert_num_queries):
+    cache = _make(L2_CACHE="db", L1_KEY_PREFIXES=("hot:",), SYNC_INTERVAL=60)
+    keys = [f"cold:{n}" for n in range(50)]
+    caches["db"].set_many(dict.fromkeys(keys, 1))
+    with django_assert_num_queries(1):
+        assert len(cache.get_many(keys)) == 50
+    with django_assert_num_queries(1):
+        cache.delete_many(keys)
+    # Hot keys come from L1 once read, after one generation check.
+    cache.set("hot:k", 1)
+    cache.get_many(["hot:k"])
+    with django_assert_num_queries(0):
+        assert cache.get_many(["hot:k"]) == {"hot:k": 1}
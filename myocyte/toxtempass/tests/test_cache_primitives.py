@@ -0,0 +1,57 @@
+"""Tests for the cache-backed queue and lock in toxtempass.cache_primitives."""
+
+import pytest
+from django.core.cache import cache
+
+from toxtempass.cache_primitives import CacheLockTimeout, CacheQueue, cache_lock
+
+
+@pytest.mark.django_db
+class TestCacheQueue:
+    def test_items_come_back_in_order_until_acked(self):
+        queue = CacheQueue("test_queue", timeout=60)
+        for item in range(5):
+            queue.put(item)
+
+        items, position = queue.peek(limit=3)
+        assert items == [0, 1, 2]
+        assert queue.peek(limit=3)[0] == [0, 1, 2]
+        queue.ack(position)
+        assert queue.peek()[0] == [3, 4]
+
+    def test_producer_with_a_stale_tail_does_not_overwrite(self):
+        queue = CacheQueue("test_queue", timeout=60)
+        queue.put("first")
+        cache.delete("test_queue:tail")
+        queue.put("second")
+        assert queue.peek()[0] == ["first", "second"]
+
+    def test_expired_slots_are_skipped(self):
+        queue = CacheQueue("test_queue", timeout=60)
+        for item in range(4):
+            queue.put(item)
+        cache.delete_many(["test_queue:0", "test_queue:2"])
+
+        items, position = queue.peek(limit=1)
+        assert (items, position) == ([1], 2)
+        queue.ack(position)
+        assert queue.peek()[0] == [3]
+
+    def test_acked_slots_are_not_reused(self):
+        queue = CacheQueue("test_queue", timeout=60)
+        queue.put("old")
+        _, position = queue.peek()
+        queue.ack(position)
+        # A producer that read the tail before the ack still lands after it.
+        cache.set("test_queue:tail", 0)
+        queue.put("new")
+        assert queue.peek()[0] == ["new"]
+
+
+@pytest.mark.django_db
+def test_cache_lock_is_exclusive_and_released():
+    with cache_lock("test_lock"):
+        with pytest.raises(CacheLockTimeout), cache_lock("test_lock", wait=0):
+            pytest.fail("ran without the lock")
+    with cache_lock("test_lock", wait=0):
+        pass
@@ -0,0 +1,225 @@
+"""Tests for the deployment circuit breakers and health-aware routing."""
+
+import functools
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from toxtempass import config, deployment_health
+from toxtempass.azure_registry import (
+    EndpointEntry,
+    ModelEntry,
+    get_registry,
+    reload_registry,
+)
+from toxtempass.cache_primitives import cache_lock
+from toxtempass.deployment_health import (
+    breaker_state,
+    breaker_states,
+    probe_deployment_health,
+    record_result,
+    record_run_health,
+    route_deployment,
+)
+from toxtempass.models import (
+    Answer,
+    LLMCallRecord,
+    LLMConfig,
+    LLMHealthCheck,
+    Question,
+    QuestionSet,
+    Section,
+    Subsection,
+)
+from toxtempass.tests.fixtures.factories import AssayFactory
+from toxtempass.views import process_llm_async
+
+EU = {"residency": "eu", "provider": "openai"}
+GLOBAL = {"residency": "global", "direct-from-azure": "true", "provider": "openai"}
+
+
+def _endpoint(index: int, *models: ModelEntry) -> EndpointEntry:
+    return EndpointEntry(
+        index=index,
+        endpoint=f"https://e{index}.invalid/openai/v1",
+        api_key="key",
+        models=list(models),
+    )
+
+
+REGISTRY = [
+    _endpoint(
+        1,
+        ModelEntry(tag="GPT4O", deployment_name="gpt4o", model_id="gpt-4o", tags=EU),
+        ModelEntry(tag="MINI", deployment_name="mini", model_id="gpt-4o-mini", tags=EU),
+    ),
+    _endpoint(
+        2,
+        ModelEntry(tag="GPT4O", deployment_name="gpt4o", model_id="gpt-4o", tags=EU),
+        ModelEntry(tag="GLOBAL", deployment_name="g", model_id="gpt-4o", tags=GLOBAL),
+    ),
+]
+
+
+@pytest.fixture(autouse=True)
+def registry():
+    original = get_registry()
+    reload_registry(REGISTRY)
+    yield
+    reload_registry(original)
+
+
+def _open(key: str) -> None:
+    for _ in range(3):
+        record_result(key, False, "APIConnectionError: refused")
+
+
+@pytest.mark.django_db
+def test_breaker_opens_after_threshold_and_half_opens_after_cooldown(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(deployment_health.time, "time", lambda: clock[0])
+    monkeypatch.setattr("toxtempass.config.llm_breaker_failure_threshold", 2)
+    monkeypatch.setattr("toxtempass.config.llm_breaker_cooldown_seconds", 300)
+
+    assert record_result("1:GPT4O", False, "timeout") == "closed"
+    assert record_result("1:GPT4O", False, "timeout") == "open"
+    assert not deployment_health.is_available("1:GPT4O")
+
+    clock[0] += 300
+    assert breaker_state("1:GPT4O") == "half_open"
+    # A failed trial re-opens the breaker for another cooldown ...
+    assert record_result("1:GPT4O", False, "timeout") == "open"
+    clock[0] += 300
+    # ... and a successful one closes it.
+    assert record_result("1:GPT4O", True) == "closed"
+    assert deployment_health.breaker_states(["1:GPT4O"])["1:GPT4O"]["failures"] == 0
+
+
+@pytest.mark.django_db
+def test_run_outcomes_feed_the_breaker(monkeypatch):
+    monkeypatch.setattr("toxtempass.config.llm_breaker_failure_threshold", 1)
+
+    def records(*outcomes):
+        out = []
+        for outcome in outcomes:
+            record = LLMCallRecord(model_key="1:MINI", outcome=outcome, error="boom")
+            record._started_at = 0.0
+            out.append(record)
+        return out
+
+    record_run_health(records("bad_request", "bad_request"))
+    assert breaker_state("1:MINI") == "closed"
+    record_run_health(records("transient", "timeout"))
+    assert breaker_state("1:MINI") == "open"
+    record_run_health(records("transient", "ok"))
+    assert breaker_state("1:MINI") == "closed"
+
+
+@pytest.mark.django_db
+def test_breaker_update_holds_a_lock(monkeypatch):
+    monkeypatch.setattr(
+        deployment_health, "cache_lock", functools.partial(cache_lock, wait=0)
+    )
+    record_result("1:MINI", False, "timeout")
+
+    with cache_lock("llm_breaker_lock:1:MINI"):
+        # Another worker is updating the breaker: this result is dropped
+        # rather than overwriting its count.
+        assert record_result("1:MINI", False, "timeout") == "closed"
+    assert breaker_states(["1:MINI"])["1:MINI"]["failures"] == 1
+
+    record_result("1:MINI", False, "timeout")
+    assert breaker_states(["1:MINI"])["1:MINI"]["failures"] == 2
+
+
+@pytest.mark.django_db
+def test_route_prefers_same_model_then_same_provider():
+    _open("1:GPT4O")
+    assert route_deployment("1:GPT4O") == ("2:GPT4O", "1:GPT4O")
+    assert route_deployment("1:MINI") == ("1:MINI", None)
+
+    _open("2:GPT4O")
+    # 2:GLOBAL hosts the same model but would move EU data out of the EU.
+    assert route_deployment("1:GPT4O") == ("1:MINI", "1:GPT4O")
+
+
+@pytest.mark.django_db
+def test_route_keeps_key_without_healthy_allowed_substitute(
+    django_capture_on_commit_callbacks,
+):
+    cfg = LLMConfig.load()
+    cfg.allowed_models = ["1:GPT4O", "1:MINI"]
+    with django_capture_on_commit_callbacks(execute=True):
+        cfg.save()
+    _open("1:GPT4O")
+
+    assert route_deployment("1:GPT4O") == ("1:MINI", "1:GPT4O")
+    _open("1:MINI")
+    assert route_deployment("1:GPT4O") == ("1:GPT4O", None)
+    # Superusers may use deployments outside the allowlist.
+    assert route_deployment("1:GPT4O", SimpleNamespace(is_superuser=True)) == (
+        "2:GPT4O",
+        "1:GPT4O",
+    )
+
+
+@pytest.mark.django_db
+def test_probe_updates_breakers_and_history(monkeypatch):
+    monkeypatch.setattr("toxtempass.config.llm_breaker_failure_threshold", 1)
+    results = {
+        "1:GPT4O": {"ok": True, "model_id": "gpt-4o", "samples": 1},
+        "2:GPT4O": {"ok": False, "model_id": "gpt-4o", "error": "TimeoutError"},
+    }
+    with patch("toxtempass.health_check.run_health_check", return_value=results):
+        assert probe_deployment_health() == 1
+
+    assert breaker_state("2:GPT4O") == "open"
+    assert LLMHealthCheck.objects.filter(deployment="2:GPT4O", ok=False).exists()
+
+
+@pytest.mark.django_db
+def test_probe_fits_into_the_default_cluster_timeout(monkeypatch, settings):
+    assert config.llm_health_probe_budget_seconds < settings.Q_CLUSTER["timeout"]
+    monkeypatch.setattr("toxtempass.config.health_check_workers", 1)
+    monkeypatch.setattr("toxtempass.config.llm_health_probe_timeout_seconds", 20)
+    monkeypatch.setattr("toxtempass.config.llm_health_probe_budget_seconds", 40)
+    with patch("toxtempass.health_check.run_health_check", return_value={}) as run:
+        probe_deployment_health()
+
+    # Four deployments in two rounds of 20 s.
+    assert run.call_args.kwargs == {"samples": 1, "timeout": 20, "workers": 2}
+
+
+class FakeLLM:
+    def invoke(self, messages):
+        return SimpleNamespace(content="Answer", usage_metadata={})
+
+
+@pytest.mark.django_db
+def test_run_switches_to_healthy_deployment_and_tells_the_user():
+    assay = AssayFactory()
+    qs = QuestionSet.objects.create(
+        display_name="health-qs", created_by=assay.study.investigation.owner
+    )
+    subsection = Subsection.objects.create(
+        section=Section.objects.create(question_set=qs, title="Sec"), title="Subsec"
+    )
+    question = Question.objects.create(subsection=subsection, question_text="Q?")
+    Answer.objects.create(assay=assay, question=question)
+    _open("1:GPT4O")
+
+    with patch(
+        "toxtempass.views.get_llm_for_endpoint", return_value=FakeLLM()
+    ) as get_llm:
+        process_llm_async(
+            assay.id,
+            doc_dict={"doc.txt": {"text": "Context", "source_document": "doc.txt"}},
+            llm_model="1:GPT4O",
+        )
+
+    get_llm.assert_called_once_with(2, "GPT4O", temperature=0)
+    assay.refresh_from_db()
+    assert [a["level"] for a in assay.user_alerts] == ["info"]
+    assert "gpt-4o is currently unavailable" in assay.user_alerts[0]["message"]
+    assert LLMCallRecord.objects.get().model_key == "2:GPT4O"
@@ -0,0 +1,120 @@
+"""Tests for the content-digest keyed export artifact cache in export.py."""
+
+import tempfile
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from django.core.files.storage import InMemoryStorage
+from django.test import TestCase
+
+from toxtempass import Config
+from toxtempass.export import (
+    delete_cached_exports,
+    export_assay_to_file,
+    export_content_digest,
+)
+from toxtempass.tests.fixtures.factories import AssayFactory
+
+
+class ExportArtifactCacheTests(TestCase):
+    def setUp(self):
+        self.assay = AssayFactory(title="cached export assay")
+        self.request = MagicMock()
+        self.storage = InMemoryStorage()
+        self.renders: list[list[str]] = []
+
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        yaml_stub = Path(tmp_dir.name) / "meta.yaml"
+        yaml_stub.write_text("title: test")
+
+        def _pandoc(cmd, check=False):
+            self.renders.append(list(cmd))
+            out = Path(cmd[cmd.index("-o") + 1])
+            out.write_bytes(f"render {len(self.renders)}".encode())
+
+        for patcher in (
+            patch.object(Config, "export_cache_enabled", True),
+            patch("toxtempass.export.default_storage", self.storage),
+            patch("toxtempass.export.get_create_meta_data_yaml", return_value=yaml_stub),
+            patch("toxtempass.export.subprocess.run", side_effect=_pandoc),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _export(self, export_type: str = "pdf") -> bytes:
+        response = export_assay_to_file(self.request, self.assay, export_type)
+        content = b"".join(response.streaming_content)
+        response.file_to_stream.close()
+        return content
+
+    def _cached_files(self, export_type: str = "pdf") -> list[str]:
+        directory = f"{Config.export_cache_prefix}/{self.assay.id}/{export_type}"
+        return self.storage.listdir(directory)[1]
+
+    def test_unchanged_assay_is_served_from_cache(self):
+        first = self._export()
+        second = self._export()
+
+        self.assertEqual(len(self.renders), 1)
+        self.assertEqual(first, second)
+        self.assertEqual(len(self._cached_files()), 1)
+
+    def test_content_change_rerenders_and_prunes_old_artifact(self):
+        self._export()
+        self.assay.description = "changed description"
+        self.assay.save()
+        content = self._export()
+
+        self.assertEqual(len(self.renders), 2)
+        self.assertEqual(content, b"render 2")
+        self.assertEqual(len(self._cached_files()), 1)
+
+    def test_export_types_are_cached_separately(self):
+        self._export("pdf")
+        self._export("html")
+        self._export("pdf")
+
+        self.assertEqual(len(self.renders), 2)
+
+    def test_storage_errors_fall_back_to_rendering(self):
+        with patch.object(self.storage, "exists", side_effect=OSError("down")):
+            first = self._export()
+            second = self._export()
+
+        self.assertEqual(len(self.renders), 2)
+        self.assertEqual((first, second), (b"render 1", b"render 2"))
+
+    def test_delete_cached_exports_removes_all_types(self):
+        self._export("pdf")
+        self._export("docx")
+        delete_cached_exports(self.assay.id)
+
+        self.assertEqual(self._cached_files("pdf"), [])
+        self.assertEqual(self._cached_files("docx"), [])
+
+
+class ExportContentDigestTests(TestCase):
+    def setUp(self):
+        self.data = {
+            "metadata": {"creation_date": "2026-01-01T00:00:00+01:00", "filename": "x"},
+            "assay": {"fields": {"title": "a"}},
+        }
+
+    def test_creation_date_does_not_affect_digest(self):
+        later = {
+            **self.data,
+            "metadata": {**self.data["metadata"], "creation_date": "2026-02-02T00:00:00"},
+        }
+        self.assertEqual(
+            export_content_digest(self.data, "pdf"), export_content_digest(later, "pdf")
+        )
+
+    def test_digest_depends_on_type_content_and_cache_version(self):
+        base = export_content_digest(self.data, "pdf")
+        changed = {**self.data, "assay": {"fields": {"title": "b"}}}
+
+        self.assertNotEqual(base, export_content_digest(self.data, "docx"))
+        self.assertNotEqual(base, export_content_digest(changed, "pdf"))
+        with patch.object(Config, "export_cache_version", Config.export_cache_version + 1):
+            self.assertNotEqual(base, export_content_digest(self.data, "pdf"))
@@ -40,8 +40,8 @@ def _run_export_with_pandoc_error(assay, side_effect):
 
         with (
             patch(
-                "toxtempass.export.generate_markdown_from_assay",
-                return_value="# test",
+                "toxtempass.export.iter_markdown_from_assay",
+                return_value=["# test"],
             ),
             patch(
                 "toxtempass.export.get_create_meta_data_yaml",
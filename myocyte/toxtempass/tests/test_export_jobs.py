@@ -0,0 +1,235 @@
+"""Tests for asynchronous export jobs (toxtempass.export_jobs and views)."""
+
+import subprocess
+from datetime import timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import InMemoryStorage
+from django.urls import reverse
+from django.utils import timezone
+
+from toxtempass import config
+from toxtempass.export_jobs import (
+    enqueue_export_job,
+    run_export_job,
+    sweep_export_jobs,
+)
+from toxtempass.models import ExportJob, Feedback
+from toxtempass.tests.fixtures.factories import (
+    AssayFactory,
+    InvestigationFactory,
+    PersonFactory,
+    StudyFactory,
+)
+
+
+def _pandoc_stub(cmd, check=False):
+    Path(cmd[cmd.index("-o") + 1]).write_bytes(b"rendered")
+
+
+@pytest.fixture
+def storage():
+    storage = InMemoryStorage()
+    with (
+        patch("toxtempass.export.default_storage", storage),
+        patch("toxtempass.export_jobs.default_storage", storage),
+        patch("toxtempass.views.default_storage", storage),
+    ):
+        yield storage
+
+
+@pytest.fixture
+def user(db):
+    return PersonFactory.create()
+
+
+@pytest.fixture
+def assay(db, user):
+    investigation = InvestigationFactory.create(owner=user)
+    study = StudyFactory.create(investigation=investigation)
+    assay = AssayFactory.create(study=study, title="job assay")
+    Feedback.objects.create(
+        feedback_text="fine", usefulness_rating=4, assay=assay, user=user
+    )
+    return assay
+
+
+@pytest.mark.django_db
+class TestStartExportJobView:
+    def test_queues_on_export_cluster(self, client, user, assay, storage):
+        client.force_login(user)
+        url = reverse(
+            "start_export_job", kwargs={"assay_id": assay.id, "export_type": "pdf"}
+        )
+        with patch("toxtempass.export_jobs.async_task", return_value="t-1") as queued:
+            resp = client.post(url)
+
+        assert resp.status_code == 202
+        data = resp.json()
+        assert data["status"] == ExportJob.Status.QUEUED
+        assert data["status_url"] == reverse("export_job_status", args=[data["job_id"]])
+        assert queued.call_args.kwargs["cluster"] == config.export_job_cluster
+        assert queued.call_args.kwargs["group"] == config.export_job_group
+        assert ExportJob.objects.get(pk=data["job_id"]).task_id == "t-1"
+        assert data["poll_timeout_seconds"] == config.export_job_poll_timeout_seconds
+
+    def test_requires_feedback(self, client, user, assay, storage):
+        assay.feedback.delete()
+        client.force_login(user)
+        url = reverse(
+            "start_export_job", kwargs={"assay_id": assay.id, "export_type": "pdf"}
+        )
+        with patch("toxtempass.export_jobs.async_task") as queued:
+            resp = client.post(url)
+        assert resp.json()["success"] is False
+        queued.assert_not_called()
+
+    def test_rejects_unknown_type(self, client, user, assay, storage):
+        client.force_login(user)
+        url = reverse(
+            "start_export_job", kwargs={"assay_id": assay.id, "export_type": "exe"}
+        )
+        assert client.post(url).status_code == 400
+
+
+@pytest.mark.django_db
+class TestRunExportJob:
+    def _queue(self, assay, user, export_type="pdf"):
+        with patch("toxtempass.export_jobs.async_task", return_value="t-1"):
+            return enqueue_export_job(assay, export_type, user)
+
+    def test_render_stores_artifact_and_timing(self, client, user, assay, storage):
+        job = self._queue(assay, user)
+        with patch("toxtempass.export.subprocess.run", side_effect=_pandoc_stub):
+            key = run_export_job(str(job.id))
+
+        job.refresh_from_db()
+        assert job.status == ExportJob.Status.DONE
+        assert job.artifact_key == key
+        assert job.render_seconds is not None
+        assert storage.open(key).read() == b"rendered"
+
+        client.force_login(user)
+        status = client.get(reverse("export_job_status", args=[job.id])).json()
+        assert status["download_url"] == reverse("export_job_download", args=[job.id])
+        resp = client.get(status["download_url"])
+        assert resp.status_code == 200
+        assert b"".join(resp.streaming_content) == b"rendered"
+        assert "job-assay.pdf" in resp.headers["Content-Disposition"]
+
+    def test_pandoc_failure_marks_job_failed(self, user, assay, storage):
+        job = self._queue(assay, user)
+        error = subprocess.CalledProcessError(43, ["pandoc"])
+        with patch("toxtempass.export.subprocess.run", side_effect=error):
+            assert run_export_job(str(job.id)) is None
+
+        job.refresh_from_db()
+        assay.refresh_from_db()
+        assert job.status == ExportJob.Status.FAILED
+        ref = job.id.hex[:8]
+        assert ref in job.error
+        assert ref in assay.processing_log
+
+    def test_cached_artifact_completes_job_without_queueing(self, user, assay, storage):
+        with patch.object(config, "export_cache_enabled", True):
+            first = self._queue(assay, user)
+            with patch("toxtempass.export.subprocess.run", side_effect=_pandoc_stub):
+                run_export_job(str(first.id))
+            with patch("toxtempass.export_jobs.async_task") as queued:
+                second = enqueue_export_job(assay, "pdf", user)
+
+        queued.assert_not_called()
+        first.refresh_from_db()
+        assert second.status == ExportJob.Status.DONE
+        assert second.cache_hit is True
+        assert second.artifact_key == first.artifact_key
+
+    def test_in_flight_job_is_reused(self, user, assay, storage):
+        first = self._queue(assay, user)
+        with patch("toxtempass.export_jobs.async_task") as queued:
+            again = enqueue_export_job(assay, "pdf", PersonFactory.create())
+        queued.assert_not_called()
+        assert again.pk == first.pk
+        # Another format, or a finished job, gets a render of its own.
+        assert self._queue(assay, user, "docx").pk != first.pk
+        ExportJob.objects.filter(pk=first.pk).update(status=ExportJob.Status.FAILED)
+        assert self._queue(assay, user).pk != first.pk
+
+    def test_queueing_failure_marks_job_failed(self, user, assay, storage):
+        with patch("toxtempass.export_jobs.async_task", side_effect=OSError("broker")):
+            job = enqueue_export_job(assay, "pdf", user)
+        assert job.status == ExportJob.Status.FAILED
+        assert job.id.hex[:8] in job.error
+        assert job.finished_at is not None
+
+    def test_status_forbidden_for_other_users(self, client, user, assay, storage):
+        job = self._queue(assay, user)
+        client.force_login(PersonFactory.create())
+        assert client.get(reverse("export_job_status", args=[job.id])).status_code == 403
+
+    def test_download_before_done_conflicts(self, client, user, assay, storage):
+        job = self._queue(assay, user)
+        client.force_login(user)
+        resp = client.get(reverse("export_job_download", args=[job.id]))
+        assert resp.status_code == 409
+
+
+@pytest.mark.django_db
+def test_render_timings_per_type(assay, user):
+    for export_type, seconds in (("pdf", 2.0), ("pdf", 4.0), ("docx", 1.0)):
+        ExportJob.objects.create(
+            assay=assay,
+            requested_by=user,
+            export_type=export_type,
+            status=ExportJob.Status.DONE,
+            render_seconds=seconds,
+        )
+    ExportJob.objects.create(
+        assay=assay, export_type="pdf", status=ExportJob.Status.DONE, cache_hit=True
+    )
+
+    timings = ExportJob.render_timings()
+    assert timings["pdf"] == {"count": 2, "avg_seconds": 3.0, "max_seconds": 4.0}
+    assert timings["docx"]["count"] == 1
+
+
+@pytest.mark.django_db
+def test_sweep_fails_stale_jobs_and_prunes_old_ones(assay, user, storage):
+    now = timezone.now()
+
+    def job(status, age, **kwargs):
+        job = ExportJob.objects.create(
+            assay=assay, requested_by=user, export_type="pdf", status=status, **kwargs
+        )
+        ExportJob.objects.filter(pk=job.pk).update(created_at=now - age)
+        return job
+
+    queued_long = job(
+        ExportJob.Status.QUEUED,
+        timedelta(seconds=config.export_job_queue_stale_seconds + 1),
+    )
+    running_long = job(
+        ExportJob.Status.RUNNING,
+        timedelta(minutes=1),
+        started_at=now - timedelta(seconds=config.export_job_stale_seconds + 1),
+    )
+    fresh = job(ExportJob.Status.QUEUED, timedelta(minutes=1))
+    retention = timedelta(days=config.export_job_retention_days, seconds=1)
+    job_key = storage.save(f"{config.export_job_prefix}/old.pdf", ContentFile(b"x"))
+    cache_key = storage.save(f"{config.export_cache_prefix}/old.pdf", ContentFile(b"x"))
+    job(ExportJob.Status.DONE, retention, artifact_key=job_key)
+    job(ExportJob.Status.DONE, retention, artifact_key=cache_key)
+
+    assert sweep_export_jobs() == {"failed": 2, "deleted": 2}
+    for stale in (queued_long, running_long):
+        stale.refresh_from_db()
+        assert stale.status == ExportJob.Status.FAILED and stale.error
+    fresh.refresh_from_db()
+    assert fresh.status == ExportJob.Status.QUEUED
+    assert ExportJob.objects.count() == 3
+    # Per-job artifacts go with their job; shared cache artifacts stay.
+    assert not storage.exists(job_key)
+    assert storage.exists(cache_key)
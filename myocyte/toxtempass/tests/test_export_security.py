@@ -85,8 +85,8 @@ class ExportFilenameTests(TestCase):
 
                 with (
                     patch(
-                        "toxtempass.export.generate_markdown_from_assay",
-                        return_value="# test",
+                        "toxtempass.export.iter_markdown_from_assay",
+                        return_value=["# test"],
                     ),
                     patch(
                         "toxtempass.export.get_create_meta_data_yaml",
@@ -139,8 +139,8 @@ class ExportPandocCommandTests(TestCase):
 
                 with (
                     patch(
-                        "toxtempass.export.generate_markdown_from_assay",
-                        return_value="# test",
+                        "toxtempass.export.iter_markdown_from_assay",
+                        return_value=["# test"],
                     ),
                     patch(
                         "toxtempass.export.get_create_meta_data_yaml",
@@ -0,0 +1,121 @@
+"""Tests for the prefetch-based export tree builder."""
+
+import json
+
+import pytest
+from django.core.serializers import serialize
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from toxtempass.export import (
+    ExportSource,
+    build_export_tree,
+    generate_json_from_assay,
+    generate_markdown_from_assay,
+    iter_markdown_from_assay,
+)
+from toxtempass.models import Section
+from toxtempass.tests.fixtures.factories import (
+    AnswerFactory,
+    AssayFactory,
+    QuestionFactory,
+    QuestionSetFactory,
+    SectionFactory,
+    SubsectionFactory,
+)
+
+
+def _make_assay(n_sections: int, n_subsections: int, n_questions: int):
+    question_set = QuestionSetFactory.create()
+    assay = AssayFactory.create(question_set=question_set)
+    for _ in range(n_sections):
+        section = SectionFactory.create(question_set=question_set)
+        for _ in range(n_subsections):
+            subsection = SubsectionFactory.create(section=section)
+            for _ in range(n_questions):
+                question = QuestionFactory.create(subsection=subsection)
+                question.subsections_for_context.add(subsection)
+                AnswerFactory.create(assay=assay, question=question)
+    return assay
+
+
+def _legacy_tree(assay) -> dict:
+    """Per-object serialization as generate_json_from_assay used to do it."""
+    as_json = lambda objs: json.loads(serialize("json", objs))  # noqa: E731
+    answers = assay.answers.order_by("pk")
+    sections = []
+    for section in Section.objects.filter(question_set=assay.question_set).order_by("pk"):
+        subsections = []
+        for subsection in section.subsections.order_by("pk"):
+            qa = []
+            for question in subsection.questions.order_by("pk"):
+                answer_text = ""
+                for answer in assay.answers.filter(question=question):
+                    answer_text = answer.answer_text
+                qa.append({"question": as_json([question])[0], "answer": answer_text})
+            subsections.append(
+                {"subsection": as_json([subsection])[0], "questions_with_answers": qa}
+            )
+        sections.append({"section": as_json([section])[0], "subsections": subsections})
+    return {
+        "answers": as_json(answers),
+        "questions_with_answers": [
+            {
+                "question": as_json([a.question])[0],
+                "answer": a.answer_text,
+                "source": a.answer_documents,
+            }
+            for a in answers
+        ],
+        "sections": sections,
+    }
+
+
+@pytest.mark.django_db
+class TestBuildExportTree:
+    def test_matches_per_object_serialization(self):
+        assay = _make_assay(2, 2, 2)
+        assert build_export_tree(assay) == _legacy_tree(assay)
+
+    def test_excludes_other_question_sets(self):
+        assay = _make_assay(1, 1, 1)
+        SectionFactory.create()  # belongs to an unrelated question set
+        tree = build_export_tree(assay)
+        assert len(tree["sections"]) == 1
+
+    def test_unanswered_questions_export_empty_answer(self):
+        assay = _make_assay(1, 1, 1)
+        subsection = assay.question_set.sections.get().subsections.get()
+        QuestionFactory.create(subsection=subsection)
+        qa = build_export_tree(assay)["sections"][0]["subsections"][0]["questions_with_answers"]
+        assert [item["answer"] == "" for item in qa] == [False, True]
+
+    def test_query_count_is_independent_of_tree_size(self):
+        small = _make_assay(1, 1, 1)
+        large = _make_assay(3, 3, 4)
+
+        with CaptureQueriesContext(connection) as small_ctx:
+            generate_json_from_assay(small)
+        with CaptureQueriesContext(connection) as large_ctx:
+            generate_json_from_assay(large)
+
+        assert len(large_ctx) == len(small_ctx)
+        assert len(large_ctx) <= 15
+
+
+@pytest.mark.django_db
+def test_markdown_streams_without_json_tree(monkeypatch):
+    assay = _make_assay(n_sections=2, n_subsections=2, n_questions=2)
+    monkeypatch.setattr(
+        "toxtempass.export.generate_json_from_assay",
+        lambda *a, **k: pytest.fail("markdown export built the JSON tree"),
+    )
+    source = ExportSource(assay).prefetch()
+
+    with CaptureQueriesContext(connection) as ctx:
+        chunks = list(iter_markdown_from_assay(assay, source))
+
+    assert len(ctx.captured_queries) == 0
+    # header, then per section: title, one chunk per subsection, spacer
+    assert len(chunks) == 1 + 2 * (1 + 2 + 1)
+    assert "".join(chunks) == generate_markdown_from_assay(assay, source)
@@ -0,0 +1,144 @@
+"""Tests for content-addressed FileAsset storage and its clean-up."""
+
+import hashlib
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import InMemoryStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+
+from toxtempass.filehandling import content_object_key, store_files_to_storage
+from toxtempass.models import FileAsset
+from toxtempass.tests.fixtures.factories import (
+    AssayFactory,
+    FileAssetFactory,
+    PersonFactory,
+)
+
+
+@pytest.fixture
+def storage():
+    storage = InMemoryStorage()
+    with (
+        patch("toxtempass.filehandling.default_storage", storage),
+        patch("toxtempass.signals.default_storage", storage),
+        patch(
+            "toxtempass.management.commands.collapse_file_assets.default_storage",
+            storage,
+        ),
+    ):
+        yield storage
+
+
+def _store(name: str, content: bytes, user=None):
+    return store_files_to_storage(
+        [SimpleUploadedFile(name, content)],
+        user or PersonFactory.create(),
+        AssayFactory.create(),
+        consent=True,
+    )[0]
+
+
+@pytest.mark.django_db
+class TestContentAddressedStorage:
+    def test_same_content_is_stored_once(self, storage):
+        first = _store("protocol.pdf", b"%PDF protocol")
+        with patch.object(storage, "save", wraps=storage.save) as save:
+            second = _store("copy of protocol.pdf", b"%PDF protocol")
+            other = _store("other.pdf", b"%PDF other")
+
+        key = content_object_key(hashlib.sha256(b"%PDF protocol").hexdigest())
+        assert first.object_key == second.object_key == key
+        assert second.original_filename == "copy of protocol.pdf"
+        assert other.object_key != key
+        assert save.call_count == 1
+        assert storage.open(key).read() == b"%PDF protocol"
+
+    def test_duplicates_within_one_call_upload_once(self, storage):
+        with patch.object(storage, "save", wraps=storage.save) as save:
+            assets = store_files_to_storage(
+                [SimpleUploadedFile("a.pdf", b"same"), SimpleUploadedFile("b.pdf", b"same")],
+                PersonFactory.create(),
+                AssayFactory.create(),
+                consent=True,
+            )
+
+        assert [a.original_filename for a in assets] == ["a.pdf", "b.pdf"]
+        assert save.call_count == 1
+
+    def test_object_deleted_with_last_reference(
+        self, storage, django_capture_on_commit_callbacks
+    ):
+        first = _store("a.pdf", b"shared")
+        second = _store("b.pdf", b"shared")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            first.delete()
+        assert storage.exists(second.object_key)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            second.delete()
+        assert not storage.exists(second.object_key)
+
+    def test_rolled_back_delete_keeps_the_object(
+        self, storage, django_capture_on_commit_callbacks
+    ):
+        asset = _store("a.pdf", b"kept")
+
+        with django_capture_on_commit_callbacks() as callbacks:
+            asset.delete()
+        # The delete never commits, so its callback is not run.
+        assert len(callbacks) == 1
+        assert storage.exists(asset.object_key)
+
+    def test_missing_shared_object_is_uploaded_again(self, storage):
+        first = _store("a.pdf", b"shared")
+        storage.delete(first.object_key)  # deleted by a concurrent clean-up
+
+        second = _store("b.pdf", b"shared")
+
+        assert second.object_key == first.object_key
+        assert storage.open(second.object_key).read() == b"shared"
+
+
+@pytest.mark.django_db
+def test_collapse_command_merges_legacy_duplicates(storage):
+    content = b"legacy document"
+    sha256_hash = hashlib.sha256(content).hexdigest()
+    legacy = [
+        FileAssetFactory.create(sha256=sha256_hash, size_bytes=len(content))
+        for _ in range(3)
+    ]
+    for asset in legacy:
+        storage.save(asset.object_key, ContentFile(content))
+    unhashed = FileAssetFactory.create(sha256="")
+
+    call_command("collapse_file_assets", stdout=StringIO(), stderr=StringIO())
+
+    target = content_object_key(sha256_hash)
+    assert set(
+        FileAsset.objects.filter(pk__in=[a.pk for a in legacy]).values_list(
+            "object_key", flat=True
+        )
+    ) == {target}
+    assert storage.open(target).read() == content
+    assert not any(storage.exists(asset.object_key) for asset in legacy)
+    unhashed.refresh_from_db()
+    assert unhashed.object_key != target
+
+
+@pytest.mark.django_db
+def test_collapse_command_skips_mismatched_content(storage):
+    asset = FileAssetFactory.create(sha256="0" * 64)
+    storage.save(asset.object_key, ContentFile(b"not matching"))
+    err = StringIO()
+
+    call_command("collapse_file_assets", stdout=StringIO(), stderr=err)
+
+    asset.refresh_from_db()
+    assert asset.object_key != content_object_key("0" * 64)
+    assert storage.exists(asset.object_key)
+    assert "does not match" in err.getvalue()
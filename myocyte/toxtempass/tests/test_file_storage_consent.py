@@ -1,5 +1,6 @@
 """Tests for file storage with user consent."""
 
+import hashlib
 import io
 from pathlib import Path
 from unittest.mock import MagicMock, patch
@@ -7,11 +8,15 @@ from unittest.mock import MagicMock, patch
 import pytest
 from django.core.files.uploadedfile import InMemoryUploadedFile
 
-from toxtempass.filehandling import store_files_to_storage
+from toxtempass.filehandling import content_object_key, store_files_to_storage
 from toxtempass.models import FileAsset
 from toxtempass.tests.fixtures.factories import AssayFactory, PersonFactory
 
 
+def _saved_as_given(key, content):
+    """Storage ``save`` that keeps the content-addressed key it was given."""
+    return key
+
 @pytest.mark.django_db
 class TestStoreFilesToStorage:
     """Test suite for store_files_to_storage function."""
@@ -64,7 +69,7 @@ class TestStoreFilesToStorage:
         file.chunks.return_value = [file_content]
         file.content_type = "application/pdf"
         
-        mock_save.return_value = "consent_user_documents/user@test.com/1/uuid/document.pdf"
+        mock_save.side_effect = _saved_as_given
         
         result = store_files_to_storage(
             files=[file],
@@ -96,10 +101,7 @@ class TestStoreFilesToStorage:
             file.content_type = "application/pdf"
             files.append(file)
         
-        mock_save.side_effect = [
-            f"consent_user_documents/user@test.com/1/uuid{i}/document{i}.pdf"
-            for i in range(3)
-        ]
+        mock_save.side_effect = _saved_as_given
         
         result = store_files_to_storage(
             files=files,
@@ -127,7 +129,7 @@ class TestStoreFilesToStorage:
         file.chunks.return_value = [file_content]
         file.content_type = "text/plain"
         
-        mock_save.return_value = "consent_user_documents/user@test.com/1/uuid/test.txt"
+        mock_save.side_effect = _saved_as_given
         
         result = store_files_to_storage(
             files=[file],
@@ -152,9 +154,10 @@ class TestStoreFilesToStorage:
         file.chunks.return_value = [b"content"]
         file.content_type = "application/pdf"
         
+        expected_key = content_object_key(hashlib.sha256(b"content").hexdigest())
+
         def capture_key(key, file_obj):
-            assert key.startswith("consent_user_documents/test@example.com/assay/123/")
-            assert key.endswith("/myfile.pdf")
+            assert key == expected_key
             return key
         
         mock_save.side_effect = capture_key
@@ -167,8 +170,8 @@ class TestStoreFilesToStorage:
         )
         
         assert len(result) == 1
-        assert "consent_user_documents/test@example.com/assay/123/" in result[0].object_key
-        assert result[0].object_key.endswith("/myfile.pdf")
+        assert result[0].object_key == expected_key
+        assert result[0].original_filename == "myfile.pdf"
 
     @patch("toxtempass.filehandling.default_storage.save")
     def test_storage_failure_raises_exception(self, mock_save):
@@ -202,7 +205,7 @@ class TestStoreFilesToStorage:
         file.chunks.return_value = [b"pdf content"]
         file.content_type = ""  # Empty content type
         
-        mock_save.return_value = "consent_user_documents/user@test.com/1/uuid/document.pdf"
+        mock_save.side_effect = _saved_as_given
         
         result = store_files_to_storage(
             files=[file],
@@ -226,7 +229,7 @@ class TestStoreFilesToStorage:
         file.chunks.return_value = [b"content"]
         file.content_type = "application/pdf"
         
-        mock_save.return_value = "consent_user_documents/user@test.com/1/uuid/test.pdf"
+        mock_save.side_effect = _saved_as_given
         
         result = store_files_to_storage(
             files=[file],
@@ -51,7 +51,7 @@ class FileUploadTests(TestCase):
         with patch(
             "toxtempass.forms.get_text_or_imagebytes_from_django_uploaded_file",
             return_value=(dummy_doc, []),
-        ) as mock_get_text, patch("toxtempass.forms.async_task") as mock_async:
+        ) as mock_get_text, patch("toxtempass.forms.submit_llm_run") as mock_async:
             form = AssayAnswerForm(
                 data={f"earmarked_{question.id}": True},
                 files=files,
@@ -150,7 +150,7 @@ class FileUploadTests(TestCase):
         with patch(
             "toxtempass.forms.get_text_or_imagebytes_from_django_uploaded_file",
             return_value=(dummy_doc, ["bad.pdf"]),
-        ), patch("toxtempass.forms.async_task"):
+        ), patch("toxtempass.forms.submit_llm_run"):
             form = AssayAnswerForm(
                 data={f"earmarked_{question.id}": True},
                 files=files,
@@ -190,7 +190,7 @@ class FileUploadTests(TestCase):
         with patch(
             "toxtempass.forms.get_text_or_imagebytes_from_django_uploaded_file",
             return_value=({}, ["broken.pdf"]),
-        ), patch("toxtempass.forms.async_task") as mock_async:
+        ), patch("toxtempass.forms.submit_llm_run") as mock_async:
             form = AssayAnswerForm(
                 data={f"earmarked_{question.id}": True},
                 files=files,
@@ -0,0 +1,118 @@
+"""Tests for the concurrent deployment health check."""
+
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from toxtempass.azure_registry import EndpointEntry, ModelEntry
+from toxtempass.health_check import percentile, run_health_check, save_health_check
+from toxtempass.models import LLMConfig, LLMHealthCheck
+
+REGISTRY = [
+    EndpointEntry(
+        index=1,
+        endpoint="https://example.invalid",
+        api_key="key",
+        models=[
+            ModelEntry(tag="FAST", deployment_name="fast", model_id="gpt-4o"),
+            ModelEntry(tag="SLOW", deployment_name="slow", model_id="gpt-4o-mini"),
+        ],
+    )
+]
+
+
+class _FakeLLM:
+    def __init__(self, delay: float = 0.0, release: threading.Event | None = None):
+        self.delay = delay
+        self.release = release
+        self.calls = 0
+
+    def stream(self, prompt):
+        self.calls += 1
+        if self.release is not None:
+            self.release.wait(5)
+        time.sleep(self.delay)
+        yield SimpleNamespace(content="Par")
+        yield SimpleNamespace(content="is")
+
+
+@pytest.fixture
+def deployments():
+    llms = {"FAST": _FakeLLM(), "SLOW": _FakeLLM()}
+    with (
+        patch("toxtempass.health_check.get_registry", return_value=REGISTRY),
+        patch(
+            "toxtempass.llm.get_llm_for_endpoint",
+            side_effect=lambda idx, tag, temperature=0: llms[tag],
+        ),
+    ):
+        yield llms
+
+
+def test_percentile_nearest_rank():
+    assert percentile([], 50) is None
+    assert percentile([30, 10, 20], 50) == 20
+    assert percentile(list(range(1, 101)), 95) == 95
+
+
+def test_samples_and_reports_latency(deployments):
+    results = run_health_check(samples=3)
+
+    fast = results["1:FAST"]
+    assert fast["ok"] and fast["response"] == "Paris"
+    assert fast["samples"] == 3 and deployments["FAST"].calls == 3
+    assert fast["latency_ms"] == fast["p50_ms"] <= fast["p95_ms"]
+    assert fast["ttft_ms"] is not None
+
+
+def test_only_filter_is_applied_before_calls(deployments):
+    results = run_health_check(only=["fast"], samples=1)
+
+    assert list(results) == ["1:FAST"]
+    assert deployments["SLOW"].calls == 0
+
+
+def test_deployments_are_probed_concurrently(deployments):
+    deployments["FAST"].delay = deployments["SLOW"].delay = 0.3
+
+    started = time.perf_counter()
+    results = run_health_check(samples=1, workers=2)
+
+    assert all(r["ok"] for r in results.values())
+    assert time.perf_counter() - started < 0.55
+
+
+def test_hanging_deployment_times_out(deployments):
+    release = threading.Event()
+    deployments["SLOW"].release = release
+    try:
+        results = run_health_check(samples=1, timeout=0.2)
+    finally:
+        release.set()
+
+    assert results["1:FAST"]["ok"]
+    assert not results["1:SLOW"]["ok"]
+    assert results["1:SLOW"]["error"].startswith("TimeoutError")
+
+
+@pytest.mark.django_db
+def test_save_keeps_a_rolling_history(deployments, monkeypatch):
+    monkeypatch.setattr("toxtempass.config.health_check_history_size", 2)
+    for _ in range(3):
+        save_health_check(run_health_check(samples=1))
+    save_health_check(run_health_check(only=["FAST"], samples=1))
+
+    assert LLMHealthCheck.objects.filter(deployment="1:FAST").count() == 2
+    assert LLMHealthCheck.objects.filter(deployment="1:SLOW").count() == 2
+    assert set(LLMConfig.objects.get(pk=1).last_health_check) == {"1:FAST", "1:SLOW"}
+
+
+@pytest.mark.django_db
+def test_save_keeps_the_config_version(deployments):
+    LLMConfig.load()
+    version = LLMConfig.current_version()
+    save_health_check(run_health_check(samples=1))
+    assert LLMConfig.current_version() == version
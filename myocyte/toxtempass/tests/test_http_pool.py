@@ -0,0 +1,138 @@
+"""Tests for the shared per-host HTTP pools of the chat clients."""
+
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from toxtempass import http_pool
+from toxtempass.azure_registry import (
+    EndpointEntry,
+    ModelEntry,
+    get_registry,
+    reload_registry,
+)
+from toxtempass.http_pool import endpoint_host, get_http_clients, pool_stats
+from toxtempass.llm import get_llm_for_endpoint
+
+REGISTRY = [
+    EndpointEntry(
+        index=1,
+        endpoint="https://example.invalid/openai/v1",
+        api_key="key",
+        models=[
+            ModelEntry(tag="A", deployment_name="a", model_id="gpt-4o"),
+            ModelEntry(tag="B", deployment_name="b", model_id="gpt-4o-mini"),
+        ],
+    )
+]
+
+
+@pytest.fixture(autouse=True)
+def fresh_pools():
+    http_pool.reset_pools()
+    get_llm_for_endpoint.cache_clear()
+    yield
+    http_pool.reset_pools()
+    get_llm_for_endpoint.cache_clear()
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        return
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+
+@pytest.fixture
+def server_url():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    host, port = httpd.server_address[:2]
+    yield f"http://{host}:{port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_clients_are_shared_per_host():
+    sync_a, async_a = get_http_clients("https://Example.invalid/openai/v1")
+    sync_b, async_b = get_http_clients("https://example.invalid/anthropic")
+    sync_c, _ = get_http_clients("https://other.invalid/v1")
+
+    assert sync_a is sync_b and async_a is async_b
+    assert sync_c is not sync_a
+    assert endpoint_host("https://Example.invalid:8443/x") == (
+        "https://example.invalid:8443"
+    )
+
+
+def test_stats_count_connection_reuse(server_url):
+    client, _ = get_http_clients(server_url)
+
+    for _ in range(3):
+        assert client.get(f"{server_url}/ping").text == "ok"
+
+    stats = pool_stats()[endpoint_host(server_url)]
+    assert stats["requests"] == 3
+    assert stats["connections_opened"] == 1
+    assert stats["tls_handshakes"] == 0
+    assert stats["reused"] == 2
+    assert stats["reuse_ratio"] == pytest.approx(0.667)
+
+
+def test_endpoint_models_share_one_pool():
+    original = get_registry()
+    reload_registry(REGISTRY)
+    try:
+        first = get_llm_for_endpoint(1, "A")
+        second = get_llm_for_endpoint(1, "B")
+    finally:
+        reload_registry(original)
+
+    assert first is not second
+    assert first.http_client is second.http_client
+    assert first.http_async_client is second.http_async_client
+    assert list(pool_stats()) == ["https://example.invalid"]
+
+
+def test_async_client_survives_separate_event_loops(server_url):
+    _, client = get_http_clients(server_url)
+
+    async def ping():
+        responses = [await client.get(f"{server_url}/ping") for _ in range(2)]
+        return [r.text for r in responses]
+
+    # The evaluation scripts run one asyncio.run() per batch on cached clients.
+    assert asyncio.run(ping()) == ["ok", "ok"]
+    assert asyncio.run(ping()) == ["ok", "ok"]
+
+    stats = pool_stats()[endpoint_host(server_url)]
+    assert stats["requests"] == 4
+    # One connection per loop, reused within it.
+    assert stats["connections_opened"] == 2
+
+
+def test_reset_closes_async_pools_of_live_loops(server_url):
+    _, client = get_http_clients(server_url)
+    transport = http_pool._pools[endpoint_host(server_url)].async_transport
+    loop = asyncio.new_event_loop()
+    try:
+        response = loop.run_until_complete(client.get(f"{server_url}/ping"))
+        assert response.text == "ok"
+        (loop_pool,) = transport._transports.values()
+        assert loop_pool._pool.connections
+
+        http_pool.reset_pools()
+
+        assert not transport._transports
+        assert not loop_pool._pool.connections
+    finally:
+        loop.close()
@@ -0,0 +1,129 @@
+"""Tests for the LLM throughput benchmark, run against the local fake server."""
+
+import json
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+from django.core.management import call_command
+
+from toxtempass.azure_registry import EndpointEntry, ModelEntry
+from toxtempass.llm_benchmark import (
+    FakeOpenAIServer,
+    LevelResult,
+    benchmark_messages,
+    ramp,
+    rate_limit_onset,
+    recommend_concurrency,
+)
+
+langchain_openai = pytest.importorskip("langchain_openai")
+
+
+def _level(concurrency, tps, rate_limited=0):
+    return LevelResult(
+        concurrency=concurrency,
+        requests=concurrency,
+        ok=concurrency - rate_limited,
+        rate_limited=rate_limited,
+        errors=0,
+        wall_seconds=1.0,
+        ttft_p50_ms=100,
+        ttft_p95_ms=120,
+        stream_tokens_per_second=50.0,
+        aggregate_tokens_per_second=tps,
+    )
+
+
+def test_recommendation_is_the_throughput_knee():
+    levels = [
+        _level(1, 50),
+        _level(2, 100),
+        _level(4, 190),
+        _level(8, 200),
+        _level(16, 90, rate_limited=3),
+    ]
+    assert rate_limit_onset(levels) == 16
+    assert recommend_concurrency(levels) == 4
+    assert recommend_concurrency([_level(1, 10, rate_limited=1)]) == 1
+
+
+def test_ramp_stops_at_the_429_onset():
+    with FakeOpenAIServer(
+        ttft_ms=20, tokens_per_second=500, output_tokens=10, max_concurrency=2
+    ) as server:
+        llm = langchain_openai.ChatOpenAI(
+            base_url=server.base_url,
+            api_key="fake",
+            model="fake",
+            max_retries=0,
+            stream_usage=True,
+        )
+        levels = ramp(llm, benchmark_messages(2_000), levels=(1, 2, 4, 8), rounds=1)
+
+    assert [lvl.concurrency for lvl in levels] == [1, 2, 4]
+    assert levels[0].ok == 1 and levels[0].ttft_p50_ms >= 20
+    assert levels[1].rate_limited == 0
+    assert levels[2].rate_limited > 0
+    assert server.rejected == levels[2].rate_limited
+    assert rate_limit_onset(levels) == 4
+
+
+def test_command_writes_report_offline(tmp_path):
+    output = tmp_path / "report.json"
+    with patch(
+        "toxtempass.management.commands.benchmark_llm_throughput.select_deployments",
+        return_value=[],
+    ):
+        call_command(
+            "benchmark_llm_throughput",
+            "--fake-server",
+            "--levels=1,2",
+            "--rounds=1",
+            "--context-chars=1000",
+            "--fake-ttft-ms=5",
+            "--fake-tokens-per-second=1000",
+            "--fake-output-tokens=5",
+            f"--output={output}",
+            stdout=StringIO(),
+        )
+
+    report = json.loads(output.read_text())
+    (deployment,) = report["deployments"]
+    assert deployment["deployment"] == "0:FAKE"
+    assert [lvl["concurrency"] for lvl in deployment["levels"]] == [1, 2]
+    assert deployment["levels"][0]["aggregate_tokens_per_second"] > 0
+    assert deployment["rate_limit_onset"] is None
+
+
+def test_real_deployments_are_benchmarked_without_sdk_retries(tmp_path):
+    output = tmp_path / "report.json"
+    with FakeOpenAIServer(
+        ttft_ms=50, tokens_per_second=1000, output_tokens=5, max_concurrency=1
+    ) as server:
+        model = ModelEntry(tag="FAKE", deployment_name="fake", model_id="fake")
+        endpoint = EndpointEntry(
+            index=1, endpoint=server.base_url, api_key="fake", models=[model]
+        )
+        with (
+            patch(
+                "toxtempass.management.commands.benchmark_llm_throughput"
+                ".select_deployments",
+                return_value=[(endpoint, model)],
+            ),
+            patch("toxtempass.azure_registry.get_model", return_value=(endpoint, model)),
+        ):
+            call_command(
+                "benchmark_llm_throughput",
+                "--levels=1,2",
+                "--rounds=1",
+                "--context-chars=1000",
+                f"--output={output}",
+                stdout=StringIO(),
+            )
+
+    (deployment,) = json.loads(output.read_text())["deployments"]
+    # Retried 429s would have succeeded and hidden the onset.
+    assert deployment["deployment"] == "1:FAKE"
+    assert deployment["levels"][1]["rate_limited"] == server.rejected > 0
+    assert deployment["rate_limit_onset"] == 2
@@ -0,0 +1,59 @@
+"""Tests for the version-keyed process-local cache on LLMConfig."""
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from toxtempass.models import LLMConfig
+
+
+@pytest.mark.django_db
+class TestLLMConfigCache:
+    def test_load_does_not_requery_llmconfig(self):
+        LLMConfig.load()
+        with CaptureQueriesContext(connection) as ctx:
+            LLMConfig.load()
+        assert not any("toxtempass_llmconfig" in q["sql"] for q in ctx.captured_queries)
+
+    def test_save_invalidates_snapshot(self, django_capture_on_commit_callbacks):
+        cfg = LLMConfig.load()
+        cfg.default_model = "1:GPT4O"
+        with django_capture_on_commit_callbacks(execute=True):
+            cfg.save()
+        assert LLMConfig.load().default_model == "1:GPT4O"
+
+    def test_load_returns_independent_copy(self):
+        cfg = LLMConfig.load()
+        cfg.allowed_models.append("1:UNSAVED")
+        assert "1:UNSAVED" not in LLMConfig.load().allowed_models
+
+    def test_cached_builds_once_per_version(self, django_capture_on_commit_callbacks):
+        calls = []
+
+        def builder(cfg):
+            calls.append(cfg.default_model)
+            return cfg.default_model
+
+        assert LLMConfig.cached("test-key", builder) == ""
+        assert LLMConfig.cached("test-key", builder) == ""
+        assert len(calls) == 1
+
+        cfg = LLMConfig.load()
+        cfg.default_model = "2:CLAUDE"
+        with django_capture_on_commit_callbacks(execute=True):
+            cfg.save()
+        assert LLMConfig.cached("test-key", builder) == "2:CLAUDE"
+        assert len(calls) == 2
+
+    def test_uncommitted_save_keeps_the_version(self, django_capture_on_commit_callbacks):
+        cfg = LLMConfig.load()
+        before = LLMConfig.current_version()
+        with django_capture_on_commit_callbacks() as callbacks:
+            cfg.save()
+        assert LLMConfig.current_version() == before
+        assert callbacks == [LLMConfig.bump_version]
+
+    def test_bump_version_changes_version(self):
+        before = LLMConfig.current_version()
+        LLMConfig.bump_version()
+        assert LLMConfig.current_version() != before
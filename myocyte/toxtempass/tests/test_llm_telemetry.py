@@ -0,0 +1,157 @@
+"""Tests for per-call LLM telemetry (LLMCallRecord and the dashboard stats)."""
+
+import threading
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from django.utils import timezone
+from openai import RateLimitError
+
+from toxtempass.llm_telemetry import call_stats
+from toxtempass.models import (
+    Answer,
+    LLMCallRecord,
+    Question,
+    QuestionSet,
+    Section,
+    Subsection,
+)
+from toxtempass.tests.fixtures.factories import AssayFactory
+from toxtempass.views import process_llm_async
+
+
+class FakeLLM:
+    """Fake LLM with usage metadata; the first *rate_limited* calls raise 429."""
+
+    model_name = "gpt-4o-2024-08-06"
+
+    def __init__(self, rate_limited: int = 0):
+        self._lock = threading.Lock()
+        self._rate_limited = rate_limited
+
+    def invoke(self, messages):
+        with self._lock:
+            limited = self._rate_limited > 0
+            self._rate_limited -= 1
+        if limited:
+            err = RateLimitError("rate limited")
+
+            class Resp:
+                def json(self_non):
+                    return {"error": {"message": "Please try again in 0.5s"}}
+
+            err.response = Resp()
+            raise err
+        return SimpleNamespace(
+            content="Answer",
+            usage_metadata={
+                "input_tokens": 1000,
+                "output_tokens": 40,
+                "input_token_details": {"cache_read": 800},
+            },
+        )
+
+
+@pytest.fixture
+def assay_with_questions():
+    assay = AssayFactory()
+    qs = QuestionSet.objects.create(
+        display_name="telemetry-qs", created_by=assay.study.investigation.owner
+    )
+    section = Section.objects.create(question_set=qs, title="Sec")
+    subsection = Subsection.objects.create(section=section, title="Subsec")
+    for i in range(3):
+        question = Question.objects.create(
+            subsection=subsection, question_text=f"Telemetry Q{i}?"
+        )
+        Answer.objects.create(assay=assay, question=question)
+    return assay
+
+
+@pytest.mark.django_db
+def test_one_record_per_call_written_at_end_of_run(assay_with_questions):
+    assay = assay_with_questions
+
+    process_llm_async(
+        assay.id,
+        doc_dict={},
+        extract_images=False,
+        chatopenai=FakeLLM(),
+        llm_model="1:GPT4O",
+    )
+
+    records = list(LLMCallRecord.objects.filter(assay=assay))
+    assert len(records) == 3
+    for record in records:
+        assert record.outcome == LLMCallRecord.Outcome.OK
+        assert record.model_key == "1:GPT4O"
+        assert record.model_id == "gpt-4o-2024-08-06"
+        assert record.attempts == 1
+        assert record.input_tokens == 1000
+        assert record.cache_read_tokens == 800
+        assert record.latency_ms >= 0 and record.queue_wait_ms >= 0
+
+
+@pytest.mark.django_db
+def test_rate_limit_sleep_and_attempts_are_recorded(assay_with_questions):
+    assay = assay_with_questions
+
+    with patch("toxtempass.views.time.sleep") as sleep:
+        process_llm_async(
+            assay.id,
+            doc_dict={},
+            extract_images=False,
+            chatopenai=FakeLLM(rate_limited=1),
+        )
+
+    records = list(LLMCallRecord.objects.filter(assay=assay))
+    assert all(r.outcome == LLMCallRecord.Outcome.OK for r in records)
+    retried = [r for r in records if r.attempts == 2]
+    assert len(retried) == 1
+    assert retried[0].rate_limit_sleep_ms > 0
+    assert sleep.called
+
+
+@pytest.mark.django_db
+def test_call_stats_percentiles_and_error_rate():
+    now = timezone.now()
+    ok = LLMCallRecord.Outcome.OK
+    rows = [
+        LLMCallRecord(model_key="1:A", started_at=now, latency_ms=ms, outcome=ok)
+        for ms in (100, 200, 300, 400)
+    ]
+    rows += [
+        LLMCallRecord(
+            model_key="1:A",
+            started_at=now,
+            latency_ms=5,
+            outcome=LLMCallRecord.Outcome.ERROR,
+        ),
+        LLMCallRecord(
+            model_key="1:A",
+            started_at=now - timedelta(days=1),
+            latency_ms=900,
+            outcome=ok,
+        ),
+        LLMCallRecord(model_key="1:B", started_at=now, latency_ms=50, outcome=ok),
+        LLMCallRecord(
+            model_key="1:B",
+            started_at=now - timedelta(days=30),
+            latency_ms=50,
+            outcome=ok,
+        ),
+    ]
+    LLMCallRecord.objects.bulk_create(rows)
+
+    stats = {s["model_key"]: s for s in call_stats(days=14)}
+
+    a = stats["1:A"]
+    assert a["calls"] == 6 and a["errors"] == 1
+    assert a["error_rate"] == round(1 / 6, 3)
+    # Failed calls do not count towards the latency percentiles.
+    assert a["p50_ms"] == 300 and a["p95_ms"] == 900
+    assert [d["calls"] for d in a["days"]] == [5, 1]
+    assert a["days"][0]["p50_ms"] == 200
+    assert stats["1:B"]["calls"] == 1
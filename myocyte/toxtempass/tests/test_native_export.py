@@ -0,0 +1,214 @@
+"""Tests for the in-process Markdown/HTML/DOCX export renderers.
+
+The fidelity tests render the same assay with Pandoc and natively and compare
+the document structure and text; they are skipped where Pandoc is not
+installed.
+"""
+
+import io
+import re
+import shutil
+from html.parser import HTMLParser
+from unittest.mock import patch
+
+import pytest
+
+from toxtempass import Config
+from toxtempass.export import (
+    ExportSource,
+    export_content_digest,
+    generate_markdown_from_assay,
+    render_export,
+)
+from toxtempass.tests.fixtures.factories import (
+    AnswerFactory,
+    AssayFactory,
+    QuestionFactory,
+    QuestionSetFactory,
+    SectionFactory,
+    SubsectionFactory,
+)
+
+docx = pytest.importorskip("docx")
+pytest.importorskip("markdown_it")
+
+ANSWERS = [
+    "The assay uses **HepG2** cells, see [the protocol](https://example.org/p).\n\n"
+    "- seeded at 10,000 cells/well\n- exposed for 24 h\n  - medium refreshed once",
+    'Readout is "ATP content" <b>measured</b> by luminescence.\n\n'
+    "| Plate | Wells |\n|---|---|\n| 96 | 60 |",
+    "",
+]
+
+
+@pytest.fixture
+def assay(db):
+    question_set = QuestionSetFactory.create()
+    assay = AssayFactory.create(title="native export", question_set=question_set)
+    section = SectionFactory.create(question_set=question_set, title="1. Test system")
+    for index, answer_text in enumerate(ANSWERS):
+        subsection = SubsectionFactory.create(section=section, title=f"1.{index + 1} Part")
+        question = QuestionFactory.create(
+            subsection=subsection, question_text=f"Question {index + 1}?"
+        )
+        AnswerFactory.create(assay=assay, question=question, answer_text=answer_text)
+    return assay
+
+
+@pytest.fixture
+def native():
+    with patch.object(Config, "native_export_enabled", True):
+        yield
+
+
+class _HtmlOutline(HTMLParser):
+    """Collect body heading texts and the whitespace-normalized body text."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.headings: list[str] = []
+        self.text: list[str] = []
+        self._heading: list[str] | None = None
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("header", "nav", "style", "title"):
+            self._skip += 1
+        elif re.fullmatch(r"h[1-6]", tag) and not self._skip:
+            self._heading = []
+
+    def handle_endtag(self, tag):
+        if tag in ("header", "nav", "style", "title"):
+            self._skip -= 1
+        elif re.fullmatch(r"h[1-6]", tag) and self._heading is not None:
+            self.headings.append(" ".join("".join(self._heading).split()))
+            self._heading = None
+
+    def handle_data(self, data):
+        if self._skip:
+            return
+        if self._heading is not None:
+            self._heading.append(data)
+        self.text.append(data)
+
+
+def _html_outline(content: bytes) -> tuple[list[str], str]:
+    parser = _HtmlOutline()
+    parser.feed(content.decode("utf-8"))
+    return parser.headings, " ".join("".join(parser.text).split())
+
+
+def _docx_outline(content: bytes) -> tuple[list[str], str]:
+    document = docx.Document(io.BytesIO(content))
+    headings = [
+        p.text for p in document.paragraphs if p.style.name.startswith("Heading ")
+    ]
+    body = [p.text for p in document.paragraphs]
+    for table in document.tables:
+        body.extend(cell.text for row in table.rows for cell in row.cells)
+    return headings, " ".join(" ".join(body).split())
+
+
+@pytest.mark.django_db
+class TestNativeRenderers:
+    def test_renders_without_pandoc(self, assay, native):
+        with patch("toxtempass.export.subprocess.run") as pandoc:
+            for export_type in Config.NATIVE_EXPORT_TYPES:
+                assert render_export(None, assay, export_type)
+        pandoc.assert_not_called()
+
+    def test_markdown_is_the_generated_markdown(self, assay, native):
+        source = ExportSource(assay)
+        content = render_export(None, assay, "md", source)
+        assert content.decode() == generate_markdown_from_assay(assay, source)
+
+    def test_html_structure_and_escaping(self, assay, native):
+        content = render_export(None, assay, "html").decode()
+        headings, text = _html_outline(content.encode())
+
+        assert "<title>ToxTemp for Test Method: native export</title>" in content
+        assert '<h1 id="test-system">1. Test system</h1>' in content
+        assert '<a href="#test-system" id="toc-test-system">' in content
+        assert "<strong>HepG2</strong>" in content
+        assert "&lt;b&gt;measured&lt;/b&gt;" in content
+        assert "<table>" in content
+        assert headings[:2] == ["Metadata", "ToxTempAssistant configuration"]
+        assert "Answer not found in documents." in text
+
+    def test_docx_structure(self, assay, native):
+        document = docx.Document(io.BytesIO(render_export(None, assay, "docx")))
+        styles = [(p.style.name, p.text) for p in document.paragraphs]
+
+        assert styles[0] == ("Title", "ToxTemp for Test Method: native export")
+        assert ("Heading 1", "1. Test system") in styles
+        assert ("List Bullet 2", "medium refreshed once") in styles
+        assert document.tables[0].rows[1].cells[1].text == "60"
+        assert document.core_properties.title.endswith("native export")
+
+    def test_tex_math_falls_back_to_pandoc(self, assay, native):
+        answer = assay.answers.first()
+        answer.answer_text = "Viability is $v = x^2$ of control."
+        answer.save()
+
+        def _pandoc(cmd, check=False):
+            out = cmd[cmd.index("-o") + 1]
+            with open(out, "wb") as fh:
+                fh.write(b"pandoc")
+
+        with patch("toxtempass.export.subprocess.run", side_effect=_pandoc) as pandoc:
+            assert render_export(None, assay, "html") == b"pandoc"
+            assert render_export(None, assay, "md") != b"pandoc"
+        assert pandoc.call_count == 1
+
+    def test_cache_digest_depends_on_renderer(self, assay):
+        content = ExportSource(assay).fingerprint()
+        docx_digest = export_content_digest(content, "docx")
+        pdf_digest = export_content_digest(content, "pdf")
+        with patch.object(Config, "native_export_enabled", True):
+            assert export_content_digest(content, "docx") != docx_digest
+            assert export_content_digest(content, "pdf") == pdf_digest
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(shutil.which("pandoc") is None, reason="Pandoc is not installed")
+class TestFidelityAgainstPandoc:
+    """Native output carries the same headings and text as Pandoc's."""
+
+    def _render_both(self, assay, export_type: str) -> tuple[bytes, bytes]:
+        source = ExportSource(assay)
+        pandoc = render_export(None, assay, export_type, source)
+        with patch.object(Config, "native_export_enabled", True):
+            native = render_export(None, assay, export_type, source)
+        return pandoc, native
+
+    def test_html(self, assay):
+        pandoc, native = self._render_both(assay, "html")
+        pandoc_headings, pandoc_text = _html_outline(pandoc)
+        native_headings, native_text = _html_outline(native)
+
+        assert native_headings == pandoc_headings
+        for answer in filter(None, ANSWERS):
+            for word in re.findall(r"[A-Za-z]{4,}", answer):
+                assert (word in native_text) == (word in pandoc_text)
+
+    def test_docx(self, assay):
+        pandoc, native = self._render_both(assay, "docx")
+        pandoc_headings, pandoc_text = _docx_outline(pandoc)
+        native_headings, native_text = _docx_outline(native)
+
+        assert native_headings == pandoc_headings
+        for answer in filter(None, ANSWERS):
+            for word in re.findall(r"[A-Za-z]{4,}", answer):
+                assert (word in native_text) == (word in pandoc_text)
+
+    def test_markdown(self, assay):
+        pandoc, native = self._render_both(assay, "md")
+
+        def _outline(content: bytes) -> list[str]:
+            return [
+                line.strip()
+                for line in content.decode().splitlines()
+                if line.startswith("#")
+            ]
+
+        assert _outline(native) == _outline(pandoc)
@@ -0,0 +1,115 @@
+"""Tests for the offline pipeline benchmark helpers."""
+
+import pytest
+
+from toxtempass.models import Answer, LLMCallRecord
+from toxtempass.perf_benchmark import (
+    BenchmarkOptions,
+    LatencyFakeChatModel,
+    build_synthetic_assay,
+    compare_to_baseline,
+    docx_extraction_unavailable,
+    run_cases,
+    write_docx,
+    write_pdf,
+    write_xlsx,
+)
+
+
+def _payload(median_ms: float, queries: int) -> dict:
+    return {"cases": {"case": {"median_ms": median_ms, "queries": queries}}}
+
+
+def test_compare_flags_slowdowns_beyond_tolerance_and_noise_floor():
+    baseline = _payload(100.0, 10)
+
+    assert compare_to_baseline(_payload(120.0, 10), baseline) == []
+    assert compare_to_baseline(_payload(130.0, 10), baseline) == [
+        "case: median 130.0 ms vs 100.0 ms baseline (+30.0 ms)"
+    ]
+    # Doubling a 2 ms case stays under the noise floor.
+    assert compare_to_baseline(_payload(4.0, 1), _payload(2.0, 1)) == []
+
+
+def test_compare_flags_extra_queries_and_ignores_new_cases():
+    assert compare_to_baseline(_payload(100.0, 11), _payload(100.0, 10)) == [
+        "case: 11 queries vs 10 baseline"
+    ]
+    assert compare_to_baseline(_payload(999.0, 99), {"cases": {}}) == []
+
+
+def test_generated_fixtures_are_extractable(tmp_path):
+    from toxtempass.filehandling import get_text_or_bytes_perfile_dict
+
+    paths = [
+        write_pdf(tmp_path / "bench.pdf", pages=2),
+        write_xlsx(tmp_path / "bench.xlsx", rows=10),
+    ]
+
+    result = get_text_or_bytes_perfile_dict(paths, unlink=False, extract_images=False)
+
+    assert set(result) == {str(p) for p in paths}
+    assert "HepG2" in result[str(paths[0])]["text"]
+    assert "Sheet: Plate readout" in result[str(paths[1])]["text"]
+
+
+def test_generated_docx_is_extractable(tmp_path):
+    from toxtempass.filehandling import get_text_or_bytes_perfile_dict
+
+    reason = docx_extraction_unavailable()
+    if reason:
+        pytest.skip(reason)
+    path = write_docx(tmp_path / "bench.docx", paragraphs=5)
+
+    result = get_text_or_bytes_perfile_dict([path], unlink=False, extract_images=False)
+
+    assert "HepG2" in result[str(path)]["text"]
+
+
+def test_docx_case_is_skipped_without_the_spacy_model(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        "toxtempass.perf_benchmark.docx_extraction_unavailable",
+        lambda: "spaCy model en_core_web_sm is not installed",
+    )
+    options = BenchmarkOptions(workdir=tmp_path, repeat=1)
+
+    assert run_cases(options, only=["extract_docx"]) == []
+    assert options.skipped == {
+        "extract_docx": "spaCy model en_core_web_sm is not installed"
+    }
+
+
+@pytest.mark.django_db
+def test_synthetic_assay_has_two_answering_rounds():
+    assay = build_synthetic_assay(questions=77, list_assays=3)
+
+    answers = Answer.objects.filter(assay=assay).select_related("question")
+    assert answers.count() == 77
+    assert {a.question.answering_round for a in answers} == {1, 2}
+    assert assay.study.assays.count() == 4
+
+
+@pytest.mark.django_db
+def test_process_llm_async_case_answers_every_question(tmp_path):
+    options = BenchmarkOptions(workdir=tmp_path, repeat=1, questions=10, llm_latency_ms=0)
+
+    (result,) = run_cases(options, only=["process_llm_async"])
+
+    assert result.name == "process_llm_async_10q"
+    assert result.runs == 1 and result.queries > 0
+    assert not Answer.objects.filter(answer_text="").exists()
+    assert LLMCallRecord.objects.count() == 10
+
+
+def test_unknown_case_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match="nope"):
+        run_cases(BenchmarkOptions(workdir=tmp_path), only=["nope"])
+
+
+def test_fake_model_reports_usage():
+    llm = LatencyFakeChatModel(latency_ms=0, output_tokens=5)
+
+    response = llm.invoke(["x" * 400])
+
+    assert llm.calls == 1
+    assert response.usage_metadata == {"input_tokens": 100, "output_tokens": 5}
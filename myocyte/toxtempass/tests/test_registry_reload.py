@@ -0,0 +1,156 @@
+"""Tests for reloading the Azure model registry without a restart."""
+
+import pytest
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import OperationalError
+
+from toxtempass import azure_registry
+from toxtempass.azure_registry import (
+    EndpointEntry,
+    ModelEntry,
+    build_registry,
+    get_endpoint,
+    get_model,
+    get_registry,
+    registry_environ,
+    reload_registry,
+)
+from toxtempass.llm import get_llm_for_endpoint
+from toxtempass.models import LLMConfig
+
+
+def _registry(deploy_b: str = "b", *, with_c: bool = False) -> list[EndpointEntry]:
+    models = [
+        ModelEntry(tag="A", deployment_name="a", model_id="gpt-4o"),
+        ModelEntry(tag="B", deployment_name=deploy_b, model_id="gpt-4o-mini"),
+    ]
+    if with_c:
+        models.append(ModelEntry(tag="C", deployment_name="c", model_id="gpt-4.1"))
+    return [
+        EndpointEntry(
+            index=1, endpoint="https://example.invalid/openai/v1", api_key="key",
+            models=models,
+        )
+    ]
+
+
+@pytest.fixture(autouse=True)
+def restore_registry():
+    original = get_registry()
+    get_llm_for_endpoint.cache_clear()
+    yield
+    reload_registry(original)
+    get_llm_for_endpoint.cache_clear()
+
+
+def test_build_registry_reads_the_given_environ():
+    (ep,) = build_registry({
+        "AZURE_E3_ENDPOINT": "https://e3.invalid",
+        "AZURE_E3_KEY": "k",
+        "AZURE_E3_DEPLOY_FAST": "fast-dep",
+        "AZURE_E3_MODEL_FAST": "gpt-4o-mini",
+    })
+
+    assert (ep.index, [m.deployment_name for m in ep.models]) == (3, ["fast-dep"])
+
+
+@pytest.mark.django_db
+def test_registry_file_overrides_and_retires(tmp_path, monkeypatch):
+    monkeypatch.setenv("AZURE_E3_ENDPOINT", "https://e3.invalid")
+    monkeypatch.setenv("AZURE_E3_KEY", "k")
+    monkeypatch.setenv("AZURE_E3_DEPLOY_OLD", "old-dep")
+    monkeypatch.setenv("AZURE_E3_MODEL_OLD", "gpt-4o")
+    registry_file = tmp_path / "registry.env"
+    registry_file.write_text(
+        "# new deployment, old one retired\n"
+        "AZURE_E3_DEPLOY_NEW='new-dep'\n"
+        "export AZURE_E3_MODEL_NEW=gpt-4.1\n"
+        "AZURE_E3_DEPLOY_OLD=\n"
+    )
+    monkeypatch.setenv("AZURE_REGISTRY_FILE", str(registry_file))
+
+    environ = registry_environ()
+    (ep,) = build_registry({k: v for k, v in environ.items() if "_E3_" in k})
+
+    assert "AZURE_E3_DEPLOY_OLD" not in environ
+    assert [(m.tag, m.deployment_name) for m in ep.models] == [("NEW", "new-dep")]
+
+
+def test_reload_reports_changes_and_swaps_indexes():
+    reload_registry(_registry())
+    version = azure_registry.registry_version()
+
+    change = reload_registry(_registry(deploy_b="b-v2", with_c=True))
+
+    assert change.version == version + 1
+    assert change.added == {"1:C"}
+    assert change.changed == {"1:B"}
+    assert change.removed == set()
+    assert get_model(1, "B")[1].deployment_name == "b-v2"
+    assert get_endpoint(1).index == 1 and get_endpoint(2) is None
+    assert azure_registry.find_by_model_id("gpt-4.1")[1].tag == "C"
+
+
+def test_reload_evicts_only_affected_clients():
+    reload_registry(_registry())
+    llm_a = get_llm_for_endpoint(1, "A")
+    in_flight_b = get_llm_for_endpoint(1, "B")
+
+    reload_registry(_registry(deploy_b="b-v2"))
+
+    assert get_llm_for_endpoint(1, "A") is llm_a
+    fresh_b = get_llm_for_endpoint(1, "B")
+    assert fresh_b is not in_flight_b
+    assert fresh_b.model_name == "b-v2"
+    # A run that already held the old client keeps using it.
+    assert in_flight_b.model_name == "b"
+
+
+@pytest.mark.django_db
+def test_other_processes_follow_the_shared_version(
+    monkeypatch, django_capture_on_commit_callbacks
+):
+    monkeypatch.setenv("AZURE_E4_ENDPOINT", "https://e4.invalid")
+    monkeypatch.setenv("AZURE_E4_KEY", "k")
+    reload_registry()
+    assert get_model(4, "NEW") is None
+
+    cfg = LLMConfig.load()
+    cfg.registry_env = "AZURE_E4_DEPLOY_NEW=new-dep\nAZURE_E4_MODEL_NEW=gpt-4.1\n"
+    with django_capture_on_commit_callbacks(execute=True):
+        cfg.save()
+    assert get_model(4, "NEW") is None  # not reloaded yet
+
+    # What ``reload_registry()`` in another worker does to the shared counter.
+    cache.incr("llm_registry:version")
+
+    assert get_model(4, "NEW")[1].deployment_name == "new-dep"
+
+
+@pytest.mark.django_db
+def test_api_keys_stay_out_of_the_db_source(
+    monkeypatch, django_capture_on_commit_callbacks
+):
+    monkeypatch.setenv("AZURE_E4_KEY", "from-env")
+    cfg = LLMConfig.load()
+    cfg.registry_env = "AZURE_E4_KEY=from-db\nAZURE_E4_DEPLOY_NEW=new-dep\n"
+
+    with pytest.raises(ValidationError) as excinfo:
+        cfg.full_clean()
+    assert "AZURE_E4_KEY" in str(excinfo.value.message_dict["registry_env"])
+
+    with django_capture_on_commit_callbacks(execute=True):
+        cfg.save()  # e.g. written before the check existed
+    environ = registry_environ()
+    assert environ["AZURE_E4_KEY"] == "from-env"
+    assert environ["AZURE_E4_DEPLOY_NEW"] == "new-dep"
+
+
+def test_db_source_is_skipped_when_the_database_is_unavailable(monkeypatch):
+    def unavailable():
+        raise OperationalError("no such table: toxtempass_llmconfig")
+
+    monkeypatch.setattr(LLMConfig, "load", unavailable)
+
+    assert azure_registry._db_registry_lines() == {}
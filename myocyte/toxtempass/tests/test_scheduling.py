@@ -0,0 +1,226 @@
+"""Tests for LLM run admission control, fair queueing and queue ETAs."""
+
+from datetime import timedelta
+from unittest.mock import ANY, patch
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from toxtempass import config
+from toxtempass.models import LLMRun, LLMStatus
+from toxtempass.run_eta import DurationPredictor
+from toxtempass.scheduling import (
+    dispatch_pending,
+    queue_estimate,
+    queue_position,
+    run_llm_run,
+    submit_llm_run,
+)
+from toxtempass.tests.fixtures.factories import (
+    AssayFactory,
+    InvestigationFactory,
+    PersonFactory,
+    StudyFactory,
+)
+
+
+@pytest.fixture
+def queued():
+    """Capture dispatched runs instead of running them."""
+    with patch("toxtempass.scheduling.async_task", return_value="t-1") as queued:
+        yield queued
+
+
+@pytest.fixture
+def slots(monkeypatch):
+    def set_slots(total, per_user=1):
+        monkeypatch.setattr(config, "llm_run_max_in_flight", total)
+        monkeypatch.setattr(config, "llm_run_max_in_flight_per_user", per_user)
+
+    return set_slots
+
+
+def _assay(user):
+    investigation = InvestigationFactory.create(owner=user)
+    return AssayFactory.create(study=StudyFactory.create(investigation=investigation))
+
+
+def _submit(user, n=1):
+    return [submit_llm_run(_assay(user), {}, requested_by=user) for _ in range(n)]
+
+
+def _finish(run):
+    LLMRun.objects.filter(pk=run.pk).update(status=LLMRun.Status.DONE)
+
+
+@pytest.mark.django_db
+def test_runs_are_admitted_round_robin_per_user(queued, slots):
+    slots(1)
+    alice, bob = PersonFactory.create(), PersonFactory.create()
+    a1, a2, a3 = _submit(alice, 3)
+    (b1,) = _submit(bob)
+
+    assert a1.status == LLMRun.Status.QUEUED
+    assert queued.call_args.kwargs["cluster"] == config.llm_run_cluster
+    # Bob's only run goes ahead of Alice's second and third.
+    assert [queue_position(r.assay) for r in (a1, b1, a2, a3)] == [0, 1, 2, 3]
+
+    _finish(a1)
+    assert dispatch_pending() == 1
+    b1.refresh_from_db()
+    assert b1.status == LLMRun.Status.QUEUED
+    assert queue_position(a2.assay) == 1
+
+
+@pytest.mark.django_db
+def test_per_user_cap_only_applies_while_others_wait(queued, slots):
+    slots(2)
+    alice, bob = PersonFactory.create(), PersonFactory.create()
+    a1, a2, a3 = _submit(alice, 3)
+    # Nobody else is waiting, so Alice may use both slots.
+    assert [r.status for r in (a1, a2)] == [LLMRun.Status.QUEUED] * 2
+
+    (b1,) = _submit(bob)
+    _finish(a1)
+    dispatch_pending()
+    b1.refresh_from_db()
+    a3.refresh_from_db()
+    assert b1.status == LLMRun.Status.QUEUED
+    assert a3.status == LLMRun.Status.PENDING
+
+
+@pytest.mark.django_db
+def test_run_calls_process_llm_async_and_admits_the_next(queued, slots):
+    slots(1)
+    user = PersonFactory.create()
+    first = submit_llm_run(
+        _assay(user),
+        {"a.txt": {"text": "alpha"}},
+        True,
+        requested_by=user,
+        llm_model="1:A",
+    )
+    (second,) = _submit(user)
+
+    def process(assay_id, *args, timings, **kwargs):
+        timings.update(model_key="2:B", rounds={"1": 4.0})
+
+    with patch("toxtempass.views.process_llm_async", side_effect=process) as called:
+        assert run_llm_run(first.pk) == LLMRun.Status.DONE
+
+    called.assert_called_once_with(
+        first.assay_id,
+        {"a.txt": {"text": "alpha"}},
+        True,
+        None,
+        timings=ANY,
+        llm_model="1:A",
+    )
+    first.refresh_from_db()
+    second.refresh_from_db()
+    assert first.payload == "" and first.finished_at is not None
+    # The deployment actually used and the per-phase timings are kept.
+    assert first.model_key == "2:B" and first.context_chars == 5
+    assert first.timings["rounds"] == {"1": 4.0} and "queue" in first.timings
+    assert first.run_seconds is not None
+    assert second.status == LLMRun.Status.QUEUED
+    # A retried task does not run the assay twice.
+    assert run_llm_run(first.pk) is None
+
+
+@pytest.mark.django_db
+def test_stale_runs_fail_and_free_their_slot(queued, slots):
+    slots(1)
+    user = PersonFactory.create()
+    stale, waiting = _submit(user, 2)
+    stale.assay.status = LLMStatus.BUSY
+    stale.assay.save()
+    LLMRun.objects.filter(pk=stale.pk).update(
+        dispatched_at=timezone.now() - timedelta(seconds=config.llm_run_stale_seconds + 1)
+    )
+
+    assert dispatch_pending() == 1
+    stale.refresh_from_db()
+    stale.assay.refresh_from_db()
+    assert stale.status == LLMRun.Status.FAILED
+    assert stale.assay.status == LLMStatus.ERROR
+    assert queue_position(waiting.assay) == 0
+
+
+@pytest.mark.django_db
+def test_status_endpoint_reports_queue_position(client, queued, slots):
+    slots(1)
+    user = PersonFactory.create()
+    _, second = _submit(user, 2)
+    second.assay.status = LLMStatus.SCHEDULED
+    second.assay.save()
+
+    client.force_login(user)
+    resp = client.post(reverse("assay_scheduled_or_busy", kwargs={"pk": second.assay.pk}))
+
+    data = resp.json()
+    assert data["is_busy_or_scheduled"] is True
+    assert data["queue_position"] == 1
+    # No history: the default 5 s per question for the run ahead and this one.
+    assert data["eta_seconds"] == 10
+    assert data["poll_after_seconds"] == 2
+
+
+def _history(model_key, seconds, questions=10, context_chars=10_000, n=3):
+    assay = AssayFactory.create()
+    LLMRun.objects.bulk_create(
+        LLMRun(
+            assay=assay,
+            status=LLMRun.Status.DONE,
+            model_key=model_key,
+            question_count=questions,
+            context_chars=context_chars,
+            run_seconds=seconds,
+            finished_at=timezone.now(),
+        )
+        for _ in range(n)
+    )
+
+
+@pytest.mark.django_db
+def test_predictor_uses_deployment_history_nearest_in_context_size(monkeypatch):
+    monkeypatch.setattr(config, "llm_eta_neighbours", 3)
+    _history("1:A", seconds=100)  # 10 s per question
+    _history("1:A", seconds=400, context_chars=1_000_000)  # 40 s per question
+    _history("2:B", seconds=20, context_chars=100)  # 2 s per question
+
+    predictor = DurationPredictor()
+    assert predictor.predict("1:A", 5, 12_000) == pytest.approx(50)
+    assert predictor.predict("1:A", 5, 900_000) == pytest.approx(200)
+    # Too little history on 3:C: every deployment's runs are used instead.
+    assert predictor.predict("3:C", 1, 10_000) == pytest.approx(10)
+
+
+@pytest.mark.django_db
+def test_estimate_simulates_the_slots_ahead(queued, slots):
+    slots(1)
+    _history("1:A", seconds=100)  # 10 s per question
+    user, other = PersonFactory.create(), PersonFactory.create()
+    running = submit_llm_run(_assay(user), {}, requested_by=user, llm_model="1:A")
+    LLMRun.objects.filter(pk=running.pk).update(
+        status=LLMRun.Status.RUNNING,
+        started_at=timezone.now() - timedelta(seconds=30),
+        question_count=6,
+    )
+    waiting = submit_llm_run(_assay(other), {}, requested_by=other, llm_model="1:A")
+    LLMRun.objects.filter(pk=waiting.pk).update(question_count=4)
+
+    estimate = queue_estimate(waiting.assay)
+    # 60 s predicted for the running run, 30 s of it already spent.
+    assert estimate["queue_position"] == 1
+    assert estimate["eta_seconds"] == pytest.approx(30 + 40, abs=1)
+    assert estimate["poll_after_seconds"] == pytest.approx(70 / 4, abs=1)
+    assert queue_estimate(running.assay)["eta_seconds"] == pytest.approx(30, abs=1)
+    assert queue_estimate(AssayFactory.create()) is None
+
+
+def test_answer_deadline_follows_the_llm_cluster_timeout(settings):
+    llm_timeout = settings.Q_CLUSTER["ALT_CLUSTERS"][config.llm_run_cluster]["timeout"]
+    assert config.llm_run_timeout_seconds == llm_timeout
+    assert config.llm_run_timeout_seconds > settings.Q_CLUSTER["timeout"]
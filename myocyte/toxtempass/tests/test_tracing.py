@@ -0,0 +1,142 @@
+"""Tests for the pipeline tracing spans."""
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from toxtempass import tracing
+from toxtempass.export import render_export_artifact
+from toxtempass.models import Answer, Question, QuestionSet, Section, Subsection
+from toxtempass.tests.fixtures.factories import AssayFactory
+from toxtempass.tracing import in_current_context, span
+from toxtempass.views import process_llm_async
+
+
+@pytest.fixture
+def trace_file(tmp_path, monkeypatch):
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr("toxtempass.config.trace_exporter", "file")
+    monkeypatch.setattr("toxtempass.config.trace_file", str(path))
+    return path
+
+
+def read_spans(path) -> dict[str, list[dict]]:
+    spans: dict[str, list[dict]] = {}
+    for line in path.read_text().splitlines():
+        record = json.loads(line)
+        spans.setdefault(record["name"], []).append(record)
+    return spans
+
+
+def test_disabled_tracing_exports_nothing(tmp_path, monkeypatch):
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr("toxtempass.config.trace_exporter", "")
+    monkeypatch.setattr("toxtempass.config.trace_file", str(path))
+
+    with span("outer", assay_id=1) as s:
+        s.set_attribute("ignored", True)
+
+    assert not path.exists()
+
+
+def test_nested_spans_inherit_assay_and_task(trace_file):
+    tracing.bind_task("task-123")
+    try:
+        with span("outer", assay_id=7), span("inner", step="x"):
+            pass
+    finally:
+        tracing.bind_task(None)
+    with span("after"):
+        pass
+
+    spans = read_spans(trace_file)
+    outer, inner = spans["outer"][0], spans["inner"][0]
+    assert inner["parent_id"] == outer["span_id"]
+    assert inner["trace_id"] == outer["trace_id"]
+    assert inner["attributes"] == {
+        "django_q.task_id": "task-123",
+        "assay.id": 7,
+        "step": "x",
+    }
+    assert outer["duration_ms"] >= inner["duration_ms"]
+    assert spans["after"][0]["attributes"] == {}
+    assert spans["after"][0]["parent_id"] is None
+
+
+def test_exception_marks_span_failed(trace_file):
+    with pytest.raises(ValueError), span("boom"):
+        raise ValueError("bad input")
+
+    record = read_spans(trace_file)["boom"][0]
+    assert record["status"] == "error"
+    assert record["error"] == "ValueError: bad input"
+
+
+def test_thread_pool_spans_nest_under_the_submitting_span(trace_file):
+    def work(i):
+        with span("work", item=i):
+            return i
+
+    with span("round", assay_id=3), ThreadPoolExecutor(max_workers=2) as pool:
+        futures = [pool.submit(in_current_context(work), i) for i in range(3)]
+        assert sorted(f.result() for f in futures) == [0, 1, 2]
+
+    spans = read_spans(trace_file)
+    round_id = spans["round"][0]["span_id"]
+    assert len(spans["work"]) == 3
+    assert all(w["parent_id"] == round_id for w in spans["work"])
+    assert all(w["attributes"]["assay.id"] == 3 for w in spans["work"])
+
+
+class FakeLLM:
+    def invoke(self, messages):
+        return SimpleNamespace(
+            content="Answer", usage_metadata={"input_tokens": 10, "output_tokens": 2}
+        )
+
+
+@pytest.mark.django_db
+def test_process_llm_async_spans(trace_file):
+    assay = AssayFactory()
+    qs = QuestionSet.objects.create(
+        display_name="trace-qs", created_by=assay.study.investigation.owner
+    )
+    section = Section.objects.create(question_set=qs, title="Sec")
+    subsection = Subsection.objects.create(section=section, title="Subsec")
+    for i in range(2):
+        question = Question.objects.create(subsection=subsection, question_text=f"Q{i}?")
+        Answer.objects.create(assay=assay, question=question)
+
+    process_llm_async(
+        assay.id,
+        doc_dict={"doc.txt": {"text": "Some context", "source_document": "doc.txt"}},
+        chatopenai=FakeLLM(),
+    )
+
+    spans = read_spans(trace_file)
+    run = spans["llm.process_assay"][0]
+    assert run["attributes"]["assay.id"] == assay.id
+    assert spans["context.truncate"][0]["attributes"]["truncated"] is False
+    (round_span,) = spans["llm.round"]
+    assert round_span["parent_id"] == run["span_id"]
+    calls = spans["llm.call"]
+    assert len(calls) == 2
+    assert all(c["parent_id"] == round_span["span_id"] for c in calls)
+    assert all(c["attributes"]["assay.id"] == assay.id for c in calls)
+    assert {c["attributes"]["outcome"] for c in calls} == {"ok"}
+    assert len(spans["db.save_answer"]) == 2
+
+
+@pytest.mark.django_db
+def test_export_stages_are_traced(trace_file):
+    assay = AssayFactory()
+
+    render_export_artifact(None, assay, "json", use_cache=False)
+
+    spans = read_spans(trace_file)
+    artifact = spans["export.artifact"][0]
+    assert artifact["attributes"]["assay.id"] == assay.id
+    assert artifact["attributes"]["cache_hit"] is False
+    assert spans["export.json"][0]["parent_id"] == artifact["span_id"]
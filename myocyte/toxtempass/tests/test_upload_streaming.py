@@ -0,0 +1,83 @@
+"""Tests for streaming consented uploads to storage."""
+
+import hashlib
+from unittest.mock import patch
+
+import pytest
+from django.core.files.storage import InMemoryStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from toxtempass.filehandling import (
+    HashingUploadStream,
+    content_object_key,
+    store_files_to_storage,
+)
+from toxtempass.models import FileAsset
+from toxtempass.tests.fixtures.factories import AssayFactory, PersonFactory
+
+
+class _FailingStorage(InMemoryStorage):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.saved: list[str] = []
+
+    def _save(self, name, content):
+        if name == content_object_key(hashlib.sha256(b"bad").hexdigest()):
+            raise OSError("upload failed")
+        self.saved.append(super()._save(name, content))
+        return self.saved[-1]
+
+
+def test_hashing_stream_reads_exact_sizes_and_hashes_everything():
+    stream = HashingUploadStream(iter([b"abc", b"", b"defgh", b"ij"]))
+
+    assert stream.read(4) == b"abcd"
+    assert stream.read(4) == b"efgh"
+    assert not stream.seekable()
+    # The unread rest is still hashed.
+    assert stream.hexdigest() == hashlib.sha256(b"abcdefghij").hexdigest()
+    assert stream.size == 10
+
+
+@pytest.mark.django_db
+class TestStreamingStoreFiles:
+    def test_streams_files_concurrently_in_input_order(self):
+        storage = InMemoryStorage()
+        user = PersonFactory.create()
+        assay = AssayFactory.create()
+        contents = [bytes([i]) * (300_000 + i) for i in range(5)]
+        files = [
+            SimpleUploadedFile(f"doc{i}.pdf", content, content_type="application/pdf")
+            for i, content in enumerate(contents)
+        ]
+
+        with (
+            patch("toxtempass.filehandling.default_storage", storage),
+            patch("toxtempass.filehandling.config.upload_chunk_size", 64 * 1024),
+        ):
+            assets = store_files_to_storage(files, user, assay, consent=True)
+
+        assert [a.original_filename for a in assets] == [f.name for f in files]
+        for asset, content in zip(assets, contents):
+            assert asset.size_bytes == len(content)
+            assert asset.sha256 == hashlib.sha256(content).hexdigest()
+            assert storage.open(asset.object_key).read() == content
+
+    def test_failure_removes_uploaded_objects(self):
+        storage = _FailingStorage()
+        files = [
+            SimpleUploadedFile("good.pdf", b"good"),
+            SimpleUploadedFile("bad.pdf", b"bad"),
+        ]
+
+        with (
+            patch("toxtempass.filehandling.default_storage", storage),
+            pytest.raises(OSError, match="upload failed"),
+        ):
+            store_files_to_storage(
+                files, PersonFactory.create(), AssayFactory.create(), consent=True
+            )
+
+        assert FileAsset.objects.count() == 0
+        assert len(storage.saved) == 1
+        assert not storage.exists(storage.saved[0])
@@ -0,0 +1,131 @@
+"""Tests for the batched AssayView tracking in toxtempass.view_tracking."""
+
+from unittest.mock import patch
+
+import pytest
+from django.db import DatabaseError
+from django.test import RequestFactory
+from django.urls import reverse
+
+from toxtempass import config
+from toxtempass.models import AssayView
+from toxtempass.tables import AssayTable
+from toxtempass.tests.fixtures.factories import (
+    AssayFactory,
+    InvestigationFactory,
+    PersonFactory,
+    StudyFactory,
+)
+from toxtempass.view_tracking import (
+    flush_assay_views,
+    get_viewed_assay_ids,
+    record_assay_view,
+)
+
+
+@pytest.fixture
+def user(db):
+    return PersonFactory.create()
+
+
+@pytest.fixture
+def assay(db, user):
+    investigation = InvestigationFactory.create(owner=user)
+    study = StudyFactory.create(investigation=investigation)
+    return AssayFactory.create(study=study)
+
+
+@pytest.mark.django_db
+class TestViewTracking:
+    def test_first_view_is_written_and_visible(self, user, assay):
+        get_viewed_assay_ids(user.id)  # cache the set before the view
+        record_assay_view(user.id, assay.id)
+        assert AssayView.objects.filter(user=user, assay=assay).exists()
+        assert assay.id in get_viewed_assay_ids(user.id)
+        assert flush_assay_views() == 0
+
+    def test_repeat_views_are_flushed(self, user, assay):
+        record_assay_view(user.id, assay.id)
+        first = AssayView.objects.get(user=user, assay=assay).last_viewed
+
+        record_assay_view(user.id, assay.id)
+        assert AssayView.objects.get(user=user, assay=assay).last_viewed == first
+        assert flush_assay_views() == 1
+        assert AssayView.objects.filter(user=user, assay=assay).count() == 1
+        assert AssayView.objects.get(user=user, assay=assay).last_viewed > first
+
+    def test_flush_with_empty_queue_is_noop(self):
+        assert flush_assay_views() == 0
+
+    def test_flush_skips_deleted_assays(self, user, assay):
+        record_assay_view(user.id, assay.id)
+        record_assay_view(user.id, assay.id)
+        assay.delete()
+        assert flush_assay_views() == 0
+
+    def test_flush_skips_deleted_users(self, user, assay):
+        other = PersonFactory.create()
+        for viewer in (user, other, user, other):
+            record_assay_view(viewer.id, assay.id)
+        other.delete()
+        assert flush_assay_views() == 1
+        assert list(AssayView.objects.values_list("user_id", flat=True)) == [user.id]
+
+    def test_failed_flush_keeps_the_queue(self, user, assay):
+        record_assay_view(user.id, assay.id)
+        record_assay_view(user.id, assay.id)
+        with (
+            patch.object(AssayView.objects, "bulk_create", side_effect=DatabaseError),
+            pytest.raises(DatabaseError),
+        ):
+            flush_assay_views()
+        assert flush_assay_views() == 1
+        assert flush_assay_views() == 0
+
+    def test_flush_stops_after_its_time_budget(self, user, assay):
+        record_assay_view(user.id, assay.id)
+        record_assay_view(user.id, assay.id)
+        with patch.object(config, "view_tracking_flush_max_seconds", 0):
+            assert flush_assay_views() == 0
+        assert flush_assay_views() == 1
+
+    def test_views_recorded_during_a_flush_are_kept(self, user, assay):
+        other = AssayFactory.create(study=assay.study)
+        for viewed in (assay, other, assay):
+            record_assay_view(user.id, viewed.id)
+        real_bulk_create = AssayView.objects.bulk_create
+
+        def record_meanwhile(rows, **kwargs):
+            if len(rows) == 1 and rows[0].assay_id == assay.id:
+                record_assay_view(user.id, other.id)
+            return real_bulk_create(rows, **kwargs)
+
+        with patch.object(AssayView.objects, "bulk_create", side_effect=record_meanwhile):
+            assert flush_assay_views() == 2
+        assert flush_assay_views() == 0
+
+    def test_viewed_ids_seeded_from_db(self, user, assay):
+        AssayView.objects.create(user=user, assay=assay)
+        assert get_viewed_assay_ids(user.id) == {assay.id}
+
+    def test_repeat_answer_page_get_does_not_write_assay_view(
+        self, client, user, assay
+    ):
+        client.force_login(user)
+        url = reverse("answer_assay_questions", kwargs={"assay_id": assay.id})
+        client.get(url)
+        first = AssayView.objects.get(user=user, assay=assay).last_viewed
+        client.get(url)
+        assert AssayView.objects.get(user=user, assay=assay).last_viewed == first
+        assert assay.id in get_viewed_assay_ids(user.id)
+
+    def test_new_dot_uses_cached_viewed_set(self, user, assay):
+        other = AssayFactory.create(study=assay.study)
+        record_assay_view(user.id, assay.id)
+        request = RequestFactory().get("/")
+        request.user = user
+        table = AssayTable([assay, other])
+        table.context = {"request": request}
+
+        assert str(table.render_new(assay)) == ""
+        assert "bi-dot" in str(table.render_new(other))
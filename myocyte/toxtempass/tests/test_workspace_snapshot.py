@@ -0,0 +1,62 @@
+"""Tests for the memoised/cached workspace snapshot used by the offcanvas."""
+
+import pytest
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from toxtempass.context_processors import workspaces
+from toxtempass.tests.fixtures.factories import (
+    InvestigationFactory,
+    PersonFactory,
+    WorkspaceFactory,
+)
+from toxtempass.workspace import get_workspace_list, get_workspace_snapshot
+
+
+def _request(user):
+    request = RequestFactory().get("/")
+    request.user = user
+    return request
+
+
+@pytest.mark.django_db
+class TestWorkspaceSnapshot:
+    def test_context_processor_keys_share_one_snapshot(self):
+        user = PersonFactory.create()
+        WorkspaceFactory.create(owner=user)
+        request = _request(user)
+        ctx = workspaces(request)
+
+        assert len(ctx["owned_workspaces"]) == 1
+        with CaptureQueriesContext(connection) as queries:
+            list(ctx["member_workspaces"])
+            list(ctx["accessible_investigations"])
+            get_workspace_list(request)
+        assert len(queries) == 0
+
+    def test_snapshot_cached_across_requests(self):
+        user = PersonFactory.create()
+        get_workspace_snapshot(_request(user))
+        with CaptureQueriesContext(connection) as queries:
+            get_workspace_snapshot(_request(user))
+        assert not any("toxtempass_workspace" in q["sql"] for q in queries)
+
+    def test_create_view_invalidates_cache(self, client):
+        user = PersonFactory.create()
+        assert get_workspace_snapshot(_request(user))["owned_workspaces"] == []
+
+        client.force_login(user)
+        resp = client.post(reverse("create_workspace"), {"name": "WS", "description": ""})
+        assert resp.json()["success"] is True
+
+        owned = get_workspace_snapshot(_request(user))["owned_workspaces"]
+        assert [ws.name for ws in owned] == ["WS"]
+
+    def test_new_investigation_invalidates_cache(self):
+        user = PersonFactory.create()
+        assert get_workspace_snapshot(_request(user))["accessible_investigations"] == []
+        investigation = InvestigationFactory.create(owner=user)
+        snapshot = get_workspace_snapshot(_request(user))
+        assert [inv.pk for inv in snapshot["accessible_investigations"]] == [investigation.pk]
@@ -0,0 +1,49 @@
+"""Per-user active time on an assay, kept monotonic in ``AssayTimeLog``.
+
+The answer page posts a cumulative ``seconds`` heartbeat every
+``config.time_sync_interval_ms``.  :func:`record_active_seconds` raises the
+user's row to that value with one conditional ``UPDATE`` (``seconds < new``),
+creating the row on the first heartbeat, so concurrent heartbeats cannot
+replace a larger value with a smaller one and nothing is read first.
+
+Heartbeats used to be buffered in the cache and flushed on a schedule, but the
+shared cache is a table in the same database: the buffer cost more writes than
+it saved, and a culled entry lost time that existed nowhere else.
+"""
+
+from django.db.models import Sum
+from django.utils import timezone
+
+from toxtempass.models import AssayTimeLog
+
+
+def record_active_seconds(assay_id: int, user_id: int, seconds: int) -> int:
+    """Record a heartbeat and return the total seconds across all collaborators.
+
+    The stored value per user never decreases, even if the client sends a
+    smaller number (e.g. after its local storage was cleared).
+    """
+    if not _raise_seconds(assay_id, user_id, seconds):
+        row, created = AssayTimeLog.objects.get_or_create(
+            assay_id=assay_id, user_id=user_id, defaults={"seconds": seconds}
+        )
+        if not created and row.seconds < seconds:
+            # Another heartbeat created the row first with a smaller value.
+            _raise_seconds(assay_id, user_id, seconds)
+    return get_assay_total_seconds(assay_id)
+
+
+def _raise_seconds(assay_id: int, user_id: int, seconds: int) -> int:
+    return AssayTimeLog.objects.filter(
+        assay_id=assay_id, user_id=user_id, seconds__lt=seconds
+    ).update(seconds=seconds, updated_at=timezone.now())
+
+
+def get_assay_total_seconds(assay_id: int) -> int:
+    """Return the active seconds of all collaborators on *assay_id*."""
+    return (
+        AssayTimeLog.objects.filter(assay_id=assay_id).aggregate(total=Sum("seconds"))[
+            "total"
+        ]
+        or 0
+    )
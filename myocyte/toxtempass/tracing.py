@@ -0,0 +1,201 @@
+"""Lightweight tracing of the assay pipeline (ingestion, answering, export).
+
+``with span("name", **attributes):`` times a block as a span nested under the
+current one.  Every span carries the ``assay.id`` and ``django_q.task_id`` of
+the spans it is nested in, so all spans of one assay run can be pulled from
+the trace output together.  Where spans go is set by ``config.trace_exporter``:
+
+* ``""`` (default): tracing is off and :func:`span` yields a no-op span;
+* ``"console"``: each finished span is logged to the ``tracing`` logger;
+* ``"file"``: each finished span is appended as a JSON line to
+  ``config.trace_file``;
+* ``"otel"``: spans are created with OpenTelemetry (if installed) and exported
+  by whatever SDK the deployment configured (``OTEL_*`` environment).
+
+Thread pools do not inherit the caller's context; submit work wrapped with
+:func:`in_current_context` so spans created in the worker nest correctly.
+The django-q task ID is bound by the ``pre_execute`` signal receiver in
+``toxtempass.signals``.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import functools
+import json
+import logging
+import secrets
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from toxtempass import config
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:  # pragma: no cover - optional dependency
+    otel_trace = None
+
+logger = logging.getLogger("tracing")
+
+ASSAY_ID = "assay.id"
+TASK_ID = "django_q.task_id"
+
+# Attributes every span inherits from the spans it is nested in.
+_links: contextvars.ContextVar[dict] = contextvars.ContextVar("trace_links", default={})
+_current: contextvars.ContextVar[Span | None] = contextvars.ContextVar(
+    "trace_span", default=None
+)
+_file_lock = threading.Lock()
+_otel_missing_warned = False
+
+
+class Span:
+    """A finished-or-running span of the built-in tracer."""
+
+    __slots__ = (
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "depth",
+        "attributes",
+        "start",
+        "duration_ms",
+        "status",
+        "error",
+        "_t0",
+    )
+
+    def __init__(self, name: str, parent: Span | None, attributes: dict) -> None:
+        self.name = name
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.depth = parent.depth + 1 if parent else 0
+        self.attributes = attributes
+        self.start = time.time()
+        self.duration_ms: float | None = None
+        self.status = "ok"
+        self.error: str | None = None
+        self._t0 = time.perf_counter()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def end(self) -> None:
+        self.duration_ms = round((time.perf_counter() - self._t0) * 1000, 3)
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    def set_attribute(self, key: str, value: Any) -> None:
+        return
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def _export(finished: Span) -> None:
+    exporter = config.trace_exporter
+    try:
+        if exporter == "file":
+            line = json.dumps(finished.to_dict(), default=str)
+            with _file_lock, open(config.trace_file, "a", encoding="utf-8") as fh:
+                fh.write(line + "\n")
+        elif exporter == "console":
+            logger.info(
+                "%s%s %.1f ms [%s] %s",
+                "  " * finished.depth,
+                finished.name,
+                finished.duration_ms,
+                finished.status,
+                finished.attributes,
+            )
+    except Exception:
+        logger.warning("Could not export span %s", finished.name, exc_info=True)
+
+
+def _otel_tracer():
+    global _otel_missing_warned
+    if otel_trace is None:
+        if not _otel_missing_warned:
+            logger.warning("TRACE_EXPORTER=otel but opentelemetry is not installed.")
+            _otel_missing_warned = True
+        return None
+    return otel_trace.get_tracer("toxtempass")
+
+
+@contextmanager
+def span(name: str, *, assay_id: int | None = None, **attributes: Any) -> Iterator:
+    """Time the enclosed block as a span named *name*.
+
+    *assay_id* is attached to this span and every span nested in it.  The
+    yielded span accepts further attributes via ``set_attribute``; an
+    exception leaving the block marks the span as failed and is re-raised.
+    """
+    exporter = config.trace_exporter
+    if not exporter:
+        yield _NOOP_SPAN
+        return
+
+    links = _links.get()
+    if assay_id is not None:
+        links = {**links, ASSAY_ID: assay_id}
+    links_token = _links.set(links)
+    attributes = {**links, **{k: v for k, v in attributes.items() if v is not None}}
+    try:
+        if exporter == "otel":
+            tracer = _otel_tracer()
+            if tracer is None:
+                yield _NOOP_SPAN
+                return
+            with tracer.start_as_current_span(name, attributes=attributes) as otel_span:
+                yield otel_span
+            return
+
+        current = Span(name, _current.get(), attributes)
+        span_token = _current.set(current)
+        try:
+            yield current
+        except BaseException as exc:
+            current.status = "error"
+            current.error = f"{type(exc).__name__}: {exc}"[:400]
+            raise
+        finally:
+            _current.reset(span_token)
+            current.end()
+            _export(current)
+    finally:
+        _links.reset(links_token)
+
+
+def bind_task(task_id: str | None) -> None:
+    """Attach *task_id* to the spans created from now on in this context."""
+    links = {k: v for k, v in _links.get().items() if k != TASK_ID}
+    if task_id:
+        links[TASK_ID] = task_id
+    _links.set(links)
+
+
+def in_current_context(fn: Callable) -> Callable:
+    """Return *fn* bound to a copy of the caller's context (current span, links).
+
+    Wrap each ``pool.submit`` target separately; one context copy cannot be
+    entered by two threads at once.
+    """
+    return functools.partial(contextvars.copy_context().run, fn)
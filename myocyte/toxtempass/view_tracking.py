@@ -0,0 +1,116 @@
+"""Cache-backed, batched recording of ``AssayView`` "last viewed" timestamps.
+
+Opening an assay used to ``update_or_create`` its ``AssayView`` row on every
+GET.  Only the first view of an assay by a user is still written straight
+away; later views just move ``last_viewed``, so they are queued in the cache
+(a :class:`~toxtempass.cache_primitives.CacheQueue`, so concurrent requests
+never overwrite each other's views) and written in bulk by
+:func:`flush_assay_views`, which runs as a django-q schedule.  The overview's
+"new" indicator reads :func:`get_viewed_assay_ids`, a cached per-user set that
+can always be rebuilt from ``AssayView`` alone.
+"""
+
+import logging
+import time
+from datetime import datetime
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from toxtempass import config
+from toxtempass.cache_primitives import CacheQueue
+from toxtempass.models import Assay, AssayView, Person
+
+logger = logging.getLogger(__name__)
+
+_VIEWED_KEY = "assay_view:viewed:{user_id}"
+
+# ``(user_id, assay_id, viewed_at)`` per opened assay, in the order opened.
+_pending = CacheQueue("assay_view:pending", config.view_tracking_cache_timeout_seconds)
+
+
+def _viewed_key(user_id: int) -> str:
+    return _VIEWED_KEY.format(user_id=user_id)
+
+
+def get_viewed_assay_ids(user_id: int) -> set[int]:
+    """Return the IDs of all assays *user_id* has opened, seeding from the DB."""
+    viewed = cache.get(_viewed_key(user_id))
+    if viewed is None:
+        viewed = set(
+            AssayView.objects.filter(user_id=user_id).values_list("assay_id", flat=True)
+        )
+        cache.set(
+            _viewed_key(user_id), viewed, config.view_tracking_cache_timeout_seconds
+        )
+    return viewed
+
+
+def record_assay_view(user_id: int, assay_id: int) -> None:
+    """Record that *user_id* opened *assay_id* now."""
+    now = timezone.now()
+    if assay_id in get_viewed_assay_ids(user_id):
+        _pending.put((user_id, assay_id, now))
+        return
+    # First view: write the row so the viewed set stays derivable from
+    # AssayView, then let the next lookup re-read it (again after the commit,
+    # in case another request re-read it before the row was visible).
+    AssayView.objects.bulk_create(
+        [AssayView(user_id=user_id, assay_id=assay_id, last_viewed=now)],
+        update_conflicts=True,
+        unique_fields=["user", "assay"],
+        update_fields=["last_viewed"],
+    )
+    cache.delete(_viewed_key(user_id))
+    transaction.on_commit(lambda: cache.delete(_viewed_key(user_id)))
+
+
+def flush_assay_views() -> int:
+    """Upsert the queued views into ``AssayView``, one batch per statement.
+
+    Views are removed from the queue only once their batch has been written,
+    so a failed flush is retried by the next run. No new batch is started after
+    ``config.view_tracking_flush_max_seconds``; the next run continues.
+
+    Returns:
+        The number of (user, assay) pairs written.
+
+    """
+    written = 0
+    deadline = time.monotonic() + config.view_tracking_flush_max_seconds
+    while time.monotonic() < deadline:
+        pending, position = _pending.peek(limit=config.view_tracking_flush_batch_size)
+        if not pending:
+            return written
+
+        latest: dict[tuple[int, int], datetime] = {}
+        for user_id, assay_id, ts in pending:
+            if (user_id, assay_id) not in latest or ts > latest[(user_id, assay_id)]:
+                latest[(user_id, assay_id)] = ts
+        # Assays or users deleted since the view would violate the FK constraints.
+        live_assays = set(
+            Assay.objects.filter(pk__in={aid for (_, aid) in latest}).values_list(
+                "pk", flat=True
+            )
+        )
+        live_users = set(
+            Person.objects.filter(pk__in={uid for (uid, _) in latest}).values_list(
+                "pk", flat=True
+            )
+        )
+        rows = [
+            AssayView(user_id=user_id, assay_id=assay_id, last_viewed=ts)
+            for (user_id, assay_id), ts in latest.items()
+            if assay_id in live_assays and user_id in live_users
+        ]
+        AssayView.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["user", "assay"],
+            update_fields=["last_viewed"],
+        )
+        _pending.ack(position)
+        logger.debug("Flushed %s AssayView row(s).", len(rows))
+        written += len(rows)
+    return written
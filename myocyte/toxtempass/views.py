@@ -1,4 +1,3 @@
-import difflib
 import json
 import logging
 import random
@@ -6,8 +5,8 @@ import re
 import time
 import uuid
 from collections import defaultdict
-from collections.abc import Iterator
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import ExitStack
 from itertools import product
 
 import requests
@@ -16,9 +15,9 @@ from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.models import User
 from django.contrib.auth.views import PasswordResetView as DjangoPasswordResetView
-from django.contrib.humanize.templatetags.humanize import naturaltime
+from django.core.files.storage import default_storage
 from django.db import models, transaction
-from django.db.models import QuerySet, Sum
+from django.db.models import QuerySet
 from django.http import (
     FileResponse,
     HttpRequest,
@@ -28,7 +27,6 @@ from django.http import (
 from django.http.response import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse, reverse_lazy
-from django.utils import timezone
 from django.utils.decorators import method_decorator
 from django.utils.safestring import mark_safe
 from django.views import View
@@ -44,8 +42,15 @@ from tqdm.auto import tqdm
 from myocyte import settings
 from toxtempass import config
 from toxtempass import utilities as beta_util
+from toxtempass.answer_history import original_version_entry, version_history_page
 from toxtempass.azure_registry import get_model as get_azure_model
-from toxtempass.export import export_assay_to_file
+from toxtempass.bulk_export import enqueue_bulk_export_job
+from toxtempass.export import EXPORT_MAPPING, export_assay_to_file
+from toxtempass.export_jobs import (
+    enqueue_export_job,
+    export_job_mime_type,
+    export_job_payload,
+)
 from toxtempass.filehandling import (
     collect_source_documents,
     get_text_or_imagebytes_from_django_uploaded_file,
@@ -65,20 +70,28 @@ from toxtempass.forms import (
     StartingForm,
     StudyForm,
 )
+from toxtempass.deployment_health import record_run_health, route_deployment
 from toxtempass.llm import (
-    current_llm_key,
     get_llm,
     get_llm_for_endpoint,
+    queue_llm_key,
     resolve_user_llm,
 )
+from toxtempass.llm_telemetry import (
+    finish_call,
+    new_call_record,
+    save_call_records,
+    start_call,
+)
 from toxtempass.models import (
     Answer,
     AnswerFile,
     Assay,
     AssayCost,
-    AssayTimeLog,
+    ExportJob,
     Feedback,
     Investigation,
+    LLMCallRecord,
     LLMStatus,
     Person,
     Question,
@@ -88,7 +101,10 @@ from toxtempass.models import (
     Study,
     Subsection,
 )
+from toxtempass.scheduling import queue_estimate, queue_position, submit_llm_run
 from toxtempass.tables import AssayTable
+from toxtempass.time_tracking import record_active_seconds
+from toxtempass.tracing import in_current_context, span
 from toxtempass.utilities import (
     add_user_alert,
     get_password_reset_wait_seconds,
@@ -97,6 +113,7 @@ from toxtempass.utilities import (
     record_password_reset_attempt,
     update_prefs_atomic,
 )
+from toxtempass.view_tracking import record_assay_view
 
 logger = logging.getLogger("views")
 
@@ -1001,16 +1018,28 @@ def generate_answer(
     assay: Assay,
     chatopenai: ChatOpenAI,
     base_prompt: str | None = None,
+    call_record: LLMCallRecord | None = None,
 ) -> tuple[int, str, int, int]:
     """Generate an answer for a single Answer instance.
 
     Returns a 4-tuple of ``(answer_id, answer_text, input_tokens, output_tokens)``.
     ``input_tokens`` and ``output_tokens`` are 0 when the LLM response does not
     include usage metadata.
+
+    When *call_record* is given (an unsaved ``LLMCallRecord``), the call's
+    queue wait, latency, attempts, 429 back-off and token usage are recorded
+    on it; the caller saves it.
     """
+    if call_record is not None:
+        start_call(call_record)
+
+    def _record(outcome: str, usage: dict | None = None, error=None) -> None:
+        if call_record is not None:
+            finish_call(call_record, outcome, usage=usage, error=error)
+
     ## some variables for logging and deadline handling
-    # compute a soft deadline based on Django‑Q timeout (90% of it)
-    q_timeout = settings.Q_CLUSTER.get("timeout", None)
+    # compute a soft deadline based on the llm cluster's task timeout (90% of it)
+    q_timeout = config.llm_run_timeout_seconds
     if q_timeout:
         deadline = time.time() + q_timeout * 0.9
     else:
@@ -1117,16 +1146,21 @@ def generate_answer(
                 f"Timed out retrying answer {ans.id} [{max_ans_id - ans.id}"
                 " of {delta_ans}] after {q_timeout}s total"
             )
-            raise TimeoutError(
+            timeout_error = TimeoutError(
                 f"Answer {ans.id} [{max_ans_id - ans.id} of {delta_ans}] timed out"
             )
+            _record(LLMCallRecord.Outcome.TIMEOUT, error=timeout_error)
+            raise timeout_error
 
         try:
+            if call_record is not None:
+                call_record.attempts += 1
             resp = chatopenai.invoke(messages)
             usage = getattr(resp, "usage_metadata", None) or {}
             # `or 0` guards against providers that explicitly return None for these keys.
             input_tokens = usage.get("input_tokens", 0) or 0
             output_tokens = usage.get("output_tokens", 0) or 0
+            _record(LLMCallRecord.Outcome.OK, usage=usage)
             return ans.id, (resp.content or ""), input_tokens, output_tokens
 
         except _RATE_LIMIT_ERRORS as e:
@@ -1165,6 +1199,8 @@ def generate_answer(
                 f"of {delta_ans}] (attempt {rate_limit_attempts}), "
                 f"retrying in {wait:.1f}s"
             )
+            if call_record is not None:
+                call_record.rate_limit_sleep_ms += int(wait * 1000)
             time.sleep(wait)
 
         except _TRANSIENT_ERRORS as exc:
@@ -1176,6 +1212,7 @@ def generate_answer(
                     "Giving up on answer %s after %d transient errors: %s",
                     ans.id, transient_attempts, exc,
                 )
+                _record(LLMCallRecord.Outcome.TRANSIENT, error=exc)
                 return ans.id, "", 0, 0
             backoff = min(2 ** transient_attempts, 30)
             logger.warning(
@@ -1196,6 +1233,7 @@ def generate_answer(
                 delta_ans,
                 exc,
             )
+            _record(LLMCallRecord.Outcome.BAD_REQUEST, error=exc)
             return ans.id, "", 0, 0
 
         except Exception as exc:
@@ -1206,6 +1244,7 @@ def generate_answer(
                 delta_ans,
                 exc,
             )
+            _record(LLMCallRecord.Outcome.ERROR, error=exc)
             return ans.id, "", 0, 0
 
 
@@ -1281,6 +1320,42 @@ def _save_assay_cost(
     )
 
 
+def _generate_answer_traced(
+    ans: Answer,
+    full_pdf_context: str,
+    assay: Assay,
+    chatopenai: ChatOpenAI,
+    base_prompt: str | None,
+    call_record: LLMCallRecord,
+) -> tuple[int, str, int, int]:
+    """Run :func:`generate_answer` in an ``llm.call`` span; runs on the round's pool."""
+    with span("llm.call", answer_id=ans.id, question_id=ans.question_id) as call_span:
+        try:
+            return generate_answer(
+                ans, full_pdf_context, assay, chatopenai, base_prompt, call_record
+            )
+        finally:
+            for field in (
+                "outcome",
+                "attempts",
+                "queue_wait_ms",
+                "rate_limit_sleep_ms",
+                "input_tokens",
+                "output_tokens",
+            ):
+                call_span.set_attribute(field, getattr(call_record, field))
+
+
+def _deployment_label(key: str) -> str:
+    """Model id of deployment *key* for user-facing messages."""
+    try:
+        idx, tag = key.split(":", 1)
+        result = get_azure_model(int(idx), tag)
+    except (ValueError, TypeError):
+        result = None
+    return result[1].model_id if result else key
+
+
 def process_llm_async(
     assay_id: int,
     doc_dict: dict[str, dict[str, str]] | None = None,
@@ -1292,6 +1367,8 @@ def process_llm_async(
     llm_model: str | None = None,
     base_prompt: str | None = None,
     max_workers: int | None = None,
+    llm_substituted_from: str | None = None,
+    timings: dict | None = None,
 ) -> None:
     """Process llm answer async.
 
@@ -1304,8 +1381,30 @@ def process_llm_async(
     back to ``config.max_workers_threading``). Used to serialise requests against
     low-throughput endpoints — a shared low-TPM deployment livelocks on 429s when
     several large-context requests fire at once.
+
+    ``llm_model`` is re-checked against the deployment circuit breakers when the
+    run starts and may be swapped for a healthy equivalent; the user is told
+    about that, or about ``llm_substituted_from`` (a swap made at queue time),
+    in an assay alert.
+
+    ``timings``, when given, is filled with the deployment key actually used
+    (``"model_key"``) and the wall time of each answering round in seconds
+    (``"rounds"``, keyed by round); ``toxtempass.scheduling`` stores it on the
+    ``LLMRun`` for the queue ETA predictor.
     """
     pool_workers = max_workers or config.max_workers_threading
+    # One LLMCallRecord per submitted question, bulk-saved when the run ends.
+    call_records: list[LLMCallRecord] = []
+    # Entered here and closed in the final ``finally`` so the run span covers
+    # the whole task without another level of indentation.
+    run_span_stack = ExitStack()
+    run_span = run_span_stack.enter_context(
+        span(
+            "llm.process_assay",
+            assay_id=assay_id,
+            regenerate=len(answer_ids) if answer_ids else None,
+        )
+    )
     try:
         try:
             assay = Assay.objects.get(pk=assay_id)
@@ -1329,6 +1428,17 @@ def process_llm_async(
             # Prefer the snapshotted deployment captured at queue time — ensures
             # the worker uses the model the user had selected *then*, not what
             # they may have switched to while the task was waiting.
+            # Its breaker may have opened while the task was queued.
+            llm_model, substituted_from = route_deployment(llm_model)
+            llm_substituted_from = llm_substituted_from or substituted_from
+            if llm_substituted_from and llm_model != llm_substituted_from:
+                add_user_alert(
+                    assay,
+                    f"{_deployment_label(llm_substituted_from)} is currently "
+                    "unavailable, so answers were generated with "
+                    f"{_deployment_label(llm_model)} instead.",
+                    level="info",
+                )
             if llm_model and ":" in llm_model:
                 try:
                     idx_s, tag = llm_model.split(":", 1)
@@ -1348,6 +1458,8 @@ def process_llm_async(
                     except Person.DoesNotExist:
                         user = None
                 chatopenai, _source, _replaced = resolve_user_llm(user)
+        if timings is not None:
+            timings["model_key"] = llm_model if llm_model and ":" in llm_model else ""
 
         payload = dict(doc_dict or {})
         if extract_images and payload:
@@ -1441,9 +1553,11 @@ def process_llm_async(
             assay.save()
             return
 
-        full_pdf_context, context_was_truncated = truncate_context_to_token_limit(
-            full_pdf_context, _context_budget
-        )
+        with span("context.truncate", budget_tokens=_context_budget) as trunc_span:
+            full_pdf_context, context_was_truncated = truncate_context_to_token_limit(
+                full_pdf_context, _context_budget
+            )
+            trunc_span.set_attribute("truncated", context_was_truncated)
         if context_was_truncated:
             logger.warning(
                 "Context for assay %s was truncated to fit within the "
@@ -1513,16 +1627,34 @@ def process_llm_async(
             logger.info(
                 f"Starting answering_round={rnd} with {len(round_answers)} questions"
             )
+            round_started = time.perf_counter()
 
             # fire off the round in parallel
-            with ThreadPoolExecutor(max_workers=pool_workers) as pool:
-                futures = {
-                    pool.submit(
-                        generate_answer, a, full_pdf_context, assay, chatopenai,
-                        base_prompt,
-                    ): a
-                    for a in round_answers
-                }
+            with (
+                span("llm.round", round=rnd, questions=len(round_answers)),
+                ThreadPoolExecutor(max_workers=pool_workers) as pool,
+            ):
+                futures = {}
+                for a in round_answers:
+                    record = new_call_record(
+                        assay_id=assay_id,
+                        question_id=a.question_id,
+                        model_key=llm_model if llm_model and ":" in llm_model else "",
+                        model_id=(
+                            getattr(chatopenai, "model_name", None)
+                            or getattr(chatopenai, "model", None)
+                            or ""
+                        ),
+                        answering_round=rnd,
+                    )
+                    call_records.append(record)
+                    futures[
+                        pool.submit(
+                            in_current_context(_generate_answer_traced),
+                            a, full_pdf_context, assay, chatopenai,
+                            base_prompt, record,
+                        )
+                    ] = a
                 assay_gone = False
 
                 with tqdm(
@@ -1563,16 +1695,21 @@ def process_llm_async(
                             continue  # discard this completed future's result
 
                         try:
-                            Answer.objects.filter(pk=aid).update(
-                                answer_text=text,
-                                answer_documents=source_documents,
-                            )
+                            with span("db.save_answer", answer_id=aid):
+                                Answer.objects.filter(pk=aid).update(
+                                    answer_text=text,
+                                    answer_documents=source_documents,
+                                )
                         except Exception as e:
                             log_processing_event(assay, str(e))
                             assay.status = LLMStatus.ERROR
                             assay.save()
                             continue
 
+            if timings is not None:
+                timings.setdefault("rounds", {})[str(rnd)] = round(
+                    time.perf_counter() - round_started, 3
+                )
             # If the assay went away mid-round, stop the whole task.
             if assay_gone:
                 return
@@ -1602,6 +1739,7 @@ def process_llm_async(
 
     except Exception as e:
         logger.exception(f"Fatal error in process_llm_async: {e}")
+        run_span.set_attribute("error", f"{type(e).__name__}: {e}"[:400])
         # Check if assay exists before updating status and context
         try:
             assay.status = LLMStatus.ERROR
@@ -1611,6 +1749,35 @@ def process_llm_async(
             logger.info(
                 f"Assay with id {assay_id} does not exist; skipping error status update."
             )
+    finally:
+        save_call_records(call_records)
+        record_run_health(call_records)
+        run_span_stack.close()
+
+
+def get_accessible_assays(user: Person) -> QuerySet[Assay]:
+    """Return all assays *user* may view, directly or via the investigation."""
+    accessible_investigations = get_objects_for_user(
+        user,
+        "toxtempass.view_investigation",
+        klass=Investigation,
+        use_groups=False,
+        any_perm=False,
+    )
+    accessible_assays = get_objects_for_user(
+        user,
+        "toxtempass.view_assay",
+        klass=Assay,
+        use_groups=False,
+        any_perm=False,
+    )
+    # Assays accessible because the user can view the parent Investigation
+    via_investigation_qs = Assay.objects.filter(
+        study__investigation__in=accessible_investigations
+    )
+
+    # Combine assays the user has object-level view permission on (e.g., shared via workspace)
+    return (via_investigation_qs | accessible_assays).distinct()
 
 
 @method_decorator(user_passes_test(is_logged_in, login_url="/login/"), name="dispatch")
@@ -1635,28 +1802,7 @@ class AssayListView(SingleTableView):
 
         Filtered to only those with a question_set.
         """
-        user = self.request.user
-        accessible_investigations = get_objects_for_user(
-            user,
-            "toxtempass.view_investigation",
-            klass=Investigation,
-            use_groups=False,
-            any_perm=False,
-        )
-        accessible_assays = get_objects_for_user(
-            user,
-            "toxtempass.view_assay",
-            klass=Assay,
-            use_groups=False,
-            any_perm=False,
-        )
-        # Assays accessible because the user can view the parent Investigation
-        via_investigation_qs = Assay.objects.filter(
-            study__investigation__in=accessible_investigations
-        )
-
-        # Combine assays the user has object-level view permission on (e.g., shared via workspace)
-        combined_qs = (via_investigation_qs | accessible_assays).distinct()
+        combined_qs = get_accessible_assays(self.request.user)
 
         # Show every accessible assay that has a questionnaire. The demo copy is
         # NOT auto-hidden when real work exists — it stays in the list (sorting to
@@ -1672,6 +1818,9 @@ class AssayListView(SingleTableView):
         context["show_tour"] = not user_has_seen_tour_page("overview", self.request.user)
         context["reload_busy_interval"] = config.reload_busy_interval_seconds
         context["reload_busy_max_retries"] = config.reload_busy_max_retries
+        context["reload_busy_max_interval"] = (
+            config.reload_busy_max_interval_seconds * 1000
+        )
         context["LLMStatus"] = LLMStatus
         context.update(get_workspace_list(self.request))
         # Tour management is now handled by JavaScript localStorage
@@ -1819,11 +1968,18 @@ def new_form_view(request: HttpRequest) -> HttpResponse | JsonResponse:
                         ]
                         with transaction.atomic():
                             AnswerFile.objects.bulk_create(pairs, ignore_conflicts=True)
+            # Place of the new run in the LLM queue (None when nothing was queued).
+            position = None
             # If files were uploaded and either overwrite is True or no existing
             if files and (overwrite or not answers_exist):
-                doc_dict, unreadable = get_text_or_imagebytes_from_django_uploaded_file(
-                    files, extract_images=False
-                )
+                ingest_started = time.perf_counter()
+                with span("assay.ingest", assay_id=assay.id, files=len(files)):
+                    doc_dict, unreadable = (
+                        get_text_or_imagebytes_from_django_uploaded_file(
+                            files, extract_images=False
+                        )
+                    )
+                extraction_seconds = time.perf_counter() - ingest_started
                 if unreadable:
                     for name in unreadable:
                         add_user_alert(
@@ -1835,17 +1991,23 @@ def new_form_view(request: HttpRequest) -> HttpResponse | JsonResponse:
                     # Set assay status to busy and hand it off to the async worker
                     assay.status = LLMStatus.SCHEDULED
                     assay.save()
-                    # Fire off the asynchronous worker
-                    async_task(
-                        process_llm_async,
-                        assay.id,
+                    # Snapshot the user's current model choice so a later
+                    # preference change doesn't affect this already-queued job;
+                    # a deployment with an open circuit breaker is swapped here.
+                    llm_model, substituted_from = queue_llm_key(request.user)
+                    # Hand the run to the fair LLM queue; it starts once a
+                    # worker slot is free.
+                    submit_llm_run(
+                        assay,
                         doc_dict,
                         extract_images,
+                        requested_by=request.user,
+                        extraction_seconds=extraction_seconds,
                         user_id=request.user.pk,
-                        # Snapshot the user's current model choice so a later
-                        # preference change doesn't affect this already-queued job.
-                        llm_model=current_llm_key(request.user),
+                        llm_model=llm_model,
+                        llm_substituted_from=substituted_from,
                     )
+                    position = queue_position(assay)
 
                 except Exception as e:
                     corr_id = uuid.uuid4().hex[:8]
@@ -1889,6 +2051,7 @@ def new_form_view(request: HttpRequest) -> HttpResponse | JsonResponse:
                     "success": True,
                     "errors": form.errors,
                     "redirect_url": reverse("overview"),
+                    "queue_position": position,
                 }
             )
 
@@ -1938,7 +2101,18 @@ def get_assay_is_busy_or_scheduled(request: HttpRequest, pk: int) -> JsonRespons
 
             raise PermissionDenied("You do not have permission to access this assay.")
         is_busy_or_scheduled = assay.status in {LLMStatus.BUSY, LLMStatus.SCHEDULED}
-        return JsonResponse({"is_busy_or_scheduled": is_busy_or_scheduled})
+        # Queue position plus predicted start/finish and when to poll again.
+        estimate = (queue_estimate(assay) if is_busy_or_scheduled else None) or {}
+        return JsonResponse(
+            {
+                "is_busy_or_scheduled": is_busy_or_scheduled,
+                "queue_position": estimate.get("queue_position"),
+                "estimated_start": estimate.get("estimated_start"),
+                "estimated_finish": estimate.get("estimated_finish"),
+                "eta_seconds": estimate.get("eta_seconds"),
+                "poll_after_seconds": estimate.get("poll_after_seconds"),
+            }
+        )
 
 
 @login_required(login_url="/login/")
@@ -2245,8 +2419,6 @@ def answer_assay_questions(
     request: HttpRequest, assay_id: int
 ) -> JsonResponse | HttpResponse:
     """Render the form to answer questions for a specific assay."""
-    from toxtempass.models import AssayView
-
     assay = get_object_or_404(Assay, pk=assay_id)
     if not assay.is_accessible_by(request.user, perm_prefix="view"):
         from django.core.exceptions import PermissionDenied
@@ -2264,12 +2436,9 @@ def answer_assay_questions(
             },
             status=400,
         )
-    # Record that the user has viewed this assay, update or create the AssayView record
-    AssayView.objects.update_or_create(
-        user=request.user,
-        assay=assay,
-        defaults={"last_viewed": timezone.now()},
-    )
+    # Record that the user has viewed this assay; repeat views are queued and
+    # bulk-written to AssayView by the scheduled flush_assay_views task.
+    record_assay_view(request.user.id, assay.id)
     # only the sections belonging to this assay's QuestionSet
     sections = Section.objects.filter(question_set=assay.question_set).prefetch_related(
         "subsections__questions"
@@ -2347,112 +2516,22 @@ def get_version_history(
         raise PermissionDenied(
             "You do not have permission to access this answer's version history."
         )
-    history = answer.history.all().order_by("-history_date")
-    version_changes = []
-
-    class DotDict(dict):
-        def __getattr__(self, key: str):
-            try:
-                return self[key]
-            except KeyError:
-                raise AttributeError(f"'DotDict' object has no attribute '{key}'")
-
-        def __setattr__(self, key: str, value: object) -> None:
-            self[key] = value
-
-    def _split_into_words(text: str) -> list:
-        return re.findall(r"\S+|\n", text)
-
-    def _get_diff_html(diff: Iterator) -> str:
-        html_diff = ""
-        for word in diff:
-            if word.startswith("-"):
-                html_diff += (
-                    '<span style="color: red; text-decoration: line-through;">'
-                    f"{word[2:]}</span> "
-                )
-            elif word.startswith("+"):
-                html_diff += f'<span style="color: green;">{word[2:]}</span> '
-            else:
-                html_diff += f"{word[2:]} "
-        return html_diff
-
-    for version in history:
-        if version.prev_record:
-            changes = version.diff_against(version.prev_record).changes
-        else:
-            changes = version.diff_against(version).changes
-        version_changes.append({"version": version, "changes": changes})
-        version_changes[-1]["version"].history_date = naturaltime(
-            version_changes[-1]["version"].history_date
-        )
-        last_changes_answer_text = [
-            change
-            for change in version_changes[-1]["changes"]
-            if change.field == "answer_text"
-        ]
-        if last_changes_answer_text:
-            version_changes[-1]["answer_text_changes_html"] = _get_diff_html(
-                difflib.ndiff(
-                    _split_into_words(last_changes_answer_text[0].old),
-                    _split_into_words(last_changes_answer_text[0].new),
-                )
-            )
-        if changes and version_changes[-1]["changes"][0].field == "accepted":
-            version_changes.pop(-1)
-
-    # ─── strip out any “versions” with no changes ───
-    version_changes = [entry for entry in version_changes if entry["changes"]]
-
-    # If no versions with changes found, add a synthetic "original" version entry to show initial data.
-    if not version_changes:
-        # Build a minimal synthetic version entry
-        answer_text = answer.answer_text or ""
-
-        # Create a DotDict-like object for synthetic version metadata
-        class SyntheticVersion(DotDict):
-            pass
-
-        synthetic_version = SyntheticVersion()
-        synthetic_version.history_date = (
-            history.first().history_date if history else "Original"
-        )
-        synthetic_version.history_user = history.first().history_user if history else None
-        synthetic_version.history_id = history.first().history_id if history else None
-
-        # Build changes list for answer_text and answer_documents field
-        changes = []
-        # change dict format matches what is expected
-        # Use attributes to mimic along with "field", "old", and "new"
-        changes.append(DotDict(field="answer_text", old="", new=answer_text))
-        changes.append(
-            DotDict(
-                field="answer_documents",
-                old="",
-                new=", ".join(answer.answer_documents or []),
-            )
-        )
-
-        # Build HTML for answer_text no diffs because original
-        answer_text_html = answer_text.replace("\n", "<br>")
-
-        version_changes.append(
-            {
-                "version": synthetic_version,
-                "changes": changes,
-                "answer_text_changes_html": answer_text_html,
-            }
-        )
+    before = request.GET.get("before")
+    before = int(before) if before and before.isdigit() else None
+    entries, next_before = version_history_page(answer, before=before)
+    context = {"entries": entries, "instance": answer, "next_before": next_before}
+    if before is not None:
+        # "Load older versions": only the next rows of the open table.
+        return render(request, "answer_extras/version_history_rows.html", context)
+    if not entries:
+        # No visible change yet: show the current answer as the original version.
+        entries.append(original_version_entry(answer))
 
     question_set_display_name = str(answer.question.subsection.section.question_set)
     return render(
         request,
         "answer_extras/version_history_modal_body.html",
-        {
-            "version_changes": version_changes,
-            "instance": answer,
-            "question_set_display_name": question_set_display_name,
-        },
+        {**context, "question_set_display_name": question_set_display_name},
     )
 
 
@@ -2477,17 +2556,159 @@ def export_assay(
         )
 
 
+@login_required(login_url="/login/")
+@require_POST
+def bulk_export_assays(request: HttpRequest) -> JsonResponse:
+    """Queue a ZIP of several assays, in one or more formats, as an export job.
+
+    Form fields select the assays — any of ``assay`` (repeatable), ``study``,
+    ``investigation`` or ``workspace``; none means every accessible assay — and
+    the formats via ``format`` (repeatable, default ``pdf``). Only assays the
+    user may view and that have feedback are included, the same gate as the
+    single-assay export. The archive is built on the exports task cluster;
+    the response is the job status to poll, as for :func:`start_export_job`.
+    """
+    export_types = request.POST.getlist("format") or ["pdf"]
+    if any(export_type not in EXPORT_MAPPING for export_type in export_types):
+        return JsonResponse({"error": "Invalid export type"}, status=400)
+
+    assays = get_accessible_assays(request.user).filter(feedback__isnull=False)
+    scope = "assays"
+    try:
+        if assay_ids := request.POST.getlist("assay"):
+            assays = assays.filter(id__in=[int(pk) for pk in assay_ids])
+        if study_id := request.POST.get("study"):
+            assays = assays.filter(study_id=int(study_id))
+            scope = f"study-{study_id}"
+        if investigation_id := request.POST.get("investigation"):
+            assays = assays.filter(study__investigation_id=int(investigation_id))
+            scope = f"investigation-{investigation_id}"
+        if workspace_id := request.POST.get("workspace"):
+            assays = assays.filter(
+                study__investigation__shared_in_workspaces__workspace_id=int(workspace_id)
+            )
+            scope = f"workspace-{workspace_id}"
+    except ValueError:
+        return JsonResponse({"error": "Invalid selection"}, status=400)
+
+    assays = list(
+        assays.only("id").order_by("-submission_date")[
+            : config.bulk_export_max_assays + 1
+        ]
+    )
+    if not assays:
+        return JsonResponse(
+            {"error": "No exportable assays (feedback is required before export)."},
+            status=404,
+        )
+    if len(assays) > config.bulk_export_max_assays:
+        return JsonResponse(
+            {
+                "error": f"Too many assays; export at most "
+                f"{config.bulk_export_max_assays} at a time."
+            },
+            status=400,
+        )
+
+    job = enqueue_bulk_export_job(
+        assays, export_types, request.user, file_name=f"toxtemp_{scope}.zip"
+    )
+    payload = export_job_payload(job)
+    payload["success"] = True
+    payload["status_url"] = reverse("export_job_status", args=[job.id])
+    payload["poll_timeout_seconds"] = config.export_job_poll_timeout_seconds
+    return JsonResponse(payload, status=202)
+
+
+@login_required(login_url="/login/")
+@require_POST
+def start_export_job(request: HttpRequest, assay_id: int, export_type: str) -> JsonResponse:
+    """Queue an export render and return the job status URL to poll.
+
+    Same permission and feedback gate as :func:`export_assay`; the render runs
+    on the exports task cluster instead of inside this request.
+    """
+    assay = get_object_or_404(Assay, id=assay_id)
+    if not assay.is_accessible_by(request.user, perm_prefix="view"):
+        from django.core.exceptions import PermissionDenied
+
+        raise PermissionDenied("You do not have permission to export this assay.")
+    if export_type not in EXPORT_MAPPING:
+        return JsonResponse({"error": "Invalid export type"}, status=400)
+    if not assay.has_feedback:
+        return JsonResponse(
+            {
+                "success": False,
+                "errors": {"__all__": ["No feedback has been provided yet."]},
+            }
+        )
+    job = enqueue_export_job(assay, export_type, request.user)
+    payload = export_job_payload(job)
+    payload["success"] = True
+    payload["status_url"] = reverse("export_job_status", args=[job.id])
+    payload["poll_timeout_seconds"] = config.export_job_poll_timeout_seconds
+    return JsonResponse(payload, status=202)
+
+
+def _get_export_job_for_user(request: HttpRequest, job_id: uuid.UUID) -> ExportJob:
+    job = get_object_or_404(ExportJob.objects.select_related("assay"), id=job_id)
+    if job.assay is None:
+        # Bulk exports are only visible to the user who requested them.
+        allowed = job.requested_by_id == request.user.id
+    else:
+        allowed = job.assay.is_accessible_by(request.user, perm_prefix="view")
+    if not allowed:
+        from django.core.exceptions import PermissionDenied
+
+        raise PermissionDenied("You do not have permission to access this export.")
+    return job
+
+
+@login_required(login_url="/login/")
+@require_GET
+def export_job_status(request: HttpRequest, job_id: uuid.UUID) -> JsonResponse:
+    """Return the status of an export job (and its download URL once done)."""
+    job = _get_export_job_for_user(request, job_id)
+    return JsonResponse(export_job_payload(job))
+
+
+@login_required(login_url="/login/")
+@require_GET
+def export_job_download(
+    request: HttpRequest, job_id: uuid.UUID
+) -> FileResponse | JsonResponse:
+    """Stream a finished export job's artifact from storage."""
+    job = _get_export_job_for_user(request, job_id)
+    if job.status != ExportJob.Status.DONE:
+        return JsonResponse(export_job_payload(job), status=409)
+    try:
+        artifact = default_storage.open(job.artifact_key, "rb")
+    except (FileNotFoundError, OSError):
+        # Superseded cache artifacts are pruned; the client can start a new job.
+        logger.info("Export artifact %s for job %s is gone.", job.artifact_key, job.id)
+        return JsonResponse(
+            {"error": "This export has expired. Please export again."}, status=410
+        )
+    return FileResponse(
+        artifact,
+        as_attachment=True,
+        filename=job.file_name,
+        content_type=export_job_mime_type(job),
+    )
+
+
 @login_required(login_url="/login/")
 @require_POST
 def assay_time_sync(request: HttpRequest, assay_id: int) -> JsonResponse:
     """Sync a user's accumulated active time for an assay to the server.
 
-    Upserts one ``AssayTimeLog`` row per (user, assay) pair, keeping the
-    stored value monotonic — the server will never decrease the recorded
-    seconds even if the client sends a smaller number (e.g. after storage
-    was cleared).  Returns the aggregate total across all collaborators;
-    this is used by ``AssayAnswerForm`` to capture ``completion_time_seconds``
-    when all answers are accepted.
+    Raises the (user, assay) ``AssayTimeLog`` row with one conditional update
+    (see :mod:`toxtempass.time_tracking`), keeping the stored value monotonic —
+    the server will never decrease the recorded seconds even if the client
+    sends a smaller number (e.g. after storage was cleared).  Returns the
+    aggregate total across all collaborators; this is used by
+    ``AssayAnswerForm`` to capture ``completion_time_seconds`` when all answers
+    are accepted.
 
     POST body: ``seconds=<non-negative integer>``
     """
@@ -2503,20 +2724,7 @@ def assay_time_sync(request: HttpRequest, assay_id: int) -> JsonResponse:
     except (ValueError, TypeError):
         return JsonResponse({"success": False, "error": "Invalid seconds value"}, status=400)
 
-    # Keep server-side value monotonic: never regress the recorded total.
-    existing = AssayTimeLog.objects.filter(user=request.user, assay=assay).first()
-    effective_seconds = max(seconds, existing.seconds if existing else 0)
-    if existing:
-        if existing.seconds != effective_seconds:
-            existing.seconds = effective_seconds
-            existing.save(update_fields=["seconds"])
-    else:
-        AssayTimeLog.objects.create(user=request.user, assay=assay, seconds=effective_seconds)
-
-    total: int = (
-        AssayTimeLog.objects.filter(assay=assay).aggregate(total=Sum("seconds"))["total"]
-        or 0
-    )
+    total = record_active_seconds(assay.id, request.user.id, seconds)
     return JsonResponse({"success": True, "total_seconds": total})
 
 
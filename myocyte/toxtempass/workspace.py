@@ -7,8 +7,10 @@ logic.
 """
 
 import logging
+import time
 
 from django.contrib.auth.decorators import login_required
+from django.core.cache import cache
 from django.core.exceptions import PermissionDenied
 from django.db import transaction
 from django.http import HttpRequest, HttpResponseRedirect
@@ -17,6 +19,7 @@ from django.shortcuts import get_object_or_404, redirect
 from django.views.decorators.http import require_POST
 from guardian.shortcuts import assign_perm, remove_perm
 
+from toxtempass import config
 from toxtempass.forms import (
     WorkspaceForm,
     WorkspaceInvestigationForm,
@@ -34,19 +37,38 @@ from toxtempass.models import (
 logger = logging.getLogger(__name__)
 
 
-@login_required(login_url="/login/")
-def get_workspace_list(request: HttpRequest) -> dict:
-    """List all workspaces the user is a member of."""
+_GENERATION_KEY = "workspaces:generation"
+_SNAPSHOT_KEY = "workspaces:snapshot:{generation}:{user_id}"
+
+
+def invalidate_workspace_cache() -> None:
+    """Invalidate every user's cached workspace snapshot.
+
+    Bumps a shared generation counter now and again once the current
+    transaction commits, so a snapshot re-cached from pre-commit data in the
+    meantime is discarded too. Workspace mutations are rare enough that a
+    global bump is cheaper than working out which members are affected.
+    """
+
+    def _bump() -> None:
+        try:
+            cache.incr(_GENERATION_KEY)
+        except ValueError:
+            cache.set(_GENERATION_KEY, time.time_ns(), None)
+
+    _bump()
+    transaction.on_commit(_bump)
+
+
+def _build_workspace_snapshot(user: Person) -> dict:
     # memberships holds WorkspaceMember rows for the current user so we can
     # present workspaces the user belongs to even when they are not the owner.
-    memberships = WorkspaceMember.objects.filter(user=request.user).select_related(
+    memberships = WorkspaceMember.objects.filter(user=user).select_related(
         "workspace", "workspace__owner"
     )
 
     # Workspaces owned by the user
-    owned_workspaces = list(
-        Workspace.objects.filter(owner=request.user).order_by("-created_at")
-    )
+    owned_workspaces = list(Workspace.objects.filter(owner=user).order_by("-created_at"))
     # Ensure owned workspaces have a role attribute so template logic can be unified
     for ws in owned_workspaces:
         setattr(ws, "current_user_role", WorkspaceRole.OWNER)
@@ -56,7 +78,7 @@ def get_workspace_list(request: HttpRequest) -> dict:
     for m in memberships:
         ws = m.workspace
         # skip owned ones (already included)
-        if ws.owner_id == request.user.id:
+        if ws.owner_id == user.id:
             continue
         # attach the current user's role for template checks (owner/admin/member)
         setattr(ws, "current_user_role", m.role)
@@ -64,7 +86,7 @@ def get_workspace_list(request: HttpRequest) -> dict:
 
     # Only show investigations owned by the current user in the Add modal to avoid allowing
     # users to share investigations they do not own via the UI. Server-side check will also enforce ownership.
-    owned_investigations = Investigation.objects.filter(owner=request.user)
+    owned_investigations = list(Investigation.objects.filter(owner=user))
 
     return {
         "owned_workspaces": owned_workspaces,
@@ -73,6 +95,36 @@ def get_workspace_list(request: HttpRequest) -> dict:
     }
 
 
+def get_workspace_snapshot(request: HttpRequest) -> dict:
+    """Return the user's workspace lists, computed at most once per request.
+
+    The result is memoised on ``request`` and cached across requests under the
+    current workspace generation (see :func:`invalidate_workspace_cache`).
+    The context processor and views share the same snapshot.
+    """
+    snapshot = getattr(request, "_workspace_snapshot", None)
+    if snapshot is not None:
+        return snapshot
+
+    generation = cache.get(_GENERATION_KEY)
+    if generation is None:
+        cache.add(_GENERATION_KEY, time.time_ns(), None)
+        generation = cache.get(_GENERATION_KEY)
+    key = _SNAPSHOT_KEY.format(generation=generation, user_id=request.user.id)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = _build_workspace_snapshot(request.user)
+        cache.set(key, snapshot, config.workspace_cache_timeout_seconds)
+    request._workspace_snapshot = snapshot
+    return snapshot
+
+
+@login_required(login_url="/login/")
+def get_workspace_list(request: HttpRequest) -> dict:
+    """List all workspaces the user is a member of."""
+    return dict(get_workspace_snapshot(request))
+
+
 @login_required(login_url="/login/")
 def create_or_update_workspace(
     request: HttpRequest, pk: int | None = None
@@ -99,6 +151,7 @@ def create_or_update_workspace(
             # update the DOM without a full page reload. The JS expects a
             # URL matching /workspace/<pk>/ so return that form (it does not
             # need to be a real routable view — it's only used to extract pk).
+            invalidate_workspace_cache()
             redirect_url = f"/workspace/{grp.pk}/"
             return JsonResponse(
                 {
@@ -231,6 +284,7 @@ def delete_workspace(request: HttpRequest, pk: int) -> HttpResponseRedirect:
                         raise
 
         workspace.delete()
+        invalidate_workspace_cache()
     return redirect("overview")
 
 
@@ -284,6 +338,7 @@ def add_workspace_member(request: HttpRequest, pk: int) -> JsonResponse:
                 ).select_related("investigation")
                 for winv in shared_invs:
                     assign_perm("view_investigation", user, winv.investigation)
+                invalidate_workspace_cache()
         except Exception:
             return JsonResponse(
                 {
@@ -354,6 +409,7 @@ def add_workspace_member_by_email(request: HttpRequest, pk: int) -> JsonResponse
             ).select_related("investigation")
             for winv in shared_invs:
                 assign_perm("view_investigation", user, winv.investigation)
+            invalidate_workspace_cache()
     except Exception:
         logger.exception(
             "Failed to add workspace member %s to workspace %s with investigation permissions",
@@ -429,6 +485,7 @@ def remove_workspace_member(request: HttpRequest, pk: int, user_id: int) -> Json
                 )
 
             member_to_remove.delete()
+            invalidate_workspace_cache()
     except Exception:
         logger.exception(
             "Failed while revoking workspace-based permissions for removed member %s",
@@ -521,6 +578,7 @@ def remove_workspace_member_by_email(request: HttpRequest, pk: int) -> JsonRespo
                 remove_perm("view_investigation", user, winv.investigation)
 
             gm.delete()
+            invalidate_workspace_cache()
     except Exception:
         logger.exception(
             "Failed while revoking workspace-based permissions for removed member %s; membership was not deleted",
@@ -605,6 +663,7 @@ def add_workspace_assay(request: HttpRequest, pk: int) -> JsonResponse:
             members = WorkspaceMember.objects.filter(workspace=workspace).select_related("user")
             for member in members:
                 assign_perm("view_investigation", member.user, investigation)
+            invalidate_workspace_cache()
     except Exception:
         logger.exception(
             "Failed to share investigation %s with workspace %s",
@@ -656,6 +715,7 @@ def remove_workspace_assay(request: HttpRequest, pk: int, assay_id: int) -> Json
 
     with transaction.atomic():
         workspace_inv.delete()
+        invalidate_workspace_cache()
 
         # Revoke view_investigation perm from each member, but only if they do not
         # retain access to the same investigation via another workspace.
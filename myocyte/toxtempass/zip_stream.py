@@ -0,0 +1,73 @@
+"""Write ZIP archives as a stream of chunks instead of one in-memory blob.
+
+:func:`stream_zip` drives :class:`zipfile.ZipFile` over a write-only sink and
+yields whatever the archive has written after every member chunk, so a
+``StreamingHttpResponse`` can send the archive while later members are still
+being produced. Only the member currently being written is held in memory.
+"""
+
+import time
+import zipfile
+from collections.abc import Iterable, Iterator
+
+ZipEntry = tuple[str, bytes | Iterable[bytes]]
+
+
+class _ChunkSink:
+    """Write-only file object whose contents are drained by the generator.
+
+    It deliberately has no ``tell``/``seek``, so ``zipfile`` treats it as an
+    unseekable stream and writes data descriptors instead of seeking back.
+    """
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip(
+    entries: Iterable[ZipEntry], compression: int = zipfile.ZIP_DEFLATED
+) -> Iterator[bytes]:
+    """Yield a ZIP archive of *entries* chunk by chunk.
+
+    Args:
+        entries: ``(archive name, content)`` pairs, consumed lazily. Content is
+            either ``bytes`` or an iterable of ``bytes`` chunks (e.g. a file
+            read from storage piece by piece).
+        compression: ``zipfile`` compression method for every member.
+
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w", compression=compression) as archive:
+        for name, content in entries:
+            info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+            info.compress_type = compression
+            chunks: Iterable[bytes]
+            if isinstance(content, bytes):
+                info.file_size = len(content)
+                chunks = (content,)
+            else:
+                chunks = content
+            with archive.open(info, "w") as member:
+                for chunk in chunks:
+                    member.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            data = sink.drain()
+            if data:
+                yield data
+    data = sink.drain()
+    if data:
+        yield data